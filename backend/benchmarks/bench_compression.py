@@ -0,0 +1,159 @@
+"""
+Benchmark kompresi response: ukuran di jaringan dan estimasi latensi.
+
+Payload menyerupai GET /api/mahasiswa (1000 baris) dan GET /api/akademik/krs.
+Untuk tiap encoding diukur waktu kompresi di server (median), ukuran body,
+lalu estimasi waktu transfer pada beberapa profil jaringan klien kampus
+(RTT + TCP slow start + bandwidth). Baris terakhir mengukur round-trip
+penuh melalui CompressionMiddleware dengan ASGI client.
+
+Jalankan dari folder backend:
+    python benchmarks/bench_compression.py [--rows 1000] [--repeat 20]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "siakad_bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import server  # noqa: E402
+
+# (nama, bandwidth Mbps, RTT ms)
+LINK_PROFILES = [
+    ("3G / sinyal lemah", 1.5, 200),
+    ("4G kampus", 8, 80),
+    ("WiFi kampus", 30, 20),
+    ("LAN", 100, 2),
+]
+TCP_MSS = 1460
+TCP_INITIAL_CWND = 10
+
+
+def build_mahasiswa_payload(rows: int) -> bytes:
+    prodi = [("Teknik Informatika", str(uuid.uuid4())), ("Sistem Informasi", str(uuid.uuid4()))]
+    data = []
+    for i in range(rows):
+        prodi_nama, prodi_id = prodi[i % len(prodi)]
+        data.append({
+            "id": str(uuid.uuid4()),
+            "user_id": str(uuid.uuid4()),
+            "nim": f"2024{i:06d}",
+            "nama": f"Mahasiswa {i}",
+            "email": f"mhs{i}@siakad.ac.id",
+            "prodi_id": prodi_id,
+            "prodi_nama": prodi_nama,
+            "tahun_masuk": "2024",
+            "status": "aktif",
+            "jenis_kelamin": "L" if i % 2 else "P",
+            "tempat_lahir": "Bandung",
+            "tanggal_lahir": "2005-01-01",
+            "alamat": f"Jl. Contoh No. {i}",
+            "no_hp": f"0812{i:08d}",
+            "dosen_pa_id": None,
+            "dosen_pa_nama": None,
+        })
+    return json.dumps(data).encode()
+
+
+def build_krs_payload(rows: int) -> bytes:
+    kelas_ids = [str(uuid.uuid4()) for _ in range(40)]
+    data = [{
+        "id": str(uuid.uuid4()),
+        "mahasiswa_id": str(uuid.uuid4()),
+        "kelas_id": kelas_ids[i % len(kelas_ids)],
+        "tahun_akademik_id": "ta-2024-ganjil",
+        "status": "approved",
+        "mahasiswa_nama": f"Mahasiswa {i // 6}",
+        "mahasiswa_nim": f"2024{i // 6:06d}",
+        "kelas_nama": f"Kelas {chr(65 + i % 4)}",
+        "mata_kuliah_nama": "Algoritma dan Struktur Data",
+        "sks": 3,
+        "created_at": "2024-08-20T03:15:00+00:00",
+    } for i in range(rows * 6)]
+    return json.dumps(data).encode()
+
+
+def transfer_time_ms(size: int, mbps: float, rtt_ms: float) -> float:
+    """Estimated time to last byte: request RTT + slow start rounds + serialisation"""
+    segments = math.ceil(size / TCP_MSS)
+    rounds = math.ceil(math.log2(segments / TCP_INITIAL_CWND + 1)) if segments > TCP_INITIAL_CWND else 0
+    return rtt_ms + rounds * rtt_ms + size * 8 / (mbps * 1000)
+
+
+def time_compress(encoding: str, body: bytes, repeat: int) -> tuple:
+    timings = []
+    compressed = body
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compressed = server.compress_body(encoding, body)
+        timings.append((time.perf_counter() - start) * 1000)
+    return compressed, statistics.median(timings)
+
+
+def report_payload(name: str, body: bytes, repeat: int):
+    print(f"\n== {name}: {len(body) / 1024:.1f} KB JSON ==")
+    header = f"{'encoding':<10}{'ukuran':>10}{'rasio':>8}{'kompres':>10}"
+    header += "".join(f"{p[0]:>20}" for p in LINK_PROFILES)
+    print(header)
+
+    results = [("identity", body, 0.0)]
+    for encoding in server.AVAILABLE_ENCODINGS:
+        compressed, ms = time_compress(encoding, body, repeat)
+        results.append((encoding, compressed, ms))
+
+    for encoding, data, ms in results:
+        line = f"{encoding:<10}{len(data) / 1024:>8.1f}KB{len(body) / len(data):>7.1f}x{ms:>8.2f}ms"
+        for _, mbps, rtt in LINK_PROFILES:
+            line += f"{ms + transfer_time_ms(len(data), mbps, rtt):>18.0f}ms"
+        print(line)
+
+
+async def report_middleware(body: bytes, repeat: int):
+    """End-to-end latency through CompressionMiddleware (no network)"""
+    payload = json.loads(body)
+    app = FastAPI()
+
+    @app.get("/data")
+    async def data():
+        return payload
+
+    app.add_middleware(server.CompressionMiddleware)
+    print(f"\n== ASGI round-trip melalui CompressionMiddleware ({len(body) / 1024:.1f} KB) ==")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for encoding in ["identity"] + server.AVAILABLE_ENCODINGS:
+            timings = []
+            wire = 0
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = await client.get("/data", headers={"Accept-Encoding": encoding})
+                timings.append((time.perf_counter() - start) * 1000)
+                wire = int(response.headers.get("content-length", len(response.content)))
+            print(f"{encoding:<10}{wire / 1024:>8.1f}KB  median {statistics.median(timings):.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    mahasiswa = build_mahasiswa_payload(args.rows)
+    report_payload("GET /api/mahasiswa", mahasiswa, args.repeat)
+    report_payload("GET /api/akademik/krs", build_krs_payload(args.rows), args.repeat)
+    asyncio.run(report_middleware(mahasiswa, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
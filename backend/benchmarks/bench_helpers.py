@@ -0,0 +1,231 @@
+"""
+Micro-benchmark helper murni-Python yang dipanggil per baris (pytest-benchmark).
+
+Ukuran batch mengikuti beban nyata satu semester: nilai seluruh KRS satu
+fakultas, pengecekan bentrok jadwal, jadwal mingguan per mahasiswa, dan
+pembangunan model response per baris untuk list endpoint.
+
+Jalankan dari folder backend:
+    pytest benchmarks/bench_helpers.py --benchmark-only
+
+Baseline tersimpan di benchmarks/baselines/<mesin>/. Membandingkan dengan
+baseline dan gagal bila median melambat lebih dari 15%:
+    pytest benchmarks/bench_helpers.py --benchmark-only \\
+        --benchmark-storage=benchmarks/baselines \\
+        --benchmark-compare=0001 --benchmark-compare-fail=median:15%
+Menyimpan baseline baru (setelah optimasi yang disengaja):
+    pytest benchmarks/bench_helpers.py --benchmark-only \\
+        --benchmark-storage=benchmarks/baselines --benchmark-save=baseline
+"""
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "siakad_bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+from bench_serialization import kelas_rows, krs_rows, mahasiswa_rows, tagihan_rows  # noqa: E402
+
+NILAI_BATCH = 10000  # KRS disetujui satu fakultas per semester
+TIME_BATCH = 10000
+OVERLAP_KELAS = 150  # kelas aktif per hari di satu gedung -> ~11k pasangan
+JADWAL_STUDENTS = 1000
+JADWAL_ROWS = 10  # kelas per mahasiswa per minggu
+AUDIT_KELAS = 3000
+AUDIT_RUANGAN = 120
+AUDIT_DOSEN = 600
+AUDIT_MAHASISWA = 10000
+SOLVER_KELAS = 2000
+SOLVER_RUANGAN = 130  # ~80% terisi pada jam 07:00-17:00, Senin-Jumat
+UJIAN_MATA_KULIAH = 400
+UJIAN_HARI = 10  # dua minggu ujian, tiga sesi per hari
+ROWS_PER_RESPONSE = 1000
+
+HARI = list(server.DAY_ORDER)[:6]
+
+
+def random_time(rng: random.Random, start_hour: int = 7, end_hour: int = 18) -> str:
+    return f"{rng.randint(start_hour, end_hour - 1):02d}:{rng.choice((0, 10, 20, 30, 40, 50)):02d}"
+
+
+def random_slot(rng: random.Random) -> tuple:
+    start = server.parse_time(random_time(rng, 7, 16))
+    end = start + rng.choice((50, 100, 150))
+    return f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}"
+
+
+@pytest.fixture(scope="module")
+def rng():
+    return random.Random(2024)
+
+
+# ----- Nilai -----
+
+@pytest.mark.benchmark(group="nilai")
+def test_calculate_nilai(benchmark, rng):
+    scores = [(rng.uniform(40, 100), rng.uniform(40, 100), rng.uniform(40, 100)) for _ in range(NILAI_BATCH)]
+
+    def run():
+        for tugas, uts, uas in scores:
+            server.calculate_nilai(tugas, uts, uas)
+
+    benchmark(run)
+
+
+# ----- Jadwal -----
+
+@pytest.mark.benchmark(group="jadwal")
+def test_parse_time(benchmark, rng):
+    times = [random_time(rng) for _ in range(TIME_BATCH)]
+
+    def run():
+        for t in times:
+            server.parse_time(t)
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="jadwal")
+def test_check_time_overlap_pairwise(benchmark, rng):
+    """Every pair of classes on one day, as a naive conflict scan would do"""
+    slots = [random_slot(rng) for _ in range(OVERLAP_KELAS)]
+
+    def run():
+        conflicts = 0
+        for i, (s1, e1) in enumerate(slots):
+            for s2, e2 in slots[i + 1:]:
+                conflicts += server.check_time_overlap(s1, e1, s2, e2)
+        return conflicts
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="jadwal")
+def test_sort_jadwal(benchmark, rng):
+    """Day-order sort of get_my_jadwal for a batch of students"""
+    weeks = []
+    for _ in range(JADWAL_STUDENTS):
+        rows = []
+        for _ in range(JADWAL_ROWS):
+            jam_mulai, jam_selesai = random_slot(rng)
+            rows.append({"hari": rng.choice(HARI), "jam_mulai": jam_mulai, "jam_selesai": jam_selesai})
+        weeks.append(rows)
+
+    def setup():
+        # sort_jadwal bekerja in-place: setiap round mendapat salinan yang belum urut
+        return ([list(rows) for rows in weeks],), {}
+
+    def run(batch):
+        for rows in batch:
+            server.sort_jadwal(rows)
+
+    benchmark.pedantic(run, setup=setup, rounds=50)
+
+
+@pytest.mark.benchmark(group="jadwal")
+def test_audit_jadwal(benchmark, rng):
+    """Sweep-line audit of a whole semester (rooms, dosen, approved KRS)"""
+    kelas_list = []
+    for i in range(AUDIT_KELAS):
+        jam_mulai, jam_selesai = random_slot(rng)
+        kelas_list.append({
+            "id": f"kelas-{i}", "kode_kelas": f"K{i}", "mata_kuliah_id": f"mk-{i}",
+            "dosen_id": f"dosen-{rng.randrange(AUDIT_DOSEN)}", "ruangan": f"R{rng.randrange(AUDIT_RUANGAN)}",
+            "hari": rng.choice(HARI), "jam_mulai": jam_mulai, "jam_selesai": jam_selesai,
+            "menit_mulai": server.parse_time(jam_mulai), "menit_selesai": server.parse_time(jam_selesai),
+        })
+    krs_rows = [
+        {"mahasiswa_id": f"mhs-{m}", "kelas_id": f"kelas-{rng.randrange(AUDIT_KELAS)}"}
+        for m in range(AUDIT_MAHASISWA) for _ in range(JADWAL_ROWS)
+    ]
+
+    benchmark(lambda: server.audit_jadwal(server.JadwalOccupancy(kelas_list), krs_rows))
+
+
+@pytest.mark.benchmark(group="jadwal-solver")
+def test_solve_jadwal(benchmark, rng):
+    """One solver attempt (one worker process) for a whole semester"""
+    problem = {
+        "kelas": [
+            {"id": f"kelas-{i}", "dosen_id": f"dosen-{rng.randrange(AUDIT_DOSEN)}",
+             "kuota": rng.choice((30, 40, 40, 50, 60, 80, 120)), "durasi": rng.choice((2, 2, 3, 3, 3, 4)) * 50}
+            for i in range(SOLVER_KELAS)
+        ],
+        "ruangan": [{"nama": f"R{r}", "kapasitas": rng.choice((40, 40, 50, 60, 80, 100, 150))} for r in range(SOLVER_RUANGAN)],
+        "hari": HARI[:5],
+        "window": (7 * 60, 17 * 60),
+        "langkah": 30,
+        "room_busy": {},
+        "dosen_busy": {},
+        "max_repair": server.JADWAL_SOLVER_MAX_REPAIR,
+    }
+
+    result = benchmark.pedantic(server.solve_jadwal, args=(problem, 0), rounds=5)
+    assert not result["unassigned"]
+
+
+@pytest.mark.benchmark(group="jadwal-ujian")
+def test_schedule_exams(benchmark, rng):
+    """Conflict graph and DSatur colouring of a semester's UTS from approved KRS"""
+    # Tiga kelas paralel per mata kuliah. Mahasiswa mengambil 7 dari 8 mata kuliah
+    # angkatannya (45 angkatan) dan satu pilihan dari 8 mata kuliah fakultasnya
+    kelas_mk = {f"kelas-{i}": f"mk-{i // 3}" for i in range(UJIAN_MATA_KULIAH * 3)}
+    krs_rows = []
+    for m in range(AUDIT_MAHASISWA):
+        angkatan = m % 45
+        courses = [angkatan * 8 + j for j in rng.sample(range(8), 7)] + [360 + angkatan % 5 * 8 + rng.randrange(8)]
+        krs_rows += [{"mahasiswa_id": f"mhs-{m}", "kelas_id": f"kelas-{mk * 3 + rng.randrange(3)}"} for mk in courses]
+    slots = [(f"hari-{d}", sesi) for d in range(UJIAN_HARI) for sesi in ("08:00", "10:30", "13:30")]
+    rooms = [{"nama": f"R{r}", "kapasitas": rng.choice((40, 40, 50, 60, 80, 100, 150))} for r in range(SOLVER_RUANGAN)]
+
+    def run():
+        peserta, adjacency = server.exam_conflict_graph(krs_rows, kelas_mk)
+        return server.schedule_exams({mk: len(ids) for mk, ids in peserta.items()}, adjacency, slots, rooms)
+
+    result = benchmark.pedantic(run, rounds=5)
+    assert not result["unassigned"]
+
+
+# ----- Response model builders -----
+
+RESPONSE_CASES = [
+    ("MahasiswaResponse", server.MahasiswaResponse, mahasiswa_rows),
+    ("KRSResponse", server.KRSResponse, krs_rows),
+    ("TagihanUKTResponse", server.TagihanUKTResponse, tagihan_rows),
+    ("KelasResponse", server.KelasResponse, kelas_rows),
+]
+
+
+def rekap_presensi_rows(n: int) -> list:
+    return [{
+        "mahasiswa_id": f"mhs-{i}", "mahasiswa_nama": f"Mahasiswa {i}", "mahasiswa_nim": f"2024{i:06d}",
+        "hadir": 12, "izin": 1, "sakit": 1, "alpha": 0, "total_pertemuan": 14, "persentase_kehadiran": 85.7,
+    } for i in range(n)]
+
+
+@pytest.mark.benchmark(group="response-model")
+@pytest.mark.parametrize("name,model,build_rows", RESPONSE_CASES, ids=[c[0] for c in RESPONSE_CASES])
+def test_model_per_row(benchmark, name, model, build_rows):
+    """Validated construction, as handlers did before trusted_list_response"""
+    rows = build_rows(ROWS_PER_RESPONSE)
+    benchmark(lambda: [model(**row) for row in rows])
+
+
+@pytest.mark.benchmark(group="response-model")
+@pytest.mark.parametrize("name,model,build_rows", RESPONSE_CASES, ids=[c[0] for c in RESPONSE_CASES])
+def test_project_rows(benchmark, name, model, build_rows):
+    """Projection used by trusted_list_response (no validation)"""
+    rows = build_rows(ROWS_PER_RESPONSE)
+    benchmark(server.project_rows, model, rows)
+
+
+@pytest.mark.benchmark(group="response-model")
+def test_rekap_presensi_model(benchmark):
+    """get_rekap_presensi still builds one RekapPresensiResponse per student"""
+    rows = rekap_presensi_rows(ROWS_PER_RESPONSE)
+    benchmark(lambda: [server.RekapPresensiResponse(**row) for row in rows])
@@ -0,0 +1,130 @@
+"""
+Micro-benchmark serialisasi list endpoint: jalur lama vs trusted_list_response.
+
+Jalur lama: model Pydantic dibangun per baris di handler, FastAPI lalu
+memvalidasi ulang terhadap response_model, dump ke dict, dan json.dumps
+(stdlib). Jalur baru: baris diproyeksikan ke field model lalu di-encode
+orjson, tanpa validasi. Sebagai pembanding ikut diukur model_construct +
+TypeAdapter.dump_json.
+
+Jalankan dari folder backend:
+    python benchmarks/bench_serialization.py [--repeat 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import List
+
+from pydantic import TypeAdapter
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "siakad_bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import server  # noqa: E402
+
+
+def mahasiswa_rows(n: int) -> List[dict]:
+    return [{
+        "id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()), "nim": f"2024{i:06d}",
+        "nama": f"Mahasiswa {i}", "email": f"mhs{i}@siakad.ac.id", "prodi_id": "prodi-ti",
+        "tahun_masuk": "2024", "status": "aktif", "jenis_kelamin": "L", "tempat_lahir": "Bandung",
+        "tanggal_lahir": "2005-01-01", "alamat": f"Jl. Contoh No. {i}", "no_hp": "081200000000",
+        "dosen_pa_id": None, "prodi_nama": "Teknik Informatika", "dosen_pa_nama": None,
+        "created_at": "2024-08-01T00:00:00+00:00",
+    } for i in range(n)]
+
+
+def krs_rows(n: int) -> List[dict]:
+    return [{
+        "id": str(uuid.uuid4()), "mahasiswa_id": str(uuid.uuid4()), "kelas_id": str(uuid.uuid4()),
+        "tahun_akademik_id": "ta-2024-ganjil", "status": "disetujui", "mata_kuliah_nama": "Basis Data",
+        "kode_mk": "IF201", "sks": 3, "dosen_nama": "Dr. Dosen", "jadwal": "Senin 08:00-10:30",
+        "mahasiswa_nim": f"2024{i:06d}", "mahasiswa_nama": f"Mahasiswa {i}",
+    } for i in range(n)]
+
+
+def tagihan_rows(n: int) -> List[dict]:
+    return [{
+        "id": str(uuid.uuid4()), "mahasiswa_id": str(uuid.uuid4()), "tahun_akademik_id": "ta-2024-ganjil",
+        "kategori_ukt_id": "ukt-3", "nominal": 3500000, "jatuh_tempo": "2024-09-30", "status": "cicilan",
+        "mahasiswa_nim": f"2024{i:06d}", "mahasiswa_nama": f"Mahasiswa {i}", "prodi_nama": "Teknik Informatika",
+        "tahun_akademik_label": "2024/2025 - ganjil", "kategori_nama": "UKT 3", "total_dibayar": 1000000,
+        "sisa_tagihan": 2500000, "created_at": "2024-08-01T00:00:00+00:00",
+    } for i in range(n)]
+
+
+def kelas_rows(n: int) -> List[dict]:
+    return [{
+        "id": str(uuid.uuid4()), "kode_kelas": f"K{i}", "mata_kuliah_id": str(uuid.uuid4()),
+        "dosen_id": str(uuid.uuid4()), "tahun_akademik_id": "ta-2024-ganjil", "kuota": 40,
+        "jadwal": None, "ruangan": "R101", "mata_kuliah_nama": "Basis Data", "dosen_nama": "Dr. Dosen",
+        "jumlah_peserta": 35,
+    } for i in range(n)]
+
+
+ENDPOINTS = [
+    ("GET /master/mahasiswa", server.MahasiswaResponse, mahasiswa_rows, 1000),
+    ("GET /akademik/krs", server.KRSResponse, krs_rows, 1000),
+    ("GET /keuangan/tagihan", server.TagihanUKTResponse, tagihan_rows, 1000),
+    ("GET /akademik/kelas", server.KelasResponse, kelas_rows, 500),
+]
+
+
+def before(model, rows) -> bytes:
+    """Handler builds models, FastAPI re-validates and encodes with json.dumps"""
+    field = create_response_field(name="response", type_=List[model])
+    items = [model(**row) for row in rows]
+    content = asyncio.run(serialize_response(field=field, response_content=items, is_coroutine=True))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def construct(model, rows) -> bytes:
+    """Alternative: model_construct (no validation) + pydantic-core dump_json"""
+    items = [model.model_construct(**row) for row in rows]
+    return TypeAdapter(List[model]).dump_json(items, warnings=False)
+
+
+def after(model, rows) -> bytes:
+    return server.trusted_list_response(model, rows).body
+
+
+def measure(fn, model, rows, repeat: int) -> float:
+    fn(model, rows)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(model, rows)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<26}{'baris':>7}{'sebelum':>12}{'construct':>12}{'sesudah':>12}{'speedup':>10}")
+    for name, model, build_rows, n in ENDPOINTS:
+        rows = build_rows(n)
+        assert json.loads(before(model, rows)) == json.loads(after(model, rows)), name
+        t_before = measure(before, model, rows, args.repeat)
+        t_construct = measure(construct, model, rows, args.repeat)
+        t_after = measure(after, model, rows, args.repeat)
+        print(
+            f"{name:<26}{n:>7}{t_before:>10.2f}ms{t_construct:>10.2f}ms"
+            f"{t_after:>10.2f}ms{t_before / t_after:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
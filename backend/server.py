@@ -1,27 +1,366 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Request, Response, Query
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
+import re
+import stat as stat_lib
+import time
+import asyncio
+import mimetypes
 import logging
 from pathlib import Path
+from functools import lru_cache
+from bisect import bisect_left
+from heapq import heapify, heappop, heappush
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple, Union, get_args, get_origin
 import uuid
+import secrets
 from datetime import datetime, timezone, timedelta
+from zoneinfo import ZoneInfo
+from email.utils import formatdate, parsedate_to_datetime
 import bcrypt
 import jwt
 import aiofiles
+import aiofiles.os
+import hashlib
+import csv
+import random
+import io
+import hmac
+import threading
+from contextvars import ContextVar
+import orjson
+import gzip
+import zlib
 import shutil
+import anyio
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps, features
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from pymongo import monitoring
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client import multiprocess
+
+# Encoder kompresi opsional; tanpa paket ini hanya gzip yang dipakai
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# ==================== METRICS ====================
+# Diekspos di GET /metrics (format Prometheus), hanya dengan Bearer
+# METRICS_TOKEN; tanpa token endpoint ini mati (404). Dengan beberapa worker,
+# set PROMETHEUS_MULTIPROC_DIR agar metrik semua worker digabung.
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+MONGO_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_REQUESTS = Counter(
+    "siakad_http_requests_total", "HTTP requests by route template and status",
+    ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "siakad_http_request_duration_seconds", "Time until the last response byte is sent",
+    ["method", "route"], buckets=HTTP_LATENCY_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    "siakad_http_requests_in_progress", "Requests currently being handled",
+    ["method"], multiprocess_mode="livesum"
+)
+MONGO_COMMANDS = Counter(
+    "siakad_mongodb_commands_total", "MongoDB commands by collection, command and outcome",
+    ["collection", "command", "outcome"]
+)
+MONGO_LATENCY = Histogram(
+    "siakad_mongodb_command_duration_seconds", "MongoDB command round-trip time",
+    ["collection", "command"], buckets=MONGO_LATENCY_BUCKETS
+)
+MONGO_POOL_WAIT = Histogram(
+    "siakad_mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=MONGO_LATENCY_BUCKETS
+)
+MONGO_POOL_CHECKOUT_FAILED = Counter(
+    "siakad_mongodb_pool_checkout_failed_total", "Failed connection checkouts", ["reason"]
+)
+CACHE_REQUESTS = Counter(
+    "siakad_cache_requests_total", "In-process cache lookups; hit ratio = hit / (hit + miss)",
+    ["cache", "result"]
+)
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+def command_collection(event: monitoring.CommandStartedEvent) -> str:
+    target = event.command.get(event.command_name)
+    if isinstance(target, str):
+        return target
+    # getMore menyimpan nama koleksi di field "collection"
+    return event.command.get("collection", "") if event.command_name == "getMore" else ""
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Counts and times every command; events fire on Motor's executor threads.
+    Motor runs them in a copy of the caller's context, so the request's
+    QueryAccount (see query_account) is visible here.
+    """
+    
+    def __init__(self):
+        # (connection_id, request_id) -> (collection, QueryAccount, shape key),
+        # karena event selesai tidak membawa command
+        self.pending: Dict[tuple, tuple] = {}
+    
+    def started(self, event):
+        collection = command_collection(event)
+        account = query_account.get()
+        key = None
+        if account is not None and collection and event.command_name not in CURSOR_CONTINUATION_COMMANDS:
+            key = account.start(collection, event)
+        self.pending[(event.connection_id, event.request_id)] = (collection, account, key)
+    
+    def succeeded(self, event):
+        self.record(event, "success")
+    
+    def failed(self, event):
+        self.record(event, "failure")
+    
+    def record(self, event, outcome: str):
+        collection, account, key = self.pending.pop((event.connection_id, event.request_id), ("", None, None))
+        MONGO_COMMANDS.labels(collection, event.command_name, outcome).inc()
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        if account is not None:
+            account.finish(key, event.duration_micros)
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Checkout wait time. Start and end of a checkout happen on the same
+    thread, so the start timestamp is kept thread-local.
+    """
+    
+    def __init__(self):
+        self.local = threading.local()
+    
+    def connection_check_out_started(self, event):
+        self.local.started = time.perf_counter()
+    
+    def connection_checked_out(self, event):
+        started = getattr(self.local, "started", None)
+        if started is not None:
+            MONGO_POOL_WAIT.observe(time.perf_counter() - started)
+            self.local.started = None
+    
+    def connection_check_out_failed(self, event):
+        self.local.started = None
+        MONGO_POOL_CHECKOUT_FAILED.labels(event.reason).inc()
+    
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_checked_in(self, event): pass
+
+class MetricsMiddleware:
+    """Per-route request count, latency and in-flight gauge"""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        status_code = 500
+        
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        start = time.perf_counter()
+        HTTP_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.labels(method).dec()
+            # Template route (bukan path asli) agar label tidak meledak per id
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.labels(method, route_path, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route_path).observe(time.perf_counter() - start)
+
+async def get_metrics(request: Request):
+    # Fail closed: tanpa METRICS_TOKEN trafik per route tidak diekspos ke siapa pun
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Token metrics tidak valid")
+    
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+# ==================== QUERY ACCOUNTING ====================
+# Setiap request menghitung command MongoDB-nya per (koleksi, command, bentuk
+# filter). Request yang melewati budget query/latensi di-log beserta rinciannya,
+# dan bentuk query yang berulang >= N_PLUS_ONE_THRESHOLD kali ditandai N+1.
+
+QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', '25'))
+LATENCY_BUDGET_MS = int(os.environ.get('LATENCY_BUDGET_MS', '500'))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', '10'))
+QUERY_DEBUG_HEADERS = os.environ.get('QUERY_DEBUG_HEADERS', '').lower() in ("1", "true", "yes")
+QUERY_BREAKDOWN_LIMIT = 10
+# Lanjutan cursor dari query yang sama: waktunya dihitung, jumlahnya tidak,
+# agar budget tidak bergantung pada jumlah baris (batch pertama 101 dokumen)
+CURSOR_CONTINUATION_COMMANDS = {"getMore", "killCursors"}
+
+HTTP_DB_QUERIES = Histogram(
+    "siakad_http_request_db_queries", "MongoDB commands issued per request",
+    ["method", "route"], buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000)
+)
+N_PLUS_ONE_DETECTED = Counter(
+    "siakad_n_plus_one_total", "Requests that repeated one query shape N_PLUS_ONE_THRESHOLD+ times",
+    ["route", "collection"]
+)
+
+def query_shape(value: Any) -> Any:
+    """Filter with every literal replaced by '?', keeping field names and operators"""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        return [query_shape(v) for v in value]
+    return "?"
+
+def command_filter_shape(event: monitoring.CommandStartedEvent) -> Any:
+    command = event.command
+    name = event.command_name
+    if name == "find":
+        return query_shape(command.get("filter", {}))
+    if name in ("count", "distinct", "findAndModify"):
+        return query_shape(command.get("query", {}))
+    if name == "aggregate":
+        # count_documents dan aggregate: bentuk $match + urutan stage
+        return [
+            {"$match": query_shape(stage["$match"])} if "$match" in stage else next(iter(stage), "")
+            for stage in command.get("pipeline", [])
+        ]
+    if name in ("update", "delete"):
+        statements = command.get(f"{name}s") or [{}]
+        return query_shape(statements[0].get("q", {}))
+    return None
+
+class QueryAccount:
+    """DB commands issued while handling one request"""
+    
+    def __init__(self):
+        # (collection, command, shape) -> [jumlah, total mikrodetik]
+        self.shapes: Dict[tuple, list] = {}
+        self.count = 0
+        self.duration_micros = 0
+        # asyncio.gather dalam handler -> event dari beberapa thread sekaligus
+        self.lock = threading.Lock()
+    
+    def start(self, collection: str, event: monitoring.CommandStartedEvent) -> tuple:
+        shape = orjson.dumps(command_filter_shape(event), option=orjson.OPT_SORT_KEYS).decode()
+        key = (collection, event.command_name, shape)
+        with self.lock:
+            self.shapes.setdefault(key, [0, 0])[0] += 1
+            self.count += 1
+        return key
+    
+    def finish(self, key: Optional[tuple], duration_micros: int):
+        with self.lock:
+            if key is not None:
+                self.shapes[key][1] += duration_micros
+            self.duration_micros += duration_micros
+    
+    def repeated_shapes(self) -> List[tuple]:
+        return [(key, n) for key, (n, _) in self.shapes.items() if n >= N_PLUS_ONE_THRESHOLD]
+    
+    def breakdown(self) -> str:
+        rows = sorted(self.shapes.items(), key=lambda item: item[1][0], reverse=True)
+        lines = [
+            f"  {n:>4}x {micros / 1000:>8.1f}ms  {collection}.{command} {shape}"
+            for (collection, command, shape), (n, micros) in rows[:QUERY_BREAKDOWN_LIMIT]
+        ]
+        if len(rows) > QUERY_BREAKDOWN_LIMIT:
+            lines.append(f"  ... {len(rows) - QUERY_BREAKDOWN_LIMIT} bentuk query lain")
+        return "\n".join(lines)
+
+query_account: ContextVar[Optional[QueryAccount]] = ContextVar("query_account", default=None)
+
+class QueryAccountingMiddleware:
+    """Log requests over QUERY_BUDGET / LATENCY_BUDGET_MS and N+1 query patterns"""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        account = QueryAccount()
+        token = query_account.set(account)
+        start = time.perf_counter()
+        
+        async def send_wrapper(message: Message):
+            if QUERY_DEBUG_HEADERS and message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(account.count)
+                headers["X-DB-Time-Ms"] = f"{account.duration_micros / 1000:.1f}"
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_account.reset(token)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.report(scope, account, elapsed_ms)
+    
+    def report(self, scope: Scope, account: QueryAccount, elapsed_ms: float):
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        HTTP_DB_QUERIES.labels(scope["method"], route).observe(account.count)
+        
+        request_line = f"{scope['method']} {route}"
+        repeated = account.repeated_shapes()
+        for (collection, command, shape), n in repeated:
+            N_PLUS_ONE_DETECTED.labels(route, collection).inc()
+            logger.warning("Pola N+1 di %s: %s.%s %s diulang %d kali", request_line, collection, command, shape, n)
+        
+        if account.count > QUERY_BUDGET or elapsed_ms > LATENCY_BUDGET_MS:
+            logger.warning(
+                "Budget request terlampaui: %s %d query (budget %d), %.0f ms (budget %d ms), DB %.1f ms\n%s",
+                request_line, account.count, QUERY_BUDGET, elapsed_ms, LATENCY_BUDGET_MS,
+                account.duration_micros / 1000, account.breakdown()
+            )
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMetrics(), MongoPoolMetrics()])
 db = client[os.environ['DB_NAME']]
 
 # JWT Configuration
@@ -30,7 +369,7 @@ JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
 # Create the main app
-app = FastAPI(title="SIAKAD API", version="1.0.0")
+app = FastAPI(title="SIAKAD API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Create routers
 api_router = APIRouter(prefix="/api")
@@ -41,10 +380,117 @@ mahasiswa_router = APIRouter(prefix="/mahasiswa", tags=["Mahasiswa"])
 dosen_router = APIRouter(prefix="/dosen", tags=["Dosen"])
 keuangan_router = APIRouter(prefix="/keuangan", tags=["Keuangan"])
 biodata_router = APIRouter(prefix="/biodata", tags=["Biodata"])
+kalender_router = APIRouter(prefix="/kalender", tags=["Kalender"])
+
+# File upload directory (dibuat saat startup, lihat startup_db)
+UPLOAD_ROOT = Path(__file__).parent / "uploads"
+UPLOAD_DIR = UPLOAD_ROOT / "biodata"
+UPLOAD_TMP_DIR = UPLOAD_ROOT / "tmp"
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB per read
+MAX_DOKUMEN_SIZE = 10 * 1024 * 1024  # KTP/KK/Akte
+MAX_FOTO_SIZE = 5 * 1024 * 1024
+
+# MIME type -> (magic bytes prefix, extension)
+IMAGE_UPLOAD_TYPES = {
+    "image/jpeg": (b"\xff\xd8\xff", ".jpg"),
+    "image/png": (b"\x89PNG\r\n\x1a\n", ".png"),
+    "image/webp": (b"RIFF", ".webp"),
+}
+DOKUMEN_UPLOAD_TYPES = {
+    **IMAGE_UPLOAD_TYPES,
+    "application/pdf": (b"%PDF-", ".pdf"),
+}
+UPLOAD_FORM_OVERHEAD = 64 * 1024  # boundary, header part dan field teks multipart
+# Batas body request per route upload. Starlette men-spool seluruh body multipart
+# sebelum handler jalan, jadi batas per file di save_upload_file saja terlambat.
+UPLOAD_BODY_LIMITS = {
+    "/api/auth/upload-foto-profil": MAX_FOTO_SIZE + UPLOAD_FORM_OVERHEAD,
+    "/api/mahasiswa/biodata/change-request": 3 * MAX_DOKUMEN_SIZE + UPLOAD_FORM_OVERHEAD,
+}
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized uploads before their body is spooled: by Content-Length
+    up front, and by counting received bytes for chunked requests.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = UPLOAD_BODY_LIMITS.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        detail = f"Ukuran upload melebihi batas {limit // (1024 * 1024)} MB"
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            await ORJSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Diteruskan FastAPI dari parser form sebagai response 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+# Varian gambar (thumbnail untuk daftar, preview untuk dialog review)
+IMAGE_VARIANT_SIZES = {"thumb": 160, "preview": 1024}
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_PROCESS_WORKERS = int(os.environ.get('IMAGE_PROCESS_WORKERS', '2'))
+
+# Solver jadwal: tiap percobaan (seed berbeda) berjalan di worker process
+JADWAL_SOLVER_WORKERS = int(os.environ.get('JADWAL_SOLVER_WORKERS', '2'))
+JADWAL_SOLVER_ATTEMPTS = int(os.environ.get('JADWAL_SOLVER_ATTEMPTS', '4'))
+JADWAL_SOLVER_MAX_REPAIR = 20000  # kandidat yang dicoba saat memindahkan kelas penghalang
+JADWAL_SOLVER_PREVIEW_HOURS = 24
+
+# Penyajian file upload (tmp tidak pernah disajikan)
+UPLOAD_SERVED_CATEGORIES = {"foto_profil", "biodata"}
+CONTENT_HASH_NAME = re.compile(r"^[0-9a-f]{64}(_[a-z]+)?\.[a-z0-9]+$")
+UPLOAD_ACCESS_CACHE_TTL = 300  # detik
+UPLOAD_ACCESS_CACHE_MAX = 10000
+# URL upload bertanda tangan berlaku sampai akhir jendela berikutnya (12-24 jam,
+# tidak lebih lama dari sesi) dan sama untuk semua response dalam satu jendela
+UPLOAD_URL_WINDOW_SECONDS = 12 * 3600
+BIODATA_DOKUMEN_FIELDS = ("dokumen_ktp", "dokumen_kk", "dokumen_akte")
+
+# Kompresi response (lihat CompressionMiddleware)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_THREAD_MIN_SIZE = 128 * 1024  # body sebesar ini dikompres di thread pool
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "application/xml", "image/svg+xml", "text/")
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # kualitas rendah-menengah: cepat untuk response dinamis
+ZSTD_LEVEL = 3
+
+# Payload /api/bootstrap
+BOOTSTRAP_COLLECTIONS = ("tahun_akademik", "fakultas", "prodi", "kategori_ukt")
+BOOTSTRAP_CACHE_MAX = 256
+
+# Cache response self-service mahasiswa (lihat get_student_cache)
+STUDENT_CACHE_TTL = int(os.environ.get('STUDENT_CACHE_TTL', '60'))  # detik
+STUDENT_CACHE_MAX_USERS = 20000
+# Koleksi bersama yang ikut menentukan isi view mahasiswa (lihat get_student_cache_version)
+STUDENT_CACHE_COLLECTIONS = ("kelas", "mata_kuliah", "jadwal_ujian", "tahun_akademik")
+
+# Feed iCalendar jadwal mahasiswa/dosen (lihat get_kalender_feed)
+KALENDER_CACHE_TTL = int(os.environ.get('KALENDER_CACHE_TTL', '300'))  # detik
+KALENDER_CACHE_MAX = 20000
+# Koleksi yang isinya masuk feed per role (nama dosen/mahasiswa ikut di judul dan deskripsi event)
+KALENDER_VERSION_COLLECTIONS = {
+    "mahasiswa": ("kelas", "krs", "mata_kuliah", "tahun_akademik", "dosen", "mahasiswa"),
+    "dosen": ("kelas", "mata_kuliah", "tahun_akademik", "dosen"),
+}
+KALENDER_TZID = os.environ.get('KALENDER_TZID', 'Asia/Jakarta')  # zona tanpa DST: WIB/WITA/WIT
 
-# File upload directory
-UPLOAD_DIR = Path(__file__).parent / "uploads" / "biodata"
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+MASTER_DATA_CACHE_CONTROL = "private, no-cache"
 
 security = HTTPBearer()
 
@@ -148,6 +594,7 @@ class FotoProfilChangeRequestResponse(BaseModel):
     prodi_nama: Optional[str] = None
     foto_lama: Optional[str] = None
     foto_baru: str
+    foto_baru_varian: Optional[Dict[str, str]] = None  # {"thumb": url, "preview": url}
     status: str = "pending"
     catatan_admin: Optional[str] = None
     reviewed_by: Optional[str] = None
@@ -228,6 +675,19 @@ class MataKuliahResponse(MataKuliahBase):
     id: str
     total_sks: int = 0
 
+# Ruangan
+class RuanganBase(BaseModel):
+    nama: str  # nilai yang disimpan di kelas.ruangan, e.g. "R.301"
+    gedung: Optional[str] = None
+    kapasitas: int = 40
+    fasilitas: List[str] = []  # e.g. ["proyektor", "lab komputer"]
+
+class RuanganCreate(RuanganBase):
+    pass
+
+class RuanganResponse(RuanganBase):
+    id: str
+
 # Mahasiswa
 class MahasiswaBase(BaseModel):
     nim: str
@@ -290,6 +750,11 @@ class KelasResponse(KelasBase):
     dosen_nama: Optional[str] = None
     jumlah_peserta: int = 0
 
+class KelasTersediaResponse(KelasResponse):
+    # Bentrok dengan kelas yang sudah diambil mahasiswa (KRS diajukan/disetujui)
+    bentrok: bool = False
+    bentrok_dengan: List[str] = []
+
 # KRS (Kartu Rencana Studi)
 class KRSBase(BaseModel):
     mahasiswa_id: str
@@ -332,7 +797,7 @@ class NilaiResponse(NilaiBase):
     mahasiswa_nama: Optional[str] = None
     nim: Optional[str] = None
 
-# Jadwal Detail untuk conflict detection
+# Jadwal Detail: satu sesi mingguan kelas (kelas.sesi)
 class JadwalDetail(BaseModel):
     hari: str  # Senin, Selasa, etc.
     jam_mulai: str  # HH:MM format
@@ -345,10 +810,12 @@ class KelasJadwalCreate(BaseModel):
     dosen_id: str
     tahun_akademik_id: str
     kuota: int = 40
-    hari: str
-    jam_mulai: str
-    jam_selesai: str
-    ruangan: Optional[str] = None
+    # Satu sesi lewat hari/jam_*, atau beberapa sesi lewat sesi (sesi diutamakan)
+    hari: Optional[str] = None
+    jam_mulai: Optional[str] = None
+    jam_selesai: Optional[str] = None
+    ruangan: Optional[str] = None  # default untuk sesi tanpa ruangan
+    sesi: Optional[List[JadwalDetail]] = None
 
 class KelasJadwalResponse(BaseModel):
     id: str
@@ -359,10 +826,69 @@ class KelasJadwalResponse(BaseModel):
     dosen_nama: Optional[str] = None
     tahun_akademik_id: str
     kuota: int = 40
-    hari: str
+    hari: str  # sesi pertama
     jam_mulai: str
     jam_selesai: str
     ruangan: Optional[str] = None
+    sesi: List[JadwalDetail] = []
+    jumlah_peserta: int = 0
+
+# Solver jadwal otomatis
+class SolverRuangan(BaseModel):
+    nama: str
+    kapasitas: int
+
+class DosenTidakTersedia(BaseModel):
+    dosen_id: str
+    hari: str
+    jam_mulai: str
+    jam_selesai: str
+
+class JadwalSolverRequest(BaseModel):
+    tahun_akademik_id: str
+    ruangan: Optional[List[SolverRuangan]] = None  # kosong: semua ruangan di master data
+    hari: List[str] = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat"]
+    jam_mulai: str = "07:00"  # jam operasional
+    jam_selesai: str = "17:00"
+    langkah_menit: int = 30  # jarak antar jam mulai yang dicoba
+    menit_per_sks: int = 50
+    # Kosong: hanya kelas yang belum punya jadwal; kelas lain tetap di tempatnya
+    kelas_ids: Optional[List[str]] = None
+    jadwal_ulang: bool = False  # True: jadwalkan ulang semua kelas semester ini
+    dosen_tidak_tersedia: List[DosenTidakTersedia] = []
+
+# Jadwal Ujian (UTS/UAS)
+class SesiUjian(BaseModel):
+    jam_mulai: str
+    jam_selesai: str
+
+class JadwalUjianRequest(BaseModel):
+    tahun_akademik_id: str
+    jenis: str = "UTS"  # UTS atau UAS
+    tanggal: List[str]  # hari ujian, YYYY-MM-DD
+    sesi: List[SesiUjian] = [
+        SesiUjian(jam_mulai="08:00", jam_selesai="10:00"),
+        SesiUjian(jam_mulai="10:30", jam_selesai="12:30"),
+        SesiUjian(jam_mulai="13:30", jam_selesai="15:30"),
+    ]
+    ruangan: Optional[List[SolverRuangan]] = None  # kosong: semua ruangan di master data
+
+class RuanganUjian(BaseModel):
+    nama: str
+    jumlah: int  # peserta di ruangan ini
+
+class JadwalUjianResponse(BaseModel):
+    id: str
+    tahun_akademik_id: str
+    jenis: str
+    mata_kuliah_id: str
+    kode_mk: Optional[str] = None
+    mata_kuliah_nama: Optional[str] = None
+    kelas_ids: List[str] = []
+    tanggal: str
+    jam_mulai: str
+    jam_selesai: str
+    ruangan: List[RuanganUjian] = []
     jumlah_peserta: int = 0
 
 # Presensi (Attendance)
@@ -374,6 +900,12 @@ class PresensiBase(BaseModel):
 class PresensiCreate(PresensiBase):
     pass
 
+class PresensiKalenderRequest(BaseModel):
+    tahun_akademik_id: str
+    libur: List[str] = []  # tanggal libur/ujian tanpa perkuliahan, YYYY-MM-DD
+    maks_pertemuan: int = 16
+    kelas_ids: Optional[List[str]] = None  # kosong: semua kelas semester ini
+
 class PresensiDetailCreate(BaseModel):
     mahasiswa_id: str
     status: str = "hadir"  # hadir, izin, sakit, alpha
@@ -487,6 +1019,17 @@ class PembayaranUKTResponse(PembayaranUKTBase):
     mahasiswa_nim: Optional[str] = None
 
 # Rekap Keuangan
+class RekapKeuanganBreakdown(BaseModel):
+    key: Optional[str] = None  # prodi_id, fakultas_id, kategori_ukt_id atau tahun_masuk
+    label: Optional[str] = None
+    total_tagihan: float = 0
+    total_terbayar: float = 0
+    total_belum_bayar: float = 0
+    jumlah_tagihan: int = 0
+    jumlah_mahasiswa_lunas: int = 0
+    jumlah_mahasiswa_cicilan: int = 0
+    jumlah_mahasiswa_belum_bayar: int = 0
+
 class RekapKeuanganResponse(BaseModel):
     total_tagihan: float
     total_terbayar: float
@@ -494,6 +1037,20 @@ class RekapKeuanganResponse(BaseModel):
     jumlah_mahasiswa_lunas: int
     jumlah_mahasiswa_cicilan: int
     jumlah_mahasiswa_belum_bayar: int
+    group_by: Optional[str] = None  # prodi, fakultas, kategori, angkatan
+    breakdown: Optional[List[RekapKeuanganBreakdown]] = None
+
+# Snapshot Keuangan Harian (trend)
+class KeuanganTrendPoint(BaseModel):
+    tanggal: str  # YYYY-MM-DD
+    key: Optional[str] = None  # prodi_id atau kategori_ukt_id jika group_by diisi
+    label: Optional[str] = None
+    total_terbayar: float = 0
+    jumlah_pembayaran: int = 0
+
+class KeuanganSnapshotRefreshResponse(BaseModel):
+    rows_updated: int
+    watermark: Optional[str] = None
 
 # Biodata Mahasiswa (untuk Ijazah)
 class BiodataBase(BaseModel):
@@ -542,6 +1099,10 @@ class BiodataChangeRequestResponse(BaseModel):
     dokumen_ktp: Optional[str] = None
     dokumen_kk: Optional[str] = None
     dokumen_akte: Optional[str] = None
+    # Varian gambar per dokumen: {"thumb": url, "preview": url}, diisi setelah diproses
+    dokumen_ktp_varian: Optional[Dict[str, str]] = None
+    dokumen_kk_varian: Optional[Dict[str, str]] = None
+    dokumen_akte_varian: Optional[Dict[str, str]] = None
     status: str = "pending"  # pending, approved, rejected
     catatan_admin: Optional[str] = None
     reviewed_by: Optional[str] = None
@@ -590,6 +1151,359 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Token tidak valid")
 
+async def find_by_ids(collection: str, ids, projection: Optional[dict] = None) -> Dict[str, dict]:
+    """One $in query instead of find_one per row; returns {id: doc}"""
+    unique_ids = list({i for i in ids if i})
+    if not unique_ids:
+        return {}
+    fields = {"_id": 0, **({**projection, "id": 1} if projection else {})}
+    docs = await db[collection].find({"id": {"$in": unique_ids}}, fields).to_list(None)
+    return {doc["id"]: doc for doc in docs}
+
+async def count_by(collection: str, field: str, match: dict) -> Dict[Any, int]:
+    """Document count per value of `field`, one aggregation for the whole list"""
+    rows = await db[collection].aggregate([
+        {"$match": match},
+        {"$group": {"_id": f"${field}", "n": {"$sum": 1}}}
+    ]).to_list(None)
+    return {row["_id"]: row["n"] for row in rows}
+
+# ==================== RESPONSE COMPRESSION ====================
+
+uncompressed_endpoints: set = set()
+
+def skip_compression(endpoint):
+    """Route decorator: responses of this endpoint are never compressed"""
+    uncompressed_endpoints.add(endpoint)
+    return endpoint
+
+def get_available_encodings() -> List[str]:
+    """Supported encodings in server preference order"""
+    encodings = []
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+AVAILABLE_ENCODINGS = get_available_encodings()
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best encoding from Accept-Encoding (highest q, then server preference)"""
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in AVAILABLE_ENCODINGS:
+        q = qualities.get(encoding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress_body(encoding: str, body: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+class StreamCompressor:
+    """Incremental compressor for responses sent with more_body=True"""
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.compress, self.flush = compressor.process, compressor.finish
+        elif encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self.compress, self.flush = compressor.compress, compressor.flush
+        else:
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress, self.flush = compressor.compress, compressor.flush
+
+class CompressionMiddleware:
+    """
+    Compress JSON/text responses with br, zstd or gzip based on Accept-Encoding.
+
+    Bodies smaller than minimum_size are sent as-is, bodies of
+    COMPRESSION_THREAD_MIN_SIZE or more are compressed in a worker thread so
+    the event loop keeps serving other requests. Endpoints decorated with
+    skip_compression are passed through untouched.
+    """
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.initial_message: Optional[Message] = None
+        self.started = False
+        self.passthrough = False
+        self.compressor: Optional[StreamCompressor] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.scope = scope
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def should_compress(self, headers: Headers, body_size: int, more_body: bool) -> bool:
+        if self.scope.get("endpoint") in uncompressed_endpoints:
+            return False
+        if self.initial_message["status"] < 200 or self.initial_message["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+            return False
+        if more_body:
+            content_length = headers.get("content-length")
+            return content_length is None or int(content_length) >= self.minimum_size
+        return body_size >= self.minimum_size
+
+    def set_encoding_headers(self, headers: MutableHeaders):
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # Representasi terkompresi tidak byte-identik: strong ETag jadi weak
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def send_compressed(self, message: Message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.initial_message = message
+            return
+        if self.passthrough or message_type != "http.response.body":
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            if not self.should_compress(headers, len(body), more_body):
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            self.set_encoding_headers(headers)
+            if not more_body:
+                if len(body) >= COMPRESSION_THREAD_MIN_SIZE:
+                    body = await anyio.to_thread.run_sync(compress_body, self.encoding, body)
+                else:
+                    body = compress_body(self.encoding, body)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.initial_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            del headers["Content-Length"]
+            self.compressor = StreamCompressor(self.encoding)
+            await self.send(self.initial_message)
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.flush()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+# ==================== RESPONSE SERIALIZATION ====================
+
+class ResponseProjectionError(ValueError):
+    """A stored row lacks a field its response model requires"""
+
+def nested_response_model(annotation) -> Tuple[Optional[type], bool]:
+    """(model, is_list) for a field typed as a model, List[model] or Optional of either"""
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) != 1:
+            return None, False
+        annotation = args[0]
+    is_list = get_origin(annotation) in (list, List)
+    if is_list:
+        annotation = (get_args(annotation) or (None,))[0]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, is_list
+    return None, False
+
+@lru_cache(maxsize=None)
+def get_response_fields(model: type) -> tuple:
+    """(name, required, default, nested model, is_list) per field of a response model, in declaration order"""
+    fields = []
+    for name, field in model.model_fields.items():
+        required = field.is_required()
+        nested, is_list = nested_response_model(field.annotation)
+        default = None if required else field.get_default(call_default_factory=True)
+        fields.append((name, required, default, nested, is_list))
+    return tuple(fields)
+
+def project_row(model: type, row: dict) -> dict:
+    result = {}
+    for name, required, default, nested, is_list in get_response_fields(model):
+        if name not in row:
+            if required:
+                raise ResponseProjectionError(f"{model.__name__}.{name} tidak ada di data (id={row.get('id')})")
+            result[name] = default
+            continue
+        value = row[name]
+        if nested is not None and value is not None:
+            value = [project_row(nested, v) for v in value] if is_list else project_row(nested, value)
+        result[name] = value
+    return result
+
+def project_rows(model: type, rows: List[dict]) -> List[dict]:
+    """
+    Keep only the model's fields, recursing into nested models (sesi rows
+    lose menit_mulai/menit_selesai); missing optional fields get the model
+    default, a missing required one raises ResponseProjectionError.
+    """
+    return [project_row(model, row) for row in rows]
+
+def trusted_list_response(model: type, rows: List[dict], headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serialize rows that were already validated when written to the database.
+
+    Each row is projected onto the model's fields, nested models included
+    (undeclared ones such as password are dropped, missing optional ones get
+    the model default) and encoded by orjson in one pass. Values are not
+    type-checked: a row that lacks a required field raises instead of
+    emitting null. Returning a Response skips FastAPI's response_model
+    re-validation; keep response_model on the route for the OpenAPI schema.
+    """
+    return ORJSONResponse(project_rows(model, rows), headers=headers)
+
+# ==================== CONDITIONAL GET ====================
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison as required for If-None-Match"""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in header.split(","))
+
+async def bump_collection_version(collection: str):
+    """Call after every write to a collection that backs an ETag'd endpoint or a version-keyed cache"""
+    await db.collection_versions.update_one({"collection": collection}, {"$inc": {"version": 1}}, upsert=True)
+
+async def get_collection_versions(*collections: str) -> tuple:
+    """
+    Current versions straight from db.collection_versions, one indexed query
+    per call: a write handled by any worker is visible to the next request.
+    """
+    docs = await db.collection_versions.find(
+        {"collection": {"$in": list(collections)}}, {"_id": 0, "collection": 1, "version": 1}
+    ).to_list(None)
+    versions = {doc["collection"]: doc["version"] for doc in docs}
+    return tuple(versions.get(c, 0) for c in collections)
+
+async def master_data_etag(request: Request, current_user: dict, *collections: str) -> str:
+    """
+    Strong ETag for a master-data list: versions of every collection the
+    response reads, the query string and the user's access scope.
+    """
+    versions = await get_collection_versions(*collections)
+    scope = (current_user.get("role"), current_user.get("prodi_id"), current_user.get("fakultas_id"))
+    key = "|".join(map(str, (*collections, *versions, *scope, request.url.query)))
+    return f'"{hashlib.sha1(key.encode()).hexdigest()[:24]}"'
+
+def not_modified_response(request: Request, etag: str) -> Optional[Response]:
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": MASTER_DATA_CACHE_CONTROL})
+    return None
+
+# ==================== STUDENT RESPONSE CACHE ====================
+
+# user_id -> (versi, {(route, params): (expires_at, body)}); body sudah di-encode
+# JSON. Versi dibaca dari database setiap request (get_student_cache_version),
+# jadi write di worker mana pun membuat entry di semua worker tidak terpakai.
+student_cache: Dict[str, Tuple[tuple, Dict[tuple, tuple]]] = {}
+# user_id -> (versi koleksi, expires_at, etag, last_modified, body) feed .ics.
+# Kunci versi dibaca dari db.collection_versions sehingga write di worker mana
+# pun langsung terlihat. Entry basi tetap disimpan agar render ulang yang
+# isinya sama memakai Last-Modified lama.
+kalender_cache: Dict[str, tuple] = {}
+
+async def get_student_cache_version(current_user: dict) -> tuple:
+    """
+    The student's own counter (users.student_cache_version, already loaded by
+    get_current_user) plus the versions of STUDENT_CACHE_COLLECTIONS. Read
+    before the response is built, so a write racing the build only costs a miss.
+    """
+    return (current_user.get("student_cache_version", 0), *await get_collection_versions(*STUDENT_CACHE_COLLECTIONS))
+
+def get_student_cache(current_user: dict, version: tuple, key: tuple) -> Optional[Response]:
+    cached = student_cache.get(current_user["id"])
+    if not cached or cached[0] != version or key not in cached[1]:
+        record_cache("student", False)
+        return None
+    expires_at, body = cached[1][key]
+    if expires_at < time.monotonic():
+        del cached[1][key]
+        record_cache("student", False)
+        return None
+    record_cache("student", True)
+    return Response(body, media_type="application/json")
+
+def set_student_cache(current_user: dict, version: tuple, key: tuple, content: Any) -> Response:
+    """Encode and store a self-service response under the version it was built at; returns it ready to send"""
+    body = content.body if isinstance(content, Response) else orjson.dumps(content)
+    user_id = current_user["id"]
+    cached = student_cache.get(user_id)
+    if cached is None or cached[0] != version:
+        if cached is None and len(student_cache) >= STUDENT_CACHE_MAX_USERS:
+            # Buang user yang paling lama masuk cache
+            del student_cache[next(iter(student_cache))]
+        cached = student_cache[user_id] = (version, {})
+    cached[1][key] = (time.monotonic() + STUDENT_CACHE_TTL, body)
+    return Response(body, media_type="application/json")
+
+async def invalidate_student_cache(*mahasiswa_ids: str):
+    """
+    Call after a write that changes KRS, jadwal, nilai or tagihan of these
+    students: bumps their users.student_cache_version, so every worker misses.
+    Writes shared by many students bump a STUDENT_CACHE_COLLECTIONS version instead.
+    """
+    mahasiswa_list = await db.mahasiswa.find(
+        {"id": {"$in": list(mahasiswa_ids)}}, {"_id": 0, "user_id": 1}
+    ).to_list(None)
+    user_ids = [mhs["user_id"] for mhs in mahasiswa_list if mhs.get("user_id")]
+    if user_ids:
+        await db.users.update_many({"id": {"$in": user_ids}}, {"$inc": {"student_cache_version": 1}})
+
+async def krs_changed(mahasiswa_id: str):
+    """Call after a KRS is approved or rejected: the student's cached views and every worker's kalender feeds"""
+    await bump_collection_version("krs")
+    await invalidate_student_cache(mahasiswa_id)
+
 # ==================== ROLE-BASED ACCESS HELPERS ====================
 
 async def get_accessible_prodi_ids(user: dict) -> Optional[List[str]]:
@@ -787,15 +1701,14 @@ async def login(credentials: UserLogin):
             role=user["role"],
             is_active=user.get("is_active", True),
             user_id_number=user.get("user_id_number"),
-            foto_profil=user.get("foto_profil"),
+            foto_profil=sign_upload_url(user.get("foto_profil")),
             prodi_id=user.get("prodi_id"),
             fakultas_id=user.get("fakultas_id"),
             modules_access=modules_access
         )
     )
 
-@auth_router.get("/me", response_model=UserResponse)
-async def get_me(current_user: dict = Depends(get_current_user)):
+def build_user_response(current_user: dict) -> UserResponse:
     # Get modules_access, use default if not set
     modules_access = current_user.get("modules_access")
     if not modules_access:
@@ -808,12 +1721,16 @@ async def get_me(current_user: dict = Depends(get_current_user)):
         role=current_user["role"],
         is_active=current_user.get("is_active", True),
         user_id_number=current_user.get("user_id_number"),
-        foto_profil=current_user.get("foto_profil"),
+        foto_profil=sign_upload_url(current_user.get("foto_profil")),
         prodi_id=current_user.get("prodi_id"),
         fakultas_id=current_user.get("fakultas_id"),
         modules_access=modules_access
     )
 
+@auth_router.get("/me", response_model=UserResponse)
+async def get_me(current_user: dict = Depends(get_current_user)):
+    return build_user_response(current_user)
+
 @auth_router.get("/my-access")
 async def get_my_access(current_user: dict = Depends(get_current_user)):
     """Get accessible prodi and fakultas based on user's role"""
@@ -1013,18 +1930,7 @@ async def upload_foto_profil(
         raise HTTPException(status_code=400, detail="Masih ada pengajuan foto yang belum diproses")
     
     # Simpan foto
-    user_dir = UPLOAD_DIR.parent / "foto_profil" / current_user["id"]
-    user_dir.mkdir(parents=True, exist_ok=True)
-    
-    ext = Path(foto.filename).suffix if foto.filename else ".jpg"
-    filename = f"pending_{uuid.uuid4().hex[:8]}{ext}"
-    file_path = user_dir / filename
-    
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await foto.read()
-        await f.write(content)
-    
-    foto_path = f"/uploads/foto_profil/{current_user['id']}/{filename}"
+    foto_path = await save_upload_file(foto, "foto_profil", IMAGE_UPLOAD_TYPES, MAX_FOTO_SIZE)
     
     # Dapatkan prodi_id
     prodi_id = None
@@ -1048,6 +1954,7 @@ async def upload_foto_profil(
     }
     
     await db.foto_profil_requests.insert_one(doc)
+    schedule_image_variants(foto_path, "foto_profil_requests", doc["id"], "foto_baru")
     
     return {"message": "Pengajuan ganti foto profil berhasil. Menunggu persetujuan admin."}
 
@@ -1073,7 +1980,7 @@ async def get_foto_profil_requests(
         user = await db.users.find_one({"id": req["user_id"]}, {"_id": 0})
         prodi = await db.prodi.find_one({"id": req.get("prodi_id")}, {"_id": 0}) if req.get("prodi_id") else None
         result.append({
-            **req,
+            **sign_upload_fields(req, "foto_lama", "foto_baru"),
             "user_nama": user["nama"] if user else None,
             "prodi_nama": prodi["nama"] if prodi else None
         })
@@ -1127,15 +2034,21 @@ async def get_my_foto_profil_requests(current_user: dict = Depends(get_current_u
         {"user_id": current_user["id"]},
         {"_id": 0}
     ).sort("created_at", -1).to_list(10)
-    return requests
+    return [sign_upload_fields(req, "foto_lama", "foto_baru") for req in requests]
 
 # ==================== MASTER DATA ROUTES ====================
 
 # Tahun Akademik
 @master_router.get("/tahun-akademik", response_model=List[TahunAkademikResponse])
-async def get_tahun_akademik(current_user: dict = Depends(get_current_user)):
+async def get_tahun_akademik(request: Request, current_user: dict = Depends(get_current_user)):
+    etag = await master_data_etag(request, current_user, "tahun_akademik")
+    if not_modified := not_modified_response(request, etag):
+        return not_modified
+    
     items = await db.tahun_akademik.find({}, {"_id": 0}).sort("tahun", -1).to_list(100)
-    return items
+    return trusted_list_response(
+        TahunAkademikResponse, items, {"ETag": etag, "Cache-Control": MASTER_DATA_CACHE_CONTROL}
+    )
 
 @master_router.post("/tahun-akademik", response_model=TahunAkademikResponse)
 async def create_tahun_akademik(
@@ -1148,6 +2061,7 @@ async def create_tahun_akademik(
     item_id = str(uuid.uuid4())
     doc = {**data.model_dump(), "id": item_id}
     await db.tahun_akademik.insert_one(doc)
+    await bump_collection_version("tahun_akademik")
     return TahunAkademikResponse(**doc)
 
 @master_router.put("/tahun-akademik/{item_id}", response_model=TahunAkademikResponse)
@@ -1167,6 +2081,7 @@ async def update_tahun_akademik(
         {"id": item_id},
         {"$set": data.model_dump()}
     )
+    await bump_collection_version("tahun_akademik")
     updated = await db.tahun_akademik.find_one({"id": item_id}, {"_id": 0})
     return TahunAkademikResponse(**updated)
 
@@ -1181,6 +2096,7 @@ async def delete_tahun_akademik(
     result = await db.tahun_akademik.delete_one({"id": item_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Data tidak ditemukan")
+    await bump_collection_version("tahun_akademik")
     return {"message": "Data berhasil dihapus"}
 
 @master_router.get("/tahun-akademik/active", response_model=Optional[TahunAkademikResponse])
@@ -1190,9 +2106,13 @@ async def get_active_tahun_akademik():
 
 # Fakultas
 @master_router.get("/fakultas", response_model=List[FakultasResponse])
-async def get_fakultas(current_user: dict = Depends(get_current_user)):
+async def get_fakultas(request: Request, current_user: dict = Depends(get_current_user)):
+    etag = await master_data_etag(request, current_user, "fakultas")
+    if not_modified := not_modified_response(request, etag):
+        return not_modified
+    
     items = await db.fakultas.find({}, {"_id": 0}).sort("nama", 1).to_list(100)
-    return items
+    return trusted_list_response(FakultasResponse, items, {"ETag": etag, "Cache-Control": MASTER_DATA_CACHE_CONTROL})
 
 @master_router.post("/fakultas", response_model=FakultasResponse)
 async def create_fakultas(
@@ -1205,6 +2125,7 @@ async def create_fakultas(
     item_id = str(uuid.uuid4())
     doc = {**data.model_dump(), "id": item_id}
     await db.fakultas.insert_one(doc)
+    await bump_collection_version("fakultas")
     return FakultasResponse(**doc)
 
 @master_router.put("/fakultas/{item_id}", response_model=FakultasResponse)
@@ -1217,6 +2138,7 @@ async def update_fakultas(
         raise HTTPException(status_code=403, detail="Akses ditolak")
     
     await db.fakultas.update_one({"id": item_id}, {"$set": data.model_dump()})
+    await bump_collection_version("fakultas")
     updated = await db.fakultas.find_one({"id": item_id}, {"_id": 0})
     return FakultasResponse(**updated)
 
@@ -1231,14 +2153,20 @@ async def delete_fakultas(
     result = await db.fakultas.delete_one({"id": item_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Data tidak ditemukan")
+    await bump_collection_version("fakultas")
     return {"message": "Data berhasil dihapus"}
 
 # Program Studi
 @master_router.get("/prodi", response_model=List[ProdiResponse])
 async def get_prodi(
+    request: Request,
     fakultas_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
+    etag = await master_data_etag(request, current_user, "prodi", "fakultas")
+    if not_modified := not_modified_response(request, etag):
+        return not_modified
+    
     query = {}
     if fakultas_id:
         query["fakultas_id"] = fakultas_id
@@ -1253,11 +2181,12 @@ async def get_prodi(
     items = await db.prodi.find(query, {"_id": 0}).sort("nama", 1).to_list(100)
     
     # Add fakultas nama
+    fakultas_map = await find_by_ids("fakultas", (item["fakultas_id"] for item in items), {"nama": 1})
     for item in items:
-        fakultas = await db.fakultas.find_one({"id": item["fakultas_id"]}, {"_id": 0})
+        fakultas = fakultas_map.get(item["fakultas_id"])
         item["fakultas_nama"] = fakultas["nama"] if fakultas else None
     
-    return items
+    return trusted_list_response(ProdiResponse, items, {"ETag": etag, "Cache-Control": MASTER_DATA_CACHE_CONTROL})
 
 @master_router.post("/prodi", response_model=ProdiResponse)
 async def create_prodi(
@@ -1270,6 +2199,7 @@ async def create_prodi(
     item_id = str(uuid.uuid4())
     doc = {**data.model_dump(), "id": item_id}
     await db.prodi.insert_one(doc)
+    await bump_collection_version("prodi")
     
     fakultas = await db.fakultas.find_one({"id": data.fakultas_id}, {"_id": 0})
     return ProdiResponse(**doc, fakultas_nama=fakultas["nama"] if fakultas else None)
@@ -1284,6 +2214,7 @@ async def update_prodi(
     check_admin_access(current_user)
     
     await db.prodi.update_one({"id": item_id}, {"$set": data.model_dump()})
+    await bump_collection_version("prodi")
     updated = await db.prodi.find_one({"id": item_id}, {"_id": 0})
     fakultas = await db.fakultas.find_one({"id": updated["fakultas_id"]}, {"_id": 0})
     return ProdiResponse(**updated, fakultas_nama=fakultas["nama"] if fakultas else None)
@@ -1299,17 +2230,23 @@ async def delete_prodi(
     result = await db.prodi.delete_one({"id": item_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Data tidak ditemukan")
+    await bump_collection_version("prodi")
     return {"message": "Data berhasil dihapus"}
 
 # Kurikulum
 @master_router.get("/kurikulum", response_model=List[KurikulumResponse])
 async def get_kurikulum(
+    request: Request,
     prodi_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
     # Check management access
     check_management_access(current_user)
     
+    etag = await master_data_etag(request, current_user, "kurikulum", "prodi")
+    if not_modified := not_modified_response(request, etag):
+        return not_modified
+    
     query = {}
     if prodi_id:
         query["prodi_id"] = prodi_id
@@ -1319,11 +2256,12 @@ async def get_kurikulum(
     
     items = await db.kurikulum.find(query, {"_id": 0}).sort("tahun", -1).to_list(100)
     
+    prodi_map = await find_by_ids("prodi", (item["prodi_id"] for item in items), {"nama": 1})
     for item in items:
-        prodi = await db.prodi.find_one({"id": item["prodi_id"]}, {"_id": 0})
+        prodi = prodi_map.get(item["prodi_id"])
         item["prodi_nama"] = prodi["nama"] if prodi else None
     
-    return items
+    return trusted_list_response(KurikulumResponse, items, {"ETag": etag, "Cache-Control": MASTER_DATA_CACHE_CONTROL})
 
 @master_router.post("/kurikulum", response_model=KurikulumResponse)
 async def create_kurikulum(
@@ -1340,6 +2278,7 @@ async def create_kurikulum(
     item_id = str(uuid.uuid4())
     doc = {**data.model_dump(), "id": item_id}
     await db.kurikulum.insert_one(doc)
+    await bump_collection_version("kurikulum")
     
     prodi = await db.prodi.find_one({"id": data.prodi_id}, {"_id": 0})
     return KurikulumResponse(**doc, prodi_nama=prodi["nama"] if prodi else None)
@@ -1362,6 +2301,7 @@ async def update_kurikulum(
         raise HTTPException(status_code=403, detail="Anda tidak memiliki akses ke kurikulum ini")
     
     await db.kurikulum.update_one({"id": item_id}, {"$set": data.model_dump()})
+    await bump_collection_version("kurikulum")
     updated = await db.kurikulum.find_one({"id": item_id}, {"_id": 0})
     prodi = await db.prodi.find_one({"id": updated["prodi_id"]}, {"_id": 0})
     return KurikulumResponse(**updated, prodi_nama=prodi["nama"] if prodi else None)
@@ -1385,11 +2325,13 @@ async def delete_kurikulum(
     result = await db.kurikulum.delete_one({"id": item_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Data tidak ditemukan")
+    await bump_collection_version("kurikulum")
     return {"message": "Data berhasil dihapus"}
 
 # Mata Kuliah
 @master_router.get("/mata-kuliah", response_model=List[MataKuliahResponse])
 async def get_mata_kuliah(
+    request: Request,
     kurikulum_id: Optional[str] = None,
     prodi_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
@@ -1397,6 +2339,10 @@ async def get_mata_kuliah(
     # Check management access
     check_management_access(current_user)
     
+    etag = await master_data_etag(request, current_user, "mata_kuliah", "kurikulum", "prodi")
+    if not_modified := not_modified_response(request, etag):
+        return not_modified
+    
     query = {}
     if kurikulum_id:
         query["kurikulum_id"] = kurikulum_id
@@ -1428,7 +2374,7 @@ async def get_mata_kuliah(
     for item in items:
         item["total_sks"] = item.get("sks_teori", 0) + item.get("sks_praktik", 0)
     
-    return items
+    return trusted_list_response(MataKuliahResponse, items, {"ETag": etag, "Cache-Control": MASTER_DATA_CACHE_CONTROL})
 
 @master_router.post("/mata-kuliah", response_model=MataKuliahResponse)
 async def create_mata_kuliah(
@@ -1441,6 +2387,7 @@ async def create_mata_kuliah(
     item_id = str(uuid.uuid4())
     doc = {**data.model_dump(), "id": item_id}
     await db.mata_kuliah.insert_one(doc)
+    await bump_collection_version("mata_kuliah")
     
     return MataKuliahResponse(
         **doc,
@@ -1457,6 +2404,7 @@ async def update_mata_kuliah(
         raise HTTPException(status_code=403, detail="Akses ditolak")
     
     await db.mata_kuliah.update_one({"id": item_id}, {"$set": data.model_dump()})
+    await bump_collection_version("mata_kuliah")
     updated = await db.mata_kuliah.find_one({"id": item_id}, {"_id": 0})
     return MataKuliahResponse(
         **updated,
@@ -1474,6 +2422,91 @@ async def delete_mata_kuliah(
     result = await db.mata_kuliah.delete_one({"id": item_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Data tidak ditemukan")
+    await bump_collection_version("mata_kuliah")
+    return {"message": "Data berhasil dihapus"}
+
+# Ruangan
+@master_router.get("/ruangan", response_model=List[RuanganResponse])
+async def get_ruangan(
+    request: Request,
+    gedung: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    etag = await master_data_etag(request, current_user, "ruangan")
+    if not_modified := not_modified_response(request, etag):
+        return not_modified
+    
+    query = {"gedung": gedung} if gedung else {}
+    items = await db.ruangan.find(query, {"_id": 0}).sort("nama", 1).to_list(None)
+    return trusted_list_response(RuanganResponse, items, {"ETag": etag, "Cache-Control": MASTER_DATA_CACHE_CONTROL})
+
+@master_router.post("/ruangan", response_model=RuanganResponse)
+async def create_ruangan(
+    data: RuanganCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    if data.kapasitas <= 0:
+        raise HTTPException(status_code=400, detail="Kapasitas ruangan harus lebih dari 0")
+    if await db.ruangan.find_one({"nama": data.nama}, {"_id": 0, "id": 1}):
+        raise HTTPException(status_code=400, detail="Nama ruangan sudah terdaftar")
+    
+    item_id = str(uuid.uuid4())
+    doc = {**data.model_dump(), "id": item_id}
+    await db.ruangan.insert_one(doc)
+    await bump_collection_version("ruangan")
+    return RuanganResponse(**doc)
+
+@master_router.put("/ruangan/{item_id}", response_model=RuanganResponse)
+async def update_ruangan(
+    item_id: str,
+    data: RuanganCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    if data.kapasitas <= 0:
+        raise HTTPException(status_code=400, detail="Kapasitas ruangan harus lebih dari 0")
+    
+    existing = await db.ruangan.find_one({"id": item_id}, {"_id": 0})
+    if not existing:
+        raise HTTPException(status_code=404, detail="Data tidak ditemukan")
+    renamed = data.nama != existing["nama"]
+    if renamed and await db.ruangan.find_one({"nama": data.nama}, {"_id": 0, "id": 1}):
+        raise HTTPException(status_code=400, detail="Nama ruangan sudah terdaftar")
+    
+    await db.ruangan.update_one({"id": item_id}, {"$set": data.model_dump()})
+    await bump_collection_version("ruangan")
+    # kelas.ruangan dan kelas.sesi[].ruangan menyimpan nama, jadi ikut diganti di semua semester
+    if renamed:
+        top = await db.kelas.update_many({"ruangan": existing["nama"]}, {"$set": {"ruangan": data.nama}})
+        sesi = await db.kelas.update_many(
+            {"sesi.ruangan": existing["nama"]},
+            {"$set": {"sesi.$[s].ruangan": data.nama}},
+            array_filters=[{"s.ruangan": existing["nama"]}]
+        )
+        if top.modified_count or sesi.modified_count:
+            await kelas_changed()
+    return RuanganResponse(**data.model_dump(), id=item_id)
+
+@master_router.delete("/ruangan/{item_id}")
+async def delete_ruangan(
+    item_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    
+    existing = await db.ruangan.find_one({"id": item_id}, {"_id": 0, "nama": 1})
+    if not existing:
+        raise HTTPException(status_code=404, detail="Data tidak ditemukan")
+    dipakai = await db.kelas.count_documents({"$or": [{"ruangan": existing["nama"]}, {"sesi.ruangan": existing["nama"]}]})
+    if dipakai:
+        raise HTTPException(status_code=400, detail=f"Ruangan masih dipakai oleh {dipakai} kelas")
+    
+    await db.ruangan.delete_one({"id": item_id})
+    await bump_collection_version("ruangan")
     return {"message": "Data berhasil dihapus"}
 
 # ==================== MAHASISWA ROUTES ====================
@@ -1508,7 +2541,7 @@ async def get_mahasiswa(
         else:
             item["dosen_pa_nama"] = None
     
-    return items
+    return trusted_list_response(MahasiswaResponse, items)
 
 @master_router.post("/mahasiswa", response_model=MahasiswaResponse)
 async def create_mahasiswa(
@@ -1574,6 +2607,7 @@ async def update_mahasiswa(
         raise HTTPException(status_code=403, detail="Anda tidak memiliki akses ke mahasiswa ini")
     
     await db.mahasiswa.update_one({"id": item_id}, {"$set": data.model_dump()})
+    await bump_collection_version("mahasiswa")
     updated = await db.mahasiswa.find_one({"id": item_id}, {"_id": 0})
     prodi = await db.prodi.find_one({"id": updated["prodi_id"]}, {"_id": 0})
     dosen_pa_nama = None
@@ -1636,7 +2670,7 @@ async def get_dosen(
             prodi = await db.prodi.find_one({"id": item["prodi_id"]}, {"_id": 0})
             item["prodi_nama"] = prodi["nama"] if prodi else None
     
-    return items
+    return trusted_list_response(DosenResponse, items)
 
 @master_router.post("/dosen", response_model=DosenResponse)
 async def create_dosen(
@@ -1693,6 +2727,7 @@ async def update_dosen(
         raise HTTPException(status_code=403, detail="Akses ditolak")
     
     await db.dosen.update_one({"id": item_id}, {"$set": data.model_dump()})
+    await bump_collection_version("dosen")
     updated = await db.dosen.find_one({"id": item_id}, {"_id": 0})
     
     prodi_nama = None
@@ -1717,6 +2752,7 @@ async def delete_dosen(
     result = await db.dosen.delete_one({"id": item_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Data tidak ditemukan")
+    await bump_collection_version("dosen")
     return {"message": "Data berhasil dihapus"}
 
 # ==================== AKADEMIK ROUTES ====================
@@ -1745,25 +2781,26 @@ async def get_kelas(
     
     items = await db.kelas.find(query, {"_id": 0}).to_list(500)
     
+    mk_map = await find_by_ids("mata_kuliah", (item["mata_kuliah_id"] for item in items), {"nama": 1})
+    dosen_map = await find_by_ids("dosen", (item["dosen_id"] for item in items), {"nama": 1})
+    # Count enrolled students
+    krs_counts = await count_by("krs", "kelas_id", {
+        "kelas_id": {"$in": [item["id"] for item in items]},
+        "status": "disetujui"
+    }) if items else {}
+    
     result = []
     for item in items:
-        mk = await db.mata_kuliah.find_one({"id": item["mata_kuliah_id"]}, {"_id": 0})
-        dosen = await db.dosen.find_one({"id": item["dosen_id"]}, {"_id": 0})
-        
-        # Count enrolled students
-        krs_count = await db.krs.count_documents({
-            "kelas_id": item["id"],
-            "status": "disetujui"
-        })
-        
-        result.append(KelasResponse(
+        mk = mk_map.get(item["mata_kuliah_id"])
+        dosen = dosen_map.get(item["dosen_id"])
+        result.append({
             **item,
-            mata_kuliah_nama=mk["nama"] if mk else None,
-            dosen_nama=dosen["nama"] if dosen else None,
-            jumlah_peserta=krs_count
-        ))
+            "mata_kuliah_nama": mk["nama"] if mk else None,
+            "dosen_nama": dosen["nama"] if dosen else None,
+            "jumlah_peserta": krs_counts.get(item["id"], 0)
+        })
     
-    return result
+    return trusted_list_response(KelasResponse, result)
 
 @akademik_router.post("/kelas", response_model=KelasResponse)
 async def create_kelas(
@@ -1780,6 +2817,7 @@ async def create_kelas(
     item_id = str(uuid.uuid4())
     doc = {**data.model_dump(), "id": item_id}
     await db.kelas.insert_one(doc)
+    await kelas_changed()
     
     mk = await db.mata_kuliah.find_one({"id": data.mata_kuliah_id}, {"_id": 0})
     dosen = await db.dosen.find_one({"id": data.dosen_id}, {"_id": 0})
@@ -1809,7 +2847,17 @@ async def update_kelas(
     if kelas.get("prodi_id") and not await can_access_prodi(current_user, kelas["prodi_id"]):
         raise HTTPException(status_code=403, detail="Anda tidak memiliki akses ke kelas ini")
     
-    await db.kelas.update_one({"id": item_id}, {"$set": data.model_dump()})
+    update_data = data.model_dump()
+    if kelas.get("sesi"):
+        # Kelas berjadwal: sesi (dan jadwal/ruangan turunannya) hanya diubah lewat /akademik/jadwal
+        del update_data["jadwal"], update_data["ruangan"]
+        if (data.dosen_id, data.tahun_akademik_id) != (kelas["dosen_id"], kelas["tahun_akademik_id"]):
+            conflicts = await jadwal_conflicts(kelas["sesi"], data.dosen_id, data.tahun_akademik_id, exclude_kelas_id=item_id)
+            if conflicts:
+                raise HTTPException(status_code=400, detail={"message": "Terdapat konflik jadwal", "conflicts": conflicts})
+    
+    await db.kelas.update_one({"id": item_id}, {"$set": update_data})
+    await kelas_changed()
     updated = await db.kelas.find_one({"id": item_id}, {"_id": 0})
     
     mk = await db.mata_kuliah.find_one({"id": updated["mata_kuliah_id"]}, {"_id": 0})
@@ -1843,15 +2891,24 @@ async def delete_kelas(
     result = await db.kelas.delete_one({"id": item_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Data tidak ditemukan")
+    await kelas_changed()
     return {"message": "Data berhasil dihapus"}
 
 # ==================== KRS ROUTES ====================
 
+# KRS yang memakai kuota dan slot jadwal mahasiswa
+KRS_COMMITTED_STATUSES = ("diajukan", "disetujui")
+
 @mahasiswa_router.get("/krs", response_model=List[KRSResponse])
 async def get_my_krs(
     tahun_akademik_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
+    cache_key = ("krs", tahun_akademik_id)
+    cache_version = await get_student_cache_version(current_user)
+    if cached := get_student_cache(current_user, cache_version, cache_key):
+        return cached
+    
     # Get mahasiswa from user
     mhs = await db.mahasiswa.find_one({"user_id": current_user["id"]}, {"_id": 0})
     if not mhs and current_user["role"] != "admin":
@@ -1870,16 +2927,18 @@ async def get_my_krs(
             mk = await db.mata_kuliah.find_one({"id": kelas["mata_kuliah_id"]}, {"_id": 0})
             dosen = await db.dosen.find_one({"id": kelas["dosen_id"]}, {"_id": 0})
             
-            result.append(KRSResponse(
+            result.append({
                 **item,
-                mata_kuliah_nama=mk["nama"] if mk else None,
-                kode_mk=mk["kode"] if mk else None,
-                sks=(mk.get("sks_teori", 0) + mk.get("sks_praktik", 0)) if mk else 0,
-                dosen_nama=dosen["nama"] if dosen else None,
-                jadwal=kelas.get("jadwal")
-            ))
+                "mata_kuliah_nama": mk["nama"] if mk else None,
+                "kode_mk": mk["kode"] if mk else None,
+                "sks": (mk.get("sks_teori", 0) + mk.get("sks_praktik", 0)) if mk else 0,
+                "dosen_nama": dosen["nama"] if dosen else None,
+                "jadwal": kelas.get("jadwal")
+            })
     
-    return result
+    if not mhs:
+        return trusted_list_response(KRSResponse, result)
+    return set_student_cache(current_user, cache_version, cache_key, trusted_list_response(KRSResponse, result))
 
 @mahasiswa_router.post("/krs", response_model=KRSResponse)
 async def create_krs(
@@ -1896,12 +2955,11 @@ async def create_krs(
         raise HTTPException(status_code=400, detail="Tidak ada tahun akademik aktif")
     
     # Check if already enrolled
-    existing = await db.krs.find_one({
-        "mahasiswa_id": mhs["id"],
-        "kelas_id": data.kelas_id,
-        "tahun_akademik_id": ta["id"]
-    })
-    if existing:
+    my_krs = await db.krs.find(
+        {"mahasiswa_id": mhs["id"], "tahun_akademik_id": ta["id"]},
+        {"_id": 0, "kelas_id": 1, "status": 1}
+    ).to_list(None)
+    if any(krs["kelas_id"] == data.kelas_id for krs in my_krs):
         raise HTTPException(status_code=400, detail="Sudah terdaftar di kelas ini")
     
     # Check kuota
@@ -1916,6 +2974,17 @@ async def create_krs(
     if enrolled >= kelas.get("kuota", 40):
         raise HTTPException(status_code=400, detail="Kuota kelas penuh")
     
+    # Check jadwal bentrok with classes already taken this semester
+    if kelas.get("tahun_akademik_id") == ta["id"]:
+        occupancy = await get_jadwal_occupancy(ta["id"])
+        taken_ids = [krs["kelas_id"] for krs in my_krs if krs["status"] in KRS_COMMITTED_STATUSES]
+        clashes = occupancy.clashes(data.kelas_id, taken_ids)
+        if clashes:
+            raise HTTPException(status_code=400, detail={
+                "message": "Jadwal bentrok dengan kelas yang sudah diambil",
+                "conflicts": [f"{k['kode_kelas']} {k['hari']} {k['jam_mulai']}-{k['jam_selesai']}" for k in clashes]
+            })
+    
     item_id = str(uuid.uuid4())
     doc = {
         "id": item_id,
@@ -1926,6 +2995,7 @@ async def create_krs(
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.krs.insert_one(doc)
+    await invalidate_student_cache(mhs["id"])
     
     mk = await db.mata_kuliah.find_one({"id": kelas["mata_kuliah_id"]}, {"_id": 0})
     dosen = await db.dosen.find_one({"id": kelas["dosen_id"]}, {"_id": 0})
@@ -1956,6 +3026,7 @@ async def delete_krs(
         raise HTTPException(status_code=400, detail="KRS yang sudah disetujui tidak bisa dihapus")
     
     await db.krs.delete_one({"id": item_id})
+    await invalidate_student_cache(mhs["id"])
     return {"message": "KRS berhasil dihapus"}
 
 # Mahasiswa profile
@@ -1984,7 +3055,7 @@ async def get_mahasiswa_profile(current_user: dict = Depends(get_current_user)):
     }
 
 # Get available kelas for mahasiswa
-@mahasiswa_router.get("/kelas-tersedia", response_model=List[KelasResponse])
+@mahasiswa_router.get("/kelas-tersedia", response_model=List[KelasTersediaResponse])
 async def get_available_kelas(
     tahun_akademik_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
@@ -2001,25 +3072,45 @@ async def get_available_kelas(
     
     items = await db.kelas.find(query, {"_id": 0}).to_list(500)
     
+    mk_map = await find_by_ids("mata_kuliah", (item["mata_kuliah_id"] for item in items), {"nama": 1})
+    dosen_map = await find_by_ids("dosen", (item["dosen_id"] for item in items), {"nama": 1})
+    # Count enrolled students
+    krs_counts = await count_by("krs", "kelas_id", {
+        "kelas_id": {"$in": [item["id"] for item in items]},
+        "status": {"$in": list(KRS_COMMITTED_STATUSES)}
+    }) if items else {}
+    
+    # Student's weekly bitmap; each offer is then checked with one AND
+    occupancy, taken_ids, taken_mask = None, [], 0
+    if current_user["role"] == "mahasiswa" and query.get("tahun_akademik_id"):
+        mhs = await db.mahasiswa.find_one({"user_id": current_user["id"]}, {"_id": 0, "id": 1})
+        if mhs:
+            taken = await db.krs.find({
+                "mahasiswa_id": mhs["id"],
+                "tahun_akademik_id": query["tahun_akademik_id"],
+                "status": {"$in": list(KRS_COMMITTED_STATUSES)}
+            }, {"_id": 0, "kelas_id": 1}).to_list(None)
+            taken_ids = [krs["kelas_id"] for krs in taken]
+        if taken_ids:
+            occupancy = await get_jadwal_occupancy(query["tahun_akademik_id"])
+            taken_mask = occupancy.weekly_mask(taken_ids)
+    
     result = []
     for item in items:
-        mk = await db.mata_kuliah.find_one({"id": item["mata_kuliah_id"]}, {"_id": 0})
-        dosen = await db.dosen.find_one({"id": item["dosen_id"]}, {"_id": 0})
-        
-        # Count enrolled students
-        krs_count = await db.krs.count_documents({
-            "kelas_id": item["id"],
-            "status": {"$in": ["diajukan", "disetujui"]}
-        })
+        mk = mk_map.get(item["mata_kuliah_id"])
+        dosen = dosen_map.get(item["dosen_id"])
+        clashes = occupancy.clashes(item["id"], taken_ids, taken_mask) if occupancy else []
         
-        result.append(KelasResponse(
+        result.append({
             **item,
-            mata_kuliah_nama=mk["nama"] if mk else None,
-            dosen_nama=dosen["nama"] if dosen else None,
-            jumlah_peserta=krs_count
-        ))
+            "mata_kuliah_nama": mk["nama"] if mk else None,
+            "dosen_nama": dosen["nama"] if dosen else None,
+            "jumlah_peserta": krs_counts.get(item["id"], 0),
+            "bentrok": bool(clashes),
+            "bentrok_dengan": [k["kode_kelas"] for k in clashes]
+        })
     
-    return result
+    return trusted_list_response(KelasTersediaResponse, result)
 
 # Admin or Dosen PA approve/reject KRS
 @akademik_router.put("/krs/{item_id}/approve")
@@ -2029,7 +3120,13 @@ async def approve_krs(
 ):
     # Check if admin or dosen PA
     if current_user["role"] == "admin":
-        await db.krs.update_one({"id": item_id}, {"$set": {"status": "disetujui", "approved_by": current_user["id"]}})
+        krs = await db.krs.find_one_and_update(
+            {"id": item_id},
+            {"$set": {"status": "disetujui", "approved_by": current_user["id"]}},
+            projection={"_id": 0, "mahasiswa_id": 1}
+        )
+        if krs:
+            await krs_changed(krs["mahasiswa_id"])
         return {"message": "KRS disetujui"}
     
     if current_user["role"] == "dosen":
@@ -2048,6 +3145,7 @@ async def approve_krs(
             raise HTTPException(status_code=403, detail="Anda bukan Dosen PA mahasiswa ini")
         
         await db.krs.update_one({"id": item_id}, {"$set": {"status": "disetujui", "approved_by": current_user["id"]}})
+        await krs_changed(krs["mahasiswa_id"])
         return {"message": "KRS disetujui oleh Dosen PA"}
     
     raise HTTPException(status_code=403, detail="Akses ditolak")
@@ -2063,7 +3161,13 @@ async def reject_krs(
         update_data = {"status": "ditolak", "rejected_by": current_user["id"]}
         if catatan:
             update_data["catatan_penolakan"] = catatan
-        await db.krs.update_one({"id": item_id}, {"$set": update_data})
+        krs = await db.krs.find_one_and_update(
+            {"id": item_id},
+            {"$set": update_data},
+            projection={"_id": 0, "mahasiswa_id": 1}
+        )
+        if krs:
+            await krs_changed(krs["mahasiswa_id"])
         return {"message": "KRS ditolak"}
     
     if current_user["role"] == "dosen":
@@ -2084,6 +3188,7 @@ async def reject_krs(
         if catatan:
             update_data["catatan_penolakan"] = catatan
         await db.krs.update_one({"id": item_id}, {"$set": update_data})
+        await krs_changed(krs["mahasiswa_id"])
         return {"message": "KRS ditolak oleh Dosen PA"}
     
     raise HTTPException(status_code=403, detail="Akses ditolak")
@@ -2106,26 +3211,31 @@ async def get_all_krs(
     
     items = await db.krs.find(query, {"_id": 0}).to_list(1000)
     
+    kelas_map = await find_by_ids("kelas", (item["kelas_id"] for item in items))
+    mahasiswa_map = await find_by_ids("mahasiswa", (item["mahasiswa_id"] for item in items), {"nim": 1, "nama": 1})
+    mk_map = await find_by_ids("mata_kuliah", (k["mata_kuliah_id"] for k in kelas_map.values()))
+    dosen_map = await find_by_ids("dosen", (k["dosen_id"] for k in kelas_map.values()), {"nama": 1})
+    
     result = []
     for item in items:
-        kelas = await db.kelas.find_one({"id": item["kelas_id"]}, {"_id": 0})
-        mahasiswa = await db.mahasiswa.find_one({"id": item["mahasiswa_id"]}, {"_id": 0})
+        kelas = kelas_map.get(item["kelas_id"])
+        mahasiswa = mahasiswa_map.get(item["mahasiswa_id"])
         if kelas:
-            mk = await db.mata_kuliah.find_one({"id": kelas["mata_kuliah_id"]}, {"_id": 0})
-            dosen = await db.dosen.find_one({"id": kelas["dosen_id"]}, {"_id": 0})
+            mk = mk_map.get(kelas["mata_kuliah_id"])
+            dosen = dosen_map.get(kelas["dosen_id"])
             
-            result.append(KRSResponse(
+            result.append({
                 **item,
-                mata_kuliah_nama=mk["nama"] if mk else None,
-                kode_mk=mk["kode"] if mk else None,
-                sks=(mk.get("sks_teori", 0) + mk.get("sks_praktik", 0)) if mk else 0,
-                dosen_nama=dosen["nama"] if dosen else None,
-                jadwal=kelas.get("jadwal"),
-                mahasiswa_nim=mahasiswa["nim"] if mahasiswa else None,
-                mahasiswa_nama=mahasiswa["nama"] if mahasiswa else None
-            ))
+                "mata_kuliah_nama": mk["nama"] if mk else None,
+                "kode_mk": mk["kode"] if mk else None,
+                "sks": (mk.get("sks_teori", 0) + mk.get("sks_praktik", 0)) if mk else 0,
+                "dosen_nama": dosen["nama"] if dosen else None,
+                "jadwal": kelas.get("jadwal"),
+                "mahasiswa_nim": mahasiswa["nim"] if mahasiswa else None,
+                "mahasiswa_nama": mahasiswa["nama"] if mahasiswa else None
+            })
     
-    return result
+    return trusted_list_response(KRSResponse, result)
 
 # ==================== NILAI ROUTES ====================
 
@@ -2150,14 +3260,14 @@ async def get_my_kelas(
         mk = await db.mata_kuliah.find_one({"id": item["mata_kuliah_id"]}, {"_id": 0})
         krs_count = await db.krs.count_documents({"kelas_id": item["id"], "status": "disetujui"})
         
-        result.append(KelasResponse(
+        result.append({
             **item,
-            mata_kuliah_nama=mk["nama"] if mk else None,
-            dosen_nama=dosen["nama"],
-            jumlah_peserta=krs_count
-        ))
+            "mata_kuliah_nama": mk["nama"] if mk else None,
+            "dosen_nama": dosen["nama"],
+            "jumlah_peserta": krs_count
+        })
     
-    return result
+    return trusted_list_response(KelasResponse, result)
 
 # Dosen PA - Get mahasiswa bimbingan
 @dosen_router.get("/mahasiswa-bimbingan")
@@ -2316,6 +3426,7 @@ async def input_nilai(
     else:
         nilai_doc["id"] = str(uuid.uuid4())
         await db.nilai.insert_one(nilai_doc)
+    await invalidate_student_cache(data.mahasiswa_id)
     
     return {"message": "Nilai berhasil disimpan", "nilai_huruf": nilai_huruf, "nilai_akhir": round(nilai_akhir, 2)}
 
@@ -2326,6 +3437,11 @@ async def get_khs(
     tahun_akademik_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
+    cache_key = ("khs", tahun_akademik_id)
+    cache_version = await get_student_cache_version(current_user)
+    if cached := get_student_cache(current_user, cache_version, cache_key):
+        return cached
+    
     mhs = await db.mahasiswa.find_one({"user_id": current_user["id"]}, {"_id": 0})
     if not mhs:
         raise HTTPException(status_code=404, detail="Data mahasiswa tidak ditemukan")
@@ -2364,15 +3480,20 @@ async def get_khs(
     
     ips = round(total_bobot / total_sks, 2) if total_sks > 0 else 0
     
-    return {
+    return set_student_cache(current_user, cache_version, cache_key, {
         "mahasiswa": {"nim": mhs["nim"], "nama": mhs["nama"]},
         "nilai": result,
         "total_sks": total_sks,
         "ips": ips
-    }
+    })
 
 @mahasiswa_router.get("/transkrip")
 async def get_transkrip(current_user: dict = Depends(get_current_user)):
+    cache_key = ("transkrip",)
+    cache_version = await get_student_cache_version(current_user)
+    if cached := get_student_cache(current_user, cache_version, cache_key):
+        return cached
+    
     mhs = await db.mahasiswa.find_one({"user_id": current_user["id"]}, {"_id": 0})
     if not mhs:
         raise HTTPException(status_code=404, detail="Data mahasiswa tidak ditemukan")
@@ -2420,7 +3541,7 @@ async def get_transkrip(current_user: dict = Depends(get_current_user)):
     
     prodi = await db.prodi.find_one({"id": mhs["prodi_id"]}, {"_id": 0})
     
-    return {
+    return set_student_cache(current_user, cache_version, cache_key, {
         "mahasiswa": {
             "nim": mhs["nim"],
             "nama": mhs["nama"],
@@ -2430,8 +3551,79 @@ async def get_transkrip(current_user: dict = Depends(get_current_user)):
         "nilai": result,
         "total_sks": total_sks,
         "ipk": ipk
+    })
+
+# ==================== BOOTSTRAP ====================
+
+# (role, prodi_id, fakultas_id, versi koleksi) -> access + master data
+bootstrap_cache: Dict[tuple, dict] = {}
+
+async def build_bootstrap_data(current_user: dict) -> dict:
+    """Access scope and master data, filtered the same way as the individual endpoints"""
+    role = current_user.get("role")
+    accessible_prodis = await get_accessible_prodi_ids(current_user)
+    accessible_fakultas = await get_accessible_fakultas_ids(current_user)
+    
+    tahun_akademik = await db.tahun_akademik.find({}, {"_id": 0}).sort("tahun", -1).to_list(100)
+    fakultas = await db.fakultas.find({}, {"_id": 0}).sort("nama", 1).to_list(100)
+    prodi = await db.prodi.find({}, {"_id": 0}).sort("nama", 1).to_list(100)
+    kategori_ukt = await db.kategori_ukt.find({}, {"_id": 0}).sort("nominal", 1).to_list(100)
+    
+    fakultas_nama = {f["id"]: f["nama"] for f in fakultas}
+    for item in prodi:
+        item["fakultas_nama"] = fakultas_nama.get(item.get("fakultas_id"))
+    
+    access_prodi = prodi if accessible_prodis is None else [p for p in prodi if p["id"] in accessible_prodis]
+    access_fakultas = fakultas if accessible_fakultas is None else [f for f in fakultas if f["id"] in accessible_fakultas]
+    
+    return {
+        "access": {
+            "role": role,
+            "has_full_access": role in ALL_ACCESS_ROLES,
+            "is_management": role in MANAGEMENT_ROLES,
+            "accessible_prodi": access_prodi,
+            "accessible_fakultas": access_fakultas,
+            "prodi_id": current_user.get("prodi_id"),
+            "fakultas_id": current_user.get("fakultas_id")
+        },
+        "tahun_akademik_aktif": next((ta for ta in tahun_akademik if ta.get("is_active")), None),
+        "master": {
+            "tahun_akademik": project_rows(TahunAkademikResponse, tahun_akademik),
+            "fakultas": project_rows(FakultasResponse, fakultas),
+            # Sama seperti GET /master/prodi: hanya role management yang dibatasi
+            "prodi": project_rows(ProdiResponse, access_prodi if role in MANAGEMENT_ROLES else prodi),
+            "kategori_ukt": project_rows(KategoriUKTResponse, kategori_ukt),
+        }
     }
 
+@api_router.get("/bootstrap")
+async def get_bootstrap(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Everything the frontend needs for first paint in one response: user,
+    access scope, active tahun akademik and master data. The data part is
+    cached per access scope and collection versions; the ETag also covers
+    the user profile, so a matching If-None-Match costs no extra queries.
+    """
+    user = build_user_response(current_user).model_dump()
+    versions = await get_collection_versions(*BOOTSTRAP_COLLECTIONS)
+    cache_key = (current_user.get("role"), current_user.get("prodi_id"), current_user.get("fakultas_id"), versions)
+    etag = f'"{hashlib.sha1(orjson.dumps([cache_key, user])).hexdigest()[:24]}"'
+    if not_modified := not_modified_response(request, etag):
+        return not_modified
+    
+    data = bootstrap_cache.get(cache_key)
+    record_cache("bootstrap", data is not None)
+    if data is None:
+        data = await build_bootstrap_data(current_user)
+        if len(bootstrap_cache) >= BOOTSTRAP_CACHE_MAX:
+            bootstrap_cache.clear()
+        bootstrap_cache[cache_key] = data
+    
+    return ORJSONResponse(
+        {"user": user, **data},
+        headers={"ETag": etag, "Cache-Control": MASTER_DATA_CACHE_CONTROL}
+    )
+
 # ==================== DASHBOARD ====================
 
 @api_router.get("/dashboard/stats", response_model=DashboardStats)
@@ -2485,31 +3677,26 @@ async def get_users(current_user: dict = Depends(get_current_user)):
                 {"role": {"$in": ["admin", "rektor"]}}  # Always show admin/rektor for reference
             ]}
     
-    users = await db.users.find(query, {"_id": 0, "password": 0}).to_list(500)
+    users = await db.users.find(
+        query, {"_id": 0, "password": 0, "kalender_token": 0, "student_cache_version": 0}
+    ).to_list(500)
     
     # Enrich with prodi_nama and fakultas_nama
+    prodi_map = await find_by_ids("prodi", (u.get("prodi_id") for u in users), {"nama": 1})
+    fakultas_map = await find_by_ids("fakultas", (u.get("fakultas_id") for u in users), {"nama": 1})
+    
     result = []
     for u in users:
-        prodi_nama = None
-        fakultas_nama = None
-        
-        if u.get("prodi_id"):
-            prodi = await db.prodi.find_one({"id": u["prodi_id"]}, {"_id": 0})
-            if prodi:
-                prodi_nama = prodi.get("nama")
-        
-        if u.get("fakultas_id"):
-            fakultas = await db.fakultas.find_one({"id": u["fakultas_id"]}, {"_id": 0})
-            if fakultas:
-                fakultas_nama = fakultas.get("nama")
+        prodi_nama = prodi_map.get(u.get("prodi_id"), {}).get("nama")
+        fakultas_nama = fakultas_map.get(u.get("fakultas_id"), {}).get("nama")
         
         # If user doesn't have modules_access, use default based on role
         if not u.get("modules_access"):
             u["modules_access"] = DEFAULT_MODULES_BY_ROLE.get(u.get("role"), [])
         
-        result.append(UserResponse(**u, prodi_nama=prodi_nama, fakultas_nama=fakultas_nama))
+        result.append({**sign_upload_fields(u, "foto_profil"), "prodi_nama": prodi_nama, "fakultas_nama": fakultas_nama})
     
-    return result
+    return trusted_list_response(UserResponse, result)
 
 @api_router.get("/users/available-modules")
 async def get_available_modules(current_user: dict = Depends(get_current_user)):
@@ -2724,12 +3911,626 @@ def parse_time(time_str: str) -> int:
     h, m = map(int, time_str.split(':'))
     return h * 60 + m
 
+def format_time(minutes: int) -> str:
+    """Minutes from midnight back to HH:MM"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
 def check_time_overlap(start1: str, end1: str, start2: str, end2: str) -> bool:
     """Check if two time ranges overlap"""
     s1, e1 = parse_time(start1), parse_time(end1)
     s2, e2 = parse_time(start2), parse_time(end2)
     return s1 < e2 and s2 < e1
 
+DAY_ORDER = {"Senin": 1, "Selasa": 2, "Rabu": 3, "Kamis": 4, "Jumat": 5, "Sabtu": 6, "Minggu": 7}
+
+def sort_jadwal(rows: List[dict]) -> List[dict]:
+    """Sort schedule rows in place by weekday, then start time; unknown days last"""
+    rows.sort(key=lambda x: (DAY_ORDER.get(x["hari"], 8), x["jam_mulai"]))
+    return rows
+
+def jadwal_span(jam_mulai: str, jam_selesai: str) -> Tuple[int, int]:
+    """Validated (menit_mulai, menit_selesai) of a schedule slot from request input"""
+    try:
+        start, end = parse_time(jam_mulai), parse_time(jam_selesai)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format jam harus HH:MM")
+    if not 0 <= start < end <= 24 * 60:
+        raise HTTPException(status_code=400, detail="Jam selesai harus setelah jam mulai")
+    return start, end
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+def slot_mask(hari: str, start: int, end: int) -> int:
+    """
+    Weekly bitmap (7 x 288 five-minute slots, bit 0 = Senin 00:00) of the
+    slots touched by [start, end) on hari. Rounded outward, so a non-zero AND
+    of two masks still needs an exact minute check; 0 for an unknown day.
+    """
+    day = DAY_ORDER.get(hari)
+    if day is None:
+        return 0
+    first, last = start // SLOT_MINUTES, -(-end // SLOT_MINUTES)
+    return ((1 << (last - first)) - 1) << ((day - 1) * SLOTS_PER_DAY + first)
+
+def kelas_span(kelas: dict) -> Optional[Tuple[int, int]]:
+    """Stored minutes of a kelas or session; parsed from jam_* for rows written before they existed"""
+    if "menit_mulai" in kelas and "menit_selesai" in kelas:
+        return kelas["menit_mulai"], kelas["menit_selesai"]
+    try:
+        return parse_time(kelas["jam_mulai"]), parse_time(kelas["jam_selesai"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def kelas_sessions(kelas: dict) -> List[dict]:
+    """
+    Weekly sessions of a kelas as flat rows: the kelas fields with hari, jam,
+    menit and ruangan of each session. Kelas without sesi (stored before it
+    existed) have their single top-level slot; invalid sessions are skipped.
+    """
+    rows = []
+    for sesi in kelas.get("sesi") or [kelas]:
+        span = kelas_span(sesi)
+        if not sesi.get("hari") or span is None:
+            continue
+        rows.append({
+            **kelas,
+            "hari": sesi["hari"],
+            "jam_mulai": sesi.get("jam_mulai") or format_time(span[0]),
+            "jam_selesai": sesi.get("jam_selesai") or format_time(span[1]),
+            "menit_mulai": span[0],
+            "menit_selesai": span[1],
+            "ruangan": sesi.get("ruangan"),
+        })
+    return rows
+
+def sesi_fields(sesi: List[dict]) -> dict:
+    """
+    kelas fields for a session list: sesi sorted by day and start, with the
+    first session mirrored in hari/jam_*/menit_*/ruangan for older readers
+    and every session in the jadwal label.
+    """
+    sesi = sort_jadwal(list(sesi))
+    first = sesi[0]
+    return {
+        "sesi": sesi,
+        "hari": first["hari"],
+        "jam_mulai": first["jam_mulai"],
+        "jam_selesai": first["jam_selesai"],
+        "menit_mulai": first["menit_mulai"],
+        "menit_selesai": first["menit_selesai"],
+        "ruangan": first.get("ruangan"),
+        "jadwal": ", ".join(f"{s['hari']} {s['jam_mulai']}-{s['jam_selesai']}" for s in sesi),
+    }
+
+# ----- Conflict engine -----
+
+class IntervalIndex:
+    """
+    Intervals [start, end) grouped per key, sorted by start.
+
+    overlapping() bisects the first interval that starts at or after the
+    query end, then walks left while the running max end still reaches past
+    the query start: O(log n + k). The running max keeps it correct for rows
+    that already collide with each other (data from before conflict checks
+    covered every same-day class).
+    """
+
+    def __init__(self):
+        self.rows: Dict[Any, list] = {}
+        self.built: Dict[Any, tuple] = {}
+
+    def add(self, key: Any, start: int, end: int, item: Any):
+        self.rows.setdefault(key, []).append((start, end, item))
+        if self.built:
+            self.built.pop(key, None)
+
+    def _sorted(self, key: Any) -> tuple:
+        built = self.built.get(key)
+        if built is None:
+            rows = sorted(self.rows.get(key, ()), key=lambda r: (r[0], r[1]))
+            max_end, running = [], -1
+            for _, end, _ in rows:
+                running = max(running, end)
+                max_end.append(running)
+            built = self.built[key] = ([r[0] for r in rows], max_end, rows)
+        return built
+
+    def overlapping(self, key: Any, start: int, end: int) -> list:
+        """Items of key whose interval intersects [start, end), ordered by start"""
+        starts, max_end, rows = self._sorted(key)
+        hits = []
+        i = bisect_left(starts, end) - 1
+        while i >= 0 and max_end[i] > start:
+            if rows[i][1] > start:
+                hits.append(rows[i][2])
+            i -= 1
+        hits.reverse()
+        return hits
+
+    def keys(self):
+        return self.rows.keys()
+
+    def intervals(self, key: Any) -> list:
+        """(start, end, item) of key, sorted by start"""
+        return self._sorted(key)[2]
+
+    def overlapping_pairs(self) -> Iterator[Tuple[Any, Any, Any]]:
+        """
+        (key, earlier, later) for every colliding pair, each as its
+        (start, end, item) row: one sweep per key with a min-heap of active
+        end times, O(n log n + k) overall.
+        """
+        for key, rows in self.rows.items():
+            if len(rows) < 2:
+                continue
+            active = []
+            for seq, (start, end, item) in enumerate(sorted(rows, key=lambda r: (r[0], r[1]))):
+                while active and active[0][0] <= start:
+                    heappop(active)
+                for other_end, _, other_start, other in active:
+                    yield key, (other_start, other_end, other), (start, end, item)
+                heappush(active, (end, seq, start, item))
+
+class JadwalOccupancy:
+    """
+    Room and dosen occupancy of one semester, keyed (ruangan, hari) /
+    (dosen_id, hari). Every session of a kelas is indexed on its own; the
+    items returned are session rows (see kelas_sessions).
+    """
+
+    def __init__(self, kelas_list: List[dict]):
+        self.ruangan = IntervalIndex()
+        self.dosen = IntervalIndex()
+        # Hanya kelas yang punya minimal satu sesi valid, per id
+        self.kelas: Dict[str, dict] = {}
+        self.sessions: Dict[str, List[dict]] = {}
+        # kelas_id -> slot_mask, diisi saat pertama dipakai
+        self.masks: Dict[str, int] = {}
+        # ruangan -> gabungan slot_mask semua sesi di ruangan itu
+        self.room_masks: Dict[str, int] = {}
+        for kelas in kelas_list:
+            sessions = kelas_sessions(kelas)
+            if not sessions:
+                continue
+            self.kelas[kelas["id"]] = kelas
+            self.sessions[kelas["id"]] = sessions
+            for sesi in sessions:
+                span = sesi["menit_mulai"], sesi["menit_selesai"]
+                if sesi["ruangan"]:
+                    self.ruangan.add((sesi["ruangan"], sesi["hari"]), *span, sesi)
+                    self.room_masks[sesi["ruangan"]] = self.room_masks.get(sesi["ruangan"], 0) | slot_mask(sesi["hari"], *span)
+                self.dosen.add((kelas["dosen_id"], sesi["hari"]), *span, sesi)
+
+    def conflicts(
+        self,
+        hari: str,
+        start: int,
+        end: int,
+        dosen_id: Optional[str] = None,
+        ruangan: Optional[str] = None,
+        exclude_kelas_id: Optional[str] = None,
+    ) -> List[Tuple[str, dict]]:
+        """("room" | "dosen", kelas) for every class that collides with the slot"""
+        found = []
+        if ruangan:
+            found += [("room", k) for k in self.ruangan.overlapping((ruangan, hari), start, end)]
+        if dosen_id:
+            found += [("dosen", k) for k in self.dosen.overlapping((dosen_id, hari), start, end)]
+        return [(kind, k) for kind, k in found if k["id"] != exclude_kelas_id]
+
+    def free_rooms(
+        self, rooms: List[dict], hari: str, start: int, end: int, exclude_kelas_id: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Rooms (master data rows, matched on nama) that no class uses during
+        [start, end) on hari, in input order. One AND per room settles most
+        of them; only a hit is confirmed on exact minutes.
+        """
+        mask = slot_mask(hari, start, end)
+        free = []
+        for room in rooms:
+            if self.room_masks.get(room["nama"], 0) & mask and any(
+                k["id"] != exclude_kelas_id for k in self.ruangan.overlapping((room["nama"], hari), start, end)
+            ):
+                continue
+            free.append(room)
+        return free
+
+    def mask(self, kelas_id: str) -> int:
+        """Weekly slot bitmap of all sessions of a kelas; 0 if it has no valid schedule"""
+        mask = self.masks.get(kelas_id)
+        if mask is None:
+            mask = 0
+            for sesi in self.sessions.get(kelas_id, ()):
+                mask |= slot_mask(sesi["hari"], sesi["menit_mulai"], sesi["menit_selesai"])
+            self.masks[kelas_id] = mask
+        return mask
+
+    def weekly_mask(self, kelas_ids) -> int:
+        """Combined bitmap of a student's classes"""
+        mask = 0
+        for kelas_id in kelas_ids:
+            mask |= self.mask(kelas_id)
+        return mask
+
+    def clashes(self, kelas_id: str, taken_ids: List[str], taken_mask: Optional[int] = None) -> List[dict]:
+        """
+        Classes in taken_ids that overlap any session of kelas_id, each as its
+        first clashing session row. The bitmap AND settles the common
+        no-clash case; only a hit is confirmed on exact minutes.
+        """
+        if taken_mask is None:
+            taken_mask = self.weekly_mask(taken_ids)
+        if not self.mask(kelas_id) & taken_mask:
+            return []
+        sessions = self.sessions[kelas_id]
+        found = []
+        for other_id in taken_ids:
+            if other_id == kelas_id:
+                continue
+            for other in self.sessions.get(other_id, ()):
+                if any(
+                    sesi["hari"] == other["hari"] and sesi["menit_mulai"] < other["menit_selesai"]
+                    and other["menit_mulai"] < sesi["menit_selesai"] for sesi in sessions
+                ):
+                    found.append(other)
+                    break
+        return found
+
+
+def audit_jadwal(occupancy: JadwalOccupancy, krs_rows: List[dict]) -> List[dict]:
+    """
+    Every overlapping pair of a semester, per room, per dosen and per student.
+
+    krs_rows are the approved KRS (mahasiswa_id, kelas_id) of the semester;
+    KRS for kelas without a valid schedule are ignored.
+    """
+    mahasiswa = IntervalIndex()
+    seen = set()  # KRS ganda untuk kelas yang sama dihitung sekali
+    for krs in krs_rows:
+        pair = (krs["mahasiswa_id"], krs["kelas_id"])
+        if pair in seen:
+            continue
+        seen.add(pair)
+        for sesi in occupancy.sessions.get(krs["kelas_id"], ()):
+            mahasiswa.add((krs["mahasiswa_id"], sesi["hari"]), sesi["menit_mulai"], sesi["menit_selesai"], sesi)
+
+    conflicts = []
+    for kind, index in (("room", occupancy.ruangan), ("dosen", occupancy.dosen), ("mahasiswa", mahasiswa)):
+        for (key, hari), (start_a, end_a, a), (start_b, end_b, b) in index.overlapping_pairs():
+            conflicts.append({
+                "type": kind, "key": key, "hari": hari, "kelas_a": a, "kelas_b": b,
+                "overlap_mulai": start_b, "overlap_selesai": min(end_a, end_b),
+            })
+    return conflicts
+
+def common_free_slots(
+    occupancy: JadwalOccupancy,
+    busy_kelas_ids,
+    rooms: List[dict],
+    hari_list: List[str],
+    window: Tuple[int, int],
+    durasi: int,
+    langkah: int,
+    preferred_start: Optional[int] = None,
+    exclude_kelas_id: Optional[str] = None,
+) -> List[dict]:
+    """
+    Slots of durasi minutes, every langkah minutes within window on each of
+    hari_list, during which none of busy_kelas_ids meets and at least one of
+    rooms is free (exclude_kelas_id's own sessions do not occupy a room);
+    each with its free rooms in input order.
+
+    The busy sessions are unioned into one weekly bitmap, so most candidates
+    are settled with one AND; only a hit is confirmed on exact minutes.
+    Ranked by distance from preferred_start (the regular start time), then
+    day and start.
+    """
+    busy = IntervalIndex()
+    busy_mask = 0
+    for kelas_id in set(busy_kelas_ids):
+        busy_mask |= occupancy.mask(kelas_id)
+        for sesi in occupancy.sessions.get(kelas_id, ()):
+            busy.add(sesi["hari"], sesi["menit_mulai"], sesi["menit_selesai"], sesi)
+
+    slots = []
+    for hari in hari_list:
+        for start in range(window[0], window[1] - durasi + 1, langkah):
+            end = start + durasi
+            if slot_mask(hari, start, end) & busy_mask and busy.overlapping(hari, start, end):
+                continue
+            free = occupancy.free_rooms(rooms, hari, start, end, exclude_kelas_id=exclude_kelas_id)
+            if free:
+                slots.append({"hari": hari, "menit_mulai": start, "menit_selesai": end, "ruangan": free})
+    slots.sort(key=lambda s: (
+        abs(s["menit_mulai"] - preferred_start) if preferred_start is not None else 0,
+        DAY_ORDER[s["hari"]],
+        s["menit_mulai"],
+    ))
+    return slots
+
+JADWAL_OCCUPANCY_PROJECTION = {
+    "_id": 0, "id": 1, "kode_kelas": 1, "mata_kuliah_id": 1, "dosen_id": 1, "ruangan": 1,
+    "hari": 1, "jam_mulai": 1, "jam_selesai": 1, "menit_mulai": 1, "menit_selesai": 1, "sesi": 1,
+}
+JADWAL_OCCUPANCY_MAX_SEMESTERS = 8
+JADWAL_SESI_FIELDS = ("hari", "jam_mulai", "jam_selesai", "menit_mulai", "menit_selesai", "ruangan")
+
+# tahun_akademik_id -> (versi koleksi kelas saat dimuat, JadwalOccupancy)
+jadwal_occupancy_cache: Dict[str, Tuple[int, JadwalOccupancy]] = {}
+
+async def get_kelas_version() -> int:
+    """Current kelas version straight from the database"""
+    doc = await db.collection_versions.find_one({"collection": "kelas"}, {"_id": 0, "version": 1})
+    return doc["version"] if doc else 0
+
+async def get_jadwal_occupancy(tahun_akademik_id: str) -> JadwalOccupancy:
+    """
+    Occupancy of a semester, rebuilt only when the kelas collection changed.
+
+    The version is read from db.collection_versions on every call: a write in
+    another worker must be visible to the next conflict check. Read before
+    loading, so a write that races the load only causes one extra rebuild.
+    """
+    version = await get_kelas_version()
+    cached = jadwal_occupancy_cache.get(tahun_akademik_id)
+    if cached and cached[0] == version:
+        record_cache("jadwal_occupancy", True)
+        return cached[1]
+    record_cache("jadwal_occupancy", False)
+
+    kelas_list = await db.kelas.find(
+        {"tahun_akademik_id": tahun_akademik_id, "hari": {"$exists": True}}, JADWAL_OCCUPANCY_PROJECTION
+    ).to_list(None)
+    occupancy = JadwalOccupancy(kelas_list)
+    if tahun_akademik_id not in jadwal_occupancy_cache and len(jadwal_occupancy_cache) >= JADWAL_OCCUPANCY_MAX_SEMESTERS:
+        del jadwal_occupancy_cache[next(iter(jadwal_occupancy_cache))]
+    jadwal_occupancy_cache[tahun_akademik_id] = (version, occupancy)
+    return occupancy
+
+async def kelas_changed():
+    """Call after every write to db.kelas that touches schedule, room, dosen or semester"""
+    await bump_collection_version("kelas")
+
+async def backfill_kelas_sesi():
+    """Store sesi (and menit_mulai/menit_selesai) on scheduled kelas written before they existed"""
+    legacy = await db.kelas.find(
+        {"sesi": {"$exists": False}, "hari": {"$exists": True}},
+        {"_id": 0, "id": 1, "hari": 1, "jam_mulai": 1, "jam_selesai": 1, "menit_mulai": 1, "menit_selesai": 1, "ruangan": 1}
+    ).to_list(None)
+    ops = []
+    for kelas in legacy:
+        sessions = kelas_sessions(kelas)
+        if sessions:
+            sesi = [{key: row[key] for key in JADWAL_SESI_FIELDS} for row in sessions]
+            ops.append(UpdateOne({"id": kelas["id"]}, {"$set": {
+                "sesi": sesi, "menit_mulai": sesi[0]["menit_mulai"], "menit_selesai": sesi[0]["menit_selesai"]
+            }}))
+    if ops:
+        await db.kelas.bulk_write(ops, ordered=False)
+        await bump_collection_version("kelas")
+        logger.info(f"Backfilled sesi on {len(ops)} kelas")
+
+# ----- Timetable solver -----
+
+def solve_jadwal(problem: dict, seed: int) -> dict:
+    """
+    Assign (hari, menit_mulai, ruangan) to every kelas of problem; runs in a
+    worker process, so problem and the result are plain data.
+
+    Greedy, most constrained class first (longest, largest kuota, busiest
+    dosen), each into the least used feasible start time and the smallest
+    room that fits. Room and dosen occupancy are weekly slot bitmaps, so a
+    candidate costs two ANDs. Classes left over are repaired by moving one
+    blocking class elsewhere. Items sharing a grup (the sessions of one
+    multi-session kelas) go on different days. seed breaks ties, so
+    parallel attempts explore different orders.
+    """
+    rng = random.Random(seed)
+    day_start, day_end = problem["window"]
+    rooms = sorted(problem["ruangan"], key=lambda r: (r["kapasitas"], r["nama"]))
+    fixed_room = {r["nama"]: problem["room_busy"].get(r["nama"], 0) for r in rooms}
+    fixed_dosen = problem["dosen_busy"]
+    room_busy = dict(fixed_room)
+    dosen_busy = dict(fixed_dosen)
+    kelas_by_id = {k["id"]: k for k in problem["kelas"]}
+
+    dosen_load: Dict[str, int] = {}
+    for k in problem["kelas"]:
+        dosen_load[k["dosen_id"]] = dosen_load.get(k["dosen_id"], 0) + k["durasi"]
+
+    fitting = {k["id"]: [r["nama"] for r in rooms if r["kapasitas"] >= k["kuota"]] for k in problem["kelas"]}
+    starts_by_durasi: Dict[int, list] = {}
+    masks: Dict[tuple, int] = {}
+    day_use: Dict[str, int] = {}
+    # kelas_id -> (hari, start, ruangan, mask)
+    assigned: Dict[str, tuple] = {}
+    by_room: Dict[str, set] = {}
+    by_dosen: Dict[str, set] = {}
+    # grup -> hari yang sudah dipakai sesi lain dari kelas yang sama
+    group_days: Dict[str, list] = {}
+
+    def options(durasi: int) -> list:
+        if durasi not in starts_by_durasi:
+            starts_by_durasi[durasi] = [
+                (hari, start) for hari in problem["hari"]
+                for start in range(day_start, day_end - durasi + 1, problem["langkah"])
+            ]
+        return starts_by_durasi[durasi]
+
+    def mask_of(hari: str, start: int, durasi: int) -> int:
+        key = (hari, start, durasi)
+        if key not in masks:
+            masks[key] = slot_mask(hari, start, start + durasi)
+        return masks[key]
+
+    def commit(kelas: dict, hari: str, start: int, room: str, mask: int):
+        room_busy[room] |= mask
+        dosen_busy[kelas["dosen_id"]] = dosen_busy.get(kelas["dosen_id"], 0) | mask
+        assigned[kelas["id"]] = (hari, start, room, mask)
+        by_room.setdefault(room, set()).add(kelas["id"])
+        by_dosen.setdefault(kelas["dosen_id"], set()).add(kelas["id"])
+        day_use[hari] = day_use.get(hari, 0) + kelas["durasi"]
+        if kelas.get("grup"):
+            group_days.setdefault(kelas["grup"], []).append(hari)
+
+    def release(kelas: dict):
+        hari, start, room, mask = assigned.pop(kelas["id"])
+        room_busy[room] &= ~mask
+        dosen_busy[kelas["dosen_id"]] &= ~mask
+        by_room[room].discard(kelas["id"])
+        by_dosen[kelas["dosen_id"]].discard(kelas["id"])
+        day_use[hari] -= kelas["durasi"]
+        if kelas.get("grup"):
+            group_days[kelas["grup"]].remove(hari)
+
+    def ordered_options(kelas: dict) -> list:
+        # Hari paling sepi dulu, lalu jam paling awal: ruangan terisi rapat tanpa celah
+        day_rank = {h: (day_use.get(h, 0), rng.random()) for h in problem["hari"]}
+        taken = group_days.get(kelas.get("grup"), ())
+        return sorted(
+            (hs for hs in options(kelas["durasi"]) if hs[0] not in taken),
+            key=lambda hs: (day_rank[hs[0]], hs[1])
+        )
+
+    def place(kelas: dict) -> bool:
+        busy = dosen_busy.get(kelas["dosen_id"], 0)
+        for hari, start in ordered_options(kelas):
+            mask = mask_of(hari, start, kelas["durasi"])
+            if busy & mask:
+                continue
+            for room in fitting[kelas["id"]]:
+                if not room_busy[room] & mask:
+                    commit(kelas, hari, start, room, mask)
+                    return True
+        return False
+
+    order = sorted(
+        problem["kelas"],
+        key=lambda k: (-k["durasi"], -k["kuota"], -dosen_load[k["dosen_id"]], rng.random())
+    )
+    unplaced = [k for k in order if fitting[k["id"]] and options(k["durasi"]) and not place(k)]
+
+    # Repair: letakkan kelas sisa di slot yang hanya terhalang satu kelas,
+    # lalu pindahkan kelas penghalang itu ke slot lain
+    budget = problem["max_repair"]
+    still_unplaced = []
+    for kelas in unplaced:
+        placed = False
+        for hari, start in ordered_options(kelas):
+            if placed or budget <= 0:
+                break
+            mask = mask_of(hari, start, kelas["durasi"])
+            if fixed_dosen.get(kelas["dosen_id"], 0) & mask:
+                continue
+            dosen_blockers = {b for b in by_dosen.get(kelas["dosen_id"], ()) if assigned[b][3] & mask}
+            if len(dosen_blockers) > 1:
+                continue
+            for room in fitting[kelas["id"]]:
+                budget -= 1
+                if fixed_room[room] & mask:
+                    continue
+                blockers = dosen_blockers | {b for b in by_room.get(room, ()) if assigned[b][3] & mask}
+                if len(blockers) != 1:
+                    continue
+                blocker = kelas_by_id[blockers.pop()]
+                previous = assigned[blocker["id"]]
+                release(blocker)
+                commit(kelas, hari, start, room, mask)
+                if place(blocker):
+                    placed = True
+                    break
+                release(kelas)
+                commit(blocker, *previous)
+        if not placed:
+            still_unplaced.append(kelas)
+
+    unassigned = []
+    for kelas in problem["kelas"]:
+        if kelas["id"] in assigned:
+            continue
+        if not fitting[kelas["id"]]:
+            alasan = f"Tidak ada ruangan dengan kapasitas untuk kuota {kelas['kuota']}"
+        elif not options(kelas["durasi"]):
+            alasan = f"Durasi {kelas['durasi']} menit melebihi jam operasional"
+        else:
+            alasan = "Tidak ada slot yang bebas untuk dosen dan ruangan"
+        unassigned.append({"kelas_id": kelas["id"], "alasan": alasan})
+
+    return {
+        "seed": seed,
+        "assignments": [
+            {"kelas_id": kelas_id, "hari": hari, "menit_mulai": start,
+             "menit_selesai": start + kelas_by_id[kelas_id]["durasi"], "ruangan": room}
+            for kelas_id, (hari, start, room, _) in assigned.items()
+        ],
+        "unassigned": unassigned,
+    }
+
+solver_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_solver_process_pool() -> ProcessPoolExecutor:
+    global solver_process_pool
+    if solver_process_pool is None:
+        solver_process_pool = ProcessPoolExecutor(max_workers=JADWAL_SOLVER_WORKERS)
+    return solver_process_pool
+
+async def run_jadwal_solver(problem: dict) -> dict:
+    """Best of JADWAL_SOLVER_ATTEMPTS seeds: fewest unassigned classes"""
+    loop = asyncio.get_running_loop()
+    pool = get_solver_process_pool()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(pool, solve_jadwal, problem, seed) for seed in range(JADWAL_SOLVER_ATTEMPTS)
+    ))
+    return min(results, key=lambda r: (len(r["unassigned"]), r["seed"]))
+
+def jadwal_request_sesi(data: KelasJadwalCreate) -> List[dict]:
+    """Validated session docs of a jadwal request, sorted; sesi wins over the single hari/jam_* fields"""
+    items = data.sesi
+    if not items and data.hari and data.jam_mulai and data.jam_selesai:
+        items = [JadwalDetail(hari=data.hari, jam_mulai=data.jam_mulai, jam_selesai=data.jam_selesai)]
+    if not items:
+        raise HTTPException(status_code=400, detail="Jadwal minimal satu sesi")
+    
+    sesi = []
+    for item in items:
+        if item.hari not in DAY_ORDER:
+            raise HTTPException(status_code=400, detail=f"Hari tidak dikenal: {item.hari}")
+        start, end = jadwal_span(item.jam_mulai, item.jam_selesai)
+        sesi.append({
+            "hari": item.hari,
+            "jam_mulai": format_time(start),
+            "jam_selesai": format_time(end),
+            "menit_mulai": start,
+            "menit_selesai": end,
+            "ruangan": item.ruangan or data.ruangan,
+        })
+    sort_jadwal(sesi)
+    for a, b in zip(sesi, sesi[1:]):
+        if a["hari"] == b["hari"] and b["menit_mulai"] < a["menit_selesai"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Sesi kelas saling bentrok: {a['hari']} {a['jam_mulai']}-{a['jam_selesai']} dan {b['jam_mulai']}-{b['jam_selesai']}"
+            )
+    return sesi
+
+async def jadwal_conflicts(
+    sesi: List[dict], dosen_id: str, tahun_akademik_id: str, exclude_kelas_id: Optional[str] = None
+) -> List[str]:
+    """Room and dosen clash messages of a session list against the other kelas of the semester"""
+    occupancy = await get_jadwal_occupancy(tahun_akademik_id)
+    conflicts = []
+    for s in sesi:
+        for kind, kelas in occupancy.conflicts(
+            s["hari"], s["menit_mulai"], s["menit_selesai"], dosen_id, s.get("ruangan"), exclude_kelas_id=exclude_kelas_id
+        ):
+            if kind == "room":
+                conflicts.append(f"Ruangan {s['ruangan']} sudah digunakan ({s['hari']} {kelas['jam_mulai']}-{kelas['jam_selesai']})")
+            else:
+                conflicts.append(f"Dosen sudah mengajar pada waktu tersebut ({s['hari']} {kelas['jam_mulai']}-{kelas['jam_selesai']})")
+    return conflicts
+
 @akademik_router.post("/jadwal", response_model=KelasJadwalResponse)
 async def create_jadwal_kelas(
     data: KelasJadwalCreate,
@@ -2738,47 +4539,27 @@ async def create_jadwal_kelas(
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Akses ditolak")
     
-    # Check for conflicts
-    conflicts = []
-    
-    # 1. Check room conflict (same room, same day, overlapping time)
-    if data.ruangan:
-        room_conflict = await db.kelas.find_one({
-            "ruangan": data.ruangan,
-            "hari": data.hari,
-            "tahun_akademik_id": data.tahun_akademik_id,
-        }, {"_id": 0})
-        
-        if room_conflict and check_time_overlap(
-            data.jam_mulai, data.jam_selesai,
-            room_conflict.get("jam_mulai", "00:00"),
-            room_conflict.get("jam_selesai", "00:00")
-        ):
-            conflicts.append(f"Ruangan {data.ruangan} sudah digunakan pada {data.hari} {room_conflict['jam_mulai']}-{room_conflict['jam_selesai']}")
+    sesi = jadwal_request_sesi(data)
     
-    # 2. Check dosen conflict (same dosen, same day, overlapping time)
-    dosen_conflict = await db.kelas.find_one({
-        "dosen_id": data.dosen_id,
-        "hari": data.hari,
-        "tahun_akademik_id": data.tahun_akademik_id,
-    }, {"_id": 0})
-    
-    if dosen_conflict and check_time_overlap(
-        data.jam_mulai, data.jam_selesai,
-        dosen_conflict.get("jam_mulai", "00:00"),
-        dosen_conflict.get("jam_selesai", "00:00")
-    ):
-        dosen = await db.dosen.find_one({"id": data.dosen_id}, {"_id": 0})
-        dosen_nama = dosen["nama"] if dosen else "Dosen"
-        conflicts.append(f"{dosen_nama} sudah mengajar pada {data.hari} {dosen_conflict['jam_mulai']}-{dosen_conflict['jam_selesai']}")
+    # Check for conflicts: every session against every same-day class of the room and the dosen
+    occupancy = await get_jadwal_occupancy(data.tahun_akademik_id)
+    conflicts = []
+    dosen_nama = None
+    for s in sesi:
+        for kind, kelas in occupancy.conflicts(s["hari"], s["menit_mulai"], s["menit_selesai"], data.dosen_id, s["ruangan"]):
+            if kind == "room":
+                conflicts.append(f"Ruangan {s['ruangan']} sudah digunakan pada {s['hari']} {kelas['jam_mulai']}-{kelas['jam_selesai']}")
+            else:
+                if dosen_nama is None:
+                    dosen = await db.dosen.find_one({"id": data.dosen_id}, {"_id": 0, "nama": 1})
+                    dosen_nama = dosen["nama"] if dosen else "Dosen"
+                conflicts.append(f"{dosen_nama} sudah mengajar pada {s['hari']} {kelas['jam_mulai']}-{kelas['jam_selesai']}")
     
     if conflicts:
         raise HTTPException(status_code=400, detail={"message": "Terdapat konflik jadwal", "conflicts": conflicts})
     
     # Create kelas with jadwal
     kelas_id = str(uuid.uuid4())
-    jadwal_str = f"{data.hari} {data.jam_mulai}-{data.jam_selesai}"
-    
     doc = {
         "id": kelas_id,
         "kode_kelas": data.kode_kelas,
@@ -2786,15 +4567,12 @@ async def create_jadwal_kelas(
         "dosen_id": data.dosen_id,
         "tahun_akademik_id": data.tahun_akademik_id,
         "kuota": data.kuota,
-        "hari": data.hari,
-        "jam_mulai": data.jam_mulai,
-        "jam_selesai": data.jam_selesai,
-        "ruangan": data.ruangan,
-        "jadwal": jadwal_str,
+        **sesi_fields(sesi),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
     await db.kelas.insert_one(doc)
+    await kelas_changed()
     
     mk = await db.mata_kuliah.find_one({"id": data.mata_kuliah_id}, {"_id": 0})
     dosen = await db.dosen.find_one({"id": data.dosen_id}, {"_id": 0})
@@ -2819,60 +4597,25 @@ async def update_jadwal_kelas(
     if not existing:
         raise HTTPException(status_code=404, detail="Kelas tidak ditemukan")
     
-    # Check for conflicts (excluding current kelas)
-    conflicts = []
-    
-    # Room conflict
-    if data.ruangan:
-        room_conflict = await db.kelas.find_one({
-            "ruangan": data.ruangan,
-            "hari": data.hari,
-            "tahun_akademik_id": data.tahun_akademik_id,
-            "id": {"$ne": item_id}
-        }, {"_id": 0})
-        
-        if room_conflict and check_time_overlap(
-            data.jam_mulai, data.jam_selesai,
-            room_conflict.get("jam_mulai", "00:00"),
-            room_conflict.get("jam_selesai", "00:00")
-        ):
-            conflicts.append(f"Ruangan {data.ruangan} sudah digunakan")
-    
-    # Dosen conflict
-    dosen_conflict = await db.kelas.find_one({
-        "dosen_id": data.dosen_id,
-        "hari": data.hari,
-        "tahun_akademik_id": data.tahun_akademik_id,
-        "id": {"$ne": item_id}
-    }, {"_id": 0})
-    
-    if dosen_conflict and check_time_overlap(
-        data.jam_mulai, data.jam_selesai,
-        dosen_conflict.get("jam_mulai", "00:00"),
-        dosen_conflict.get("jam_selesai", "00:00")
-    ):
-        conflicts.append("Dosen sudah mengajar pada waktu tersebut")
+    sesi = jadwal_request_sesi(data)
     
+    # Check for conflicts (excluding current kelas)
+    conflicts = await jadwal_conflicts(sesi, data.dosen_id, data.tahun_akademik_id, exclude_kelas_id=item_id)
     if conflicts:
         raise HTTPException(status_code=400, detail={"message": "Terdapat konflik jadwal", "conflicts": conflicts})
     
-    jadwal_str = f"{data.hari} {data.jam_mulai}-{data.jam_selesai}"
-    
     update_data = {
         "kode_kelas": data.kode_kelas,
         "mata_kuliah_id": data.mata_kuliah_id,
         "dosen_id": data.dosen_id,
         "tahun_akademik_id": data.tahun_akademik_id,
         "kuota": data.kuota,
-        "hari": data.hari,
-        "jam_mulai": data.jam_mulai,
-        "jam_selesai": data.jam_selesai,
-        "ruangan": data.ruangan,
-        "jadwal": jadwal_str,
+        **sesi_fields(sesi),
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
     await db.kelas.update_one({"id": item_id}, {"$set": update_data})
+    await kelas_changed()
     
     mk = await db.mata_kuliah.find_one({"id": data.mata_kuliah_id}, {"_id": 0})
     dosen = await db.dosen.find_one({"id": data.dosen_id}, {"_id": 0})
@@ -2896,33 +4639,38 @@ async def get_all_jadwal(
     if tahun_akademik_id:
         query["tahun_akademik_id"] = tahun_akademik_id
     if hari:
-        query["hari"] = hari
+        query["sesi.hari"] = hari  # kelas dengan minimal satu sesi di hari itu
     
     items = await db.kelas.find(query, {"_id": 0}).to_list(500)
+    mk_map = await find_by_ids("mata_kuliah", (item["mata_kuliah_id"] for item in items), {"nama": 1})
+    dosen_map = await find_by_ids("dosen", (item["dosen_id"] for item in items), {"nama": 1})
+    krs_counts = await count_by("krs", "kelas_id", {
+        "kelas_id": {"$in": [item["id"] for item in items]},
+        "status": "disetujui"
+    }) if items else {}
     
     result = []
     for item in items:
-        mk = await db.mata_kuliah.find_one({"id": item["mata_kuliah_id"]}, {"_id": 0})
-        dosen = await db.dosen.find_one({"id": item["dosen_id"]}, {"_id": 0})
-        krs_count = await db.krs.count_documents({"kelas_id": item["id"], "status": "disetujui"})
-        
-        result.append(KelasJadwalResponse(
-            id=item["id"],
-            kode_kelas=item["kode_kelas"],
-            mata_kuliah_id=item["mata_kuliah_id"],
-            mata_kuliah_nama=mk["nama"] if mk else None,
-            dosen_id=item["dosen_id"],
-            dosen_nama=dosen["nama"] if dosen else None,
-            tahun_akademik_id=item["tahun_akademik_id"],
-            kuota=item.get("kuota", 40),
-            hari=item.get("hari", ""),
-            jam_mulai=item.get("jam_mulai", ""),
-            jam_selesai=item.get("jam_selesai", ""),
-            ruangan=item.get("ruangan"),
-            jumlah_peserta=krs_count
-        ))
+        mk = mk_map.get(item["mata_kuliah_id"])
+        dosen = dosen_map.get(item["dosen_id"])
+        result.append({
+            "id": item["id"],
+            "kode_kelas": item["kode_kelas"],
+            "mata_kuliah_id": item["mata_kuliah_id"],
+            "mata_kuliah_nama": mk["nama"] if mk else None,
+            "dosen_id": item["dosen_id"],
+            "dosen_nama": dosen["nama"] if dosen else None,
+            "tahun_akademik_id": item["tahun_akademik_id"],
+            "kuota": item.get("kuota", 40),
+            "hari": item.get("hari", ""),
+            "jam_mulai": item.get("jam_mulai", ""),
+            "jam_selesai": item.get("jam_selesai", ""),
+            "ruangan": item.get("ruangan"),
+            "sesi": [{key: sesi.get(key) for key in ("hari", "jam_mulai", "jam_selesai", "ruangan")} for sesi in item.get("sesi", [])],
+            "jumlah_peserta": krs_counts.get(item["id"], 0)
+        })
     
-    return result
+    return trusted_list_response(KelasJadwalResponse, result)
 
 @akademik_router.get("/jadwal/check-conflict")
 async def check_jadwal_conflict(
@@ -2935,47 +4683,411 @@ async def check_jadwal_conflict(
     exclude_kelas_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
+    menit_mulai, menit_selesai = jadwal_span(jam_mulai, jam_selesai)
+    occupancy = await get_jadwal_occupancy(tahun_akademik_id)
+    hits = occupancy.conflicts(hari, menit_mulai, menit_selesai, dosen_id, ruangan, exclude_kelas_id)
+    mk_map = await find_by_ids("mata_kuliah", (k["mata_kuliah_id"] for _, k in hits), {"nama": 1})
+    
     conflicts = []
+    for kind, kelas in hits:
+        mk = mk_map.get(kelas["mata_kuliah_id"])
+        nama = mk["nama"] if mk else kelas["kode_kelas"]
+        if kind == "room":
+            message = f"Ruangan {ruangan} digunakan untuk {nama} ({kelas['jam_mulai']}-{kelas['jam_selesai']})"
+        else:
+            message = f"Dosen mengajar {nama} ({kelas['jam_mulai']}-{kelas['jam_selesai']})"
+        conflicts.append({"type": kind, "message": message})
     
-    # Check room conflict
-    if ruangan:
-        room_query = {
-            "ruangan": ruangan,
-            "hari": hari,
-            "tahun_akademik_id": tahun_akademik_id
-        }
-        if exclude_kelas_id:
-            room_query["id"] = {"$ne": exclude_kelas_id}
-        
-        room_conflicts = await db.kelas.find(room_query, {"_id": 0}).to_list(100)
-        for rc in room_conflicts:
-            if check_time_overlap(jam_mulai, jam_selesai, rc.get("jam_mulai", "00:00"), rc.get("jam_selesai", "00:00")):
-                mk = await db.mata_kuliah.find_one({"id": rc["mata_kuliah_id"]}, {"_id": 0})
-                conflicts.append({
-                    "type": "room",
-                    "message": f"Ruangan {ruangan} digunakan untuk {mk['nama'] if mk else rc['kode_kelas']} ({rc['jam_mulai']}-{rc['jam_selesai']})"
-                })
+    return {"has_conflict": len(conflicts) > 0, "conflicts": conflicts}
+
+@akademik_router.get("/jadwal/ruangan-tersedia", response_model=List[RuanganResponse])
+async def get_ruangan_tersedia(
+    hari: str,
+    jam_mulai: str,
+    jam_selesai: str,
+    tahun_akademik_id: str,
+    kuota: int = 0,
+    gedung: Optional[str] = None,
+    fasilitas: Optional[str] = None,  # dipisah koma, semua harus ada
+    exclude_kelas_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Rooms that fit kuota and are free for the slot, smallest capacity first"""
+    if hari not in DAY_ORDER:
+        raise HTTPException(status_code=400, detail=f"Hari tidak dikenal: {hari}")
+    menit_mulai, menit_selesai = jadwal_span(jam_mulai, jam_selesai)
+    
+    query = {"kapasitas": {"$gte": kuota}}
+    if gedung:
+        query["gedung"] = gedung
+    wajib = [f.strip() for f in (fasilitas or "").split(",") if f.strip()]
+    if wajib:
+        query["fasilitas"] = {"$all": wajib}
+    rooms = await db.ruangan.find(query, {"_id": 0}).sort([("kapasitas", 1), ("nama", 1)]).to_list(None)
+    
+    occupancy = await get_jadwal_occupancy(tahun_akademik_id)
+    free = occupancy.free_rooms(rooms, hari, menit_mulai, menit_selesai, exclude_kelas_id)
+    return trusted_list_response(RuanganResponse, free)
+
+SLOT_KOSONG_MAX_RUANGAN = 5  # saran ruangan per slot, terkecil yang muat lebih dulu
+SLOT_KOSONG_MAX_LIMIT = 100
+
+@dosen_router.get("/kelas/{kelas_id}/slot-kosong")
+async def get_slot_kosong(
+    kelas_id: str,
+    tanggal: Optional[str] = None,  # tanggal mana pun di minggu yang dicari; default hari ini
+    durasi_menit: Optional[int] = None,  # default: durasi sesi pertama kelas
+    hari: str = "Senin,Selasa,Rabu,Kamis,Jumat,Sabtu",
+    jam_mulai: str = "07:00",
+    jam_selesai: str = "18:00",
+    langkah_menit: int = 30,
+    limit: int = Query(20, ge=1, le=SLOT_KOSONG_MAX_LIMIT),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Ranked make-up slots in one week when the dosen, every student with an
+    approved KRS in the class and a room that fits them are all free
+    """
+    kelas = await db.kelas.find_one({"id": kelas_id}, {"_id": 0})
+    if not kelas:
+        raise HTTPException(status_code=404, detail="Kelas tidak ditemukan")
+    if current_user["role"] != "admin":
+        dosen = await db.dosen.find_one({"user_id": current_user["id"]}, {"_id": 0, "id": 1})
+        if not dosen:
+            raise HTTPException(status_code=404, detail="Data dosen tidak ditemukan")
+        if kelas["dosen_id"] != dosen["id"]:
+            raise HTTPException(status_code=403, detail="Akses ditolak")
     
-    # Check dosen conflict
-    if dosen_id:
-        dosen_query = {
-            "dosen_id": dosen_id,
-            "hari": hari,
-            "tahun_akademik_id": tahun_akademik_id
+    window = jadwal_span(jam_mulai, jam_selesai)
+    hari_list = [h.strip() for h in hari.split(",") if h.strip()]
+    unknown_days = [h for h in hari_list if h not in DAY_ORDER]
+    if unknown_days or not hari_list:
+        raise HTTPException(status_code=400, detail=f"Hari tidak dikenal: {', '.join(unknown_days) or '-'}")
+    if langkah_menit <= 0 or langkah_menit % SLOT_MINUTES:
+        raise HTTPException(status_code=400, detail=f"langkah_menit harus kelipatan {SLOT_MINUTES} menit")
+    try:
+        acuan = datetime.strptime(tanggal, "%Y-%m-%d").date() if tanggal else datetime.now(timezone.utc).date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format tanggal harus YYYY-MM-DD")
+    senin = acuan - timedelta(days=acuan.weekday())
+    
+    sessions = kelas_sessions(kelas)
+    if durasi_menit is None:
+        if sessions:
+            durasi_menit = sessions[0]["menit_selesai"] - sessions[0]["menit_mulai"]
+        else:
+            mk = await db.mata_kuliah.find_one({"id": kelas["mata_kuliah_id"]}, {"_id": 0, "sks_teori": 1, "sks_praktik": 1})
+            sks = (mk.get("sks_teori", 0) + mk.get("sks_praktik", 0)) if mk else 0
+            durasi_menit = max(sks, 1) * 50
+    if not 0 < durasi_menit <= window[1] - window[0]:
+        raise HTTPException(status_code=400, detail="durasi_menit harus muat di antara jam_mulai dan jam_selesai")
+    
+    # Hari di luar masa semester tidak ditawarkan
+    ta = await db.tahun_akademik.find_one(
+        {"id": kelas["tahun_akademik_id"]}, {"_id": 0, "tanggal_mulai": 1, "tanggal_selesai": 1}
+    ) or {}
+    tanggal_hari = {}
+    for h in hari_list:
+        iso = (senin + timedelta(days=DAY_ORDER[h] - 1)).isoformat()
+        if (ta.get("tanggal_mulai") or iso) <= iso <= (ta.get("tanggal_selesai") or iso):
+            tanggal_hari[h] = iso
+    
+    # Satu fetch per koleksi: peserta, seluruh KRS peserta semester ini, ruangan, jadwal semester (cache)
+    peserta = await db.krs.find(
+        {"kelas_id": kelas_id, "status": "disetujui"}, {"_id": 0, "mahasiswa_id": 1}
+    ).to_list(None)
+    mahasiswa_ids = list({krs["mahasiswa_id"] for krs in peserta})
+    taken = await db.krs.find({
+        "mahasiswa_id": {"$in": mahasiswa_ids},
+        "tahun_akademik_id": kelas["tahun_akademik_id"],
+        "status": "disetujui"
+    }, {"_id": 0, "kelas_id": 1}).to_list(None) if mahasiswa_ids else []
+    rooms = await db.ruangan.find(
+        {"kapasitas": {"$gte": len(mahasiswa_ids)}}, {"_id": 0, "nama": 1, "kapasitas": 1, "gedung": 1}
+    ).sort([("kapasitas", 1), ("nama", 1)]).to_list(None)
+    occupancy = await get_jadwal_occupancy(kelas["tahun_akademik_id"])
+    
+    # Sesi reguler kelas ini sendiri tidak dihitung sibuk (pertemuan penggantinya
+    # boleh di jam reguler, seperti exclude_kelas_id di jadwal_conflicts)
+    busy_ids = {k["id"] for k in occupancy.kelas.values() if k["dosen_id"] == kelas["dosen_id"]}
+    busy_ids.update(krs["kelas_id"] for krs in taken)
+    busy_ids.discard(kelas_id)
+    slots = common_free_slots(
+        occupancy, busy_ids, rooms, list(tanggal_hari), window, durasi_menit, langkah_menit,
+        preferred_start=sessions[0]["menit_mulai"] if sessions else None, exclude_kelas_id=kelas_id,
+    )
+    
+    return ORJSONResponse({
+        "kelas_id": kelas_id,
+        "kode_kelas": kelas["kode_kelas"],
+        "minggu_mulai": senin.isoformat(),
+        "durasi_menit": durasi_menit,
+        "jumlah_peserta": len(mahasiswa_ids),
+        "total_slot": len(slots),
+        "slots": [{
+            "hari": s["hari"],
+            "tanggal": tanggal_hari[s["hari"]],
+            "jam_mulai": format_time(s["menit_mulai"]),
+            "jam_selesai": format_time(s["menit_selesai"]),
+            "ruangan": [r["nama"] for r in s["ruangan"][:SLOT_KOSONG_MAX_RUANGAN]],
+            "jumlah_ruangan": len(s["ruangan"]),
+        } for s in slots[:limit]],
+    })
+
+JADWAL_AUDIT_CSV_COLUMNS = [
+    "tipe", "kunci", "nama", "hari", "jam_bentrok",
+    "kelas_a", "mata_kuliah_a", "jam_a", "kelas_b", "mata_kuliah_b", "jam_b",
+]
+UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+@akademik_router.get("/jadwal/audit")
+async def audit_jadwal_semester(
+    tahun_akademik_id: str,
+    format: str = "json",
+    current_user: dict = Depends(get_current_user)
+):
+    """Report every room, dosen and student (approved KRS) clash of a semester"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    if format not in ("json", "csv"):
+        raise HTTPException(status_code=400, detail="Format harus json atau csv")
+    
+    occupancy = await get_jadwal_occupancy(tahun_akademik_id)
+    krs_rows = await db.krs.find(
+        {"tahun_akademik_id": tahun_akademik_id, "status": "disetujui"},
+        {"_id": 0, "mahasiswa_id": 1, "kelas_id": 1}
+    ).to_list(None)
+    found = audit_jadwal(occupancy, krs_rows)
+    
+    mk_map = await find_by_ids("mata_kuliah", (k["mata_kuliah_id"] for k in occupancy.kelas.values()), {"nama": 1})
+    dosen_map = await find_by_ids("dosen", (c["key"] for c in found if c["type"] == "dosen"), {"nama": 1})
+    mhs_map = await find_by_ids("mahasiswa", (c["key"] for c in found if c["type"] == "mahasiswa"), {"nim": 1, "nama": 1})
+    
+    def kelas_info(kelas: dict) -> dict:
+        mk = mk_map.get(kelas["mata_kuliah_id"])
+        return {
+            "id": kelas["id"],
+            "kode_kelas": kelas["kode_kelas"],
+            "mata_kuliah_nama": mk["nama"] if mk else None,
+            "jam_mulai": kelas["jam_mulai"],
+            "jam_selesai": kelas["jam_selesai"],
         }
-        if exclude_kelas_id:
-            dosen_query["id"] = {"$ne": exclude_kelas_id}
-        
-        dosen_conflicts = await db.kelas.find(dosen_query, {"_id": 0}).to_list(100)
-        for dc in dosen_conflicts:
-            if check_time_overlap(jam_mulai, jam_selesai, dc.get("jam_mulai", "00:00"), dc.get("jam_selesai", "00:00")):
-                mk = await db.mata_kuliah.find_one({"id": dc["mata_kuliah_id"]}, {"_id": 0})
-                conflicts.append({
-                    "type": "dosen",
-                    "message": f"Dosen mengajar {mk['nama'] if mk else dc['kode_kelas']} ({dc['jam_mulai']}-{dc['jam_selesai']})"
-                })
     
-    return {"has_conflict": len(conflicts) > 0, "conflicts": conflicts}
+    def key_label(conflict: dict) -> Optional[str]:
+        if conflict["type"] == "room":
+            return conflict["key"]
+        if conflict["type"] == "dosen":
+            dosen = dosen_map.get(conflict["key"])
+            return dosen["nama"] if dosen else None
+        mhs = mhs_map.get(conflict["key"])
+        return f"{mhs['nim']} - {mhs['nama']}" if mhs else None
+    
+    found.sort(key=lambda c: (c["type"], DAY_ORDER.get(c["hari"], 8), c["key"], c["overlap_mulai"]))
+    conflicts = [{
+        "type": c["type"],
+        "key": c["key"],
+        "nama": key_label(c),
+        "hari": c["hari"],
+        "jam_mulai": format_time(c["overlap_mulai"]),
+        "jam_selesai": format_time(c["overlap_selesai"]),
+        "kelas_a": kelas_info(c["kelas_a"]),
+        "kelas_b": kelas_info(c["kelas_b"]),
+    } for c in found]
+    
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(JADWAL_AUDIT_CSV_COLUMNS)
+        for c in conflicts:
+            a, b = c["kelas_a"], c["kelas_b"]
+            writer.writerow([
+                c["type"], c["key"], c["nama"] or "", c["hari"], f"{c['jam_mulai']}-{c['jam_selesai']}",
+                a["kode_kelas"], a["mata_kuliah_nama"] or "", f"{a['jam_mulai']}-{a['jam_selesai']}",
+                b["kode_kelas"], b["mata_kuliah_nama"] or "", f"{b['jam_mulai']}-{b['jam_selesai']}",
+            ])
+        # Nama file dari path parameter: buang karakter selain [A-Za-z0-9_-] agar header tidak bisa disisipi
+        nama_file = UNSAFE_FILENAME_CHARS.sub("", tahun_akademik_id) or "semester"
+        return Response(
+            buffer.getvalue(),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="audit-jadwal-{nama_file}.csv"'}
+        )
+    
+    return ORJSONResponse({
+        "tahun_akademik_id": tahun_akademik_id,
+        "total_kelas": len(occupancy.kelas),
+        "total_conflicts": len(conflicts),
+        "summary": {kind: sum(c["type"] == kind for c in conflicts) for kind in ("room", "dosen", "mahasiswa")},
+        "conflicts": conflicts,
+    })
+
+@akademik_router.post("/jadwal/solver/preview")
+async def preview_jadwal_solver(
+    data: JadwalSolverRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Propose hari, jam and ruangan for the semester's classes; nothing is written to kelas"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    
+    day_start, day_end = jadwal_span(data.jam_mulai, data.jam_selesai)
+    unknown_days = [h for h in data.hari if h not in DAY_ORDER]
+    if unknown_days or not data.hari:
+        raise HTTPException(status_code=400, detail=f"Hari tidak dikenal: {', '.join(unknown_days) or '-'}")
+    if data.langkah_menit <= 0 or data.langkah_menit % SLOT_MINUTES or data.menit_per_sks <= 0:
+        raise HTTPException(status_code=400, detail=f"langkah_menit harus kelipatan {SLOT_MINUTES} menit")
+    if data.ruangan is not None:
+        ruangan = [r.model_dump() for r in data.ruangan]
+    else:
+        ruangan = await db.ruangan.find({}, {"_id": 0, "nama": 1, "kapasitas": 1}).to_list(None)
+    if not ruangan:
+        raise HTTPException(status_code=400, detail="Daftar ruangan kosong")
+    
+    # Read before loading, like get_jadwal_occupancy: apply refuses a stale preview
+    version = await get_kelas_version()
+    kelas_list = await db.kelas.find(
+        {"tahun_akademik_id": data.tahun_akademik_id},
+        {**JADWAL_OCCUPANCY_PROJECTION, "kuota": 1}
+    ).to_list(None)
+    
+    if data.kelas_ids is not None:
+        target_ids = set(data.kelas_ids)
+    elif data.jadwal_ulang:
+        target_ids = {k["id"] for k in kelas_list}
+    else:
+        target_ids = {k["id"] for k in kelas_list if not kelas_sessions(k)}
+    targets = [k for k in kelas_list if k["id"] in target_ids]
+    
+    # Kelas lain yang sudah terjadwal tetap menempati ruangan dan dosennya
+    room_busy: Dict[str, int] = {}
+    dosen_busy: Dict[str, int] = {}
+    for kelas in kelas_list:
+        if kelas["id"] in target_ids:
+            continue
+        for sesi in kelas_sessions(kelas):
+            mask = slot_mask(sesi["hari"], sesi["menit_mulai"], sesi["menit_selesai"])
+            if sesi["ruangan"]:
+                room_busy[sesi["ruangan"]] = room_busy.get(sesi["ruangan"], 0) | mask
+            dosen_busy[kelas["dosen_id"]] = dosen_busy.get(kelas["dosen_id"], 0) | mask
+    for item in data.dosen_tidak_tersedia:
+        mask = slot_mask(item.hari, *jadwal_span(item.jam_mulai, item.jam_selesai))
+        dosen_busy[item.dosen_id] = dosen_busy.get(item.dosen_id, 0) | mask
+    
+    mk_map = await find_by_ids(
+        "mata_kuliah", (k["mata_kuliah_id"] for k in targets), {"nama": 1, "sks_teori": 1, "sks_praktik": 1}
+    )
+    
+    def durasi(kelas: dict) -> int:
+        mk = mk_map.get(kelas["mata_kuliah_id"])
+        sks = (mk.get("sks_teori", 0) + mk.get("sks_praktik", 0)) if mk else 0
+        return max(sks, 1) * data.menit_per_sks
+    
+    # Kelas multi-sesi tetap punya jumlah sesi yang sama, durasi dibagi rata, di hari berbeda
+    items = []
+    for k in targets:
+        n_sesi = max(len(kelas_sessions(k)), 1)
+        item = {"id": k["id"], "dosen_id": k["dosen_id"], "kuota": k.get("kuota", 40), "durasi": durasi(k)}
+        if n_sesi == 1:
+            items.append(item)
+            continue
+        per_sesi = -(-item["durasi"] // (n_sesi * SLOT_MINUTES)) * SLOT_MINUTES
+        items += [{**item, "id": f"{k['id']}#{i}", "grup": k["id"], "durasi": per_sesi} for i in range(n_sesi)]
+    item_kelas = {item["id"]: item.get("grup", item["id"]) for item in items}
+    
+    problem = {
+        "kelas": items,
+        "ruangan": ruangan,
+        "hari": data.hari,
+        "window": (day_start, day_end),
+        "langkah": data.langkah_menit,
+        "room_busy": room_busy,
+        "dosen_busy": dosen_busy,
+        "max_repair": JADWAL_SOLVER_MAX_REPAIR,
+    }
+    started = time.perf_counter()
+    result = await run_jadwal_solver(problem)
+    elapsed = time.perf_counter() - started
+    
+    kelas_by_id = {k["id"]: k for k in targets}
+    
+    def kelas_label(kelas_id: str) -> dict:
+        kelas = kelas_by_id[kelas_id]
+        mk = mk_map.get(kelas["mata_kuliah_id"])
+        return {"kelas_id": kelas_id, "kode_kelas": kelas["kode_kelas"], "mata_kuliah_nama": mk["nama"] if mk else None}
+    
+    # Kelas multi-sesi yang salah satu sesinya tidak mendapat slot tidak diubah sama sekali
+    failed: Dict[str, str] = {}
+    for u in result["unassigned"]:
+        failed.setdefault(item_kelas[u["kelas_id"]], u["alasan"])
+    assignments = [{
+        **kelas_label(item_kelas[a["kelas_id"]]),
+        "hari": a["hari"],
+        "jam_mulai": format_time(a["menit_mulai"]),
+        "jam_selesai": format_time(a["menit_selesai"]),
+        "menit_mulai": a["menit_mulai"],
+        "menit_selesai": a["menit_selesai"],
+        "ruangan": a["ruangan"],
+    } for a in result["assignments"] if item_kelas[a["kelas_id"]] not in failed]
+    sort_jadwal(assignments)
+    
+    now = datetime.now(timezone.utc)
+    preview = {
+        "id": str(uuid.uuid4()),
+        "tahun_akademik_id": data.tahun_akademik_id,
+        "kelas_version": version,
+        "total_kelas": len(targets),
+        "assignments": assignments,
+        "unassigned": [{**kelas_label(kelas_id), "alasan": alasan} for kelas_id, alasan in failed.items()],
+        "durasi_detik": round(elapsed, 2),
+        "created_by": current_user["id"],
+        "created_at": now.isoformat()
+    }
+    # Preview lama yang tidak pernah diterapkan
+    await db.jadwal_solver_preview.delete_many({
+        "created_at": {"$lt": (now - timedelta(hours=JADWAL_SOLVER_PREVIEW_HOURS)).isoformat()}
+    })
+    await db.jadwal_solver_preview.insert_one(preview)
+    preview.pop("_id", None)
+    return ORJSONResponse(preview)
+
+@akademik_router.post("/jadwal/solver/{preview_id}/apply")
+async def apply_jadwal_solver(
+    preview_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Bulk-write a solver preview to kelas, unless kelas changed since it was made"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    
+    # find_one_and_delete: preview yang sama tidak bisa diterapkan dua kali
+    preview = await db.jadwal_solver_preview.find_one_and_delete({"id": preview_id}, projection={"_id": 0})
+    if not preview:
+        raise HTTPException(status_code=404, detail="Preview tidak ditemukan atau sudah diterapkan")
+    if preview["kelas_version"] != await get_kelas_version():
+        raise HTTPException(
+            status_code=409,
+            detail="Data kelas berubah sejak preview dibuat, jalankan solver lagi"
+        )
+    
+    now = datetime.now(timezone.utc).isoformat()
+    sesi_by_kelas: Dict[str, List[dict]] = {}
+    for a in preview["assignments"]:
+        sesi_by_kelas.setdefault(a["kelas_id"], []).append({key: a[key] for key in JADWAL_SESI_FIELDS})
+    ops = [UpdateOne(
+        {"id": kelas_id, "tahun_akademik_id": preview["tahun_akademik_id"]},
+        {"$set": {**sesi_fields(sesi), "updated_at": now}}
+    ) for kelas_id, sesi in sesi_by_kelas.items()]
+    updated = 0
+    if ops:
+        result = await db.kelas.bulk_write(ops, ordered=False)
+        updated = result.modified_count
+        await kelas_changed()
+    
+    return {
+        "message": f"{updated} jadwal kelas diterapkan",
+        "updated": updated,
+        "unassigned": preview["unassigned"]
+    }
 
 # Mahasiswa jadwal view
 @mahasiswa_router.get("/jadwal")
@@ -2983,43 +5095,738 @@ async def get_my_jadwal(
     tahun_akademik_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    mhs = await db.mahasiswa.find_one({"user_id": current_user["id"]}, {"_id": 0})
-    if not mhs:
-        raise HTTPException(status_code=404, detail="Data mahasiswa tidak ditemukan")
+    cache_key = ("jadwal", tahun_akademik_id)
+    cache_version = await get_student_cache_version(current_user)
+    if cached := get_student_cache(current_user, cache_version, cache_key):
+        return cached
+    
+    mhs = await db.mahasiswa.find_one({"user_id": current_user["id"]}, {"_id": 0})
+    if not mhs:
+        raise HTTPException(status_code=404, detail="Data mahasiswa tidak ditemukan")
+    
+    query = {"mahasiswa_id": mhs["id"], "status": "disetujui"}
+    if tahun_akademik_id:
+        query["tahun_akademik_id"] = tahun_akademik_id
+    
+    krs_list = await db.krs.find(query, {"_id": 0, "kelas_id": 1}).to_list(100)
+    kelas_map = await find_by_ids("kelas", (krs["kelas_id"] for krs in krs_list))
+    mk_map = await find_by_ids("mata_kuliah", (k["mata_kuliah_id"] for k in kelas_map.values()), {"nama": 1})
+    dosen_map = await find_by_ids("dosen", (k["dosen_id"] for k in kelas_map.values()), {"nama": 1})
+    
+    # Satu baris per sesi; kelas yang belum terjadwal tetap tampil dengan hari kosong
+    result = []
+    for krs in krs_list:
+        kelas = kelas_map.get(krs["kelas_id"])
+        if not kelas:
+            continue
+        mk = mk_map.get(kelas["mata_kuliah_id"])
+        dosen = dosen_map.get(kelas["dosen_id"])
+        for sesi in kelas_sessions(kelas) or [{"hari": "", "jam_mulai": "", "jam_selesai": "", "ruangan": kelas.get("ruangan")}]:
+            result.append({
+                "kelas_id": kelas["id"],
+                "kode_kelas": kelas["kode_kelas"],
+                "mata_kuliah_nama": mk["nama"] if mk else None,
+                "dosen_nama": dosen["nama"] if dosen else None,
+                "hari": sesi["hari"],
+                "jam_mulai": sesi["jam_mulai"],
+                "jam_selesai": sesi["jam_selesai"],
+                "ruangan": sesi["ruangan"],
+                "jadwal": kelas.get("jadwal")
+            })
+    
+    # Sort by day order
+    sort_jadwal(result)
+    
+    return set_student_cache(current_user, cache_version, cache_key, result)
+
+# ==================== KALENDER (iCALENDAR FEED) ====================
+
+def ics_text(value: str) -> str:
+    """Escape a TEXT property value (RFC 5545 3.3.11)"""
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def ics_fold(line: str) -> str:
+    """Fold a content line into chunks of at most 75 octets, never inside a UTF-8 character"""
+    if len(line.encode()) <= 75:
+        return line
+    chunks = []
+    current, size = "", 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > (75 if not chunks else 74):
+            chunks.append(current)
+            current, size = "", 0
+        current += char
+        size += width
+    chunks.append(current)
+    return "\r\n ".join(chunks)
+
+def kalender_events(kelas_list: List[dict], ta_map: Dict[str, dict], mk_map: Dict[str, dict],
+                    dosen_map: Dict[str, dict]) -> List[dict]:
+    """
+    One weekly recurring event per kelas session, from the first matching day
+    on or after the semester start until its end. Kelas whose semester has no
+    dates are left out: a recurrence needs both ends.
+    """
+    events = []
+    for kelas in kelas_list:
+        ta = ta_map.get(kelas.get("tahun_akademik_id")) or {}
+        try:
+            mulai = datetime.strptime(ta["tanggal_mulai"], "%Y-%m-%d").date()
+            selesai = datetime.strptime(ta["tanggal_selesai"], "%Y-%m-%d").date()
+        except (KeyError, TypeError, ValueError):
+            continue
+        mk = mk_map.get(kelas.get("mata_kuliah_id")) or {}
+        dosen = dosen_map.get(kelas.get("dosen_id")) or {}
+        for sesi in kelas_sessions(kelas):
+            if sesi["hari"] not in DAY_ORDER:
+                continue
+            tanggal = mulai + timedelta(days=(DAY_ORDER[sesi["hari"]] - 1 - mulai.weekday()) % 7)
+            if tanggal > selesai:
+                continue
+            events.append({
+                "uid": f"{kelas['id']}-{DAY_ORDER[sesi['hari']]}-{sesi['menit_mulai']}@siakad",
+                "summary": f"{mk.get('nama') or kelas.get('kode_kelas') or 'Kuliah'} ({kelas.get('kode_kelas', '')})",
+                "location": sesi.get("ruangan") or "",
+                "description": f"Dosen: {dosen['nama']}" if dosen.get("nama") else "",
+                "tanggal": tanggal,
+                "menit_mulai": sesi["menit_mulai"],
+                "menit_selesai": sesi["menit_selesai"],
+                "sampai": selesai,
+                "dtstamp": mulai,
+            })
+    events.sort(key=lambda e: (e["tanggal"], e["menit_mulai"], e["uid"]))
+    return events
+
+def render_kalender(nama: str, events: List[dict], tzid: str = KALENDER_TZID) -> bytes:
+    """
+    VCALENDAR body of a feed. Output depends only on the events (DTSTAMP is
+    the semester start, not the render time), so an unchanged schedule keeps
+    its ETag across re-renders.
+    """
+    zone = ZoneInfo(tzid)
+    offset = datetime(2000, 1, 1, tzinfo=zone).utcoffset()
+    minutes = int(offset.total_seconds()) // 60
+    tzoffset = f"{'+' if minutes >= 0 else '-'}{abs(minutes) // 60:02d}{abs(minutes) % 60:02d}"
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//SIAKAD//Jadwal Kuliah//ID",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{ics_text(nama)}",
+        f"X-WR-TIMEZONE:{tzid}",
+        "BEGIN:VTIMEZONE",
+        f"TZID:{tzid}",
+        "BEGIN:STANDARD",
+        "DTSTART:19700101T000000",
+        f"TZOFFSETFROM:{tzoffset}",
+        f"TZOFFSETTO:{tzoffset}",
+        f"TZNAME:{datetime(2000, 1, 1, tzinfo=zone).tzname()}",
+        "END:STANDARD",
+        "END:VTIMEZONE",
+    ]
+    for event in events:
+        tanggal = event["tanggal"].strftime("%Y%m%d")
+        start, end = event["menit_mulai"], event["menit_selesai"]
+        # UNTIL wajib UTC bila DTSTART memakai TZID
+        sampai = event["sampai"]
+        until = datetime(sampai.year, sampai.month, sampai.day, 23, 59, 59, tzinfo=zone).astimezone(timezone.utc)
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{event['uid']}",
+            f"DTSTAMP:{event['dtstamp'].strftime('%Y%m%d')}T000000Z",
+            f"DTSTART;TZID={tzid}:{tanggal}T{start // 60:02d}{start % 60:02d}00",
+            f"DTEND;TZID={tzid}:{tanggal}T{end // 60:02d}{end % 60:02d}00",
+            f"RRULE:FREQ=WEEKLY;UNTIL={until.strftime('%Y%m%dT%H%M%SZ')}",
+            f"SUMMARY:{ics_text(event['summary'])}",
+        ]
+        if event["location"]:
+            lines.append(f"LOCATION:{ics_text(event['location'])}")
+        if event["description"]:
+            lines.append(f"DESCRIPTION:{ics_text(event['description'])}")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(ics_fold(line) for line in lines) + "\r\n").encode()
+
+async def build_kalender_feed(user: dict) -> Optional[bytes]:
+    """Render the feed of a mahasiswa (approved KRS) or dosen (kelas diampu); None if the profile is gone"""
+    if user["role"] == "mahasiswa":
+        mhs = await db.mahasiswa.find_one({"user_id": user["id"]}, {"_id": 0, "id": 1, "nama": 1})
+        if not mhs:
+            return None
+        krs_list = await db.krs.find(
+            {"mahasiswa_id": mhs["id"], "status": "disetujui"}, {"_id": 0, "kelas_id": 1}
+        ).to_list(None)
+        kelas_list = list((await find_by_ids("kelas", (krs["kelas_id"] for krs in krs_list))).values())
+        dosen_map = await find_by_ids("dosen", (k.get("dosen_id") for k in kelas_list), {"nama": 1})
+        nama = f"Jadwal Kuliah {mhs['nama']}"
+    else:
+        dosen = await db.dosen.find_one({"user_id": user["id"]}, {"_id": 0, "id": 1, "nama": 1})
+        if not dosen:
+            return None
+        kelas_list = await db.kelas.find({"dosen_id": dosen["id"]}, {"_id": 0}).to_list(None)
+        # Nama dosen tidak perlu diulang di setiap event feed-nya sendiri
+        dosen_map = {}
+        nama = f"Jadwal Mengajar {dosen['nama']}"
+    ta_map = await find_by_ids(
+        "tahun_akademik", (k.get("tahun_akademik_id") for k in kelas_list), {"tanggal_mulai": 1, "tanggal_selesai": 1}
+    )
+    mk_map = await find_by_ids("mata_kuliah", (k.get("mata_kuliah_id") for k in kelas_list), {"nama": 1})
+    return render_kalender(nama, kalender_events(kelas_list, ta_map, mk_map, dosen_map))
+
+async def get_kalender_versions(role: str) -> tuple:
+    """
+    Versions of the collections a feed is built from, read on every request
+    so a KRS or jadwal write in any worker invalidates the feeds cached in
+    all of them.
+    """
+    return await get_collection_versions(*KALENDER_VERSION_COLLECTIONS[role])
+
+async def rotate_kalender_token(user_id: str) -> dict:
+    token = secrets.token_urlsafe(24)
+    await db.users.update_one({"id": user_id}, {"$set": {"kalender_token": token}})
+    return {"token": token, "url": f"/api/kalender/{token}.ics"}
+
+@kalender_router.get("/token")
+async def get_kalender_token(current_user: dict = Depends(get_current_user)):
+    """Feed URL of the current mahasiswa/dosen, created on first use"""
+    if current_user["role"] not in ["mahasiswa", "dosen"]:
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    
+    token = current_user.get("kalender_token")
+    if not token:
+        return await rotate_kalender_token(current_user["id"])
+    return {"token": token, "url": f"/api/kalender/{token}.ics"}
+
+@kalender_router.post("/token")
+async def reset_kalender_token(current_user: dict = Depends(get_current_user)):
+    """Issue a new feed URL; the old one stops working immediately"""
+    if current_user["role"] not in ["mahasiswa", "dosen"]:
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    
+    return await rotate_kalender_token(current_user["id"])
+
+@kalender_router.get("/{token}.ics")
+async def get_kalender_feed(token: str, request: Request):
+    """
+    Weekly schedule as iCalendar for calendar apps, authenticated by the
+    token in the URL. Rendered feeds are kept per worker until the version
+    of a collection they are built from changes (get_kalender_versions) or
+    KALENDER_CACHE_TTL passes, so polling costs two indexed lookups; clients
+    revalidate with If-None-Match or If-Modified-Since.
+    """
+    user = await db.users.find_one({"kalender_token": token}, {"_id": 0, "id": 1, "role": 1, "is_active": 1})
+    if not user or not user.get("is_active", True) or user["role"] not in ["mahasiswa", "dosen"]:
+        raise HTTPException(status_code=404, detail="Kalender tidak ditemukan")
+    
+    versions = await get_kalender_versions(user["role"])
+    entry = kalender_cache.get(user["id"])
+    if entry and entry[0] == versions and entry[1] >= time.monotonic():
+        record_cache("kalender", True)
+        _, _, etag, last_modified, body = entry
+    else:
+        record_cache("kalender", False)
+        body = await build_kalender_feed(user)
+        if body is None:
+            raise HTTPException(status_code=404, detail="Kalender tidak ditemukan")
+        etag = f'"{hashlib.sha1(body).hexdigest()[:24]}"'
+        # Isi sama dengan render sebelumnya: Last-Modified tidak bergeser
+        last_modified = entry[3] if entry and entry[2] == etag else time.time()
+        if user["id"] not in kalender_cache and len(kalender_cache) >= KALENDER_CACHE_MAX:
+            del kalender_cache[next(iter(kalender_cache))]
+        kalender_cache[user["id"]] = (versions, time.monotonic() + KALENDER_CACHE_TTL, etag, last_modified, body)
+    
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, etag)
+    elif if_modified_since:
+        try:
+            not_modified = int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            not_modified = False
+    else:
+        not_modified = False
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="text/calendar; charset=utf-8", headers={
+        **headers, "Content-Disposition": 'inline; filename="jadwal.ics"'
+    })
+
+# ==================== JADWAL UJIAN (UTS/UAS) ====================
+
+JENIS_UJIAN = ("UTS", "UAS")
+JADWAL_UJIAN_PROJECTION = {"_id": 0, "peserta": 0, "dosen_ids": 0, "created_at": 0, "created_by": 0, "generasi": 0}
+# Generasi yang belum pernah aktif (generate yang gagal di tengah) dibersihkan setelah selang ini
+JADWAL_UJIAN_ORPHAN_SECONDS = 3600
+
+async def active_ujian_generasi(jenis: str, tahun_akademik_id: Optional[str] = None) -> List[str]:
+    """
+    Generation ids of the live exam schedules, one per semester and jenis
+    (db.jadwal_ujian_aktif). Readers filter jadwal_ujian on these, so a
+    schedule being replaced is never seen half-written or empty.
+    """
+    query = {"jenis": jenis}
+    if tahun_akademik_id:
+        query["tahun_akademik_id"] = tahun_akademik_id
+    docs = await db.jadwal_ujian_aktif.find(query, {"_id": 0, "generasi": 1}).to_list(None)
+    return [doc["generasi"] for doc in docs]
+
+async def backfill_jadwal_ujian_generasi():
+    """Give exam schedules stored before generations existed one and make it the live one"""
+    groups = await db.jadwal_ujian.aggregate([
+        {"$match": {"generasi": {"$exists": False}}},
+        {"$group": {"_id": {"tahun_akademik_id": "$tahun_akademik_id", "jenis": "$jenis"}}},
+    ]).to_list(None)
+    for group in groups:
+        key = group["_id"]
+        generasi = str(uuid.uuid4())
+        await db.jadwal_ujian.update_many({**key, "generasi": {"$exists": False}}, {"$set": {"generasi": generasi}})
+        await db.jadwal_ujian_aktif.update_one(key, {"$setOnInsert": {"generasi": generasi}}, upsert=True)
+    if groups:
+        await bump_collection_version("jadwal_ujian")
+        logger.info(f"Backfilled generasi on {len(groups)} jadwal ujian")
+
+def exam_conflict_graph(krs_rows: List[dict], kelas_mk: Dict[str, str]) -> Tuple[Dict[str, set], Dict[str, set]]:
+    """
+    (peserta, adjacency) of a semester's exams, one node per mata kuliah:
+    peserta[mk] are the students with an approved KRS in any of its kelas,
+    adjacency[mk] the courses sharing at least one of them. Edges come from
+    each student's own courses, so the cost is the sum of k^2 over students
+    rather than every pair of courses.
+    """
+    peserta: Dict[str, set] = {}
+    courses_by_student: Dict[str, set] = {}
+    for krs in krs_rows:
+        mk = kelas_mk.get(krs["kelas_id"])
+        if mk is None:
+            continue
+        peserta.setdefault(mk, set()).add(krs["mahasiswa_id"])
+        courses_by_student.setdefault(krs["mahasiswa_id"], set()).add(mk)
+
+    adjacency: Dict[str, set] = {mk: set() for mk in peserta}
+    for courses in courses_by_student.values():
+        if len(courses) < 2:
+            continue
+        for mk in courses:
+            adjacency[mk].update(courses)
+            adjacency[mk].discard(mk)
+    return peserta, adjacency
+
+def schedule_exams(sizes: Dict[str, int], adjacency: Dict[str, set], slots: List[tuple], rooms: List[dict]) -> dict:
+    """
+    DSatur colouring of the exam conflict graph into slots ((tanggal,
+    jam_mulai, jam_selesai), in order), with room capacity per slot.
+
+    Next is the exam whose neighbours already use the most distinct slots
+    (ties: most neighbours, most students), from a lazy max-heap. It takes
+    the feasible slot with the fewest neighbours on the same day, then the
+    earliest, so a student's exams spread over the days. A slot is feasible
+    when no neighbour sits in it and its free rooms seat every student: the
+    smallest single room that fits, else the largest rooms until they do.
+    A room hosts one exam per slot.
+    """
+    rooms = sorted(rooms, key=lambda r: (r["kapasitas"], r["nama"]))
+    total_kapasitas = sum(r["kapasitas"] for r in rooms)
+    free_rooms = [list(rooms) for _ in slots]
+    colour: Dict[str, int] = {}
+    allocated: Dict[str, list] = {}
+    neighbour_slots: Dict[str, set] = {mk: set() for mk in sizes}
+    unassigned = []
+
+    def allocate(available: list, n: int) -> Optional[list]:
+        for room in available:
+            if room["kapasitas"] >= n:
+                return [room]
+        chosen, seated = [], 0
+        for room in reversed(available):
+            chosen.append(room)
+            seated += room["kapasitas"]
+            if seated >= n:
+                return chosen
+        return None
+
+    heap = [(0, -len(adjacency[mk]), -sizes[mk], mk) for mk in sizes]
+    heapify(heap)
+    done = set()
+    while heap:
+        neg_saturation, _, _, mk = heappop(heap)
+        if mk in done or -neg_saturation != len(neighbour_slots[mk]):
+            continue  # sudah dijadwalkan, atau entri lama sebelum saturasinya naik
+        done.add(mk)
+        n = sizes[mk]
+        taken = neighbour_slots[mk]
+        same_day: Dict[str, int] = {}
+        for other in adjacency[mk]:
+            if other in colour:
+                tanggal = slots[colour[other]][0]
+                same_day[tanggal] = same_day.get(tanggal, 0) + 1
+
+        best = None
+        for i, slot in enumerate(slots):
+            if i in taken:
+                continue
+            rank = same_day.get(slot[0], 0)
+            if best is not None and rank >= best[0]:
+                continue
+            chosen = allocate(free_rooms[i], n)
+            if chosen:
+                best = (rank, i, chosen)
+        if best is None:
+            if n > total_kapasitas:
+                alasan = f"Peserta ({n}) melebihi total kapasitas ruangan ({total_kapasitas})"
+            elif len(taken) == len(slots):
+                alasan = "Semua slot bentrok dengan ujian lain dari peserta yang sama"
+            else:
+                alasan = "Ruangan tidak cukup di slot yang bebas bentrok"
+            unassigned.append({"mata_kuliah_id": mk, "alasan": alasan})
+            continue
+
+        _, i, chosen = best
+        colour[mk] = i
+        allocated[mk] = chosen
+        free_rooms[i] = [r for r in free_rooms[i] if r not in chosen]
+        for other in adjacency[mk]:
+            if other not in done and i not in neighbour_slots[other]:
+                neighbour_slots[other].add(i)
+                heappush(heap, (-len(neighbour_slots[other]), -len(adjacency[other]), -sizes[other], other))
+
+    return {
+        "assignments": [
+            {"mata_kuliah_id": mk, "slot": i, "ruangan": allocated[mk]} for mk, i in colour.items()
+        ],
+        "unassigned": unassigned,
+    }
+
+def seat_peserta(mahasiswa_ids: List[str], rooms: List[dict]) -> List[dict]:
+    """Fill rooms in order, each up to its capacity; mahasiswa_ids already sorted (by NIM)"""
+    seats, start = [], 0
+    for room in rooms:
+        chunk = mahasiswa_ids[start:start + room["kapasitas"]]
+        seats += [{"mahasiswa_id": mahasiswa_id, "ruangan": room["nama"]} for mahasiswa_id in chunk]
+        start += len(chunk)
+    return seats
+
+def validate_jenis_ujian(jenis: str) -> str:
+    jenis = jenis.upper()
+    if jenis not in JENIS_UJIAN:
+        raise HTTPException(status_code=400, detail="Jenis ujian harus UTS atau UAS")
+    return jenis
+
+@akademik_router.post("/ujian/generate")
+async def generate_jadwal_ujian(
+    data: JadwalUjianRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Build the UTS/UAS timetable of a semester from approved KRS and replace
+    the stored one: courses that share a student never sit in the same slot
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    
+    jenis = validate_jenis_ujian(data.jenis)
+    try:
+        tanggal_list = sorted({datetime.strptime(t, "%Y-%m-%d").date().isoformat() for t in data.tanggal})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format tanggal harus YYYY-MM-DD")
+    if not tanggal_list or not data.sesi:
+        raise HTTPException(status_code=400, detail="Tanggal dan sesi ujian wajib diisi")
+    sesi = sorted(
+        {(format_time(s), format_time(e)) for s, e in (jadwal_span(x.jam_mulai, x.jam_selesai) for x in data.sesi)}
+    )
+    slots = [(tanggal, jam_mulai, jam_selesai) for tanggal in tanggal_list for jam_mulai, jam_selesai in sesi]
+    
+    if data.ruangan is not None:
+        ruangan = [r.model_dump() for r in data.ruangan]
+    else:
+        ruangan = await db.ruangan.find({}, {"_id": 0, "nama": 1, "kapasitas": 1}).to_list(None)
+    ruangan = [r for r in ruangan if r["kapasitas"] > 0]
+    if not ruangan:
+        raise HTTPException(status_code=400, detail="Daftar ruangan kosong")
+    
+    kelas_list = await db.kelas.find(
+        {"tahun_akademik_id": data.tahun_akademik_id},
+        {"_id": 0, "id": 1, "mata_kuliah_id": 1, "dosen_id": 1}
+    ).to_list(None)
+    krs_rows = await db.krs.find(
+        {"tahun_akademik_id": data.tahun_akademik_id, "status": "disetujui"},
+        {"_id": 0, "mahasiswa_id": 1, "kelas_id": 1}
+    ).to_list(None)
+    kelas_mk = {k["id"]: k["mata_kuliah_id"] for k in kelas_list}
+    peserta, adjacency = exam_conflict_graph(krs_rows, kelas_mk)
+    
+    started = time.perf_counter()
+    result = schedule_exams({mk: len(ids) for mk, ids in peserta.items()}, adjacency, slots, ruangan)
+    elapsed = time.perf_counter() - started
+    
+    mk_map = await find_by_ids("mata_kuliah", peserta.keys(), {"kode": 1, "nama": 1})
+    mhs_map = await find_by_ids(
+        "mahasiswa", {m for ids in peserta.values() for m in ids}, {"nim": 1}
+    )
+    kelas_by_mk: Dict[str, List[dict]] = {}
+    for kelas in kelas_list:
+        kelas_by_mk.setdefault(kelas["mata_kuliah_id"], []).append(kelas)
+    
+    now = datetime.now(timezone.utc).isoformat()
+    docs = []
+    for a in result["assignments"]:
+        mk_id = a["mata_kuliah_id"]
+        mk = mk_map.get(mk_id)
+        tanggal, jam_mulai, jam_selesai = slots[a["slot"]]
+        mahasiswa_ids = sorted(peserta[mk_id], key=lambda m: (mhs_map.get(m, {}).get("nim", ""), m))
+        seats = seat_peserta(mahasiswa_ids, a["ruangan"])
+        per_room: Dict[str, int] = {}
+        for seat in seats:
+            per_room[seat["ruangan"]] = per_room.get(seat["ruangan"], 0) + 1
+        kelas = kelas_by_mk[mk_id]
+        docs.append({
+            "id": str(uuid.uuid4()),
+            "tahun_akademik_id": data.tahun_akademik_id,
+            "jenis": jenis,
+            "mata_kuliah_id": mk_id,
+            "kode_mk": mk.get("kode") if mk else None,
+            "mata_kuliah_nama": mk["nama"] if mk else None,
+            "kelas_ids": [k["id"] for k in kelas],
+            "dosen_ids": sorted({k["dosen_id"] for k in kelas}),
+            "tanggal": tanggal,
+            "jam_mulai": jam_mulai,
+            "jam_selesai": jam_selesai,
+            "ruangan": [{"nama": nama, "jumlah": jumlah} for nama, jumlah in per_room.items()],
+            "jumlah_peserta": len(seats),
+            "peserta": seats,
+            "created_by": current_user["id"],
+            "created_at": now,
+        })
+    
+    # Jadwal lama semester dan jenis ini diganti seluruhnya: tulis generasi baru,
+    # lalu pindahkan pointer aktif dalam satu update sehingga pembaca melihat
+    # jadwal lama atau baru, tidak pernah kosong atau setengah jadi
+    key = {"tahun_akademik_id": data.tahun_akademik_id, "jenis": jenis}
+    generasi = str(uuid.uuid4())
+    for doc in docs:
+        doc["generasi"] = generasi
+    if docs:
+        await db.jadwal_ujian.insert_many(docs)
+    previous = await db.jadwal_ujian_aktif.find_one_and_update(
+        key, {"$set": {"generasi": generasi, "updated_at": now}}, projection={"_id": 0, "generasi": 1}, upsert=True
+    )
+    await bump_collection_version("jadwal_ujian")
+    # Generasi yang digantikan, plus sisa generate gagal yang tidak pernah aktif
+    orphan_before = (datetime.now(timezone.utc) - timedelta(seconds=JADWAL_UJIAN_ORPHAN_SECONDS)).isoformat()
+    stale = [{"generasi": {"$ne": generasi}, "created_at": {"$lt": orphan_before}}]
+    if previous:
+        stale.append({"generasi": previous["generasi"]})
+    await db.jadwal_ujian.delete_many({**key, "$or": stale})
+    
+    docs.sort(key=lambda d: (d["tanggal"], d["jam_mulai"], d["kode_mk"] or ""))
+    return ORJSONResponse({
+        "tahun_akademik_id": data.tahun_akademik_id,
+        "jenis": jenis,
+        "total_ujian": len(peserta),
+        "total_slot": len(slots),
+        "total_bentrok_pasangan": sum(len(n) for n in adjacency.values()) // 2,
+        "slot_terpakai": len({(d["tanggal"], d["jam_mulai"]) for d in docs}),
+        "durasi_detik": round(elapsed, 3),
+        "jadwal": project_rows(JadwalUjianResponse, docs),
+        "unassigned": [{
+            "mata_kuliah_id": u["mata_kuliah_id"],
+            "mata_kuliah_nama": mk_map[u["mata_kuliah_id"]]["nama"] if u["mata_kuliah_id"] in mk_map else None,
+            "jumlah_peserta": len(peserta[u["mata_kuliah_id"]]),
+            "alasan": u["alasan"],
+        } for u in result["unassigned"]],
+    })
+
+@akademik_router.get("/ujian", response_model=List[JadwalUjianResponse])
+async def get_jadwal_ujian(
+    tahun_akademik_id: str,
+    jenis: str = "UTS",
+    current_user: dict = Depends(get_current_user)
+):
+    jenis = validate_jenis_ujian(jenis)
+    items = await db.jadwal_ujian.find({
+        "tahun_akademik_id": tahun_akademik_id, "jenis": jenis,
+        "generasi": {"$in": await active_ujian_generasi(jenis, tahun_akademik_id)},
+    }, JADWAL_UJIAN_PROJECTION).sort([("tanggal", 1), ("jam_mulai", 1), ("kode_mk", 1)]).to_list(None)
+    return trusted_list_response(JadwalUjianResponse, items)
+
+@mahasiswa_router.get("/ujian")
+async def get_my_jadwal_ujian(
+    tahun_akademik_id: Optional[str] = None,
+    jenis: str = "UTS",
+    current_user: dict = Depends(get_current_user)
+):
+    jenis = validate_jenis_ujian(jenis)
+    cache_key = ("ujian", tahun_akademik_id, jenis)
+    cache_version = await get_student_cache_version(current_user)
+    if cached := get_student_cache(current_user, cache_version, cache_key):
+        return cached
+    
+    mhs = await db.mahasiswa.find_one({"user_id": current_user["id"]}, {"_id": 0, "id": 1})
+    if not mhs:
+        raise HTTPException(status_code=404, detail="Data mahasiswa tidak ditemukan")
+    
+    query = {
+        "peserta.mahasiswa_id": mhs["id"], "jenis": jenis,
+        "generasi": {"$in": await active_ujian_generasi(jenis, tahun_akademik_id)},
+    }
+    if tahun_akademik_id:
+        query["tahun_akademik_id"] = tahun_akademik_id
+    items = await db.jadwal_ujian.find(query, {
+        "_id": 0, "mata_kuliah_id": 1, "kode_mk": 1, "mata_kuliah_nama": 1, "tanggal": 1, "jam_mulai": 1,
+        "jam_selesai": 1, "tahun_akademik_id": 1, "peserta": {"$elemMatch": {"mahasiswa_id": mhs["id"]}}
+    }).sort([("tanggal", 1), ("jam_mulai", 1)]).to_list(None)
+    
+    result = [{
+        "mata_kuliah_id": item["mata_kuliah_id"],
+        "kode_mk": item.get("kode_mk"),
+        "mata_kuliah_nama": item.get("mata_kuliah_nama"),
+        "jenis": jenis,
+        "tanggal": item["tanggal"],
+        "jam_mulai": item["jam_mulai"],
+        "jam_selesai": item["jam_selesai"],
+        "ruangan": item["peserta"][0]["ruangan"] if item.get("peserta") else None,
+    } for item in items]
+    return set_student_cache(current_user, cache_version, cache_key, result)
+
+@dosen_router.get("/ujian", response_model=List[JadwalUjianResponse])
+async def get_dosen_jadwal_ujian(
+    tahun_akademik_id: Optional[str] = None,
+    jenis: str = "UTS",
+    current_user: dict = Depends(get_current_user)
+):
+    dosen = await db.dosen.find_one({"user_id": current_user["id"]}, {"_id": 0, "id": 1})
+    if not dosen:
+        raise HTTPException(status_code=404, detail="Data dosen tidak ditemukan")
     
-    query = {"mahasiswa_id": mhs["id"], "status": "disetujui"}
+    jenis = validate_jenis_ujian(jenis)
+    query = {
+        "dosen_ids": dosen["id"], "jenis": jenis,
+        "generasi": {"$in": await active_ujian_generasi(jenis, tahun_akademik_id)},
+    }
     if tahun_akademik_id:
         query["tahun_akademik_id"] = tahun_akademik_id
-    
-    krs_list = await db.krs.find(query, {"_id": 0}).to_list(100)
-    
-    result = []
-    for krs in krs_list:
-        kelas = await db.kelas.find_one({"id": krs["kelas_id"]}, {"_id": 0})
-        if kelas:
-            mk = await db.mata_kuliah.find_one({"id": kelas["mata_kuliah_id"]}, {"_id": 0})
-            dosen = await db.dosen.find_one({"id": kelas["dosen_id"]}, {"_id": 0})
-            
-            result.append({
-                "kelas_id": kelas["id"],
-                "kode_kelas": kelas["kode_kelas"],
-                "mata_kuliah_nama": mk["nama"] if mk else None,
-                "dosen_nama": dosen["nama"] if dosen else None,
-                "hari": kelas.get("hari", ""),
-                "jam_mulai": kelas.get("jam_mulai", ""),
-                "jam_selesai": kelas.get("jam_selesai", ""),
-                "ruangan": kelas.get("ruangan"),
-                "jadwal": kelas.get("jadwal")
-            })
-    
-    # Sort by day order
-    day_order = {"Senin": 1, "Selasa": 2, "Rabu": 3, "Kamis": 4, "Jumat": 5, "Sabtu": 6, "Minggu": 7}
-    result.sort(key=lambda x: (day_order.get(x["hari"], 8), x["jam_mulai"]))
-    
-    return result
+    items = await db.jadwal_ujian.find(query, JADWAL_UJIAN_PROJECTION).sort(
+        [("tanggal", 1), ("jam_mulai", 1)]
+    ).to_list(None)
+    return trusted_list_response(JadwalUjianResponse, items)
 
 # ==================== PRESENSI (ATTENDANCE) ====================
 
+PRESENSI_INSERT_CHUNK = 1000  # dokumen per insert_many saat generate kalender
+PRESENSI_MAKS_PERTEMUAN = 32
+
+def presensi_dates(tanggal_mulai, tanggal_selesai, sessions: List[dict], libur: set, maks_pertemuan: int) -> List[dict]:
+    """
+    Meeting calendar of one kelas: every weekly session between tanggal_mulai
+    and tanggal_selesai (dates, inclusive) is a meeting unless its date is in
+    libur (ISO strings), numbered in order up to maks_pertemuan.
+    """
+    by_weekday: Dict[int, List[dict]] = {}
+    for row in sorted(sessions, key=lambda r: r["menit_mulai"]):
+        if row["hari"] in DAY_ORDER:
+            by_weekday.setdefault(DAY_ORDER[row["hari"]] - 1, []).append(row)
+    
+    meetings = []
+    day = tanggal_mulai
+    while by_weekday and day <= tanggal_selesai and len(meetings) < maks_pertemuan:
+        iso = day.isoformat()
+        if iso not in libur:
+            for row in by_weekday.get(day.weekday(), ()):
+                if len(meetings) == maks_pertemuan:
+                    break
+                meetings.append({
+                    "pertemuan_ke": len(meetings) + 1,
+                    "tanggal": iso,
+                    "jam_mulai": row["jam_mulai"],
+                    "jam_selesai": row["jam_selesai"],
+                })
+        day += timedelta(days=1)
+    return meetings
+
+@akademik_router.post("/presensi/generate")
+async def generate_presensi_kalender(
+    data: PresensiKalenderRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Create every meeting of the semester for each scheduled kelas from its
+    weekly sessions, skipping holidays. Meetings that already exist (same
+    kelas_id and pertemuan_ke) are kept, so the generator can be rerun.
+    """
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    
+    if not 1 <= data.maks_pertemuan <= PRESENSI_MAKS_PERTEMUAN:
+        raise HTTPException(status_code=400, detail=f"maks_pertemuan harus antara 1 dan {PRESENSI_MAKS_PERTEMUAN}")
+    ta = await db.tahun_akademik.find_one(
+        {"id": data.tahun_akademik_id}, {"_id": 0, "id": 1, "tanggal_mulai": 1, "tanggal_selesai": 1}
+    )
+    if not ta:
+        raise HTTPException(status_code=404, detail="Tahun akademik tidak ditemukan")
+    if not ta.get("tanggal_mulai") or not ta.get("tanggal_selesai"):
+        raise HTTPException(status_code=400, detail="Tanggal mulai dan selesai tahun akademik belum diisi")
+    try:
+        tanggal_mulai = datetime.strptime(ta["tanggal_mulai"], "%Y-%m-%d").date()
+        tanggal_selesai = datetime.strptime(ta["tanggal_selesai"], "%Y-%m-%d").date()
+        libur = {datetime.strptime(t, "%Y-%m-%d").date().isoformat() for t in data.libur}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format tanggal harus YYYY-MM-DD")
+    
+    query = {"tahun_akademik_id": data.tahun_akademik_id}
+    if data.kelas_ids is not None:
+        query["id"] = {"$in": data.kelas_ids}
+    kelas_list = await db.kelas.find(
+        query, {"_id": 0, "id": 1, "sesi": 1, **{field: 1 for field in JADWAL_SESI_FIELDS}}
+    ).to_list(None)
+    
+    now = datetime.now(timezone.utc).isoformat()
+    docs = []
+    tanpa_jadwal = []
+    kurang = []
+    for kelas in kelas_list:
+        meetings = presensi_dates(tanggal_mulai, tanggal_selesai, kelas_sessions(kelas), libur, data.maks_pertemuan)
+        if not meetings:
+            tanpa_jadwal.append(kelas["id"])
+            continue
+        if len(meetings) < data.maks_pertemuan:
+            kurang.append({"kelas_id": kelas["id"], "jumlah_pertemuan": len(meetings)})
+        docs.extend({
+            "id": str(uuid.uuid4()),
+            "kelas_id": kelas["id"],
+            **meeting,
+            "created_at": now,
+            "created_by": current_user["id"],
+        } for meeting in meetings)
+    
+    # Unique index (kelas_id, pertemuan_ke) menolak pertemuan yang sudah ada; sisanya tetap masuk
+    dibuat = 0
+    for start in range(0, len(docs), PRESENSI_INSERT_CHUNK):
+        chunk = docs[start:start + PRESENSI_INSERT_CHUNK]
+        try:
+            result = await db.presensi.insert_many(chunk, ordered=False)
+            dibuat += len(result.inserted_ids)
+        except BulkWriteError as e:
+            if any(err["code"] != 11000 for err in e.details["writeErrors"]):
+                raise
+            dibuat += e.details["nInserted"]
+    
+    return ORJSONResponse({
+        "tahun_akademik_id": data.tahun_akademik_id,
+        "total_kelas": len(kelas_list),
+        "total_pertemuan": len(docs),
+        "dibuat": dibuat,
+        "sudah_ada": len(docs) - dibuat,
+        "tanpa_jadwal": tanpa_jadwal,
+        "kurang_pertemuan": kurang,
+    })
+
 @dosen_router.post("/presensi")
 async def create_presensi(
     data: PresensiCreate,
@@ -3047,7 +5854,10 @@ async def create_presensi(
         "created_by": current_user["id"]
     }
     
-    await db.presensi.insert_one(doc)
+    try:
+        await db.presensi.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Presensi untuk pertemuan ini sudah ada")
     
     return PresensiResponse(**doc)
 
@@ -3148,31 +5958,25 @@ async def get_rekap_presensi(
         {"_id": 0}
     ).to_list(100)
     
+    mahasiswa_map = await find_by_ids("mahasiswa", (krs["mahasiswa_id"] for krs in krs_list))
+    
+    # Count attendance by (mahasiswa, status) in one pass
+    status_counts = {}
+    if presensi_ids and mahasiswa_map:
+        rows = await db.presensi_detail.aggregate([
+            {"$match": {"presensi_id": {"$in": presensi_ids}, "mahasiswa_id": {"$in": list(mahasiswa_map)}}},
+            {"$group": {"_id": {"mahasiswa_id": "$mahasiswa_id", "status": "$status"}, "n": {"$sum": 1}}}
+        ]).to_list(None)
+        status_counts = {(row["_id"]["mahasiswa_id"], row["_id"]["status"]): row["n"] for row in rows}
+    
     result = []
     for krs in krs_list:
-        mhs = await db.mahasiswa.find_one({"id": krs["mahasiswa_id"]}, {"_id": 0})
+        mhs = mahasiswa_map.get(krs["mahasiswa_id"])
         if mhs:
-            # Count attendance by status
-            hadir = await db.presensi_detail.count_documents({
-                "presensi_id": {"$in": presensi_ids},
-                "mahasiswa_id": mhs["id"],
-                "status": "hadir"
-            })
-            izin = await db.presensi_detail.count_documents({
-                "presensi_id": {"$in": presensi_ids},
-                "mahasiswa_id": mhs["id"],
-                "status": "izin"
-            })
-            sakit = await db.presensi_detail.count_documents({
-                "presensi_id": {"$in": presensi_ids},
-                "mahasiswa_id": mhs["id"],
-                "status": "sakit"
-            })
-            alpha = await db.presensi_detail.count_documents({
-                "presensi_id": {"$in": presensi_ids},
-                "mahasiswa_id": mhs["id"],
-                "status": "alpha"
-            })
+            hadir = status_counts.get((mhs["id"], "hadir"), 0)
+            izin = status_counts.get((mhs["id"], "izin"), 0)
+            sakit = status_counts.get((mhs["id"], "sakit"), 0)
+            alpha = status_counts.get((mhs["id"], "alpha"), 0)
             
             persentase = (hadir / total_pertemuan * 100) if total_pertemuan > 0 else 0
             
@@ -3531,9 +6335,13 @@ async def update_user_role(
 
 # ----- Kategori UKT -----
 @keuangan_router.get("/kategori-ukt", response_model=List[KategoriUKTResponse])
-async def get_kategori_ukt(current_user: dict = Depends(get_current_user)):
+async def get_kategori_ukt(request: Request, current_user: dict = Depends(get_current_user)):
+    etag = await master_data_etag(request, current_user, "kategori_ukt")
+    if not_modified := not_modified_response(request, etag):
+        return not_modified
+    
     items = await db.kategori_ukt.find({}, {"_id": 0}).sort("nominal", 1).to_list(100)
-    return items
+    return trusted_list_response(KategoriUKTResponse, items, {"ETag": etag, "Cache-Control": MASTER_DATA_CACHE_CONTROL})
 
 @keuangan_router.post("/kategori-ukt", response_model=KategoriUKTResponse)
 async def create_kategori_ukt(
@@ -3553,6 +6361,7 @@ async def create_kategori_ukt(
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.kategori_ukt.insert_one(doc)
+    await bump_collection_version("kategori_ukt")
     return KategoriUKTResponse(**doc)
 
 @keuangan_router.put("/kategori-ukt/{item_id}", response_model=KategoriUKTResponse)
@@ -3572,6 +6381,7 @@ async def update_kategori_ukt(
         {"id": item_id},
         {"$set": {**data.dict(), "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    await bump_collection_version("kategori_ukt")
     updated = await db.kategori_ukt.find_one({"id": item_id}, {"_id": 0})
     return KategoriUKTResponse(**updated)
 
@@ -3589,6 +6399,7 @@ async def delete_kategori_ukt(
         raise HTTPException(status_code=400, detail="Kategori masih digunakan dalam tagihan")
     
     await db.kategori_ukt.delete_one({"id": item_id})
+    await bump_collection_version("kategori_ukt")
     return {"message": "Kategori UKT berhasil dihapus"}
 
 # ----- Tagihan UKT -----
@@ -3620,9 +6431,20 @@ async def get_all_tagihan(
     # Get tagihan
     items = await db.tagihan_ukt.find(match_stage if match_stage else {}, {"_id": 0}).to_list(1000)
     
+    mahasiswa_map = await find_by_ids("mahasiswa", (item["mahasiswa_id"] for item in items), {"nim": 1, "nama": 1, "prodi_id": 1})
+    ta_map = await find_by_ids("tahun_akademik", (item["tahun_akademik_id"] for item in items))
+    kategori_map = await find_by_ids("kategori_ukt", (item["kategori_ukt_id"] for item in items), {"nama": 1})
+    prodi_map = await find_by_ids("prodi", (m.get("prodi_id") for m in mahasiswa_map.values()), {"nama": 1})
+    # Calculate total paid
+    paid_rows = await db.pembayaran_ukt.aggregate([
+        {"$match": {"tagihan_id": {"$in": [item["id"] for item in items]}, "status": "verified"}},
+        {"$group": {"_id": "$tagihan_id", "total": {"$sum": "$nominal"}}}
+    ]).to_list(None) if items else []
+    paid_map = {row["_id"]: row["total"] for row in paid_rows}
+    
     result = []
     for item in items:
-        mhs = await db.mahasiswa.find_one({"id": item["mahasiswa_id"]}, {"_id": 0})
+        mhs = mahasiswa_map.get(item["mahasiswa_id"])
         
         # Filter by prodi if specified
         if prodi_id and mhs and mhs.get("prodi_id") != prodi_id:
@@ -3633,29 +6455,23 @@ async def get_all_tagihan(
             if mhs.get("prodi_id") not in accessible_prodis:
                 continue
         
-        ta = await db.tahun_akademik.find_one({"id": item["tahun_akademik_id"]}, {"_id": 0})
-        kategori = await db.kategori_ukt.find_one({"id": item["kategori_ukt_id"]}, {"_id": 0})
-        prodi = await db.prodi.find_one({"id": mhs.get("prodi_id")}, {"_id": 0}) if mhs else None
-        
-        # Calculate total paid
-        pembayaran = await db.pembayaran_ukt.find(
-            {"tagihan_id": item["id"], "status": "verified"},
-            {"_id": 0}
-        ).to_list(100)
-        total_dibayar = sum(p["nominal"] for p in pembayaran)
+        ta = ta_map.get(item["tahun_akademik_id"])
+        kategori = kategori_map.get(item["kategori_ukt_id"])
+        prodi = prodi_map.get(mhs.get("prodi_id")) if mhs else None
+        total_dibayar = paid_map.get(item["id"], 0)
         
-        result.append(TagihanUKTResponse(
+        result.append({
             **item,
-            mahasiswa_nim=mhs["nim"] if mhs else None,
-            mahasiswa_nama=mhs["nama"] if mhs else None,
-            prodi_nama=prodi["nama"] if prodi else None,
-            tahun_akademik_label=f"{ta['tahun']} - {ta['semester']}" if ta else None,
-            kategori_nama=kategori["nama"] if kategori else None,
-            total_dibayar=total_dibayar,
-            sisa_tagihan=item["nominal"] - total_dibayar
-        ))
+            "mahasiswa_nim": mhs["nim"] if mhs else None,
+            "mahasiswa_nama": mhs["nama"] if mhs else None,
+            "prodi_nama": prodi["nama"] if prodi else None,
+            "tahun_akademik_label": f"{ta['tahun']} - {ta['semester']}" if ta else None,
+            "kategori_nama": kategori["nama"] if kategori else None,
+            "total_dibayar": total_dibayar,
+            "sisa_tagihan": item["nominal"] - total_dibayar
+        })
     
-    return result
+    return trusted_list_response(TagihanUKTResponse, result)
 
 @keuangan_router.post("/tagihan", response_model=TagihanUKTResponse)
 async def create_tagihan(
@@ -3695,6 +6511,7 @@ async def create_tagihan(
     }
     
     await db.tagihan_ukt.insert_one(doc)
+    await invalidate_student_cache(data.mahasiswa_id)
     
     mhs = await db.mahasiswa.find_one({"id": data.mahasiswa_id}, {"_id": 0})
     ta = await db.tahun_akademik.find_one({"id": data.tahun_akademik_id}, {"_id": 0})
@@ -3728,6 +6545,7 @@ async def create_tagihan_batch(
     
     created_count = 0
     skipped_count = 0
+    created_ids = []
     
     for mhs in mahasiswa_list:
         # Check if tagihan already exists
@@ -3767,8 +6585,11 @@ async def create_tagihan_batch(
         }
         
         await db.tagihan_ukt.insert_one(doc)
+        created_ids.append(mhs["id"])
         created_count += 1
     
+    if created_ids:
+        await invalidate_student_cache(*created_ids)
     return {
         "message": f"Tagihan batch berhasil dibuat",
         "created": created_count,
@@ -3816,6 +6637,7 @@ async def update_tagihan_kategori(
             "updated_at": datetime.now(timezone.utc).isoformat()
         }}
     )
+    await invalidate_student_cache(tagihan["mahasiswa_id"])
     
     return {"message": "Kategori tagihan berhasil diubah"}
 
@@ -3832,14 +6654,33 @@ async def delete_tagihan(
     if payments:
         raise HTTPException(status_code=400, detail="Tagihan sudah memiliki pembayaran, tidak bisa dihapus")
     
-    await db.tagihan_ukt.delete_one({"id": item_id})
+    tagihan = await db.tagihan_ukt.find_one_and_delete({"id": item_id}, projection={"_id": 0, "mahasiswa_id": 1})
+    if tagihan:
+        await invalidate_student_cache(tagihan["mahasiswa_id"])
     return {"message": "Tagihan berhasil dihapus"}
 
 # ----- Pembayaran UKT -----
+PEMBAYARAN_PAGE_MAX = 1000
+
+def encode_pembayaran_cursor(item: dict) -> str:
+    return f"{item.get('created_at') or ''}|{item['id']}"
+
+def decode_pembayaran_cursor(cursor: str) -> dict:
+    """Keyset condition for rows strictly after the cursor in (created_at, id) desc order"""
+    created_at, sep, item_id = cursor.rpartition("|")
+    if not sep or not item_id:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid")
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": item_id}}
+    ]}
+
 @keuangan_router.get("/pembayaran", response_model=List[PembayaranUKTResponse])
 async def get_all_pembayaran(
     tahun_akademik_id: Optional[str] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 500,
     current_user: dict = Depends(get_current_user)
 ):
     # Check management access
@@ -3848,36 +6689,56 @@ async def get_all_pembayaran(
     # Get accessible prodis for filtering
     accessible_prodis = await get_accessible_prodi_ids(current_user)
     
-    query = {}
+    limit = max(1, min(limit, PEMBAYARAN_PAGE_MAX))
+    
+    match = {}
     if status:
-        query["status"] = status
+        match["status"] = status
+    if cursor:
+        match.update(decode_pembayaran_cursor(cursor))
+    
+    # Sort walks the (status, created_at) index; tagihan/mahasiswa filters
+    # run inside the pipeline so every page is full
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"created_at": -1, "id": -1}},
+        {"$lookup": {
+            "from": "tagihan_ukt",
+            "localField": "tagihan_id",
+            "foreignField": "id",
+            "as": "tagihan"
+        }},
+        {"$unwind": {"path": "$tagihan", "preserveNullAndEmptyArrays": True}},
+    ]
+    if tahun_akademik_id:
+        pipeline.append({"$match": {"tagihan.tahun_akademik_id": tahun_akademik_id}})
+    
+    pipeline += [
+        {"$lookup": {
+            "from": "mahasiswa",
+            "localField": "tagihan.mahasiswa_id",
+            "foreignField": "id",
+            "as": "mhs"
+        }},
+        {"$unwind": {"path": "$mhs", "preserveNullAndEmptyArrays": True}},
+    ]
+    if accessible_prodis is not None:
+        pipeline.append({"$match": {"mhs.prodi_id": {"$in": accessible_prodis}}})
     
-    items = await db.pembayaran_ukt.find(query, {"_id": 0}).sort("created_at", -1).to_list(500)
+    pipeline += [
+        {"$limit": limit},
+        {"$addFields": {"mahasiswa_nama": "$mhs.nama", "mahasiswa_nim": "$mhs.nim"}},
+        {"$project": {"_id": 0, "tagihan": 0, "mhs": 0}},
+    ]
     
-    result = []
-    for item in items:
-        tagihan = await db.tagihan_ukt.find_one({"id": item["tagihan_id"]}, {"_id": 0})
-        
-        # Filter by tahun_akademik_id if specified
-        if tahun_akademik_id and tagihan and tagihan.get("tahun_akademik_id") != tahun_akademik_id:
-            continue
-        
-        mhs = None
-        if tagihan:
-            mhs = await db.mahasiswa.find_one({"id": tagihan["mahasiswa_id"]}, {"_id": 0})
-        
-        # Filter by accessible prodi (role-based)
-        if accessible_prodis is not None and mhs:
-            if mhs.get("prodi_id") not in accessible_prodis:
-                continue
-        
-        result.append(PembayaranUKTResponse(
-            **item,
-            mahasiswa_nama=mhs["nama"] if mhs else None,
-            mahasiswa_nim=mhs["nim"] if mhs else None
-        ))
+    items = await db.pembayaran_ukt.aggregate(pipeline).to_list(limit)
     
-    return result
+    # Full page means there may be more; hand out the keyset cursor
+    headers = {}
+    if len(items) == limit:
+        headers["X-Next-Cursor"] = encode_pembayaran_cursor(items[-1])
+    
+    return trusted_list_response(PembayaranUKTResponse, items, headers)
 
 @keuangan_router.post("/pembayaran", response_model=PembayaranUKTResponse)
 async def create_pembayaran(
@@ -3934,8 +6795,12 @@ async def verify_pembayaran(
         if mhs and not await can_access_prodi(current_user, mhs.get("prodi_id")):
             raise HTTPException(status_code=403, detail="Anda tidak memiliki akses ke pembayaran ini")
     
-    await db.pembayaran_ukt.update_one(
-        {"id": item_id},
+    if pembayaran["status"] == "verified" and data.status == "verified":
+        raise HTTPException(status_code=400, detail="Pembayaran sudah diverifikasi")
+    
+    # Filter status lama: dua verifikasi bersamaan tidak bisa sama-sama lolos
+    result = await db.pembayaran_ukt.update_one(
+        {"id": item_id, "status": pembayaran["status"]},
         {"$set": {
             "status": data.status,
             "catatan_verifikasi": data.catatan,
@@ -3943,6 +6808,11 @@ async def verify_pembayaran(
             "verified_at": datetime.now(timezone.utc).isoformat()
         }}
     )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Status pembayaran sudah berubah, muat ulang data")
+    if pembayaran["status"] == "verified":
+        # Pembayaran keluar dari snapshot: hari verifikasi lamanya dihitung ulang
+        await mark_keuangan_snapshot_dirty(pembayaran["verified_at"][:10])
     
     # If verified, update tagihan status
     if data.status == "verified":
@@ -3965,6 +6835,8 @@ async def verify_pembayaran(
                 {"$set": {"status": new_status, "updated_at": datetime.now(timezone.utc).isoformat()}}
             )
     
+    if tagihan:
+        await invalidate_student_cache(tagihan["mahasiswa_id"])
     return {"message": f"Pembayaran berhasil di{data.status}"}
 
 # ----- Mahasiswa Keuangan -----
@@ -3973,6 +6845,11 @@ async def get_my_tagihan(
     tahun_akademik_id: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
+    cache_key = ("tagihan", tahun_akademik_id)
+    cache_version = await get_student_cache_version(current_user)
+    if cached := get_student_cache(current_user, cache_version, cache_key):
+        return cached
+    
     mhs = await db.mahasiswa.find_one({"user_id": current_user["id"]}, {"_id": 0})
     if not mhs:
         raise HTTPException(status_code=404, detail="Data mahasiswa tidak ditemukan")
@@ -4003,7 +6880,7 @@ async def get_my_tagihan(
             "sisa_tagihan": item["nominal"] - total_dibayar
         })
     
-    return result
+    return set_student_cache(current_user, cache_version, cache_key, result)
 
 @mahasiswa_router.get("/keuangan/pembayaran")
 async def get_my_pembayaran(
@@ -4063,64 +6940,735 @@ async def create_my_pembayaran(
     )
 
 # ----- Rekap Keuangan -----
+REKAP_GROUP_FIELDS = {
+    "prodi": "$mhs.prodi_id",
+    "fakultas": "$prodi.fakultas_id",
+    "kategori": "$kategori_ukt_id",
+    "angkatan": "$mhs.tahun_masuk",
+}
+
+def build_rekap_keuangan_pipeline(
+    match: dict,
+    accessible_prodis: Optional[List[str]],
+    group_by: Optional[str] = None
+) -> List[dict]:
+    """
+    Build aggregation pipeline over tagihan_ukt that sums tagihan and verified
+    pembayaran per group. All summing happens inside MongoDB, so the result
+    size only depends on the number of groups.
+    """
+    pipeline: List[dict] = [{"$match": match}]
+    
+    # Join mahasiswa only when needed for RBAC scope or the breakdown key
+    if accessible_prodis is not None or group_by in ("prodi", "fakultas", "angkatan"):
+        pipeline += [
+            {"$lookup": {
+                "from": "mahasiswa",
+                "localField": "mahasiswa_id",
+                "foreignField": "id",
+                "as": "mhs"
+            }},
+            {"$unwind": {"path": "$mhs", "preserveNullAndEmptyArrays": accessible_prodis is None}},
+        ]
+        if accessible_prodis is not None:
+            pipeline.append({"$match": {"mhs.prodi_id": {"$in": accessible_prodis}}})
+    
+    if group_by == "fakultas":
+        pipeline += [
+            {"$lookup": {
+                "from": "prodi",
+                "localField": "mhs.prodi_id",
+                "foreignField": "id",
+                "as": "prodi"
+            }},
+            {"$unwind": {"path": "$prodi", "preserveNullAndEmptyArrays": True}},
+        ]
+    
+    # Total verified payments per tagihan, summed on the server
+    pipeline += [
+        {"$lookup": {
+            "from": "pembayaran_ukt",
+            "localField": "id",
+            "foreignField": "tagihan_id",
+            "as": "bayar"
+        }},
+        {"$addFields": {"bayar": {"$filter": {
+            "input": "$bayar",
+            "as": "p",
+            "cond": {"$eq": ["$$p.status", "verified"]}
+        }}}},
+        {"$group": {
+            "_id": REKAP_GROUP_FIELDS[group_by] if group_by else None,
+            "total_tagihan": {"$sum": "$nominal"},
+            "total_terbayar": {"$sum": {"$sum": "$bayar.nominal"}},
+            "jumlah_tagihan": {"$sum": 1},
+            "lunas": {"$sum": {"$cond": [{"$eq": ["$status", "lunas"]}, 1, 0]}},
+            "cicilan": {"$sum": {"$cond": [{"$eq": ["$status", "cicilan"]}, 1, 0]}},
+            "belum_bayar": {"$sum": {"$cond": [{"$eq": ["$status", "belum_bayar"]}, 1, 0]}},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+    return pipeline
+
+async def get_rekap_group_labels(group_by: str, keys: List[str]) -> Dict[str, str]:
+    """Resolve breakdown keys to display names with one query per rekap"""
+    if group_by == "angkatan":
+        return {k: k for k in keys}
+    
+    collection = {"prodi": db.prodi, "fakultas": db.fakultas, "kategori": db.kategori_ukt}[group_by]
+    docs = await collection.find({"id": {"$in": keys}}, {"_id": 0, "id": 1, "nama": 1}).to_list(len(keys))
+    return {d["id"]: d["nama"] for d in docs}
+
 @keuangan_router.get("/rekap", response_model=RekapKeuanganResponse)
 async def get_rekap_keuangan(
     tahun_akademik_id: Optional[str] = None,
+    group_by: Optional[str] = None,  # prodi, fakultas, kategori, angkatan
     current_user: dict = Depends(get_current_user)
 ):
-    if current_user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Akses ditolak")
-    
-    query = {}
-    if tahun_akademik_id:
-        query["tahun_akademik_id"] = tahun_akademik_id
-    
-    tagihan_list = await db.tagihan_ukt.find(query, {"_id": 0}).to_list(10000)
+    # Check management access
+    check_management_access(current_user)
     
-    total_tagihan = sum(t["nominal"] for t in tagihan_list)
+    if group_by and group_by not in REKAP_GROUP_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by harus salah satu dari: {', '.join(REKAP_GROUP_FIELDS)}"
+        )
     
-    # Calculate total verified payments
-    tagihan_ids = [t["id"] for t in tagihan_list]
-    pembayaran_list = await db.pembayaran_ukt.find(
-        {"tagihan_id": {"$in": tagihan_ids}, "status": "verified"},
-        {"_id": 0}
-    ).to_list(50000)
-    total_terbayar = sum(p["nominal"] for p in pembayaran_list)
+    # Get accessible prodis for filtering
+    accessible_prodis = await get_accessible_prodi_ids(current_user)
     
-    lunas_count = len([t for t in tagihan_list if t["status"] == "lunas"])
-    cicilan_count = len([t for t in tagihan_list if t["status"] == "cicilan"])
-    belum_bayar_count = len([t for t in tagihan_list if t["status"] == "belum_bayar"])
+    match = {}
+    if tahun_akademik_id:
+        match["tahun_akademik_id"] = tahun_akademik_id
+    
+    pipeline = build_rekap_keuangan_pipeline(match, accessible_prodis, group_by)
+    groups = await db.tagihan_ukt.aggregate(pipeline, allowDiskUse=True).to_list(None)
+    
+    total_tagihan = sum(g["total_tagihan"] for g in groups)
+    total_terbayar = sum(g["total_terbayar"] for g in groups)
+    
+    breakdown = None
+    if group_by:
+        labels = await get_rekap_group_labels(group_by, [g["_id"] for g in groups if g["_id"]])
+        breakdown = [
+            RekapKeuanganBreakdown(
+                key=g["_id"],
+                label=labels.get(g["_id"]) if g["_id"] else None,
+                total_tagihan=g["total_tagihan"],
+                total_terbayar=g["total_terbayar"],
+                total_belum_bayar=g["total_tagihan"] - g["total_terbayar"],
+                jumlah_tagihan=g["jumlah_tagihan"],
+                jumlah_mahasiswa_lunas=g["lunas"],
+                jumlah_mahasiswa_cicilan=g["cicilan"],
+                jumlah_mahasiswa_belum_bayar=g["belum_bayar"]
+            )
+            for g in groups
+        ]
     
     return RekapKeuanganResponse(
         total_tagihan=total_tagihan,
         total_terbayar=total_terbayar,
         total_belum_bayar=total_tagihan - total_terbayar,
-        jumlah_mahasiswa_lunas=lunas_count,
-        jumlah_mahasiswa_cicilan=cicilan_count,
-        jumlah_mahasiswa_belum_bayar=belum_bayar_count
+        jumlah_mahasiswa_lunas=sum(g["lunas"] for g in groups),
+        jumlah_mahasiswa_cicilan=sum(g["cicilan"] for g in groups),
+        jumlah_mahasiswa_belum_bayar=sum(g["belum_bayar"] for g in groups),
+        group_by=group_by,
+        breakdown=breakdown
+    )
+
+# ----- Snapshot Keuangan Harian -----
+# Baris agregat harian per (tanggal, tahun akademik, prodi, kategori UKT) dari
+# pembayaran terverifikasi. Setiap refresh menghitung ulang hari sejak watermark
+# terakhir (atau sejak hari yang ditandai dirty_from) dengan $set, sehingga
+# refresh yang diulang atau berjalan di dua worker tidak menggandakan total dan
+# grafik trend tidak perlu memindai ulang seluruh pembayaran_ukt.
+KEUANGAN_SNAPSHOT_STATE_ID = "pembayaran_ukt"
+KEUANGAN_SNAPSHOT_LAG_SECONDS = 5  # beri jeda agar verifikasi yang sedang ditulis tidak terlewat
+KEUANGAN_SNAPSHOT_LEASE_SECONDS = 60  # batas waktu worker lain menunggu recompute yang macet
+KEUANGAN_SNAPSHOT_POLL_SECONDS = 0.1
+keuangan_snapshot_lock = asyncio.Lock()
+
+async def mark_keuangan_snapshot_dirty(tanggal: str):
+    """Force the next refresh to recompute from this day (YYYY-MM-DD), e.g. after a verified payment is rejected"""
+    await db.keuangan_snapshot_state.update_one(
+        {"id": KEUANGAN_SNAPSHOT_STATE_ID}, {"$min": {"dirty_from": tanggal}}, upsert=True
     )
 
+async def wait_keuangan_snapshot_refresh():
+    """Wait while another worker holds the recompute lease, so its half-rewritten rows are not read"""
+    while await db.keuangan_snapshot_state.find_one(
+        {"id": KEUANGAN_SNAPSHOT_STATE_ID, "refreshing_until": {"$gt": datetime.now(timezone.utc).isoformat()}},
+        {"_id": 0, "id": 1}
+    ):
+        await asyncio.sleep(KEUANGAN_SNAPSHOT_POLL_SECONDS)
+
+async def recompute_keuangan_snapshot(dari: str, cutoff: str) -> int:
+    """Replace the snapshot rows of every day from `dari` (YYYY-MM-DD, "" for all) with fresh totals"""
+    pipeline = [
+        {"$match": {"status": "verified", "verified_at": {"$gte": dari, "$lte": cutoff}}},
+        {"$lookup": {
+            "from": "tagihan_ukt",
+            "localField": "tagihan_id",
+            "foreignField": "id",
+            "as": "tagihan"
+        }},
+        {"$unwind": "$tagihan"},
+        {"$lookup": {
+            "from": "mahasiswa",
+            "localField": "tagihan.mahasiswa_id",
+            "foreignField": "id",
+            "as": "mhs"
+        }},
+        {"$unwind": {"path": "$mhs", "preserveNullAndEmptyArrays": True}},
+        {"$group": {
+            "_id": {
+                "tanggal": {"$substr": ["$verified_at", 0, 10]},
+                "tahun_akademik_id": "$tagihan.tahun_akademik_id",
+                "prodi_id": "$mhs.prodi_id",
+                "kategori_ukt_id": "$tagihan.kategori_ukt_id",
+            },
+            "total_terbayar": {"$sum": "$nominal"},
+            "jumlah_pembayaran": {"$sum": 1},
+        }},
+    ]
+    rows = await db.pembayaran_ukt.aggregate(pipeline, allowDiskUse=True).to_list(None)
+    
+    run_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+    if rows:
+        await db.keuangan_snapshot_harian.bulk_write([
+            UpdateOne(
+                {
+                    "tanggal": row["_id"]["tanggal"],
+                    "tahun_akademik_id": row["_id"].get("tahun_akademik_id"),
+                    "prodi_id": row["_id"].get("prodi_id"),
+                    "kategori_ukt_id": row["_id"].get("kategori_ukt_id"),
+                },
+                {"$set": {
+                    "total_terbayar": row["total_terbayar"],
+                    "jumlah_pembayaran": row["jumlah_pembayaran"],
+                    "refresh_id": run_id,
+                    "updated_at": now,
+                }},
+                upsert=True
+            )
+            for row in rows
+        ], ordered=False)
+    # Kombinasi yang tidak muncul lagi (semua pembayarannya ditolak) dihapus
+    await db.keuangan_snapshot_harian.delete_many({"tanggal": {"$gte": dari}, "refresh_id": {"$ne": run_id}})
+    return len(rows)
+
+async def refresh_keuangan_snapshot(rebuild: bool = False) -> dict:
+    """
+    Bring the daily snapshot up to date. Nothing is written when no payment
+    changed since the watermark. Otherwise the watermark is claimed with a
+    compare-and-set on the state document, together with a lease that other
+    workers wait on before reading; the days it recomputes are rewritten with
+    $set, never incremented, so a rerun gives the same totals.
+    """
+    async with keuangan_snapshot_lock:
+        now = datetime.now(timezone.utc)
+        state = await db.keuangan_snapshot_state.find_one({"id": KEUANGAN_SNAPSHOT_STATE_ID}, {"_id": 0}) or {}
+        watermark = state.get("watermark")
+        dirty_from = state.get("dirty_from")
+        refreshing_until = state.get("refreshing_until")
+        if refreshing_until and refreshing_until > now.isoformat():
+            # Worker lain sedang menulis ulang snapshot
+            await wait_keuangan_snapshot_refresh()
+            return {"rows_updated": 0, "watermark": watermark}
+        redo_from = dirty_from
+        if refreshing_until:
+            # Lease kedaluwarsa: worker pemegangnya mati sebelum selesai, ulangi rentangnya
+            redo_from = min(dirty_from or state["refreshing_from"], state["refreshing_from"])
+        cutoff = (now - timedelta(seconds=KEUANGAN_SNAPSHOT_LAG_SECONDS)).isoformat()
+        
+        if rebuild or not watermark:
+            dari = ""
+        else:
+            # verified_at berubah pada setiap verifikasi/penolakan sejak watermark
+            changed = await db.pembayaran_ukt.find_one(
+                {"verified_at": {"$gt": watermark, "$lte": cutoff}}, {"_id": 0, "id": 1}
+            )
+            if not changed and redo_from is None:
+                return {"rows_updated": 0, "watermark": watermark}
+            dari = min(watermark[:10], redo_from or watermark[:10])
+        
+        lease = (now + timedelta(seconds=KEUANGAN_SNAPSHOT_LEASE_SECONDS)).isoformat()
+        if state:
+            claimed = await db.keuangan_snapshot_state.find_one_and_update(
+                {"id": KEUANGAN_SNAPSHOT_STATE_ID, "watermark": watermark, "dirty_from": dirty_from,
+                 "refreshing_until": refreshing_until},
+                {"$set": {"watermark": cutoff, "refreshing_until": lease, "refreshing_from": dari},
+                 "$unset": {"dirty_from": ""}},
+                projection={"_id": 0, "id": 1}
+            )
+        else:
+            try:
+                await db.keuangan_snapshot_state.insert_one(
+                    {"id": KEUANGAN_SNAPSHOT_STATE_ID, "watermark": cutoff,
+                     "refreshing_until": lease, "refreshing_from": dari}
+                )
+                claimed = True
+            except DuplicateKeyError:
+                claimed = None
+        if claimed is None:
+            # Worker lain sudah mengambil rentang ini (atau ada penandaan dirty baru)
+            await wait_keuangan_snapshot_refresh()
+            return {"rows_updated": 0, "watermark": watermark}
+        
+        try:
+            rows_updated = await recompute_keuangan_snapshot(dari, cutoff)
+        except Exception:
+            # Rentang sudah diklaim: tandai agar refresh berikutnya mengulanginya
+            await mark_keuangan_snapshot_dirty(dari or "0000-00-00")
+            raise
+        finally:
+            await db.keuangan_snapshot_state.update_one(
+                {"id": KEUANGAN_SNAPSHOT_STATE_ID, "refreshing_until": lease}, {"$set": {"refreshing_until": None}}
+            )
+        
+        return {"rows_updated": rows_updated, "watermark": cutoff}
+
+@keuangan_router.post("/snapshot/refresh", response_model=KeuanganSnapshotRefreshResponse)
+async def refresh_keuangan_snapshot_endpoint(
+    rebuild: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+    
+    return await refresh_keuangan_snapshot(rebuild=rebuild)
+
+@keuangan_router.get("/trend", response_model=List[KeuanganTrendPoint])
+async def get_keuangan_trend(
+    tahun_akademik_id: Optional[str] = None,
+    prodi_id: Optional[str] = None,
+    kategori_ukt_id: Optional[str] = None,
+    tanggal_mulai: Optional[str] = None,  # YYYY-MM-DD
+    tanggal_selesai: Optional[str] = None,  # YYYY-MM-DD
+    group_by: Optional[str] = None,  # prodi, kategori
+    current_user: dict = Depends(get_current_user)
+):
+    # Check management access
+    check_management_access(current_user)
+    
+    group_fields = {"prodi": "prodi_id", "kategori": "kategori_ukt_id"}
+    if group_by and group_by not in group_fields:
+        raise HTTPException(status_code=400, detail="group_by harus 'prodi' atau 'kategori'")
+    
+    # Bring snapshot up to date; only payments after the watermark are probed and
+    # nothing is written unless one changed
+    await refresh_keuangan_snapshot()
+    
+    query = {}
+    if tahun_akademik_id:
+        query["tahun_akademik_id"] = tahun_akademik_id
+    if kategori_ukt_id:
+        query["kategori_ukt_id"] = kategori_ukt_id
+    if tanggal_mulai or tanggal_selesai:
+        query["tanggal"] = {}
+        if tanggal_mulai:
+            query["tanggal"]["$gte"] = tanggal_mulai
+        if tanggal_selesai:
+            query["tanggal"]["$lte"] = tanggal_selesai
+    
+    # Apply role-based prodi filter
+    if prodi_id:
+        if not await can_access_prodi(current_user, prodi_id):
+            raise HTTPException(status_code=403, detail="Anda tidak memiliki akses ke program studi ini")
+        query["prodi_id"] = prodi_id
+    else:
+        query = await filter_by_prodi_access(query, current_user, "prodi_id")
+    
+    key_field = group_fields.get(group_by)
+    rows = await db.keuangan_snapshot_harian.aggregate([
+        {"$match": query},
+        {"$group": {
+            "_id": {"tanggal": "$tanggal", "key": f"${key_field}" if key_field else None},
+            "total_terbayar": {"$sum": "$total_terbayar"},
+            "jumlah_pembayaran": {"$sum": "$jumlah_pembayaran"},
+        }},
+        {"$sort": {"_id.tanggal": 1, "_id.key": 1}},
+    ]).to_list(None)
+    
+    labels = {}
+    if group_by:
+        keys = list({r["_id"]["key"] for r in rows if r["_id"].get("key")})
+        labels = await get_rekap_group_labels(group_by, keys)
+    
+    return [
+        KeuanganTrendPoint(
+            tanggal=r["_id"]["tanggal"],
+            key=r["_id"].get("key"),
+            label=labels.get(r["_id"].get("key")),
+            total_terbayar=r["total_terbayar"],
+            jumlah_pembayaran=r["jumlah_pembayaran"]
+        )
+        for r in rows
+    ]
+
 # ==================== BIODATA ENDPOINTS ====================
 
 # ----- Helper: Save uploaded file -----
-async def save_upload_file(file: UploadFile, mahasiswa_id: str, doc_type: str) -> str:
-    """Save uploaded file and return the relative path"""
-    # Create directory for mahasiswa
-    mhs_dir = UPLOAD_DIR / mahasiswa_id
-    mhs_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Generate unique filename
-    ext = Path(file.filename).suffix if file.filename else ".jpg"
-    filename = f"{doc_type}_{uuid.uuid4().hex[:8]}{ext}"
-    file_path = mhs_dir / filename
-    
-    # Save file
-    async with aiofiles.open(file_path, 'wb') as out_file:
-        content = await file.read()
-        await out_file.write(content)
+def detect_upload_type(head: bytes, allowed_types: Dict[str, tuple]) -> Optional[str]:
+    """Return the MIME type whose magic bytes match the start of the file"""
+    for mime, (magic, _) in allowed_types.items():
+        if head.startswith(magic):
+            if mime == "image/webp" and head[8:12] != b"WEBP":
+                continue
+            return mime
+    return None
+
+async def save_upload_file(
+    file: UploadFile,
+    category: str = "biodata",
+    allowed_types: Dict[str, tuple] = DOKUMEN_UPLOAD_TYPES,
+    max_size: int = MAX_DOKUMEN_SIZE
+) -> str:
+    """
+    Stream an upload to disk in fixed-size chunks and return its relative URL.
+    
+    Size and MIME type are enforced while streaming. Files are stored under
+    their SHA-256 digest, so identical re-uploads share a single file on disk.
+    """
+    if file.content_type not in (None, "application/octet-stream") and file.content_type not in allowed_types:
+        raise HTTPException(status_code=415, detail=f"Tipe file {file.content_type} tidak diizinkan")
+    
+    tmp_path = UPLOAD_TMP_DIR / uuid.uuid4().hex
+    digest = hashlib.sha256()
+    size = 0
+    mime = None
+    
+    try:
+        async with aiofiles.open(tmp_path, 'wb') as out_file:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                if mime is None:
+                    mime = detect_upload_type(chunk, allowed_types)
+                    if mime is None:
+                        raise HTTPException(status_code=415, detail="Isi file tidak sesuai tipe yang diizinkan")
+                size += len(chunk)
+                if size > max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Ukuran file melebihi batas {max_size // (1024 * 1024)} MB"
+                    )
+                digest.update(chunk)
+                await out_file.write(chunk)
+        
+        if size == 0:
+            raise HTTPException(status_code=400, detail="File kosong")
+        
+        sha = digest.hexdigest()
+        ext = allowed_types[mime][1]
+        target_dir = UPLOAD_ROOT / category / sha[:2]
+        target = target_dir / f"{sha}{ext}"
+        
+        await aiofiles.os.makedirs(target_dir, exist_ok=True)
+        if await aiofiles.os.path.exists(target):
+            await aiofiles.os.remove(tmp_path)
+        else:
+            await aiofiles.os.replace(tmp_path, target)
+    except BaseException:
+        if await aiofiles.os.path.exists(tmp_path):
+            await aiofiles.os.remove(tmp_path)
+        raise
     
     # Return relative path for storage
-    return f"/uploads/biodata/{mahasiswa_id}/{filename}"
+    return f"/uploads/{category}/{sha[:2]}/{sha}{ext}"
+
+# ----- Helper: Image variants -----
+image_process_pool: Optional[ProcessPoolExecutor] = None
+background_tasks: set = set()
+
+def generate_image_variants(source_path: str) -> Dict[str, str]:
+    """
+    Create resized variants next to the source image and return their file names.
+    Runs in a worker process. EXIF is dropped because variants are re-encoded
+    without it (orientation is applied first).
+    """
+    source = Path(source_path)
+    fmt, ext = ("WEBP", ".webp") if features.check("webp") else ("JPEG", ".jpg")
+    variants = {}
+    
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        has_alpha = fmt == "WEBP" and "A" in img.getbands()
+        img = img.convert("RGBA" if has_alpha else "RGB")
+        
+        for name, size in IMAGE_VARIANT_SIZES.items():
+            target = source.with_name(f"{source.stem}_{name}{ext}")
+            # Content-addressed source: existing variants are already correct
+            if not target.exists():
+                variant = img.copy()
+                variant.thumbnail((size, size), Image.LANCZOS)
+                tmp = target.with_name(f"{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+                variant.save(tmp, format=fmt, quality=IMAGE_VARIANT_QUALITY)
+                os.replace(tmp, target)
+            variants[name] = target.name
+    
+    return variants
+
+def get_image_process_pool() -> ProcessPoolExecutor:
+    global image_process_pool
+    if image_process_pool is None:
+        image_process_pool = ProcessPoolExecutor(max_workers=IMAGE_PROCESS_WORKERS)
+    return image_process_pool
+
+async def process_image_variants(url: str, collection: str, doc_id: str, field: str):
+    """Generate variants for an uploaded image and store their URLs on the document"""
+    try:
+        loop = asyncio.get_running_loop()
+        names = await loop.run_in_executor(
+            get_image_process_pool(),
+            generate_image_variants,
+            str(UPLOAD_ROOT / url.removeprefix("/uploads/"))
+        )
+    except Exception:
+        logger.exception("Gagal membuat varian gambar untuk %s", url)
+        return
+    
+    base_url = url.rsplit("/", 1)[0]
+    try:
+        await db[collection].update_one(
+            {"id": doc_id},
+            {"$set": {f"{field}_varian": {name: f"{base_url}/{fn}" for name, fn in names.items()}}}
+        )
+    except Exception:
+        # Task latar belakang: tanpa log, error di sini hilang begitu saja
+        logger.exception("Gagal menyimpan varian gambar %s ke %s/%s", url, collection, doc_id)
+
+def schedule_image_variants(url: Optional[str], collection: str, doc_id: str, field: str):
+    """Fire-and-forget variant generation; non-image uploads (PDF) are skipped"""
+    if not url or Path(url).suffix not in {ext for _, ext in IMAGE_UPLOAD_TYPES.values()}:
+        return
+    task = asyncio.create_task(process_image_variants(url, collection, doc_id, field))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+# ----- Helper: Serve uploads -----
+# (user_id, url) -> expiry; hanya keputusan "boleh" yang di-cache agar
+# request Range berikutnya untuk file yang sama tidak query DB lagi
+upload_access_cache: Dict[tuple, float] = {}
+
+def upload_url_signature(url: str, expires: int) -> str:
+    message = f"{url}:{expires}".encode()
+    return hmac.new(f"upload-url:{JWT_SECRET}".encode(), message, hashlib.sha256).hexdigest()[:32]
+
+def sign_upload_url(url: Optional[str]) -> Optional[str]:
+    """
+    Append an expiry and an HMAC over the path, so <img src>/<a href> can load
+    the file without a session token in the URL. The expiry is bucketed per
+    UPLOAD_URL_WINDOW_SECONDS, so the URL stays the same (and cacheable)
+    across requests and logins within a window.
+    """
+    if not url:
+        return url
+    expires = (int(time.time()) // UPLOAD_URL_WINDOW_SECONDS + 2) * UPLOAD_URL_WINDOW_SECONDS
+    return f"{url}?exp={expires}&sig={upload_url_signature(url, expires)}"
+
+def sign_upload_fields(doc: dict, *fields: str) -> dict:
+    """Copy of doc with the upload URL fields and their image variants signed"""
+    signed = dict(doc)
+    for field in fields:
+        signed[field] = sign_upload_url(doc.get(field))
+        if doc.get(f"{field}_varian"):
+            signed[f"{field}_varian"] = {name: sign_upload_url(u) for name, u in doc[f"{field}_varian"].items()}
+    return signed
+
+def has_valid_upload_signature(request: Request, url: str) -> bool:
+    expires, sig = request.query_params.get("exp", ""), request.query_params.get("sig", "")
+    if not expires.isdigit() or not sig or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(sig, upload_url_signature(url, int(expires)))
+
+def get_upload_user(request: Request) -> dict:
+    """Decode the JWT from the Authorization header (API clients; browsers use signed URLs)"""
+    auth_header = request.headers.get("authorization", "")
+    if not auth_header.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Token tidak ditemukan")
+    try:
+        payload = jwt.decode(auth_header[7:], JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token sudah kadaluarsa")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Token tidak valid")
+    if not payload.get("sub"):
+        raise HTTPException(status_code=401, detail="Token tidak valid")
+    return {"id": payload["sub"], "role": payload.get("role")}
+
+def upload_url_conditions(field: str, url: str) -> List[dict]:
+    """Match a stored upload URL either as the original file or one of its variants"""
+    return [{field: url}] + [{f"{field}_varian.{name}": url} for name in IMAGE_VARIANT_SIZES]
+
+async def can_access_upload(user: dict, category: str, url: str) -> bool:
+    """Admin may read every upload, other users only files from their own requests"""
+    if user["role"] == ROLE_ADMIN:
+        return True
+
+    key = (user["id"], url)
+    now = time.monotonic()
+    cached = upload_access_cache.get(key, 0) > now
+    record_cache("upload_acl", cached)
+    if cached:
+        return True
+
+    allowed = False
+    if category == "foto_profil":
+        allowed = await db.foto_profil_requests.find_one(
+            {"user_id": user["id"], "$or": upload_url_conditions("foto_baru", url)},
+            {"_id": 0, "id": 1}
+        ) is not None
+    elif category == "biodata" and user["role"] == ROLE_MAHASISWA:
+        mhs = await db.mahasiswa.find_one({"user_id": user["id"]}, {"_id": 0, "id": 1})
+        if mhs:
+            conditions = [c for f in BIODATA_DOKUMEN_FIELDS for c in upload_url_conditions(f, url)]
+            allowed = await db.biodata_change_request.find_one(
+                {"mahasiswa_id": mhs["id"], "$or": conditions},
+                {"_id": 0, "id": 1}
+            ) is not None
+
+    if allowed:
+        if len(upload_access_cache) >= UPLOAD_ACCESS_CACHE_MAX:
+            upload_access_cache.clear()
+        upload_access_cache[key] = now + UPLOAD_ACCESS_CACHE_TTL
+    return allowed
+
+def parse_byte_range(header: str, size: int) -> Optional[tuple]:
+    """
+    Parse a single "bytes=start-end" range into an inclusive (start, end).
+    Returns None when the header should be ignored (malformed or multi-range)
+    and raises 416 when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_s, sep, end_s = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start_s:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+        else:
+            # Suffix range: N byte terakhir ("-0" tidak bisa dipenuhi)
+            start, end = max(size - int(end_s), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Range tidak valid",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+async def iter_file_range(path: Path, start: int, length: int):
+    async with aiofiles.open(path, 'rb') as f:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(UPLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+@skip_compression
+async def serve_upload(file_path: str, request: Request):
+    """
+    Serve an uploaded file with per-user authorisation and HTTP caching.
+
+    Content-addressed files (named by SHA-256) never change, so they get a
+    strong ETag derived from the name and an immutable Cache-Control.
+    Single byte ranges and conditional requests are answered without
+    reading the file; full bodies go through FileResponse, which uses
+    http.response.pathsend (sendfile) when the ASGI server supports it.
+    """
+    url = f"/uploads/{file_path}"
+    # URL bertanda tangan hanya diterbitkan ke user yang boleh melihat file ini
+    signed = has_valid_upload_signature(request, url)
+    user = None if signed else get_upload_user(request)
+
+    root = UPLOAD_ROOT.resolve()
+    path = (root / file_path).resolve()
+    category = file_path.split("/", 1)[0]
+    if category not in UPLOAD_SERVED_CATEGORIES or not path.is_relative_to(root):
+        raise HTTPException(status_code=404, detail="File tidak ditemukan")
+
+    if not signed and not await can_access_upload(user, category, url):
+        raise HTTPException(status_code=403, detail="Akses ditolak")
+
+    try:
+        stat_result = await aiofiles.os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File tidak ditemukan")
+    if not stat_lib.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="File tidak ditemukan")
+
+    size = stat_result.st_size
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    if CONTENT_HASH_NAME.match(path.name):
+        etag = f'"{path.stem}"'
+        cache_control = "private, max-age=31536000, immutable"
+    else:
+        etag = f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+        cache_control = "private, no-cache"
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, etag)
+    elif if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            not_modified = int(stat_result.st_mtime) <= since.timestamp()
+        except (TypeError, ValueError):
+            not_modified = False
+    else:
+        not_modified = False
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range:
+        # Range hanya dipakai jika representasi yang dimiliki klien masih sama
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            range_header = range_header if if_range == etag else None
+        else:
+            range_header = range_header if if_range == last_modified else None
+
+    byte_range = parse_byte_range(range_header, size) if range_header else None
+    if byte_range is None:
+        return FileResponse(
+            path,
+            media_type=media_type,
+            headers=headers,
+            stat_result=stat_result
+        )
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    if request.method == "HEAD":
+        return Response(status_code=206, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        iter_file_range(path, start, length),
+        status_code=206,
+        headers=headers,
+        media_type=media_type
+    )
 
 # ----- Mahasiswa: Get My Biodata -----
 @mahasiswa_router.get("/biodata")
@@ -4220,9 +7768,9 @@ async def create_biodata_change_request(
             data_lama[key] = biodata[key]
     
     # Save uploaded files
-    ktp_path = await save_upload_file(dokumen_ktp, mhs["id"], "ktp")
-    kk_path = await save_upload_file(dokumen_kk, mhs["id"], "kk")
-    akte_path = await save_upload_file(dokumen_akte, mhs["id"], "akte")
+    ktp_path = await save_upload_file(dokumen_ktp)
+    kk_path = await save_upload_file(dokumen_kk)
+    akte_path = await save_upload_file(dokumen_akte)
     
     doc = {
         "id": str(uuid.uuid4()),
@@ -4240,6 +7788,8 @@ async def create_biodata_change_request(
     }
     
     await db.biodata_change_request.insert_one(doc)
+    for field in BIODATA_DOKUMEN_FIELDS:
+        schedule_image_variants(doc[field], "biodata_change_request", doc["id"], field)
     
     return {"message": "Pengajuan perubahan biodata berhasil diajukan", "id": doc["id"]}
 
@@ -4260,7 +7810,7 @@ async def get_my_biodata_change_requests(
         {"_id": 0}
     ).sort("created_at", -1).to_list(50)
     
-    return requests
+    return [sign_upload_fields(req, *BIODATA_DOKUMEN_FIELDS) for req in requests]
 
 # ----- Admin: Get All Biodata Change Requests -----
 @biodata_router.get("/change-requests")
@@ -4281,7 +7831,7 @@ async def get_all_biodata_change_requests(
     for req in requests:
         mhs = await db.mahasiswa.find_one({"id": req["mahasiswa_id"]}, {"_id": 0})
         result.append({
-            **req,
+            **sign_upload_fields(req, *BIODATA_DOKUMEN_FIELDS),
             "mahasiswa_nim": mhs["nim"] if mhs else None,
             "mahasiswa_nama": mhs["nama"] if mhs else None
         })
@@ -4305,7 +7855,7 @@ async def get_biodata_change_request_detail(
     biodata = await db.biodata.find_one({"mahasiswa_id": request["mahasiswa_id"]}, {"_id": 0})
     
     return {
-        **request,
+        **sign_upload_fields(request, *BIODATA_DOKUMEN_FIELDS),
         "mahasiswa_nim": mhs["nim"] if mhs else None,
         "mahasiswa_nama": mhs["nama"] if mhs else None,
         "biodata_lengkap": biodata
@@ -4434,11 +7984,18 @@ api_router.include_router(mahasiswa_router)
 api_router.include_router(dosen_router)
 api_router.include_router(keuangan_router)
 api_router.include_router(biodata_router)
+api_router.include_router(kalender_router)
 
 app.include_router(api_router)
 
-# Serve uploaded files
-app.mount("/uploads", StaticFiles(directory=str(Path(__file__).parent / "uploads")), name="uploads")
+# Serve uploaded files (auth + ETag/Range, lihat serve_upload)
+app.add_api_route("/uploads/{file_path:path}", serve_upload, methods=["GET", "HEAD"], include_in_schema=False)
+
+app.add_api_route("/metrics", get_metrics, methods=["GET"], include_in_schema=False)
+
+app.add_middleware(UploadSizeLimitMiddleware)
+
+app.add_middleware(CompressionMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -4446,8 +8003,14 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+app.add_middleware(QueryAccountingMiddleware)
+
+# Paling luar: latensi mencakup kompresi dan CORS
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -4457,11 +8020,47 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_db():
+    # Upload directories
+    for upload_dir in (UPLOAD_DIR, UPLOAD_ROOT / "foto_profil", UPLOAD_TMP_DIR):
+        await aiofiles.os.makedirs(upload_dir, exist_ok=True)
+    
     # Create indexes
     await db.users.create_index("email", unique=True)
     await db.users.create_index("id", unique=True)
     await db.mahasiswa.create_index("nim", unique=True)
     await db.dosen.create_index("nidn", unique=True)
+    await db.mahasiswa.create_index("id")
+    await db.tagihan_ukt.create_index([("tahun_akademik_id", 1), ("mahasiswa_id", 1)])
+    await db.pembayaran_ukt.create_index([("tagihan_id", 1), ("status", 1)])
+    await db.pembayaran_ukt.create_index([("status", 1), ("verified_at", 1)])
+    await db.pembayaran_ukt.create_index([("status", 1), ("created_at", -1), ("id", -1)])
+    await db.pembayaran_ukt.create_index([("created_at", -1), ("id", -1)])
+    await db.tagihan_ukt.create_index("id")
+    await db.collection_versions.create_index("collection", unique=True)
+    await db.keuangan_snapshot_state.create_index("id", unique=True)
+    # Multikey: satu entry per sesi
+    await db.kelas.create_index([("tahun_akademik_id", 1), ("sesi.hari", 1), ("sesi.menit_mulai", 1)])
+    await db.kelas.create_index([("tahun_akademik_id", 1), ("dosen_id", 1), ("sesi.hari", 1), ("sesi.menit_mulai", 1)])
+    await db.kelas.create_index("sesi.ruangan")
+    await db.jadwal_solver_preview.create_index("id", unique=True)
+    await db.ruangan.create_index("id", unique=True)
+    await db.ruangan.create_index("nama", unique=True)
+    await db.jadwal_ujian.create_index([("tahun_akademik_id", 1), ("jenis", 1), ("tanggal", 1), ("jam_mulai", 1)])
+    await db.jadwal_ujian.create_index([("peserta.mahasiswa_id", 1), ("jenis", 1)])
+    await db.jadwal_ujian.create_index([("dosen_ids", 1), ("jenis", 1)])
+    await db.jadwal_ujian_aktif.create_index([("tahun_akademik_id", 1), ("jenis", 1)], unique=True)
+    try:
+        await db.presensi.create_index([("kelas_id", 1), ("pertemuan_ke", 1)], unique=True)
+    except DuplicateKeyError:
+        # Pertemuan ganda dari data lama harus dirapikan dulu; tanpa index ini generate kalender tidak idempotent
+        logger.warning("Unique index presensi (kelas_id, pertemuan_ke) tidak dibuat: ada pertemuan ganda")
+    await db.users.create_index("kalender_token", unique=True, sparse=True)
+    await db.keuangan_snapshot_harian.create_index(
+        [("tanggal", 1), ("tahun_akademik_id", 1), ("prodi_id", 1), ("kategori_ukt_id", 1)],
+        unique=True
+    )
+    await backfill_kelas_sesi()
+    await backfill_jadwal_ujian_generasi()
     
     # Create default admin if not exists
     admin = await db.users.find_one({"email": "admin@siakad.ac.id"})
@@ -4481,3 +8080,7 @@ async def startup_db():
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    if image_process_pool is not None:
+        image_process_pool.shutdown(wait=False, cancel_futures=True)
+    if solver_process_pool is not None:
+        solver_process_pool.shutdown(wait=False, cancel_futures=True)
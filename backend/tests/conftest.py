@@ -0,0 +1,68 @@
+"""
+Konfigurasi bersama test in-process (modul yang meng-import server).
+
+server membaca MONGO_URL/DB_NAME saat di-import, jadi keduanya di-set di sini
+sebelum modul test mana pun di-collect. Database siakad_test_<acak> dibuat
+oleh fixture yang membutuhkannya dan dihapus setelah selesai. Test terhadap
+server remote (BASE_URL) tidak terpengaruh.
+"""
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+os.environ["MONGO_URL"] = os.environ.get("TEST_MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = f"siakad_test_{uuid.uuid4().hex[:8]}"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest  # noqa: E402
+from pymongo import MongoClient  # noqa: E402
+from pymongo.errors import PyMongoError  # noqa: E402
+
+
+def reset_server_state(server):
+    """
+    Drop every module-level cache of server. Their keys are collection
+    versions, which restart at 0 in the next test's fresh database, so a
+    leftover entry would be served as if it were current.
+    """
+    for cache in (
+        server.student_cache,
+        server.kalender_cache,
+        server.bootstrap_cache,
+        server.jadwal_occupancy_cache,
+        server.upload_access_cache,
+        server.background_tasks,
+    ):
+        cache.clear()
+    # Lock asyncio terikat ke event loop TestClient yang sudah ditutup
+    server.keuangan_snapshot_lock = asyncio.Lock()
+
+
+@pytest.fixture
+def live_db():
+    """
+    (TestClient, database) on an empty siakad_test_<acak> database of the
+    local MongoDB, dropped afterwards; skipped when MongoDB is not running.
+    """
+    from fastapi.testclient import TestClient
+
+    import server
+
+    mongo = MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=1000)
+    try:
+        mongo.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"MongoDB lokal tidak tersedia di {os.environ['MONGO_URL']}")
+
+    db = mongo[os.environ["DB_NAME"]]
+    mongo.drop_database(os.environ["DB_NAME"])
+    try:
+        with TestClient(server.app) as client:
+            yield client, db
+    finally:
+        reset_server_state(server)
+        mongo.drop_database(os.environ["DB_NAME"])
+        mongo.close()
+
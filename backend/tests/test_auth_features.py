@@ -229,6 +229,52 @@ class TestFotoProfilWithApproval:
         else:
             print("Note: Pending foto request already exists")
 
+    def test_upload_foto_profil_rejects_non_image(self, mahasiswa_token):
+        """Upload with non-image content is rejected while streaming"""
+        headers = {"Authorization": f"Bearer {mahasiswa_token}"}
+        files = {
+            'foto': ('fake.jpg', io.BytesIO(b'<html>not an image</html>'), 'image/jpeg')
+        }
+        response = requests.post(
+            f"{BASE_URL}/api/auth/upload-foto-profil",
+            files=files,
+            headers=headers
+        )
+        print(f"Upload non-image response: {response.status_code}, {response.text}")
+        # 415 = content rejected, 400 = pending request exists
+        assert response.status_code in [400, 415], f"Expected 400 or 415, got {response.status_code}"
+
+    def test_uploads_require_token(self):
+        """Uploaded files are not served without a token"""
+        response = requests.get(f"{BASE_URL}/uploads/foto_profil/00/missing.jpg")
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+
+    def test_uploads_with_range_and_etag(self, admin_token):
+        """Admin can fetch an uploaded photo with Range and If-None-Match"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = requests.get(
+            f"{BASE_URL}/api/auth/foto-profil-requests",
+            params={"status": ""},
+            headers=headers
+        )
+        assert response.status_code == 200
+        requests_with_foto = [r for r in response.json() if r.get("foto_baru")]
+        if not requests_with_foto:
+            pytest.skip("No foto profil uploads to fetch")
+        url = f"{BASE_URL}{requests_with_foto[0]['foto_baru']}"
+
+        response = requests.get(url, headers=headers)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        etag = response.headers["ETag"]
+        print(f"ETag: {etag}, Cache-Control: {response.headers.get('Cache-Control')}")
+
+        response = requests.get(url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304, f"Expected 304, got {response.status_code}"
+
+        response = requests.get(url, headers={**headers, "Range": "bytes=0-9"})
+        assert response.status_code == 206, f"Expected 206, got {response.status_code}"
+        assert len(response.content) == 10
+
     def test_admin_get_foto_requests(self, admin_token):
         """Admin can get pending foto profil requests"""
         headers = {"Authorization": f"Bearer {admin_token}"}
@@ -387,6 +433,25 @@ class TestUserProfile:
         assert response.status_code in [401, 403], f"Expected 401/403, got {response.status_code}"
         print("Unauthorized access correctly rejected")
 
+    def test_bootstrap(self, user_token):
+        """Bootstrap bundles user, access scope and master data"""
+        headers = {"Authorization": f"Bearer {user_token}"}
+        response = requests.get(f"{BASE_URL}/api/bootstrap", headers=headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["user"]["role"] == "mahasiswa"
+        assert data["access"]["is_management"] is False
+        assert "tahun_akademik_aktif" in data
+        for key in ["tahun_akademik", "fakultas", "prodi", "kategori_ukt"]:
+            assert isinstance(data["master"][key], list)
+
+        etag = response.headers.get("ETag")
+        assert etag
+        response = requests.get(f"{BASE_URL}/api/bootstrap", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304, f"Expected 304, got {response.status_code}"
+        print(f"Bootstrap OK, {len(data['master']['tahun_akademik'])} tahun akademik")
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
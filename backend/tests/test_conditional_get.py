@@ -0,0 +1,32 @@
+"""
+Test Suite: ETag Master Data (in-process, MongoDB lokal)
+
+Versi koleksi dibaca dari db.collection_versions pada setiap request, jadi
+write yang ditangani worker lain langsung mengganti ETag dan If-None-Match
+lama tidak lagi dijawab 304.
+
+Butuh MongoDB lokal (lihat fixture live_db di conftest.py).
+"""
+import server
+
+
+def auth():
+    return {"Authorization": f"Bearer {server.create_token('user-admin', 'akademik@siakad.ac.id', 'admin')}"}
+
+
+class TestMasterDataEtag:
+    def test_write_in_other_worker_changes_etag(self, live_db):
+        client, db = live_db
+        db.users.insert_one({"id": "user-admin", "email": "akademik@siakad.ac.id", "role": "admin", "is_active": True})
+        db.fakultas.insert_one({"id": "fak-0", "kode": "FT", "nama": "Teknik"})
+        first = client.get("/api/master/fakultas", headers=auth())
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert client.get("/api/master/fakultas", headers={**auth(), "If-None-Match": etag}).status_code == 304
+
+        # Worker lain mengganti nama fakultas dan menaikkan versinya
+        db.fakultas.update_one({"id": "fak-0"}, {"$set": {"nama": "Fakultas Teknik"}})
+        db.collection_versions.update_one({"collection": "fakultas"}, {"$inc": {"version": 1}}, upsert=True)
+        second = client.get("/api/master/fakultas", headers={**auth(), "If-None-Match": etag})
+        assert second.status_code == 200
+        assert second.json()[0]["nama"] == "Fakultas Teknik"
@@ -0,0 +1,453 @@
+"""
+Test Suite: Conflict Engine Jadwal (in-process, tanpa database)
+
+IntervalIndex dan JadwalOccupancy dibandingkan dengan pengecekan naif
+check_time_overlap terhadap setiap kelas, termasuk data lama yang sudah saling
+bentrok dan kelas kedua di hari yang sama (dulu terlewat karena find_one).
+"""
+import random
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+HARI = ["Senin", "Selasa", "Rabu"]
+
+
+def make_kelas(i, hari, jam_mulai, jam_selesai, ruangan="R1", dosen_id="dosen-1", with_minutes=True):
+    kelas = {
+        "id": f"kelas-{i}", "kode_kelas": f"A{i}", "mata_kuliah_id": f"mk-{i}", "dosen_id": dosen_id,
+        "ruangan": ruangan, "hari": hari, "jam_mulai": jam_mulai, "jam_selesai": jam_selesai,
+    }
+    if with_minutes:
+        kelas["menit_mulai"], kelas["menit_selesai"] = server.parse_time(jam_mulai), server.parse_time(jam_selesai)
+    return kelas
+
+
+def hhmm(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class TestIntervalIndex:
+    def test_second_same_day_class_is_found(self):
+        occupancy = server.JadwalOccupancy([
+            make_kelas(1, "Senin", "07:00", "08:00"),
+            make_kelas(2, "Senin", "10:00", "12:00"),
+        ])
+        hits = occupancy.conflicts("Senin", 660, 750, ruangan="R1")
+        assert [k["id"] for _, k in hits] == ["kelas-2"]
+
+    def test_touching_slots_do_not_collide(self):
+        occupancy = server.JadwalOccupancy([make_kelas(1, "Senin", "07:00", "08:00")])
+        assert occupancy.conflicts("Senin", 480, 540, ruangan="R1") == []
+        assert occupancy.conflicts("Senin", 360, 420, ruangan="R1") == []
+
+    def test_long_interval_before_short_ones(self):
+        """Legacy rows that overlap each other: the running max end keeps the long one visible"""
+        occupancy = server.JadwalOccupancy([
+            make_kelas(1, "Senin", "07:00", "17:00"),
+            make_kelas(2, "Senin", "08:00", "09:00"),
+            make_kelas(3, "Senin", "09:00", "10:00"),
+        ])
+        hits = occupancy.conflicts("Senin", 900, 960, ruangan="R1")
+        assert [k["id"] for _, k in hits] == ["kelas-1"]
+
+    def test_room_and_dosen_reported_separately(self):
+        occupancy = server.JadwalOccupancy([
+            make_kelas(1, "Selasa", "08:00", "10:00", ruangan="R1", dosen_id="dosen-1"),
+            make_kelas(2, "Selasa", "09:00", "11:00", ruangan="R2", dosen_id="dosen-2"),
+        ])
+        hits = occupancy.conflicts("Selasa", 540, 600, dosen_id="dosen-2", ruangan="R1")
+        assert [(kind, k["id"]) for kind, k in hits] == [("room", "kelas-1"), ("dosen", "kelas-2")]
+
+    def test_exclude_kelas_and_legacy_rows_without_minutes(self):
+        occupancy = server.JadwalOccupancy([
+            make_kelas(1, "Rabu", "08:00", "10:00", with_minutes=False),
+            {"id": "kelas-2", "dosen_id": "dosen-1", "ruangan": "R1", "jadwal": "Rabu 08:00-10:00"},
+        ])
+        assert [k["id"] for _, k in occupancy.conflicts("Rabu", 480, 600, ruangan="R1")] == ["kelas-1"]
+        assert occupancy.conflicts("Rabu", 480, 600, ruangan="R1", exclude_kelas_id="kelas-1") == []
+
+    def test_matches_naive_scan(self):
+        rng = random.Random(41)
+        kelas_list = []
+        for i in range(300):
+            start = rng.randrange(7 * 60, 17 * 60, 10)
+            kelas_list.append(make_kelas(
+                i, rng.choice(HARI), hhmm(start), hhmm(start + rng.choice((50, 100, 150))),
+                ruangan=f"R{rng.randrange(5)}", dosen_id=f"dosen-{rng.randrange(8)}", with_minutes=rng.random() < 0.8,
+            ))
+        occupancy = server.JadwalOccupancy(kelas_list)
+
+        for _ in range(500):
+            hari, ruangan, dosen_id = rng.choice(HARI), f"R{rng.randrange(5)}", f"dosen-{rng.randrange(8)}"
+            start = rng.randrange(6 * 60, 18 * 60, 5)
+            end = start + rng.randrange(5, 240, 5)
+            expected = {
+                (kind, k["id"])
+                for k in kelas_list if k["hari"] == hari
+                and server.check_time_overlap(hhmm(start), hhmm(end), k["jam_mulai"], k["jam_selesai"])
+                for kind, matches in (("room", k["ruangan"] == ruangan), ("dosen", k["dosen_id"] == dosen_id))
+                if matches
+            }
+            hits = occupancy.conflicts(hari, start, end, dosen_id=dosen_id, ruangan=ruangan)
+            assert {(kind, k["id"]) for kind, k in hits} == expected
+
+
+class TestAuditJadwal:
+    def random_semester(self, rng, n_kelas=400, n_mahasiswa=200):
+        kelas_list = []
+        for i in range(n_kelas):
+            start = rng.randrange(7 * 60, 17 * 60, 10)
+            kelas_list.append(make_kelas(
+                i, rng.choice(HARI), hhmm(start), hhmm(start + rng.choice((50, 100, 150))),
+                ruangan=f"R{rng.randrange(20)}", dosen_id=f"dosen-{rng.randrange(40)}",
+            ))
+        krs_rows = [
+            {"mahasiswa_id": f"mhs-{m}", "kelas_id": f"kelas-{rng.randrange(n_kelas)}"}
+            for m in range(n_mahasiswa) for _ in range(8)
+        ]
+        return kelas_list, krs_rows
+
+    def test_matches_naive_pairs(self):
+        rng = random.Random(42)
+        kelas_list, krs_rows = self.random_semester(rng)
+        by_id = {k["id"]: k for k in kelas_list}
+
+        def clash(a, b):
+            return a["id"] != b["id"] and a["hari"] == b["hari"] and server.check_time_overlap(
+                a["jam_mulai"], a["jam_selesai"], b["jam_mulai"], b["jam_selesai"])
+
+        expected = set()
+        for i, a in enumerate(kelas_list):
+            for b in kelas_list[i + 1:]:
+                if clash(a, b) and a["ruangan"] == b["ruangan"]:
+                    expected.add(("room", a["ruangan"], frozenset((a["id"], b["id"]))))
+                if clash(a, b) and a["dosen_id"] == b["dosen_id"]:
+                    expected.add(("dosen", a["dosen_id"], frozenset((a["id"], b["id"]))))
+        taken = {}
+        for krs in krs_rows:
+            taken.setdefault(krs["mahasiswa_id"], []).append(by_id[krs["kelas_id"]])
+        for mahasiswa_id, kelas in taken.items():
+            for i, a in enumerate(kelas):
+                for b in kelas[i + 1:]:
+                    if clash(a, b):
+                        expected.add(("mahasiswa", mahasiswa_id, frozenset((a["id"], b["id"]))))
+
+        found = server.audit_jadwal(server.JadwalOccupancy(kelas_list), krs_rows)
+        pairs = [(c["type"], c["key"], frozenset((c["kelas_a"]["id"], c["kelas_b"]["id"]))) for c in found]
+        assert len(pairs) == len(set(pairs))
+        assert set(pairs) == expected
+        assert expected  # dataset acak harus memuat bentrok
+
+    def test_overlap_window(self):
+        occupancy = server.JadwalOccupancy([
+            make_kelas(1, "Senin", "07:00", "09:00"),
+            make_kelas(2, "Senin", "08:30", "10:00"),
+        ])
+        (room, dosen) = server.audit_jadwal(occupancy, [])
+        assert (room["type"], dosen["type"]) == ("room", "dosen")
+        assert (room["overlap_mulai"], room["overlap_selesai"]) == (510, 540)
+
+
+class TestSlotBitmap:
+    def test_mask_layout(self):
+        # Selasa 00:00-00:10 = dua slot pertama hari kedua
+        assert server.slot_mask("Selasa", 0, 10) == 0b11 << server.SLOTS_PER_DAY
+        assert server.slot_mask("Libur", 0, 10) == 0
+
+    def test_unaligned_times_round_outward(self):
+        # 08:02 jatuh di slot 08:00-08:05, sehingga dua kelas yang hanya bersentuhan ikut beririsan
+        a = server.slot_mask("Senin", 420, 482)
+        b = server.slot_mask("Senin", 482, 540)
+        assert a & b
+        occupancy = server.JadwalOccupancy([
+            make_kelas(1, "Senin", "07:00", "08:02"),
+            make_kelas(2, "Senin", "08:02", "09:00"),
+        ])
+        assert occupancy.clashes("kelas-2", ["kelas-1"]) == []
+
+    def test_clashes_match_naive(self):
+        rng = random.Random(43)
+        kelas_list = []
+        for i in range(200):
+            start = rng.randrange(7 * 60, 17 * 60, rng.choice((1, 5, 10)))
+            kelas_list.append(make_kelas(i, rng.choice(HARI), hhmm(start), hhmm(start + rng.choice((50, 100, 150)))))
+        occupancy = server.JadwalOccupancy(kelas_list)
+
+        for _ in range(300):
+            taken = rng.sample(kelas_list, 6)
+            taken_ids = [k["id"] for k in taken]
+            offer = rng.choice(kelas_list)
+            expected = [
+                k["id"] for k in taken if k["id"] != offer["id"] and k["hari"] == offer["hari"]
+                and server.check_time_overlap(offer["jam_mulai"], offer["jam_selesai"], k["jam_mulai"], k["jam_selesai"])
+            ]
+            assert [k["id"] for k in occupancy.clashes(offer["id"], taken_ids)] == expected
+            assert [k["id"] for k in occupancy.clashes(
+                offer["id"], taken_ids, occupancy.weekly_mask(taken_ids))] == expected
+
+    def test_unscheduled_kelas_never_clashes(self):
+        occupancy = server.JadwalOccupancy([make_kelas(1, "Senin", "07:00", "09:00")])
+        assert occupancy.mask("kelas-lain") == 0
+        assert occupancy.clashes("kelas-lain", ["kelas-1"]) == []
+
+
+def make_multi_kelas(i, sesi, ruangan="R1", dosen_id="dosen-1"):
+    """kelas with several (hari, jam_mulai, jam_selesai) sessions, first one mirrored at top level"""
+    rows = [
+        {"hari": hari, "jam_mulai": jam_mulai, "jam_selesai": jam_selesai, "ruangan": ruangan,
+         "menit_mulai": server.parse_time(jam_mulai), "menit_selesai": server.parse_time(jam_selesai)}
+        for hari, jam_mulai, jam_selesai in sesi
+    ]
+    return {
+        "id": f"kelas-{i}", "kode_kelas": f"A{i}", "mata_kuliah_id": f"mk-{i}", "dosen_id": dosen_id,
+        **server.sesi_fields(rows),
+    }
+
+
+class TestMultiSesi:
+    def test_sessions_and_legacy_single_slot(self):
+        kelas = make_multi_kelas(1, [("Rabu", "10:00", "11:40"), ("Senin", "08:00", "09:40")])
+        assert [(s["hari"], s["menit_mulai"]) for s in server.kelas_sessions(kelas)] == [("Senin", 480), ("Rabu", 600)]
+        assert kelas["hari"] == "Senin" and kelas["jadwal"] == "Senin 08:00-09:40, Rabu 10:00-11:40"
+        legacy = make_kelas(2, "Selasa", "07:00", "08:00", with_minutes=False)
+        assert [(s["hari"], s["menit_mulai"]) for s in server.kelas_sessions(legacy)] == [("Selasa", 420)]
+        assert server.kelas_sessions({"id": "kelas-3", "dosen_id": "dosen-1"}) == []
+
+    def test_second_session_collides(self):
+        occupancy = server.JadwalOccupancy([
+            make_multi_kelas(1, [("Senin", "08:00", "09:40"), ("Rabu", "08:00", "09:40")]),
+        ])
+        hits = occupancy.conflicts("Rabu", 540, 600, dosen_id="dosen-1", ruangan="R1")
+        assert [(kind, k["id"], k["hari"], k["jam_mulai"]) for kind, k in hits] == [
+            ("room", "kelas-1", "Rabu", "08:00"), ("dosen", "kelas-1", "Rabu", "08:00"),
+        ]
+        rooms = [{"nama": "R1", "kapasitas": 40}]
+        assert occupancy.free_rooms(rooms, "Rabu", 540, 600) == []
+        assert occupancy.free_rooms(rooms, "Selasa", 540, 600) == rooms
+
+    def test_clashes_and_audit_across_sessions(self):
+        occupancy = server.JadwalOccupancy([
+            make_multi_kelas(1, [("Senin", "08:00", "09:40"), ("Kamis", "13:00", "14:40")], ruangan="R1"),
+            make_kelas(2, "Kamis", "14:00", "15:40", ruangan="R2", dosen_id="dosen-2"),
+            make_kelas(3, "Senin", "10:00", "11:40", ruangan="R3", dosen_id="dosen-3"),
+        ])
+        assert occupancy.mask("kelas-1") == (
+            server.slot_mask("Senin", 480, 580) | server.slot_mask("Kamis", 780, 880)
+        )
+        clashes = occupancy.clashes("kelas-2", ["kelas-1", "kelas-3"])
+        assert [(k["id"], k["hari"]) for k in clashes] == [("kelas-1", "Kamis")]
+        assert occupancy.clashes("kelas-3", ["kelas-1"]) == []
+
+        found = server.audit_jadwal(occupancy, [
+            {"mahasiswa_id": "mhs-1", "kelas_id": "kelas-1"},
+            {"mahasiswa_id": "mhs-1", "kelas_id": "kelas-2"},
+            {"mahasiswa_id": "mhs-1", "kelas_id": "kelas-3"},
+        ])
+        assert [(c["type"], c["hari"], c["overlap_mulai"], c["overlap_selesai"]) for c in found] == [
+            ("mahasiswa", "Kamis", 840, 880),
+        ]
+
+    def test_solver_puts_sessions_of_one_kelas_on_different_days(self):
+        problem = solver_problem(random.Random(48), n_kelas=0, n_ruangan=3)
+        problem["hari"] = ["Senin", "Rabu"]
+        problem["kelas"] = [
+            {"id": f"kelas-{i}#{n}", "grup": f"kelas-{i}", "dosen_id": f"dosen-{i}", "kuota": 30, "durasi": 100}
+            for i in range(6) for n in range(2)
+        ]
+        result = server.solve_jadwal(problem, seed=0)
+        assert_valid_solution(problem, result)
+        assert result["unassigned"] == []
+        days = {}
+        for a in result["assignments"]:
+            days.setdefault(a["kelas_id"].split("#")[0], []).append(a["hari"])
+        assert all(sorted(d) == ["Rabu", "Senin"] for d in days.values())
+
+        # Tiga sesi tidak muat di dua hari
+        problem["kelas"] = [
+            {"id": f"kelas-0#{n}", "grup": "kelas-0", "dosen_id": "dosen-0", "kuota": 30, "durasi": 100} for n in range(3)
+        ]
+        result = server.solve_jadwal(problem, seed=0)
+        assert_valid_solution(problem, result)
+        assert len(result["unassigned"]) == 1
+
+
+class TestFreeRooms:
+    def test_matches_naive(self):
+        rng = random.Random(45)
+        rooms = [{"nama": f"R{r}", "kapasitas": 40} for r in range(12)]
+        kelas_list = []
+        for i in range(300):
+            start = rng.randrange(7 * 60, 17 * 60, rng.choice((1, 5, 10)))
+            kelas_list.append(make_kelas(
+                i, rng.choice(HARI), hhmm(start), hhmm(start + rng.choice((50, 100))), ruangan=f"R{rng.randrange(12)}"
+            ))
+        occupancy = server.JadwalOccupancy(kelas_list)
+
+        for _ in range(300):
+            hari = rng.choice(HARI)
+            start = rng.randrange(7 * 60, 17 * 60, rng.choice((1, 5, 30)))
+            end = start + rng.choice((30, 50, 100))
+            busy = {
+                k["ruangan"] for k in kelas_list if k["hari"] == hari
+                and server.check_time_overlap(hhmm(start), hhmm(end), k["jam_mulai"], k["jam_selesai"])
+            }
+            expected = [r["nama"] for r in rooms if r["nama"] not in busy]
+            assert [r["nama"] for r in occupancy.free_rooms(rooms, hari, start, end)] == expected
+
+    def test_touching_and_excluded_class(self):
+        rooms = [{"nama": "R1", "kapasitas": 40}, {"nama": "R2", "kapasitas": 60}]
+        occupancy = server.JadwalOccupancy([make_kelas(1, "Senin", "08:00", "09:42", ruangan="R1")])
+        assert occupancy.free_rooms(rooms, "Senin", 9 * 60, 10 * 60) == rooms[1:]
+        # Mulai 09:42 hanya menyentuh akhir kelas-1: slot 09:40-09:45 sama, menit pastinya tidak
+        assert occupancy.free_rooms(rooms, "Senin", 9 * 60 + 42, 11 * 60) == rooms
+        assert occupancy.free_rooms(rooms, "Senin", 8 * 60, 9 * 60, exclude_kelas_id="kelas-1") == rooms
+        assert occupancy.free_rooms(rooms, "Selasa", 8 * 60, 9 * 60) == rooms
+
+
+class TestCommonFreeSlots:
+    def test_matches_naive(self):
+        rng = random.Random(47)
+        rooms = [{"nama": f"R{r}", "kapasitas": 40} for r in range(4)]
+        kelas_list = []
+        for i in range(120):
+            start = rng.randrange(7 * 60, 16 * 60, rng.choice((1, 5, 10)))
+            kelas_list.append(make_kelas(
+                i, rng.choice(HARI), hhmm(start), hhmm(start + rng.choice((50, 100))), ruangan=f"R{rng.randrange(4)}"
+            ))
+        occupancy = server.JadwalOccupancy(kelas_list)
+
+        for _ in range(20):
+            busy_ids = {f"kelas-{rng.randrange(120)}" for _ in range(8)}
+            slots = server.common_free_slots(occupancy, busy_ids, rooms, HARI, (7 * 60, 18 * 60), 100, 30)
+            expected = set()
+            for hari in HARI:
+                for start in range(7 * 60, 16 * 60 + 21, 30):
+                    same_day = [
+                        k for k in kelas_list if k["hari"] == hari
+                        and server.check_time_overlap(hhmm(start), hhmm(start + 100), k["jam_mulai"], k["jam_selesai"])
+                    ]
+                    if any(k["id"] in busy_ids for k in same_day):
+                        continue
+                    free = [r["nama"] for r in rooms if r["nama"] not in {k["ruangan"] for k in same_day}]
+                    if free:
+                        expected.add((hari, start, tuple(free)))
+            assert {(s["hari"], s["menit_mulai"], tuple(r["nama"] for r in s["ruangan"])) for s in slots} == expected
+
+    def test_ranked_by_distance_from_regular_start(self):
+        rooms = [{"nama": "R9", "kapasitas": 40}]
+        occupancy = server.JadwalOccupancy([
+            make_kelas(1, "Senin", "08:00", "10:00", ruangan="R1"),
+            make_kelas(2, "Selasa", "07:00", "12:00", ruangan="R2", dosen_id="dosen-2"),
+        ])
+        slots = server.common_free_slots(
+            occupancy, ["kelas-1", "kelas-2"], rooms, ["Senin", "Selasa"], (7 * 60, 12 * 60), 60, 60, preferred_start=8 * 60
+        )
+        # Senin 08:00-10:00 dan seluruh Selasa pagi sibuk
+        assert [(s["hari"], s["menit_mulai"]) for s in slots] == [("Senin", 7 * 60), ("Senin", 10 * 60), ("Senin", 11 * 60)]
+
+    def test_own_regular_session_is_not_busy(self):
+        """A make-up slot may reuse the class's own regular time and room"""
+        occupancy = server.JadwalOccupancy([make_kelas(1, "Senin", "08:00", "10:00", ruangan="R1")])
+        rooms = [{"nama": "R1", "kapasitas": 40}]
+        slots = server.common_free_slots(
+            occupancy, [], rooms, ["Senin"], (8 * 60, 10 * 60), 120, 30, exclude_kelas_id="kelas-1"
+        )
+        assert [(s["menit_mulai"], [r["nama"] for r in s["ruangan"]]) for s in slots] == [(8 * 60, ["R1"])]
+        assert server.common_free_slots(occupancy, [], rooms, ["Senin"], (8 * 60, 10 * 60), 120, 30) == []
+
+    def test_no_room_means_no_slot(self):
+        occupancy = server.JadwalOccupancy([make_kelas(1, "Senin", "07:00", "12:00", ruangan="R1")])
+        rooms = [{"nama": "R1", "kapasitas": 40}]
+        assert server.common_free_slots(occupancy, [], rooms, ["Senin"], (7 * 60, 12 * 60), 60, 30) == []
+        assert server.common_free_slots(occupancy, [], [], ["Selasa"], (7 * 60, 12 * 60), 60, 30) == []
+
+
+def solver_problem(rng, n_kelas, n_ruangan, n_dosen=60, **extra):
+    return {
+        "kelas": [
+            {"id": f"kelas-{i}", "dosen_id": f"dosen-{rng.randrange(n_dosen)}",
+             "kuota": rng.choice((30, 40, 50, 80)), "durasi": rng.choice((100, 150))}
+            for i in range(n_kelas)
+        ],
+        "ruangan": [{"nama": f"R{r}", "kapasitas": rng.choice((40, 50, 80, 100))} for r in range(n_ruangan)],
+        "hari": ["Senin", "Selasa", "Rabu", "Kamis", "Jumat"],
+        "window": (420, 1020),
+        "langkah": 30,
+        "room_busy": {},
+        "dosen_busy": {},
+        "max_repair": 5000,
+        **extra,
+    }
+
+
+def assert_valid_solution(problem, result):
+    kelas_by_id = {k["id"]: k for k in problem["kelas"]}
+    kapasitas = {r["nama"]: r["kapasitas"] for r in problem["ruangan"]}
+    room_busy = dict(problem["room_busy"])
+    dosen_busy = dict(problem["dosen_busy"])
+    for a in result["assignments"]:
+        kelas = kelas_by_id[a["kelas_id"]]
+        assert kapasitas[a["ruangan"]] >= kelas["kuota"]
+        assert a["menit_selesai"] - a["menit_mulai"] == kelas["durasi"]
+        assert problem["window"][0] <= a["menit_mulai"] and a["menit_selesai"] <= problem["window"][1]
+        # Jam kelipatan 5 menit: bitmap tepat, tidak ada pembulatan
+        mask = server.slot_mask(a["hari"], a["menit_mulai"], a["menit_selesai"])
+        assert not room_busy.get(a["ruangan"], 0) & mask
+        assert not dosen_busy.get(kelas["dosen_id"], 0) & mask
+        room_busy[a["ruangan"]] = room_busy.get(a["ruangan"], 0) | mask
+        dosen_busy[kelas["dosen_id"]] = dosen_busy.get(kelas["dosen_id"], 0) | mask
+    placed = {a["kelas_id"] for a in result["assignments"]}
+    assert placed.isdisjoint(u["kelas_id"] for u in result["unassigned"])
+    assert len(placed) + len(result["unassigned"]) == len(problem["kelas"])
+
+
+class TestSolveJadwal:
+    def test_assigns_everything_when_rooms_suffice(self):
+        problem = solver_problem(random.Random(44), n_kelas=200, n_ruangan=20)
+        result = server.solve_jadwal(problem, seed=0)
+        assert_valid_solution(problem, result)
+        assert result["unassigned"] == []
+
+    def test_respects_fixed_classes_and_dosen_availability(self):
+        senin_pagi = server.slot_mask("Senin", 420, 720)
+        problem = solver_problem(
+            random.Random(45), n_kelas=150, n_ruangan=14, n_dosen=20,
+            room_busy={"R0": senin_pagi, "R1": senin_pagi},
+            dosen_busy={f"dosen-{d}": server.slot_mask("Selasa", 420, 1020) for d in range(10)},
+        )
+        for seed in range(3):
+            assert_valid_solution(problem, server.solve_jadwal(problem, seed))
+
+    def test_overfull_semester_reports_unassigned(self):
+        problem = solver_problem(random.Random(46), n_kelas=200, n_ruangan=5)
+        result = server.solve_jadwal(problem, seed=0)
+        assert_valid_solution(problem, result)
+        assert result["unassigned"]
+        assert {u["alasan"] for u in result["unassigned"]} == {"Tidak ada slot yang bebas untuk dosen dan ruangan"}
+
+    def test_reasons_for_impossible_classes(self):
+        problem = solver_problem(random.Random(47), n_kelas=0, n_ruangan=2)
+        problem["ruangan"] = [{"nama": "R0", "kapasitas": 40}]
+        problem["kelas"] = [
+            {"id": "besar", "dosen_id": "dosen-0", "kuota": 200, "durasi": 100},
+            {"id": "panjang", "dosen_id": "dosen-1", "kuota": 30, "durasi": 700},
+        ]
+        result = server.solve_jadwal(problem, seed=0)
+        assert {u["kelas_id"]: u["alasan"] for u in result["unassigned"]} == {
+            "besar": "Tidak ada ruangan dengan kapasitas untuk kuota 200",
+            "panjang": "Durasi 700 menit melebihi jam operasional",
+        }
+
+
+class TestJadwalSpan:
+    def test_valid(self):
+        assert server.jadwal_span("07:30", "09:10") == (450, 550)
+
+    @pytest.mark.parametrize("jam_mulai,jam_selesai", [("09:00", "09:00"), ("10:00", "08:00"), ("7.30", "09:00")])
+    def test_invalid(self, jam_mulai, jam_selesai):
+        with pytest.raises(HTTPException) as exc:
+            server.jadwal_span(jam_mulai, jam_selesai)
+        assert exc.value.status_code == 400
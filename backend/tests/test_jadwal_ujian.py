@@ -0,0 +1,174 @@
+"""
+Test Suite: Penjadwalan Ujian UTS/UAS (in-process)
+
+Graf bentrok mata kuliah dari KRS disetujui dibandingkan dengan perbandingan
+naif setiap pasangan mata kuliah, dan hasil pewarnaan DSatur diperiksa: tidak
+ada dua ujian bertetangga di slot yang sama, ruangan cukup dan tidak dipakai
+dua ujian sekaligus.
+
+TestGenerateJadwalUjian memakai MongoDB lokal (fixture live_db di
+conftest.py): jadwal baru ditulis sebagai generasi baru dan baru terlihat
+setelah pointer aktif dipindah.
+"""
+import random
+
+import server
+
+
+def random_krs(rng, n_mahasiswa=300, n_mk=60, per_mahasiswa=6):
+    kelas_mk = {f"kelas-{mk}-{s}": f"mk-{mk}" for mk in range(n_mk) for s in "AB"}
+    krs_rows = [
+        {"mahasiswa_id": f"mhs-{m}", "kelas_id": f"kelas-{mk}-{rng.choice('AB')}"}
+        for m in range(n_mahasiswa) for mk in rng.sample(range(n_mk), per_mahasiswa)
+    ]
+    return kelas_mk, krs_rows
+
+
+def exam_slots(n_hari, sesi=(("08:00", "10:00"), ("10:30", "12:30"), ("13:30", "15:30"))):
+    return [(f"2024-10-{21 + d:02d}", jam_mulai, jam_selesai) for d in range(n_hari) for jam_mulai, jam_selesai in sesi]
+
+
+def assert_valid_schedule(sizes, adjacency, slots, result):
+    slot_of = {a["mata_kuliah_id"]: a["slot"] for a in result["assignments"]}
+    assert set(slot_of) | {u["mata_kuliah_id"] for u in result["unassigned"]} == set(sizes)
+    for mk, slot in slot_of.items():
+        assert all(slot_of.get(other) != slot for other in adjacency[mk])
+    used = {}
+    for a in result["assignments"]:
+        assert sum(r["kapasitas"] for r in a["ruangan"]) >= sizes[a["mata_kuliah_id"]]
+        for room in a["ruangan"]:
+            assert (a["slot"], room["nama"]) not in used
+            used[(a["slot"], room["nama"])] = a["mata_kuliah_id"]
+
+
+class TestExamConflictGraph:
+    def test_matches_naive_pairs(self):
+        rng = random.Random(48)
+        kelas_mk, krs_rows = random_krs(rng)
+        peserta, adjacency = server.exam_conflict_graph(krs_rows, kelas_mk)
+
+        expected = {mk: set() for mk in peserta}
+        for a in peserta:
+            for b in peserta:
+                if a != b and peserta[a] & peserta[b]:
+                    expected[a].add(b)
+        assert adjacency == expected
+        assert sum(len(ids) for ids in peserta.values()) == len({(r["mahasiswa_id"], kelas_mk[r["kelas_id"]]) for r in krs_rows})
+
+    def test_parallel_kelas_are_one_exam(self):
+        kelas_mk = {"kelas-a": "mk-1", "kelas-b": "mk-1", "kelas-c": "mk-2"}
+        krs_rows = [
+            {"mahasiswa_id": "mhs-1", "kelas_id": "kelas-a"},
+            {"mahasiswa_id": "mhs-2", "kelas_id": "kelas-b"},
+            {"mahasiswa_id": "mhs-2", "kelas_id": "kelas-c"},
+            {"mahasiswa_id": "mhs-3", "kelas_id": "kelas-lain-semester"},
+        ]
+        peserta, adjacency = server.exam_conflict_graph(krs_rows, kelas_mk)
+        assert peserta == {"mk-1": {"mhs-1", "mhs-2"}, "mk-2": {"mhs-2"}}
+        assert adjacency == {"mk-1": {"mk-2"}, "mk-2": {"mk-1"}}
+
+
+class TestScheduleExams:
+    def test_random_semester_is_conflict_free(self):
+        rng = random.Random(49)
+        kelas_mk, krs_rows = random_krs(rng)
+        peserta, adjacency = server.exam_conflict_graph(krs_rows, kelas_mk)
+        sizes = {mk: len(ids) for mk, ids in peserta.items()}
+        rooms = [{"nama": f"R{r}", "kapasitas": rng.choice((20, 30, 40))} for r in range(10)]
+        slots = exam_slots(10)
+
+        result = server.schedule_exams(sizes, adjacency, slots, rooms)
+        assert_valid_schedule(sizes, adjacency, slots, result)
+        assert not result["unassigned"]
+
+    def test_complete_graph_needs_one_slot_per_exam(self):
+        sizes = {f"mk-{i}": 10 for i in range(5)}
+        adjacency = {mk: set(sizes) - {mk} for mk in sizes}
+        rooms = [{"nama": "R1", "kapasitas": 40}]
+
+        result = server.schedule_exams(sizes, adjacency, exam_slots(1), rooms)
+        assert_valid_schedule(sizes, adjacency, exam_slots(1), result)
+        assert len(result["assignments"]) == 3
+        assert {u["alasan"] for u in result["unassigned"]} == {"Semua slot bentrok dengan ujian lain dari peserta yang sama"}
+
+    def test_room_capacity(self):
+        sizes = {"besar": 70, "sedang": 35, "kecil": 10, "raksasa": 500}
+        adjacency = {mk: set() for mk in sizes}
+        rooms = [{"nama": "R1", "kapasitas": 40}, {"nama": "R2", "kapasitas": 40}, {"nama": "R3", "kapasitas": 15}]
+
+        result = server.schedule_exams(sizes, adjacency, exam_slots(1)[:1], rooms)
+        by_mk = {a["mata_kuliah_id"]: [r["nama"] for r in a["ruangan"]] for a in result["assignments"]}
+        # 70 peserta memakai dua ruangan terbesar; slot itu tidak tersisa ruangan untuk "sedang"
+        assert by_mk == {"besar": ["R2", "R1"], "kecil": ["R3"]}
+        reasons = {u["mata_kuliah_id"]: u["alasan"] for u in result["unassigned"]}
+        assert reasons["raksasa"].startswith("Peserta (500) melebihi total kapasitas")
+        assert reasons["sedang"] == "Ruangan tidak cukup di slot yang bebas bentrok"
+
+    def test_neighbours_spread_over_days(self):
+        sizes = {"mk-1": 10, "mk-2": 10}
+        adjacency = {"mk-1": {"mk-2"}, "mk-2": {"mk-1"}}
+        slots = exam_slots(2)
+
+        result = server.schedule_exams(sizes, adjacency, slots, [{"nama": "R1", "kapasitas": 40}])
+        days = {slots[a["slot"]][0] for a in result["assignments"]}
+        assert len(days) == 2
+
+
+def test_seat_peserta_fills_rooms_in_order():
+    rooms = [{"nama": "R1", "kapasitas": 2}, {"nama": "R2", "kapasitas": 5}]
+    seats = server.seat_peserta(["a", "b", "c"], rooms)
+    assert seats == [
+        {"mahasiswa_id": "a", "ruangan": "R1"},
+        {"mahasiswa_id": "b", "ruangan": "R1"},
+        {"mahasiswa_id": "c", "ruangan": "R2"},
+    ]
+
+
+def admin_auth():
+    return {"Authorization": f"Bearer {server.create_token('user-admin', 'akademik@siakad.ac.id', 'admin')}"}
+
+
+def seed_semester(db):
+    db.users.insert_one({"id": "user-admin", "email": "akademik@siakad.ac.id", "role": "admin", "is_active": True})
+    db.mata_kuliah.insert_many([{"id": f"mk-{i}", "kode": f"IF10{i}", "nama": f"MK {i}"} for i in range(2)])
+    db.kelas.insert_many([{"id": f"kelas-{i}", "mata_kuliah_id": f"mk-{i}", "dosen_id": "dosen-0",
+                           "tahun_akademik_id": "ta-0"} for i in range(2)])
+    db.mahasiswa.insert_one({"id": "mhs-0", "nim": "2024001", "nama": "Ani"})
+    db.krs.insert_many([{"id": f"krs-{i}", "mahasiswa_id": "mhs-0", "kelas_id": f"kelas-{i}",
+                         "tahun_akademik_id": "ta-0", "status": "disetujui"} for i in range(2)])
+
+
+class TestGenerateJadwalUjian:
+    REQUEST = {"tahun_akademik_id": "ta-0", "jenis": "UTS", "tanggal": ["2024-10-21"],
+               "ruangan": [{"nama": "R1", "kapasitas": 40}]}
+
+    def schedule(self, client):
+        response = client.get("/api/akademik/ujian?tahun_akademik_id=ta-0&jenis=UTS", headers=admin_auth())
+        assert response.status_code == 200
+        return sorted((u["mata_kuliah_id"], u["jam_mulai"]) for u in response.json())
+
+    def test_regenerate_replaces_generation(self, live_db):
+        client, db = live_db
+        seed_semester(db)
+        assert client.post("/api/akademik/ujian/generate", json=self.REQUEST, headers=admin_auth()).status_code == 200
+        first = db.jadwal_ujian_aktif.find_one({"tahun_akademik_id": "ta-0", "jenis": "UTS"})["generasi"]
+        assert client.post("/api/akademik/ujian/generate", json=self.REQUEST, headers=admin_auth()).status_code == 200
+        second = db.jadwal_ujian_aktif.find_one({"tahun_akademik_id": "ta-0", "jenis": "UTS"})["generasi"]
+        assert first != second
+        assert set(db.jadwal_ujian.distinct("generasi")) == {second}
+        assert len(self.schedule(client)) == 2
+
+    def test_unfinished_generation_is_invisible(self, live_db):
+        client, db = live_db
+        seed_semester(db)
+        assert client.post("/api/akademik/ujian/generate", json=self.REQUEST, headers=admin_auth()).status_code == 200
+        before = self.schedule(client)
+        # Generate lain mati setelah insert_many, sebelum pointer aktif dipindah
+        db.jadwal_ujian.insert_one({
+            "id": "sisa", "tahun_akademik_id": "ta-0", "jenis": "UTS", "generasi": "gagal", "mata_kuliah_id": "mk-9",
+            "tanggal": "2024-10-21", "jam_mulai": "08:00", "jam_selesai": "10:00", "created_at": "2024-01-01T00:00:00+00:00",
+        })
+        assert self.schedule(client) == before
+        # Run berikutnya membersihkan sisa yang sudah lama
+        assert client.post("/api/akademik/ujian/generate", json=self.REQUEST, headers=admin_auth()).status_code == 200
+        assert db.jadwal_ujian.count_documents({"generasi": "gagal"}) == 0
@@ -0,0 +1,151 @@
+"""
+Test Suite: Feed iCalendar Jadwal (in-process)
+
+Event mingguan dari sesi kelas dan semester, escaping/folding baris sesuai
+RFC 5545, dan output render yang stabil sehingga ETag tidak berubah selama
+jadwal tidak berubah.
+
+TestKalenderFeed memakai MongoDB lokal (fixture live_db di conftest.py):
+revalidasi 304 dan invalidasi cache feed lewat db.collection_versions,
+termasuk write yang dilakukan worker lain.
+"""
+from datetime import date
+
+import server
+
+
+def semester_kelas(**overrides):
+    kelas = {
+        "id": "kelas-1", "kode_kelas": "A", "mata_kuliah_id": "mk-1", "dosen_id": "dosen-1",
+        "tahun_akademik_id": "ta-1",
+        "sesi": [
+            {"hari": "Rabu", "jam_mulai": "08:00", "jam_selesai": "09:40", "ruangan": "R1"},
+            {"hari": "Senin", "jam_mulai": "13:00", "jam_selesai": "14:40", "ruangan": "R2"},
+        ],
+    }
+    return {**kelas, **overrides}
+
+
+TA_MAP = {"ta-1": {"id": "ta-1", "tanggal_mulai": "2024-09-04", "tanggal_selesai": "2025-01-17"}}
+MK_MAP = {"mk-1": {"id": "mk-1", "nama": "Basis Data"}}
+DOSEN_MAP = {"dosen-1": {"id": "dosen-1", "nama": "Dr. Budi, M.Kom"}}
+
+
+class TestKalenderEvents:
+    def test_first_occurrence_on_or_after_semester_start(self):
+        # 2024-09-04 adalah Rabu: sesi Rabu mulai hari itu, sesi Senin minggu berikutnya
+        events = server.kalender_events([semester_kelas()], TA_MAP, MK_MAP, DOSEN_MAP)
+        assert [(e["tanggal"], e["menit_mulai"], e["location"]) for e in events] == [
+            (date(2024, 9, 4), 480, "R1"),
+            (date(2024, 9, 9), 780, "R2"),
+        ]
+        assert all(e["sampai"] == date(2025, 1, 17) for e in events)
+        assert events[0]["summary"] == "Basis Data (A)"
+        assert events[0]["description"] == "Dosen: Dr. Budi, M.Kom"
+        assert len({e["uid"] for e in events}) == 2
+
+    def test_kelas_without_schedule_or_semester_dates_are_skipped(self):
+        kelas_list = [
+            semester_kelas(id="tanpa-jadwal", sesi=[]),
+            semester_kelas(id="tanpa-tanggal", tahun_akademik_id="ta-2"),
+        ]
+        ta_map = {**TA_MAP, "ta-2": {"id": "ta-2", "tanggal_mulai": None, "tanggal_selesai": None}}
+        assert server.kalender_events(kelas_list, ta_map, MK_MAP, DOSEN_MAP) == []
+
+
+class TestRenderKalender:
+    def test_text_escaping(self):
+        assert server.ics_text("a,b;c\\d\ne") == "a\\,b\\;c\\\\d\\ne"
+
+    def test_folding_keeps_lines_within_75_octets(self):
+        line = "SUMMARY:" + "Pemrograman Berorientasi Objek é " * 6
+        folded = server.ics_fold(line)
+        parts = folded.split("\r\n")
+        assert all(len(part.encode()) <= 75 for part in parts)
+        assert all(part.startswith(" ") for part in parts[1:])
+        assert "".join([parts[0], *(p[1:] for p in parts[1:])]) == line
+
+    def test_weekly_event_in_campus_timezone(self):
+        events = server.kalender_events([semester_kelas()], TA_MAP, MK_MAP, DOSEN_MAP)
+        body = server.render_kalender("Jadwal Kuliah Ani", events, "Asia/Jakarta").decode()
+        lines = body.split("\r\n")
+        assert lines[0] == "BEGIN:VCALENDAR" and lines[-2] == "END:VCALENDAR" and lines[-1] == ""
+        assert "TZOFFSETTO:+0700" in lines
+        assert "DTSTART;TZID=Asia/Jakarta:20240904T080000" in lines
+        assert "DTEND;TZID=Asia/Jakarta:20240904T094000" in lines
+        # Akhir hari terakhir semester (23:59:59 WIB) dalam UTC
+        assert "RRULE:FREQ=WEEKLY;UNTIL=20250117T165959Z" in lines
+        assert "DESCRIPTION:Dosen: Dr. Budi\\, M.Kom" in lines
+        assert body.count("BEGIN:VEVENT") == 2
+
+    def test_render_is_deterministic(self):
+        events = server.kalender_events([semester_kelas()], TA_MAP, MK_MAP, DOSEN_MAP)
+        assert server.render_kalender("x", events) == server.render_kalender("x", list(events))
+
+
+def seed_feed(db, krs_status="disetujui"):
+    db.users.insert_many([
+        {"id": "user-admin", "email": "akademik@siakad.ac.id", "role": "admin", "is_active": True},
+        {"id": "user-mhs", "email": "ani@siakad.ac.id", "role": "mahasiswa", "is_active": True,
+         "kalender_token": "token-mhs"},
+    ])
+    db.mahasiswa.insert_one({"id": "mhs-0", "user_id": "user-mhs", "nim": "2024001", "nama": "Ani"})
+    db.tahun_akademik.insert_one(TA_MAP["ta-1"])
+    db.mata_kuliah.insert_one(MK_MAP["mk-1"])
+    db.dosen.insert_one(DOSEN_MAP["dosen-1"])
+    db.kelas.insert_one(semester_kelas())
+    db.krs.insert_one({"id": "krs-0", "mahasiswa_id": "mhs-0", "kelas_id": "kelas-1", "tahun_akademik_id": "ta-1",
+                       "status": krs_status})
+
+
+def admin_auth():
+    return {"Authorization": f"Bearer {server.create_token('user-admin', 'akademik@siakad.ac.id', 'admin')}"}
+
+
+class TestKalenderFeed:
+    URL = "/api/kalender/token-mhs.ics"
+
+    def test_conditional_get(self, live_db):
+        client, db = live_db
+        seed_feed(db)
+        first = client.get(self.URL)
+        assert first.status_code == 200
+        etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+        assert client.get(self.URL, headers={"If-None-Match": etag}).status_code == 304
+        assert client.get(self.URL, headers={"If-Modified-Since": last_modified}).status_code == 304
+        assert client.get(self.URL, headers={"If-None-Match": '"lama"'}).status_code == 200
+
+    def test_krs_approval_invalidates_feed(self, live_db):
+        client, db = live_db
+        seed_feed(db, krs_status="diajukan")
+        first = client.get(self.URL)
+        assert b"BEGIN:VEVENT" not in first.content
+        assert client.put("/api/akademik/krs/krs-0/approve", headers=admin_auth()).status_code == 200
+        second = client.get(self.URL, headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert second.content.count(b"BEGIN:VEVENT") == 2
+
+    def test_write_in_other_worker_invalidates_feed(self, live_db):
+        client, db = live_db
+        seed_feed(db)
+        first = client.get(self.URL)
+        assert b"LOCATION:R1" in first.content
+        # Worker lain memindahkan ruangan: tanpa bump versi, feed dari cache worker ini tetap dipakai
+        db.kelas.update_one({"id": "kelas-1"}, {"$set": {"sesi.0.ruangan": "R9"}})
+        assert client.get(self.URL).content == first.content
+        db.collection_versions.update_one({"collection": "kelas"}, {"$inc": {"version": 1}}, upsert=True)
+        second = client.get(self.URL, headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert b"LOCATION:R9" in second.content
+
+    def test_dosen_rename_invalidates_feed(self, live_db):
+        client, db = live_db
+        seed_feed(db)
+        first = client.get(self.URL)
+        assert b"Dr. Budi" in first.content
+        response = client.put("/api/master/dosen/dosen-1", headers=admin_auth(), json={
+            "nidn": "0011", "nama": "Prof. Budi", "email": "budi@siakad.ac.id"})
+        assert response.status_code == 200
+        second = client.get(self.URL, headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert b"Prof. Budi" in second.content
@@ -0,0 +1,67 @@
+"""
+Test Suite: Update Kelas Berjadwal (in-process, MongoDB lokal)
+
+PUT /akademik/kelas/{id} tidak boleh menimpa jadwal/ruangan kelas yang punya
+sesi (sesi hanya diubah lewat /akademik/jadwal), dan mengganti dosen atau
+semester dicek bentroknya seperti update jadwal.
+
+Butuh MongoDB lokal (lihat fixture live_db di conftest.py).
+"""
+import server
+
+
+def auth():
+    return {"Authorization": f"Bearer {server.create_token('user-admin', 'akademik@siakad.ac.id', 'admin')}"}
+
+
+def scheduled_kelas(i, dosen_id, hari="Senin", jam=("08:00", "10:00"), ruangan="R1"):
+    start, end = server.jadwal_span(*jam)
+    sesi = [{"hari": hari, "jam_mulai": jam[0], "jam_selesai": jam[1],
+             "menit_mulai": start, "menit_selesai": end, "ruangan": ruangan}]
+    return {"id": f"kelas-{i}", "kode_kelas": f"A{i}", "mata_kuliah_id": "mk-0", "dosen_id": dosen_id,
+            "tahun_akademik_id": "ta-0", "kuota": 40, **server.sesi_fields(sesi)}
+
+
+def seed(db):
+    db.users.insert_one({"id": "user-admin", "email": "akademik@siakad.ac.id", "role": "admin", "is_active": True})
+    db.kelas.insert_many([
+        scheduled_kelas(0, "dosen-0"),
+        scheduled_kelas(1, "dosen-1", ruangan="R2"),
+    ])
+
+
+def payload(**changes):
+    return {"kode_kelas": "A0", "mata_kuliah_id": "mk-0", "dosen_id": "dosen-0", "tahun_akademik_id": "ta-0",
+            "kuota": 40, "jadwal": "Senin 08:00-10:00", "ruangan": "R1", **changes}
+
+
+class TestUpdateKelas:
+    def test_schedule_fields_do_not_override_sesi(self, live_db):
+        client, db = live_db
+        seed(db)
+        response = client.put("/api/akademik/kelas/kelas-0",
+                              json=payload(kuota=30, jadwal="Rabu 13:00-15:00", ruangan="R9"), headers=auth())
+        assert response.status_code == 200
+        kelas = db.kelas.find_one({"id": "kelas-0"})
+        assert kelas["kuota"] == 30
+        assert (kelas["jadwal"], kelas["ruangan"]) == ("Senin 08:00-10:00", "R1")
+        assert [(s["hari"], s["ruangan"]) for s in kelas["sesi"]] == [("Senin", "R1")]
+
+    def test_dosen_change_is_conflict_checked(self, live_db):
+        client, db = live_db
+        seed(db)
+        response = client.put("/api/akademik/kelas/kelas-0", json=payload(dosen_id="dosen-1"), headers=auth())
+        assert response.status_code == 400
+        assert response.json()["detail"]["conflicts"]
+        assert db.kelas.find_one({"id": "kelas-0"})["dosen_id"] == "dosen-0"
+
+    def test_unscheduled_kelas_keeps_free_text_jadwal(self, live_db):
+        client, db = live_db
+        seed(db)
+        db.kelas.insert_one({"id": "kelas-2", "kode_kelas": "A2", "mata_kuliah_id": "mk-0", "dosen_id": "dosen-1",
+                             "tahun_akademik_id": "ta-0", "kuota": 40})
+        response = client.put("/api/akademik/kelas/kelas-2",
+                              json=payload(kode_kelas="A2", dosen_id="dosen-1", jadwal="Rabu", ruangan="R9"), headers=auth())
+        assert response.status_code == 200
+        kelas = db.kelas.find_one({"id": "kelas-2"})
+        assert (kelas["jadwal"], kelas["ruangan"]) == ("Rabu", "R9")
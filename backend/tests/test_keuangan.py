@@ -248,6 +248,30 @@ class TestPembayaran:
         assert response.status_code in [400, 404, 422], f"Unexpected status: {response.status_code}"
 
 
+    def test_pembayaran_keyset_pagination(self):
+        """Test GET /api/keuangan/pembayaran pages with X-Next-Cursor without overlap"""
+        first = requests.get(f"{BASE_URL}/api/keuangan/pembayaran",
+                            params={"limit": 2}, headers=self.headers)
+        assert first.status_code == 200
+        page1 = first.json()
+        assert len(page1) <= 2
+        cursor = first.headers.get("X-Next-Cursor")
+        if not cursor:
+            pytest.skip("Not enough pembayaran for a second page")
+        
+        second = requests.get(f"{BASE_URL}/api/keuangan/pembayaran",
+                             params={"limit": 2, "cursor": cursor}, headers=self.headers)
+        assert second.status_code == 200
+        ids1 = {p["id"] for p in page1}
+        assert not ids1 & {p["id"] for p in second.json()}
+    
+    def test_pembayaran_invalid_cursor(self):
+        """Test GET /api/keuangan/pembayaran rejects malformed cursor"""
+        response = requests.get(f"{BASE_URL}/api/keuangan/pembayaran",
+                               params={"cursor": "invalid"}, headers=self.headers)
+        assert response.status_code == 400
+
+
 class TestRekap:
     """Rekap Keuangan tests"""
     
@@ -275,6 +299,63 @@ class TestRekap:
         assert "jumlah_mahasiswa_cicilan" in data
         assert "jumlah_mahasiswa_belum_bayar" in data
         print(f"Rekap: Total tagihan={data['total_tagihan']}, Terbayar={data['total_terbayar']}")
+    
+    def test_get_rekap_breakdown(self):
+        """Test GET /api/keuangan/rekap with group_by breakdowns"""
+        total = requests.get(f"{BASE_URL}/api/keuangan/rekap", headers=self.headers).json()
+        for group_by in ["prodi", "fakultas", "kategori", "angkatan"]:
+            response = requests.get(f"{BASE_URL}/api/keuangan/rekap",
+                                   params={"group_by": group_by}, headers=self.headers)
+            print(f"Get rekap group_by={group_by} response: {response.status_code}")
+            assert response.status_code == 200
+            data = response.json()
+            assert data["group_by"] == group_by
+            assert isinstance(data["breakdown"], list)
+            # Breakdown must add up to the university-wide totals
+            assert sum(b["total_tagihan"] for b in data["breakdown"]) == pytest.approx(total["total_tagihan"])
+            assert data["total_terbayar"] == pytest.approx(total["total_terbayar"])
+    
+    def test_get_rekap_invalid_group_by(self):
+        """Test GET /api/keuangan/rekap rejects unknown group_by"""
+        response = requests.get(f"{BASE_URL}/api/keuangan/rekap",
+                               params={"group_by": "invalid"}, headers=self.headers)
+        assert response.status_code == 400
+    
+    def test_get_trend(self):
+        """Test GET /api/keuangan/trend serves daily snapshot rows"""
+        response = requests.get(f"{BASE_URL}/api/keuangan/trend",
+                               params={"group_by": "prodi"}, headers=self.headers)
+        print(f"Get trend response: {response.status_code}")
+        assert response.status_code == 200
+        data = response.json()
+        assert isinstance(data, list)
+        tanggal = [p["tanggal"] for p in data]
+        assert tanggal == sorted(tanggal)
+    
+    def test_refresh_snapshot(self):
+        """Test POST /api/keuangan/snapshot/refresh"""
+        response = requests.post(f"{BASE_URL}/api/keuangan/snapshot/refresh", headers=self.headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert "rows_updated" in data
+        assert data["watermark"]
+    
+    def test_kaprodi_can_get_rekap(self):
+        """Test kaprodi can access rekap scoped to their prodi"""
+        login = requests.post(f"{BASE_URL}/api/auth/login", json={
+            "user_id": "KPD001",
+            "password": "kaprodi123"
+        })
+        if login.status_code != 200:
+            pytest.skip("No kaprodi login available")
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        
+        response = requests.get(f"{BASE_URL}/api/keuangan/rekap",
+                               params={"group_by": "prodi"}, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        prodi_id = login.json()["user"]["prodi_id"]
+        assert all(b["key"] == prodi_id for b in data["breakdown"])
 
 
 class TestMahasiswaKeuangan:
@@ -0,0 +1,145 @@
+"""
+Test Suite: Snapshot Keuangan Harian (in-process, MongoDB lokal)
+
+Refresh snapshot harus idempoten: menjalankan ulang tidak menggandakan total,
+verifikasi ulang ditolak, dan pembayaran terverifikasi yang kemudian ditolak
+dikurangkan dari hari verifikasinya. GET /trend tidak menulis apa pun bila
+tidak ada pembayaran yang berubah, dan menunggu recompute worker lain selesai.
+
+Butuh MongoDB lokal (lihat fixture live_db di conftest.py).
+"""
+import asyncio
+import contextlib
+from functools import partial
+
+import server
+
+
+def auth(role="admin"):
+    return {"Authorization": f"Bearer {server.create_token('user-admin', 'keuangan@siakad.ac.id', role)}"}
+
+
+def seed(db):
+    db.users.insert_one({"id": "user-admin", "email": "keuangan@siakad.ac.id", "role": "admin", "is_active": True})
+    db.mahasiswa.insert_one({"id": "mhs-0", "nim": "2024001", "nama": "Ani", "prodi_id": "prodi-0"})
+    db.tagihan_ukt.insert_one({"id": "tagihan-0", "mahasiswa_id": "mhs-0", "tahun_akademik_id": "ta-0",
+                               "kategori_ukt_id": "kat-0", "nominal": 10_000_000, "status": "cicilan"})
+    db.pembayaran_ukt.insert_many([
+        {"id": "bayar-1", "tagihan_id": "tagihan-0", "nominal": 100, "status": "verified",
+         "verified_at": "2024-09-01T10:00:00+00:00"},
+        {"id": "bayar-2", "tagihan_id": "tagihan-0", "nominal": 200, "status": "verified",
+         "verified_at": "2024-09-02T10:00:00+00:00"},
+    ])
+
+
+def refresh(client, **kwargs):
+    # Di event loop app (motor terikat ke loop TestClient)
+    return client.portal.call(partial(server.refresh_keuangan_snapshot, **kwargs))
+
+
+def totals(db):
+    rows = db.keuangan_snapshot_harian.find({}, {"_id": 0}).sort("tanggal", 1)
+    return [(r["tanggal"], r["total_terbayar"], r["jumlah_pembayaran"]) for r in rows]
+
+
+class TestKeuanganSnapshot:
+    def test_rerun_does_not_double_count(self, live_db):
+        client, db = live_db
+        seed(db)
+        refresh(client)
+        refresh(client)
+        refresh(client, rebuild=True)
+        assert totals(db) == [("2024-09-01", 100, 1), ("2024-09-02", 200, 1)]
+
+    def test_reverify_is_refused(self, live_db):
+        client, db = live_db
+        seed(db)
+        refresh(client)
+        response = client.put("/api/keuangan/pembayaran/bayar-1/verify", json={"status": "verified"}, headers=auth())
+        assert response.status_code == 400
+        assert db.pembayaran_ukt.find_one({"id": "bayar-1"})["verified_at"] == "2024-09-01T10:00:00+00:00"
+
+    def test_rejected_payment_leaves_its_day(self, live_db, monkeypatch):
+        client, db = live_db
+        seed(db)
+        refresh(client)
+        response = client.put("/api/keuangan/pembayaran/bayar-1/verify", json={"status": "rejected"}, headers=auth())
+        assert response.status_code == 200
+        monkeypatch.setattr(server, "KEUANGAN_SNAPSHOT_LAG_SECONDS", 0)
+        refresh(client)
+        assert totals(db) == [("2024-09-02", 200, 1)]
+
+    def test_concurrent_workers_recompute_once(self, live_db, monkeypatch):
+        """Without the in-process lock (two workers), only the compare-and-set winner recomputes"""
+        client, db = live_db
+        seed(db)
+        refresh(client)
+        db.pembayaran_ukt.update_one({"id": "bayar-2"}, {"$set": {"verified_at": "2024-09-03T10:00:00+00:00"}})
+        db.keuangan_snapshot_state.update_one(
+            {"id": server.KEUANGAN_SNAPSHOT_STATE_ID}, {"$set": {"watermark": "2024-09-02T00:00:00+00:00"}}
+        )
+        monkeypatch.setattr(server, "keuangan_snapshot_lock", contextlib.nullcontext())
+        calls = []
+        recompute = server.recompute_keuangan_snapshot
+
+        async def counting_recompute(*args):
+            calls.append(args)
+            return await recompute(*args)
+
+        monkeypatch.setattr(server, "recompute_keuangan_snapshot", counting_recompute)
+
+        async def two_workers():
+            await asyncio.gather(server.refresh_keuangan_snapshot(), server.refresh_keuangan_snapshot())
+
+        client.portal.call(two_workers)
+        assert len(calls) == 1
+        assert totals(db) == [("2024-09-01", 100, 1), ("2024-09-03", 200, 1)]
+
+    def test_trend_without_changes_does_not_write(self, live_db):
+        client, db = live_db
+        seed(db)
+        refresh(client)
+        state = db.keuangan_snapshot_state.find_one({"id": server.KEUANGAN_SNAPSHOT_STATE_ID})
+        assert client.get("/api/keuangan/trend", headers=auth()).status_code == 200
+        assert db.keuangan_snapshot_state.find_one({"id": server.KEUANGAN_SNAPSHOT_STATE_ID}) == state
+
+    def test_reader_waits_for_other_workers_recompute(self, live_db, monkeypatch):
+        client, db = live_db
+        seed(db)
+        refresh(client)
+        monkeypatch.setattr(server, "KEUANGAN_SNAPSHOT_POLL_SECONDS", 0.01)
+        lease = (server.datetime.now(server.timezone.utc) + server.timedelta(seconds=60)).isoformat()
+        db.keuangan_snapshot_state.update_one(
+            {"id": server.KEUANGAN_SNAPSHOT_STATE_ID}, {"$set": {"refreshing_until": lease}}
+        )
+        order = []
+
+        async def other_worker_finishes():
+            await asyncio.sleep(0.05)
+            order.append("recomputed")
+            await server.db.keuangan_snapshot_state.update_one(
+                {"id": server.KEUANGAN_SNAPSHOT_STATE_ID}, {"$set": {"refreshing_until": None}}
+            )
+
+        async def reader():
+            await server.refresh_keuangan_snapshot()
+            order.append("read")
+
+        async def both():
+            await asyncio.gather(reader(), other_worker_finishes())
+
+        client.portal.call(both)
+        assert order == ["recomputed", "read"]
+
+    def test_expired_lease_redoes_its_range(self, live_db, monkeypatch):
+        """A worker that died mid-recompute left its claimed days stale; the next refresh redoes them"""
+        client, db = live_db
+        seed(db)
+        refresh(client)
+        db.keuangan_snapshot_harian.delete_many({"tanggal": "2024-09-02"})
+        db.keuangan_snapshot_state.update_one(
+            {"id": server.KEUANGAN_SNAPSHOT_STATE_ID},
+            {"$set": {"refreshing_until": "2024-01-01T00:00:00+00:00", "refreshing_from": "2024-09-02"}}
+        )
+        refresh(client)
+        assert totals(db) == [("2024-09-01", 100, 1), ("2024-09-02", 200, 1)]
@@ -0,0 +1,34 @@
+"""
+Test Suite: Akses /metrics (in-process, tanpa database)
+
+/metrics fail closed: tanpa METRICS_TOKEN endpoint tidak tersedia, dengan
+token hanya Bearer yang cocok yang mendapat data Prometheus.
+"""
+import asyncio
+
+import httpx
+
+import server
+
+
+def get_metrics(headers=None):
+    async def call():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/metrics", headers=headers)
+    return asyncio.run(call())
+
+
+def test_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(server, "METRICS_TOKEN", None)
+    assert get_metrics().status_code == 404
+    assert get_metrics({"Authorization": "Bearer "}).status_code == 404
+
+
+def test_requires_matching_bearer(monkeypatch):
+    monkeypatch.setattr(server, "METRICS_TOKEN", "rahasia")
+    assert get_metrics().status_code == 401
+    assert get_metrics({"Authorization": "Bearer salah"}).status_code == 401
+    response = get_metrics({"Authorization": "Bearer rahasia"})
+    assert response.status_code == 200
+    assert "siakad_http_requests_total" in response.text
@@ -0,0 +1,98 @@
+"""
+Test Suite: Kalender Pertemuan Presensi (in-process)
+
+presensi_dates dibandingkan dengan perhitungan manual kalender semester:
+hari libur dilewati, kelas dengan beberapa sesi per minggu diberi nomor
+pertemuan berurutan, dan jumlah pertemuan dibatasi maks_pertemuan.
+
+TestGeneratePresensi menjalankan generator dua kali terhadap MongoDB lokal
+(fixture live_db di conftest.py): run kedua tidak membuat apa pun dan
+pertemuan yang sudah ada dihitung sebagai sudah_ada.
+"""
+from datetime import date
+
+import server
+
+
+def sessions(*slots):
+    return server.kelas_sessions({"id": "kelas-1", "sesi": [
+        {"hari": hari, "jam_mulai": jam_mulai, "jam_selesai": jam_selesai} for hari, jam_mulai, jam_selesai in slots
+    ]})
+
+
+class TestPresensiDates:
+    def test_weekly_meetings_skip_holidays(self):
+        # 2024-09-02 adalah Senin
+        meetings = server.presensi_dates(
+            date(2024, 9, 2), date(2025, 1, 17), sessions(("Senin", "08:00", "09:40")), {"2024-09-16"}, 16
+        )
+        assert [m["pertemuan_ke"] for m in meetings] == list(range(1, 17))
+        assert meetings[0]["tanggal"] == "2024-09-02"
+        assert meetings[1]["tanggal"] == "2024-09-09"
+        assert meetings[2]["tanggal"] == "2024-09-23"
+        assert all(date.fromisoformat(m["tanggal"]).weekday() == 0 for m in meetings)
+        assert meetings[-1]["tanggal"] == "2024-12-23"
+
+    def test_multiple_sessions_per_week_in_order(self):
+        meetings = server.presensi_dates(
+            date(2024, 9, 2), date(2024, 9, 15),
+            sessions(("Kamis", "10:00", "11:40"), ("Senin", "13:00", "14:40"), ("Senin", "08:00", "09:40")),
+            set(), 16
+        )
+        assert [(m["tanggal"], m["jam_mulai"]) for m in meetings] == [
+            ("2024-09-02", "08:00"), ("2024-09-02", "13:00"), ("2024-09-05", "10:00"),
+            ("2024-09-09", "08:00"), ("2024-09-09", "13:00"), ("2024-09-12", "10:00"),
+        ]
+        assert [m["pertemuan_ke"] for m in meetings] == [1, 2, 3, 4, 5, 6]
+
+    def test_cap_and_short_semester(self):
+        slot = sessions(("Rabu", "08:00", "09:40"), ("Jumat", "08:00", "09:40"))
+        assert len(server.presensi_dates(date(2024, 9, 2), date(2025, 1, 17), slot, set(), 3)) == 3
+        # Semester hanya dua minggu: Rabu dan Jumat masing-masing dua kali
+        assert len(server.presensi_dates(date(2024, 9, 2), date(2024, 9, 15), slot, set(), 16)) == 4
+
+    def test_unscheduled_kelas_has_no_meetings(self):
+        assert server.presensi_dates(date(2024, 9, 2), date(2025, 1, 17), [], set(), 16) == []
+        assert server.presensi_dates(date(2024, 9, 2), date(2025, 1, 17), server.kelas_sessions({"id": "k"}), set(), 16) == []
+
+
+def auth():
+    return {"Authorization": f"Bearer {server.create_token('user-admin', 'akademik@siakad.ac.id', 'admin')}"}
+
+
+def seed(db):
+    db.users.insert_one({"id": "user-admin", "email": "akademik@siakad.ac.id", "role": "admin", "is_active": True})
+    db.tahun_akademik.insert_one({"id": "ta-0", "tanggal_mulai": "2024-09-02", "tanggal_selesai": "2025-01-17"})
+    db.kelas.insert_many([{
+        "id": f"kelas-{i}", "kode_kelas": f"A{i}", "mata_kuliah_id": "mk-0", "dosen_id": "dosen-0",
+        "tahun_akademik_id": "ta-0", **server.sesi_fields([{
+            "hari": hari, "jam_mulai": "08:00", "jam_selesai": "09:40", "menit_mulai": 480, "menit_selesai": 580,
+            "ruangan": "R1",
+        }]),
+    } for i, hari in enumerate(["Senin", "Rabu"])])
+
+
+class TestGeneratePresensi:
+    def generate(self, client):
+        response = client.post("/api/akademik/presensi/generate", json={"tahun_akademik_id": "ta-0"}, headers=auth())
+        assert response.status_code == 200
+        return response.json()
+
+    def test_rerun_creates_nothing(self, live_db):
+        client, db = live_db
+        seed(db)
+        first = self.generate(client)
+        assert (first["total_pertemuan"], first["dibuat"], first["sudah_ada"]) == (32, 32, 0)
+        second = self.generate(client)
+        assert (second["total_pertemuan"], second["dibuat"], second["sudah_ada"]) == (32, 0, 32)
+        assert db.presensi.count_documents({}) == 32
+
+    def test_existing_meetings_are_kept(self, live_db):
+        client, db = live_db
+        seed(db)
+        db.presensi.insert_one({"id": "manual", "kelas_id": "kelas-0", "pertemuan_ke": 1,
+                                "tanggal": "2024-09-03", "materi": "Pengantar"})
+        result = self.generate(client)
+        assert (result["dibuat"], result["sudah_ada"]) == (31, 1)
+        manual = db.presensi.find({"kelas_id": "kelas-0", "pertemuan_ke": 1})
+        assert [(p["id"], p["materi"]) for p in manual] == [("manual", "Pengantar")]
@@ -0,0 +1,413 @@
+"""
+Test Suite: Query Budget dan Latency Ceiling per Endpoint (in-process)
+
+Menjalankan app FastAPI langsung lewat ASGI (TestClient, tanpa server) terhadap
+MongoDB lokal yang di-seed dataset tetap. Jumlah command MongoDB tiap request
+diambil dari QueryAccountingMiddleware, lalu dibandingkan dengan budget per
+endpoint. Dataset sengaja berisi puluhan baris per koleksi, sehingga satu
+query per baris (N+1) pasti melewati budget. Endpoint N+1 yang belum
+diperbaiki diberi budget target dan ditandai xfail; setiap GET route harus
+punya budget.
+
+Budget dihitung tanpa lookup user oleh get_current_user (AUTH_QUERIES).
+getMore tidak dihitung, jadi budget tidak bergantung pada jumlah baris.
+
+Butuh MongoDB lokal:
+    TEST_MONGO_URL=mongodb://localhost:27017 pytest tests/test_query_budget.py
+Database siakad_test_<acak> dibuat lalu dihapus setelah selesai.
+QUERY_BUDGET_LATENCY_SCALE mengalikan semua latency ceiling (CI yang lambat).
+"""
+import os
+import time
+
+import pytest
+from fastapi.routing import APIRoute
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+# MONGO_URL/DB_NAME di-set oleh conftest.py sebelum server di-import
+TEST_MONGO_URL = os.environ["MONGO_URL"]
+TEST_DB_NAME = os.environ["DB_NAME"]
+LATENCY_SCALE = float(os.environ.get("QUERY_BUDGET_LATENCY_SCALE", "1"))
+AUTH_QUERIES = 1  # users.find_one di get_current_user
+
+from fastapi.testclient import TestClient  # noqa: E402
+from starlette.routing import Match  # noqa: E402
+
+import server  # noqa: E402
+
+# Ukuran dataset
+N_FAKULTAS = 2
+N_PRODI = 4
+N_DOSEN = 8
+N_MATA_KULIAH = 24
+N_KELAS = 24
+N_MAHASISWA = 40
+KRS_PER_MAHASISWA = 6  # 5 disetujui + 1 diajukan
+N_PERTEMUAN = 4
+N_REQUESTS = 12  # reset password, foto profil, perubahan biodata
+
+HARI = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat"]
+SLOTS = [("07:30", "09:10"), ("09:20", "11:00"), ("13:00", "14:40"), ("15:00", "16:40")]
+CREATED_AT = "2024-08-01T00:00:00+00:00"
+
+
+def seed_dataset(db):
+    """Fixed dataset; ids are readable (kelas-0, mhs-0, ...) so tests can address rows"""
+    db.fakultas.insert_many([
+        {"id": f"fak-{i}", "kode": f"F{i}", "nama": f"Fakultas {i}", "dekan": None}
+        for i in range(N_FAKULTAS)
+    ])
+    db.prodi.insert_many([
+        {"id": f"prodi-{i}", "kode": f"P{i}", "nama": f"Prodi {i}", "fakultas_id": f"fak-{i % N_FAKULTAS}",
+         "jenjang": "S1", "akreditasi": "B", "kaprodi": None}
+        for i in range(N_PRODI)
+    ])
+    db.tahun_akademik.insert_many([
+        {"id": "ta-lama", "tahun": "2023/2024", "semester": "Genap", "is_active": False,
+         "tanggal_mulai": "2024-02-01", "tanggal_selesai": "2024-06-30"},
+        {"id": "ta-aktif", "tahun": "2024/2025", "semester": "Ganjil", "is_active": True,
+         "tanggal_mulai": "2024-09-02", "tanggal_selesai": "2025-01-17"},
+    ])
+    db.kurikulum.insert_many([
+        {"id": f"kur-{i}", "kode": f"K{i}", "nama": f"Kurikulum {i}", "tahun": "2020",
+         "prodi_id": f"prodi-{i}", "is_active": True}
+        for i in range(N_PRODI)
+    ])
+    db.kategori_ukt.insert_many([
+        {"id": f"ukt-{i}", "kode": f"UKT-{i + 1}", "nama": f"UKT {i + 1}", "nominal": 1000000 * (i + 1), "keterangan": None}
+        for i in range(3)
+    ])
+    db.mata_kuliah.insert_many([
+        {"id": f"mk-{i}", "kode": f"IF{100 + i}", "nama": f"Mata Kuliah {i}", "sks_teori": 2, "sks_praktik": 1,
+         "semester": i % 8 + 1, "kurikulum_id": f"kur-{i % N_PRODI}", "prasyarat_ids": []}
+        for i in range(N_MATA_KULIAH)
+    ])
+
+    users = [
+        {"id": "user-admin", "email": "admin@siakad.ac.id", "nama": "Admin", "role": "admin"},
+        {"id": "user-rektor", "email": "rektor@siakad.ac.id", "nama": "Rektor", "role": "rektor"},
+        {"id": "user-dekan", "email": "dekan@siakad.ac.id", "nama": "Dekan", "role": "dekan", "fakultas_id": "fak-0"},
+        {"id": "user-kaprodi", "email": "kaprodi@siakad.ac.id", "nama": "Kaprodi", "role": "kaprodi",
+         "prodi_id": "prodi-0"},
+    ]
+    users += [
+        {"id": f"user-dosen-{i}", "email": f"dosen{i}@siakad.ac.id", "nama": f"Dosen {i}", "role": "dosen",
+         "user_id_number": f"00010{i:05d}"}
+        for i in range(N_DOSEN)
+    ]
+    users += [
+        {"id": f"user-mhs-{i}", "email": f"mhs{i}@siakad.ac.id", "nama": f"Mahasiswa {i}", "role": "mahasiswa",
+         "user_id_number": f"2024{i:04d}", "prodi_id": f"prodi-{i % N_PRODI}"}
+        for i in range(N_MAHASISWA)
+    ]
+    db.users.insert_many([{**u, "password": "x", "is_active": True, "created_at": CREATED_AT} for u in users])
+    for user_id in ("user-mhs-0", "user-dosen-0"):
+        db.users.update_one({"id": user_id}, {"$set": {"kalender_token": f"kalender-{user_id}"}})
+
+    db.dosen.insert_many([
+        {"id": f"dosen-{i}", "user_id": f"user-dosen-{i}", "nidn": f"00010{i:05d}", "nama": f"Dosen {i}",
+         "email": f"dosen{i}@siakad.ac.id", "prodi_id": f"prodi-{i % N_PRODI}", "status": "aktif"}
+        for i in range(N_DOSEN)
+    ])
+    db.mahasiswa.insert_many([
+        {"id": f"mhs-{i}", "user_id": f"user-mhs-{i}", "nim": f"2024{i:04d}", "nama": f"Mahasiswa {i}",
+         "email": f"mhs{i}@siakad.ac.id", "prodi_id": f"prodi-{i % N_PRODI}", "tahun_masuk": "2024",
+         "status": "aktif", "dosen_pa_id": f"dosen-{i % N_DOSEN}", "created_at": CREATED_AT}
+        for i in range(N_MAHASISWA)
+    ])
+
+    kelas = []
+    for i in range(N_KELAS):
+        hari = HARI[i % len(HARI)]
+        jam_mulai, jam_selesai = SLOTS[(i // len(HARI)) % len(SLOTS)]
+        kelas.append({
+            "id": f"kelas-{i}", "kode_kelas": f"A{i}", "mata_kuliah_id": f"mk-{i}", "dosen_id": f"dosen-{i % N_DOSEN}",
+            "tahun_akademik_id": "ta-aktif", "kuota": 60, "prodi_id": f"prodi-{i % N_PRODI}",
+            "hari": hari, "jam_mulai": jam_mulai, "jam_selesai": jam_selesai, "ruangan": f"R{i % 6}",
+            "jadwal": f"{hari} {jam_mulai}-{jam_selesai}",
+        })
+        if i % 6 == 0:  # kelas dua sesi: sesi kedua hari Sabtu
+            sabtu_mulai, sabtu_selesai = SLOTS[i // 6]
+            kelas[-1]["sesi"] = [
+                {"hari": hari, "jam_mulai": jam_mulai, "jam_selesai": jam_selesai, "ruangan": f"R{i % 6}"},
+                {"hari": "Sabtu", "jam_mulai": sabtu_mulai, "jam_selesai": sabtu_selesai, "ruangan": f"R{i % 6}"},
+            ]
+            kelas[-1]["jadwal"] += f", Sabtu {sabtu_mulai}-{sabtu_selesai}"
+    db.kelas.insert_many(kelas)
+    db.ruangan.insert_many([
+        {"id": f"ruang-{r}", "nama": f"R{r}", "gedung": f"Gedung {r % 2}", "kapasitas": 40 + 10 * r, "fasilitas": ["proyektor"]}
+        for r in range(8)
+    ])
+
+    krs, nilai = [], []
+    for m in range(N_MAHASISWA):
+        for j in range(KRS_PER_MAHASISWA):
+            k = (m + j * 4) % N_KELAS
+            approved = j < KRS_PER_MAHASISWA - 1
+            krs_id = f"krs-{m}-{j}"
+            krs.append({
+                "id": krs_id, "mahasiswa_id": f"mhs-{m}", "kelas_id": f"kelas-{k}", "tahun_akademik_id": "ta-aktif",
+                "status": "disetujui" if approved else "diajukan", "created_at": CREATED_AT,
+            })
+            if approved:
+                nilai.append({
+                    "id": f"nilai-{m}-{j}", "krs_id": krs_id, "nilai_tugas": 80, "nilai_uts": 75, "nilai_uas": 85,
+                    "nilai_akhir": 80.5, "nilai_huruf": "A", "bobot": 4.0, "updated_at": CREATED_AT,
+                })
+    db.krs.insert_many(krs)
+    db.nilai.insert_many(nilai)
+
+    peserta_kelas_0 = [r["mahasiswa_id"] for r in krs if r["kelas_id"] == "kelas-0" and r["status"] == "disetujui"]
+    db.presensi.insert_many([
+        {"id": f"presensi-{p}", "kelas_id": "kelas-0", "pertemuan_ke": p + 1, "tanggal": f"2024-09-{2 + 7 * p:02d}",
+         "created_at": CREATED_AT, "created_by": "user-dosen-0"}
+        for p in range(N_PERTEMUAN)
+    ])
+    db.presensi_detail.insert_many([
+        {"id": f"presensi-{p}-{mhs_id}", "presensi_id": f"presensi-{p}", "mahasiswa_id": mhs_id,
+         "status": ["hadir", "hadir", "izin", "alpha"][(p + n) % 4], "keterangan": None, "created_at": CREATED_AT}
+        for p in range(N_PERTEMUAN) for n, mhs_id in enumerate(peserta_kelas_0)
+    ])
+
+    db.tagihan_ukt.insert_many([
+        {"id": f"tagihan-{m}", "mahasiswa_id": f"mhs-{m}", "tahun_akademik_id": "ta-aktif",
+         "kategori_ukt_id": f"ukt-{m % 3}", "nominal": 1000000 * (m % 3 + 1), "status": "cicilan",
+         "jatuh_tempo": "2024-09-30", "created_at": CREATED_AT}
+        for m in range(N_MAHASISWA)
+    ] + [
+        {"id": f"tagihan-lama-{m}", "mahasiswa_id": f"mhs-{m}", "tahun_akademik_id": "ta-lama",
+         "kategori_ukt_id": f"ukt-{m % 3}", "nominal": 1000000 * (m % 3 + 1), "status": "lunas",
+         "jatuh_tempo": "2024-03-31", "created_at": "2024-02-01T00:00:00+00:00"}
+        for m in range(N_MAHASISWA)
+    ])
+    db.pembayaran_ukt.insert_many([
+        {"id": f"bayar-{m}-{status}", "tagihan_id": f"tagihan-{m}", "nominal": 500000, "metode_pembayaran": "transfer",
+         "status": status, "created_at": f"2024-09-{m % 28 + 1:02d}T08:00:00+00:00"}
+        for m in range(N_MAHASISWA) for status in ("verified", "pending")
+    ])
+
+    db.password_reset_requests.insert_many([
+        {"id": f"reset-{i}", "user_id": f"user-mhs-{i}", "user_id_number": f"2024{i:04d}",
+         "prodi_id": f"prodi-{i % N_PRODI}", "password_baru_hash": "x", "status": "pending", "created_at": CREATED_AT}
+        for i in range(N_REQUESTS)
+    ])
+    db.foto_profil_requests.insert_many([
+        {"id": f"foto-{i}", "user_id": f"user-mhs-{i}", "user_id_number": f"2024{i:04d}",
+         "prodi_id": f"prodi-{i % N_PRODI}", "foto_lama": None, "foto_baru": f"/uploads/foto_profil/{i}.jpg",
+         "status": "pending", "created_at": CREATED_AT}
+        for i in range(N_REQUESTS)
+    ])
+    db.biodata.insert_many([
+        {"id": f"biodata-{m}", "mahasiswa_id": f"mhs-{m}", "nik": f"3273{m:012d}", "agama": "Islam",
+         "is_verified": False, "created_at": CREATED_AT, "updated_at": CREATED_AT}
+        for m in range(N_MAHASISWA // 2)
+    ])
+    db.biodata_change_request.insert_many([
+        {"id": f"biodata-req-{m}", "mahasiswa_id": f"mhs-{m}", "data_lama": {"agama": "Islam"},
+         "data_baru": {"agama": "Kristen"}, "status": "pending", "created_at": CREATED_AT}
+        for m in range(N_REQUESTS)
+    ])
+
+
+# (role, path, budget query di luar auth, latency ceiling ms)
+# role: user-<role> kecuali "dosen"/"mahasiswa" yang memakai dosen-0 / mhs-0
+ENDPOINTS = [
+    ("mahasiswa", "/api/auth/me", 0, 50),
+    ("kaprodi", "/api/auth/my-access", 3, 50),
+    ("mahasiswa", "/api/auth/my-foto-profil-requests", 1, 50),
+    ("admin", "/api/bootstrap", 4, 100),
+    ("admin", "/api/dashboard/stats", 6, 150),
+    ("admin", "/api/users", 3, 150),
+    ("kaprodi", "/api/users", 4, 150),
+    ("admin", "/api/users/available-modules", 0, 50),
+    ("admin", "/api/master/tahun-akademik", 2, 50),
+    ("admin", "/api/master/tahun-akademik/active", 1, 50),
+    ("admin", "/api/master/fakultas", 2, 50),
+    ("admin", "/api/master/prodi", 3, 100),
+    ("admin", "/api/master/kurikulum", 3, 100),
+    ("admin", "/api/master/mata-kuliah", 2, 100),
+    ("admin", "/api/master/ruangan", 2, 50),
+    ("admin", "/api/master/mahasiswa/mhs-0", 2, 50),
+    ("admin", "/api/akademik/kelas", 4, 150),
+    ("kaprodi", "/api/akademik/kelas", 4, 150),
+    ("admin", "/api/akademik/krs", 5, 200),
+    ("admin", "/api/akademik/krs?status=diajukan", 5, 200),
+    ("mahasiswa", "/api/mahasiswa/profile", 4, 50),
+    ("dosen", "/api/dosen/presensi/kelas-0", 1, 50),
+    # Tanpa header auth; lookup token menggantikan query auth yang dikurangkan
+    ("mahasiswa", "/api/kalender/kalender-user-mhs-0.ics", 7, 100),
+    ("dosen", "/api/kalender/kalender-user-dosen-0.ics", 5, 100),
+    ("mahasiswa", "/api/kalender/token", 0, 50),
+    ("mahasiswa", "/api/auth/verify-reset-token/token-tidak-ada", 0, 50),
+    ("dosen", "/api/dosen/presensi/kelas-0/rekap", 4, 150),
+    ("admin", "/api/keuangan/kategori-ukt", 2, 50),
+    ("admin", "/api/keuangan/tagihan", 6, 200),
+    ("kaprodi", "/api/keuangan/tagihan", 6, 200),
+    ("admin", "/api/keuangan/pembayaran", 3, 150),
+    ("admin", "/api/keuangan/rekap", 6, 300),
+    ("admin", "/api/keuangan/trend", 3, 300),
+    ("mahasiswa", "/api/mahasiswa/keuangan/pembayaran", 3, 50),
+    ("mahasiswa", "/api/mahasiswa/biodata", 3, 50),
+    ("mahasiswa", "/api/mahasiswa/biodata/change-requests", 2, 50),
+    ("admin", "/api/biodata/change-requests/biodata-req-0", 3, 50),
+    ("admin", "/api/akademik/jadwal/check-conflict?hari=Senin&jam_mulai=07:00&jam_selesai=18:00"
+              "&tahun_akademik_id=ta-aktif&ruangan=R0&dosen_id=dosen-0", 2, 50),
+    ("mahasiswa", "/api/mahasiswa/kelas-tersedia", 8, 150),
+    ("admin", "/api/akademik/jadwal/ruangan-tersedia?hari=Senin&jam_mulai=07:00&jam_selesai=09:00"
+              "&tahun_akademik_id=ta-aktif&kuota=50", 2, 50),
+    ("admin", "/api/akademik/jadwal/audit?tahun_akademik_id=ta-aktif", 4, 100),
+    ("admin", "/api/akademik/jadwal", 4, 150),
+    ("admin", "/api/akademik/jadwal?tahun_akademik_id=ta-aktif&hari=Rabu", 4, 150),
+    ("mahasiswa", "/api/mahasiswa/jadwal", 6, 100),
+    ("dosen", "/api/dosen/kelas/kelas-0/slot-kosong?tanggal=2024-09-11", 8, 100),
+    ("admin", "/api/akademik/ujian?tahun_akademik_id=ta-aktif&jenis=UTS", 2, 50),
+    ("mahasiswa", "/api/mahasiswa/ujian?tahun_akademik_id=ta-aktif", 4, 50),
+    ("dosen", "/api/dosen/ujian?tahun_akademik_id=ta-aktif", 3, 50),
+    ("admin", "/api/akademik/jadwal/audit?tahun_akademik_id=ta-aktif&format=csv", 4, 100),
+]
+
+# Endpoint yang masih query per baris: budget = target setelah diperbaiki,
+# ditandai xfail strict sehingga perbaikan yang mencapai target (XPASS) memaksa
+# entri dipindah ke ENDPOINTS. Jumlah query saat ini di komentar.
+N_PLUS_ONE = pytest.mark.xfail(strict=True, raises=AssertionError, reason="N+1: query per baris, belum diperbaiki")
+KNOWN_N_PLUS_ONE = [
+    pytest.param("admin", "/api/auth/forgot-password-requests", 3, 100, marks=N_PLUS_ONE),  # saat ini 25
+    pytest.param("admin", "/api/auth/foto-profil-requests", 3, 100, marks=N_PLUS_ONE),  # saat ini 25
+    pytest.param("admin", "/api/master/mahasiswa", 3, 150, marks=N_PLUS_ONE),  # saat ini 81
+    pytest.param("admin", "/api/master/dosen", 2, 100, marks=N_PLUS_ONE),  # saat ini 9
+    pytest.param("mahasiswa", "/api/mahasiswa/krs", 5, 100, marks=N_PLUS_ONE),  # saat ini 21
+    pytest.param("dosen", "/api/dosen/kelas", 4, 100, marks=N_PLUS_ONE),  # saat ini 8
+    pytest.param("dosen", "/api/dosen/mahasiswa-bimbingan", 3, 100, marks=N_PLUS_ONE),  # saat ini 7
+    pytest.param("dosen", "/api/dosen/krs-bimbingan", 6, 150, marks=N_PLUS_ONE),  # saat ini 63
+    pytest.param("dosen", "/api/dosen/kelas/kelas-0/mahasiswa", 4, 100, marks=N_PLUS_ONE),  # saat ini 18
+    pytest.param("mahasiswa", "/api/mahasiswa/khs", 5, 100, marks=N_PLUS_ONE),  # saat ini 18
+    pytest.param("mahasiswa", "/api/mahasiswa/transkrip", 6, 100, marks=N_PLUS_ONE),  # saat ini 19
+    pytest.param("dosen", "/api/dosen/presensi/presensi-0/detail", 3, 100, marks=N_PLUS_ONE),  # saat ini 18
+    pytest.param("mahasiswa", "/api/mahasiswa/presensi", 5, 100, marks=N_PLUS_ONE),  # saat ini 14
+    pytest.param("mahasiswa", "/api/mahasiswa/presensi/rekap", 6, 100, marks=N_PLUS_ONE),  # saat ini 37
+    pytest.param("mahasiswa", "/api/mahasiswa/keuangan/tagihan", 5, 100, marks=N_PLUS_ONE),  # saat ini 9
+    pytest.param("admin", "/api/biodata/change-requests", 3, 100, marks=N_PLUS_ONE),  # saat ini 13
+    pytest.param("admin", "/api/biodata/list", 3, 150, marks=N_PLUS_ONE),  # saat ini 22
+    pytest.param("admin", "/api/biodata/mahasiswa-belum-isi", 3, 150, marks=N_PLUS_ONE),  # saat ini 22
+]
+
+# GET route tanpa budget, dengan alasannya; route lain harus ada di ENDPOINTS
+# atau KNOWN_N_PLUS_ONE (test_every_get_route_is_budgeted)
+UNBUDGETED_GET_ROUTES = {
+    "/api/": "tanpa query",
+    "/metrics": "tanpa query, dilindungi METRICS_TOKEN",
+    "/uploads/{file_path:path}": "file statis; diuji di test_upload_url.py",
+}
+
+# Write path yang menginvalidasi cache mahasiswa: (role, method, path, body, budget, ceiling ms)
+WRITE_ENDPOINTS = [
+    ("mahasiswa", "POST", "/api/mahasiswa/krs", {"kelas_id": "kelas-1"}, 11, 100),
+    ("admin", "PUT", "/api/akademik/krs/krs-3-5/approve", None, 4, 50),
+    ("dosen", "POST", "/api/dosen/nilai", {"mahasiswa_id": "mhs-0", "kelas_id": "kelas-0", "nilai_tugas": 90,
+                                           "nilai_uts": 80, "nilai_uas": 85}, 6, 50),
+    ("admin", "PUT", "/api/keuangan/pembayaran/bayar-2-pending/verify", {"status": "verified"}, 9, 100),
+    ("admin", "PUT", "/api/akademik/jadwal/kelas-23", {
+        "kode_kelas": "A23", "mata_kuliah_id": "mk-23", "dosen_id": "dosen-7", "tahun_akademik_id": "ta-aktif",
+        "kuota": 60, "hari": "Kamis", "jam_mulai": "15:00", "jam_selesai": "16:40", "ruangan": "R5"}, 8, 100),
+    ("admin", "POST", "/api/akademik/ujian/generate", {
+        "tahun_akademik_id": "ta-aktif", "jenis": "UTS", "tanggal": ["2024-10-21", "2024-10-22", "2024-10-23"]}, 9, 150),
+    ("admin", "POST", "/api/akademik/presensi/generate", {
+        "tahun_akademik_id": "ta-aktif", "libur": ["2024-10-21", "2024-10-22", "2024-10-23"],
+        "kelas_ids": ["kelas-0", "kelas-1", "kelas-2", "kelas-3"]}, 3, 150),
+]
+
+ROLE_USERS = {"dosen": "user-dosen-0", "mahasiswa": "user-mhs-0"}
+
+
+def auth_headers(role: str) -> dict:
+    user_id = ROLE_USERS.get(role, f"user-{role}")
+    return {"Authorization": f"Bearer {server.create_token(user_id, f'{role}@siakad.ac.id', role)}"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    mongo = MongoClient(TEST_MONGO_URL, serverSelectionTimeoutMS=1000)
+    try:
+        mongo.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"MongoDB lokal tidak tersedia di {TEST_MONGO_URL}")
+
+    seed_dataset(mongo[TEST_DB_NAME])
+    try:
+        with TestClient(server.app) as test_client:
+            yield test_client
+    finally:
+        mongo.drop_database(TEST_DB_NAME)
+        mongo.close()
+
+
+@pytest.fixture
+def accounts(monkeypatch):
+    """QueryAccount of every request handled during the test"""
+    recorded = []
+    report = server.QueryAccountingMiddleware.report
+
+    def recording_report(self, scope, account, elapsed_ms):
+        recorded.append(account)
+        report(self, scope, account, elapsed_ms)
+
+    monkeypatch.setattr(server.QueryAccountingMiddleware, "report", recording_report)
+    return recorded
+
+
+def measure(client, accounts, method, path, headers, json=None):
+    # Ukur jalur render penuh, bukan cache hit
+    server.student_cache.clear()
+    server.kalender_cache.clear()
+    start = time.perf_counter()
+    response = client.request(method, path, headers=headers, json=json)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return response, accounts[-1], elapsed_ms
+
+
+def assert_within_budget(response, account, elapsed_ms, budget, ceiling_ms):
+    assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text[:200]}"
+    queries = account.count - AUTH_QUERIES
+    print(f"{queries} query, {elapsed_ms:.1f} ms\n{account.breakdown()}")
+    assert queries <= budget, f"{queries} query > budget {budget}:\n{account.breakdown()}"
+    assert elapsed_ms <= ceiling_ms * LATENCY_SCALE, f"{elapsed_ms:.0f} ms > ceiling {ceiling_ms * LATENCY_SCALE:.0f} ms"
+
+
+class TestQueryBudget:
+    """GET endpoints stay within a fixed number of queries whatever the row count"""
+
+    @pytest.mark.parametrize(
+        "role,path,budget,ceiling_ms", ENDPOINTS + KNOWN_N_PLUS_ONE,
+        ids=[f"{e[0]} {e[1]}" for e in ENDPOINTS] + [f"{e.values[0]} {e.values[1]}" for e in KNOWN_N_PLUS_ONE]
+    )
+    def test_get_within_budget(self, client, accounts, role, path, budget, ceiling_ms):
+        headers = auth_headers(role)
+        client.get(path, headers=headers)  # warm-up: koneksi pool, cache versi koleksi
+        response, account, elapsed_ms = measure(client, accounts, "GET", path, headers)
+        assert_within_budget(response, account, elapsed_ms, budget, ceiling_ms)
+
+    @pytest.mark.parametrize(
+        "role,method,path,body,budget,ceiling_ms", WRITE_ENDPOINTS, ids=[f"{e[0]} {e[1]} {e[2]}" for e in WRITE_ENDPOINTS]
+    )
+    def test_write_within_budget(self, client, accounts, role, method, path, body, budget, ceiling_ms):
+        response, account, elapsed_ms = measure(client, accounts, method, path, auth_headers(role), json=body)
+        assert_within_budget(response, account, elapsed_ms, budget, ceiling_ms)
+
+    def test_no_repeated_query_shape(self, client, accounts):
+        """The fixed endpoints must not repeat one query shape per row"""
+        for role, path, _, _ in ENDPOINTS:
+            client.get(path, headers=auth_headers(role))
+            repeated = accounts[-1].repeated_shapes()
+            assert not repeated, f"{path}: pola N+1 {repeated}"
+
+    def test_every_get_route_is_budgeted(self):
+        """A new GET route fails here until it gets a budget (or a reason in UNBUDGETED_GET_ROUTES)"""
+        def route_of(path):
+            scope = {"type": "http", "method": "GET", "path": path.partition("?")[0]}
+            return next(r.path for r in server.app.routes if r.matches(scope)[0] == Match.FULL)
+
+        budgeted = {route_of(e[1]) for e in ENDPOINTS} | {route_of(e.values[1]) for e in KNOWN_N_PLUS_ONE}
+        routes = {r.path for r in server.app.routes if isinstance(r, APIRoute) and "GET" in r.methods}
+        missing = routes - budgeted - UNBUDGETED_GET_ROUTES.keys()
+        assert not missing, f"GET route tanpa query budget: {sorted(missing)}"
@@ -311,6 +311,36 @@ class TestProdiDataAccess:
             assert p['fakultas_id'] == fakultas_id
         
         print(f"✓ Dekan sees {len(prodi)} prodi from their fakultas")
+    
+    def test_prodi_etag_not_modified(self, admin_token):
+        """Repeat fetch with If-None-Match returns 304"""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        response = requests.get(f"{BASE_URL}/api/master/prodi", headers=headers)
+        assert response.status_code == 200
+        etag = response.headers.get('ETag')
+        assert etag, "Expected ETag header"
+        
+        response = requests.get(
+            f"{BASE_URL}/api/master/prodi",
+            headers={**headers, 'If-None-Match': etag}
+        )
+        assert response.status_code == 304, f"Expected 304, got {response.status_code}"
+        print(f"✓ Prodi list revalidated with ETag {etag}")
+    
+    def test_prodi_etag_differs_per_scope(self, admin_token, kaprodi_token):
+        """Kaprodi must not get 304 for the admin's ETag"""
+        response = requests.get(
+            f"{BASE_URL}/api/master/prodi",
+            headers={'Authorization': f'Bearer {admin_token}'}
+        )
+        etag = response.headers.get('ETag')
+        
+        response = requests.get(
+            f"{BASE_URL}/api/master/prodi",
+            headers={'Authorization': f'Bearer {kaprodi_token}', 'If-None-Match': etag}
+        )
+        assert response.status_code == 200
+        print("✓ ETag includes the user's access scope")
 
 
 class TestManagementAccessControl:
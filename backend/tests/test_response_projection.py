@@ -0,0 +1,45 @@
+"""
+Test Suite: Proyeksi Response Terpercaya (in-process, tanpa database)
+
+project_rows memotong dokumen MongoDB ke field response model, termasuk model
+bersarang (sesi kelas), mengisi default field opsional dan menolak baris yang
+kehilangan field wajib.
+"""
+import pytest
+
+import server
+
+
+def kelas_row(**overrides):
+    row = {
+        "id": "kelas-1", "kode_kelas": "A", "mata_kuliah_id": "mk-1", "dosen_id": "dosen-1",
+        "tahun_akademik_id": "ta-1", "kuota": 40, "hari": "Senin", "jam_mulai": "08:00", "jam_selesai": "09:40",
+        "menit_mulai": 480, "menit_selesai": 580, "ruangan": "R1", "_internal": "x",
+        "sesi": [{"hari": "Senin", "jam_mulai": "08:00", "jam_selesai": "09:40", "ruangan": "R1",
+                  "menit_mulai": 480, "menit_selesai": 580}],
+    }
+    return {**row, **overrides}
+
+
+def test_nested_models_are_projected():
+    [row] = server.project_rows(server.KelasJadwalResponse, [kelas_row()])
+    assert "_internal" not in row
+    assert row["sesi"] == [{"hari": "Senin", "jam_mulai": "08:00", "jam_selesai": "09:40", "ruangan": "R1"}]
+
+
+def test_optional_fields_get_defaults():
+    row = kelas_row()
+    del row["ruangan"]
+    row["sesi"][0].pop("ruangan")
+    [projected] = server.project_rows(server.KelasJadwalResponse, [row])
+    assert projected["ruangan"] is None
+    assert projected["sesi"][0]["ruangan"] is None
+
+
+def test_missing_required_field_raises():
+    row = kelas_row()
+    del row["kode_kelas"]
+    with pytest.raises(server.ResponseProjectionError, match="kode_kelas"):
+        server.project_rows(server.KelasJadwalResponse, [row])
+    with pytest.raises(server.ResponseProjectionError, match="jam_mulai"):
+        server.project_rows(server.KelasJadwalResponse, [kelas_row(sesi=[{"hari": "Senin", "jam_selesai": "09:40"}])])
@@ -0,0 +1,62 @@
+"""
+Test Suite: Cache Response Mahasiswa (in-process, MongoDB lokal)
+
+Entry cache dikunci dengan versi yang dibaca dari database setiap request
+(users.student_cache_version dan db.collection_versions), jadi write yang
+ditangani worker lain langsung terlihat tanpa menunggu STUDENT_CACHE_TTL.
+
+Butuh MongoDB lokal (lihat fixture live_db di conftest.py).
+"""
+import server
+
+
+def auth(user_id, email, role):
+    return {"Authorization": f"Bearer {server.create_token(user_id, email, role)}"}
+
+
+MHS = auth("user-mhs", "ani@siakad.ac.id", "mahasiswa")
+ADMIN = auth("user-admin", "akademik@siakad.ac.id", "admin")
+
+
+def seed(db):
+    db.users.insert_many([
+        {"id": "user-admin", "email": "akademik@siakad.ac.id", "role": "admin", "is_active": True},
+        {"id": "user-mhs", "email": "ani@siakad.ac.id", "role": "mahasiswa", "is_active": True},
+    ])
+    db.mahasiswa.insert_one({"id": "mhs-0", "user_id": "user-mhs", "nim": "2024001", "nama": "Ani"})
+    db.mata_kuliah.insert_one({"id": "mk-0", "kode": "IF101", "nama": "Basis Data", "sks_teori": 3})
+    db.kelas.insert_one({"id": "kelas-0", "kode_kelas": "A", "mata_kuliah_id": "mk-0", "dosen_id": "dosen-0",
+                         "tahun_akademik_id": "ta-0"})
+    db.krs.insert_one({"id": "krs-0", "mahasiswa_id": "mhs-0", "kelas_id": "kelas-0", "tahun_akademik_id": "ta-0",
+                       "status": "diajukan"})
+
+
+def my_krs(client):
+    response = client.get("/api/mahasiswa/krs", headers=MHS)
+    assert response.status_code == 200
+    return [(krs["status"], krs["mata_kuliah_nama"]) for krs in response.json()]
+
+
+class TestStudentCache:
+    def test_student_write_invalidates_by_version(self, live_db):
+        client, db = live_db
+        seed(db)
+        assert my_krs(client) == [("diajukan", "Basis Data")]
+        assert client.put("/api/akademik/krs/krs-0/approve", headers=ADMIN).status_code == 200
+        assert db.users.find_one({"id": "user-mhs"})["student_cache_version"] == 1
+        assert my_krs(client) == [("disetujui", "Basis Data")]
+
+    def test_write_in_other_worker_is_seen(self, live_db):
+        client, db = live_db
+        seed(db)
+        assert my_krs(client) == [("diajukan", "Basis Data")]
+        # Tanpa bump versi, response dari cache worker ini tetap dipakai
+        db.krs.update_one({"id": "krs-0"}, {"$set": {"status": "disetujui"}})
+        assert my_krs(client) == [("diajukan", "Basis Data")]
+        # Worker lain: invalidate_student_cache menaikkan versi milik mahasiswa
+        db.users.update_one({"id": "user-mhs"}, {"$inc": {"student_cache_version": 1}})
+        assert my_krs(client) == [("disetujui", "Basis Data")]
+        # Worker lain: ganti nama mata kuliah (versi koleksi bersama)
+        db.mata_kuliah.update_one({"id": "mk-0"}, {"$set": {"nama": "Sistem Basis Data"}})
+        db.collection_versions.update_one({"collection": "mata_kuliah"}, {"$inc": {"version": 1}}, upsert=True)
+        assert my_krs(client) == [("disetujui", "Sistem Basis Data")]
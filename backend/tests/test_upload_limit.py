@@ -0,0 +1,58 @@
+"""
+Test Suite: Batas Ukuran Upload (in-process, tanpa database)
+
+Upload yang melebihi UPLOAD_BODY_LIMITS ditolak 413 sebelum body-nya di-spool:
+langsung dari Content-Length, atau saat byte yang diterima melewati batas
+untuk request chunked.
+"""
+import asyncio
+
+import httpx
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+
+import server
+
+PATH = "/api/auth/upload-foto-profil"
+
+
+async def read_body(scope, receive, send):
+    body = await Request(scope, receive).body()
+    await PlainTextResponse(str(len(body)))(scope, receive, send)
+
+
+def post(app, content, headers=None):
+    async def call():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(PATH, content=content, headers=headers)
+    return asyncio.run(call())
+
+
+def chunks(n, size=256, head=b"", tail=b""):
+    async def gen():
+        yield head
+        for _ in range(n):
+            yield b"x" * size
+        yield tail
+    return gen()
+
+
+def test_rejects_by_content_length_before_auth(monkeypatch):
+    monkeypatch.setitem(server.UPLOAD_BODY_LIMITS, PATH, 1024)
+    response = post(server.app, b"x" * 2048)
+    assert response.status_code == 413
+
+
+def test_rejects_chunked_body_past_limit(monkeypatch):
+    monkeypatch.setitem(server.UPLOAD_BODY_LIMITS, PATH, 1024)
+    head = b'--b\r\nContent-Disposition: form-data; name="foto"; filename="a.png"\r\nContent-Type: image/png\r\n\r\n'
+    response = post(server.app, chunks(8, head=head, tail=b"\r\n--b--\r\n"),
+                    {"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+
+
+def test_passes_body_within_limit(monkeypatch):
+    monkeypatch.setitem(server.UPLOAD_BODY_LIMITS, PATH, 1024)
+    app = server.UploadSizeLimitMiddleware(read_body)
+    assert post(app, chunks(4)).text == "1024"
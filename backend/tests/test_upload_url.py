@@ -0,0 +1,52 @@
+"""
+Test Suite: URL Upload Bertanda Tangan (in-process, tanpa database)
+
+Browser memuat file upload lewat URL ?exp=&sig= yang diterbitkan API, bukan
+dengan token sesi di query string. Tanda tangan terikat ke path file dan
+kedaluwarsa; URL-nya sama untuk setiap response dalam satu jendela.
+"""
+import asyncio
+
+import httpx
+
+import server
+
+URL = "/uploads/foto_profil/ab/" + "ab" * 32 + ".jpg"
+
+
+def get(url, headers=None):
+    async def call():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(url, headers=headers)
+    return asyncio.run(call())
+
+
+def stored_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "UPLOAD_ROOT", tmp_path)
+    path = tmp_path / URL.removeprefix("/uploads/")
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"\xff\xd8\xff foto")
+
+
+def test_signed_url_serves_without_session_token(tmp_path, monkeypatch):
+    stored_file(tmp_path, monkeypatch)
+    response = get(server.sign_upload_url(URL))
+    assert response.status_code == 200
+    assert response.content == b"\xff\xd8\xff foto"
+    assert get(URL).status_code == 401
+
+
+def test_url_is_stable_within_window():
+    assert server.sign_upload_url(URL) == server.sign_upload_url(URL)
+    assert "token" not in server.sign_upload_url(URL)
+
+
+def test_signature_is_bound_to_path_and_expiry(tmp_path, monkeypatch):
+    stored_file(tmp_path, monkeypatch)
+    query = server.sign_upload_url("/uploads/foto_profil/ab/lain.jpg").partition("?")[2]
+    assert get(f"{URL}?{query}").status_code == 401
+
+    expires = 1_000_000_000
+    expired = f"{URL}?exp={expires}&sig={server.upload_url_signature(URL, expires)}"
+    assert get(expired).status_code == 401
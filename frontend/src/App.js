@@ -11,23 +11,27 @@ import Fakultas from './pages/master/Fakultas';
 import Prodi from './pages/master/Prodi';
 import Kurikulum from './pages/master/Kurikulum';
 import MataKuliah from './pages/master/MataKuliah';
+import Ruangan from './pages/master/Ruangan';
 import Mahasiswa from './pages/master/Mahasiswa';
 import Dosen from './pages/master/Dosen';
 import Kelas from './pages/akademik/Kelas';
 import ValidasiKRS from './pages/akademik/ValidasiKRS';
 import JadwalKuliah from './pages/akademik/JadwalKuliah';
+import JadwalUjian from './pages/akademik/JadwalUjian';
 import UserManagement from './pages/UserManagement';
 import VerifikasiAkun from './pages/admin/VerifikasiAkun';
 import KRSPage from './pages/mahasiswa/KRSPage';
 import KHSPage from './pages/mahasiswa/KHSPage';
 import TranskripPage from './pages/mahasiswa/TranskripPage';
 import JadwalPage from './pages/mahasiswa/JadwalPage';
+import UjianPage from './pages/mahasiswa/UjianPage';
 import PresensiPage from './pages/mahasiswa/PresensiPage';
 import ValidasiKRSDosenPA from './pages/dosen/ValidasiKRSDosenPA';
 import KelasSaya from './pages/dosen/KelasSaya';
 import InputNilai from './pages/dosen/InputNilai';
 import DaftarMahasiswa from './pages/dosen/DaftarMahasiswa';
 import Presensi from './pages/dosen/Presensi';
+import UjianDosen from './pages/dosen/UjianDosen';
 import ManajemenTagihan from './pages/keuangan/ManajemenTagihan';
 import VerifikasiPembayaran from './pages/keuangan/VerifikasiPembayaran';
 import KeuanganPage from './pages/mahasiswa/KeuanganPage';
@@ -55,6 +59,7 @@ function App() {
             <Route path="/master/prodi" element={<Prodi />} />
             <Route path="/master/kurikulum" element={<Kurikulum />} />
             <Route path="/master/mata-kuliah" element={<MataKuliah />} />
+            <Route path="/master/ruangan" element={<Ruangan />} />
             <Route path="/master/mahasiswa" element={<Mahasiswa />} />
             <Route path="/master/dosen" element={<Dosen />} />
             
@@ -62,6 +67,7 @@ function App() {
             <Route path="/akademik/kelas" element={<Kelas />} />
             <Route path="/akademik/krs" element={<ValidasiKRS />} />
             <Route path="/akademik/jadwal" element={<JadwalKuliah />} />
+            <Route path="/akademik/ujian" element={<JadwalUjian />} />
             
             {/* User Management */}
             <Route path="/users" element={<UserManagement />} />
@@ -79,6 +85,7 @@ function App() {
             <Route path="/mahasiswa/khs" element={<KHSPage />} />
             <Route path="/mahasiswa/transkrip" element={<TranskripPage />} />
             <Route path="/mahasiswa/jadwal" element={<JadwalPage />} />
+            <Route path="/mahasiswa/ujian" element={<UjianPage />} />
             <Route path="/mahasiswa/presensi" element={<PresensiPage />} />
             <Route path="/mahasiswa/keuangan" element={<KeuanganPage />} />
             <Route path="/mahasiswa/biodata" element={<BiodataPage />} />
@@ -89,6 +96,7 @@ function App() {
             <Route path="/dosen/nilai" element={<InputNilai />} />
             <Route path="/dosen/mahasiswa" element={<DaftarMahasiswa />} />
             <Route path="/dosen/presensi" element={<Presensi />} />
+            <Route path="/dosen/ujian" element={<UjianDosen />} />
           </Route>
           
           {/* Catch all */}
@@ -0,0 +1,101 @@
+import React, { useState } from 'react';
+import { kalenderAPI, getKalenderFeedUrl } from '../../lib/api';
+import { Button } from '../ui/button';
+import { Input } from '../ui/input';
+import {
+  Dialog,
+  DialogContent,
+  DialogHeader,
+  DialogTitle,
+  DialogFooter,
+} from '../ui/dialog';
+import { Loader2, CalendarPlus, Copy, Check, RefreshCw } from 'lucide-react';
+import { toast } from 'sonner';
+
+// Tombol + dialog URL langganan kalender (.ics) untuk mahasiswa dan dosen
+const KalenderFeedButton = () => {
+  const [open, setOpen] = useState(false);
+  const [feedUrl, setFeedUrl] = useState('');
+  const [loading, setLoading] = useState(false);
+  const [copied, setCopied] = useState(false);
+
+  const openDialog = async () => {
+    setOpen(true);
+    setLoading(true);
+    try {
+      const response = await kalenderAPI.getToken();
+      setFeedUrl(getKalenderFeedUrl(response.data.url));
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Gagal memuat URL kalender');
+      setOpen(false);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const handleReset = async () => {
+    if (!window.confirm('URL lama akan berhenti berfungsi. Buat URL baru?')) return;
+    setLoading(true);
+    try {
+      const response = await kalenderAPI.resetToken();
+      setFeedUrl(getKalenderFeedUrl(response.data.url));
+      toast.success('URL kalender baru dibuat');
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Gagal membuat URL baru');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const copyToClipboard = () => {
+    navigator.clipboard.writeText(feedUrl);
+    setCopied(true);
+    toast.success('URL kalender berhasil disalin');
+    setTimeout(() => setCopied(false), 2000);
+  };
+
+  return (
+    <>
+      <Button variant="outline" onClick={openDialog} data-testid="kalender-feed-btn">
+        <CalendarPlus className="w-4 h-4 mr-2" />
+        Langganan Kalender
+      </Button>
+
+      <Dialog open={open} onOpenChange={setOpen}>
+        <DialogContent className="max-w-lg">
+          <DialogHeader>
+            <DialogTitle>Langganan Kalender</DialogTitle>
+          </DialogHeader>
+          <div className="space-y-3">
+            <p className="text-sm text-slate-500">
+              Tambahkan URL ini di Google Calendar, Outlook atau aplikasi kalender lain ("Tambah dari URL").
+              Jadwal ikut diperbarui saat KRS atau jadwal kuliah berubah.
+            </p>
+            {loading ? (
+              <div className="flex items-center justify-center h-10">
+                <Loader2 className="w-5 h-5 animate-spin text-[#1e1b4b]" />
+              </div>
+            ) : (
+              <div className="flex gap-2">
+                <Input value={feedUrl} readOnly className="font-mono text-xs" data-testid="kalender-feed-url" />
+                <Button variant="outline" size="icon" onClick={copyToClipboard} disabled={!feedUrl}>
+                  {copied ? <Check className="w-4 h-4" /> : <Copy className="w-4 h-4" />}
+                </Button>
+              </div>
+            )}
+            <p className="text-xs text-slate-400">Jangan bagikan URL ini: siapa pun yang memilikinya dapat melihat jadwal Anda.</p>
+          </div>
+          <DialogFooter>
+            <Button variant="outline" onClick={handleReset} disabled={loading}>
+              <RefreshCw className="w-4 h-4 mr-2" />
+              Buat URL Baru
+            </Button>
+            <Button onClick={() => setOpen(false)} className="bg-[#1e1b4b] hover:bg-[#312e81]">Tutup</Button>
+          </DialogFooter>
+        </DialogContent>
+      </Dialog>
+    </>
+  );
+};
+
+export default KalenderFeedButton;
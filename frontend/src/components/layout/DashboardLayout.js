@@ -13,16 +13,20 @@ const pageTitles = {
   '/master/prodi': 'Program Studi',
   '/master/kurikulum': 'Kurikulum',
   '/master/mata-kuliah': 'Mata Kuliah',
+  '/master/ruangan': 'Ruangan',
   '/master/mahasiswa': 'Mahasiswa',
   '/master/dosen': 'Dosen',
   '/akademik/kelas': 'Penawaran Kelas',
   '/akademik/krs': 'Validasi KRS',
+  '/akademik/ujian': 'Jadwal Ujian',
   '/users': 'Manajemen User',
   '/mahasiswa/krs': 'Kartu Rencana Studi',
   '/mahasiswa/khs': 'Kartu Hasil Studi',
   '/mahasiswa/transkrip': 'Transkrip Nilai',
+  '/mahasiswa/ujian': 'Jadwal Ujian',
   '/dosen/kelas': 'Kelas Saya',
   '/dosen/nilai': 'Input Nilai',
+  '/dosen/ujian': 'Jadwal Ujian',
   '/dosen/validasi-krs': 'Validasi KRS Mahasiswa PA',
 };
 
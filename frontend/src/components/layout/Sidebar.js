@@ -1,6 +1,7 @@
 import React from 'react';
 import { Link, useLocation } from 'react-router-dom';
 import { useAuth } from '../../context/AuthContext';
+import { getUploadUrl } from '../../lib/api';
 import {
   LayoutDashboard,
   Users,
@@ -20,6 +21,8 @@ import {
   CreditCard,
   UserCheck,
   KeyRound,
+  DoorOpen,
+  CalendarCheck,
 } from 'lucide-react';
 import {
   Collapsible,
@@ -68,6 +71,7 @@ const Sidebar = () => {
         { path: '/master/prodi', label: 'Program Studi', icon: School },
         { path: '/master/kurikulum', label: 'Kurikulum', icon: BookMarked },
         { path: '/master/mata-kuliah', label: 'Mata Kuliah', icon: BookOpen },
+        { path: '/master/ruangan', label: 'Ruangan', icon: DoorOpen },
         { path: '/master/mahasiswa', label: 'Mahasiswa', icon: GraduationCap },
         { path: '/master/dosen', label: 'Dosen', icon: UserCircle },
       ],
@@ -79,6 +83,7 @@ const Sidebar = () => {
       children: [
         { path: '/akademik/kelas', label: 'Penawaran Kelas', icon: BookOpen },
         { path: '/akademik/jadwal', label: 'Jadwal Kuliah', icon: Calendar },
+        { path: '/akademik/ujian', label: 'Jadwal Ujian', icon: CalendarCheck },
         { path: '/akademik/krs', label: 'Validasi KRS', icon: ClipboardList },
       ],
     },
@@ -110,6 +115,7 @@ const Sidebar = () => {
   const mahasiswaMenus = [
     { path: '/mahasiswa/krs', label: 'KRS', icon: ClipboardList },
     { path: '/mahasiswa/jadwal', label: 'Jadwal Kuliah', icon: Calendar },
+    { path: '/mahasiswa/ujian', label: 'Jadwal Ujian', icon: CalendarCheck },
     { path: '/mahasiswa/presensi', label: 'Presensi', icon: ClipboardList },
     { path: '/mahasiswa/khs', label: 'KHS', icon: FileText },
     { path: '/mahasiswa/transkrip', label: 'Transkrip', icon: FileText },
@@ -121,6 +127,7 @@ const Sidebar = () => {
     { path: '/dosen/kelas', label: 'Kelas Saya', icon: BookOpen },
     { path: '/dosen/mahasiswa', label: 'Daftar Mahasiswa', icon: Users },
     { path: '/dosen/presensi', label: 'Presensi', icon: ClipboardList },
+    { path: '/dosen/ujian', label: 'Jadwal Ujian', icon: CalendarCheck },
     { path: '/dosen/nilai', label: 'Input Nilai', icon: ClipboardList },
     { path: '/dosen/validasi-krs-pa', label: 'Validasi KRS PA', icon: ClipboardList },
   ];
@@ -297,6 +304,10 @@ const Sidebar = () => {
                     <Calendar className="w-4 h-4" />
                     <span>Jadwal Kuliah</span>
                   </Link>
+                  <Link to="/akademik/ujian" className={`sidebar-link text-sm ${isActive('/akademik/ujian') ? 'active' : ''}`}>
+                    <CalendarCheck className="w-4 h-4" />
+                    <span>Jadwal Ujian</span>
+                  </Link>
                   <Link to="/akademik/krs" className={`sidebar-link text-sm ${isActive('/akademik/krs') ? 'active' : ''}`}>
                     <ClipboardList className="w-4 h-4" />
                     <span>Validasi KRS</span>
@@ -443,7 +454,7 @@ const Sidebar = () => {
           <div className="w-9 h-9 bg-indigo-700 rounded-full flex items-center justify-center overflow-hidden">
             {user?.foto_profil ? (
               <img 
-                src={`${process.env.REACT_APP_BACKEND_URL}${user.foto_profil}`} 
+                src={getUploadUrl(user.foto_profil)} 
                 alt="Profile"
                 className="w-full h-full object-cover"
               />
@@ -1,5 +1,5 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
-import { authAPI } from '../lib/api';
+import { authAPI, bootstrapAPI } from '../lib/api';
 
 const AuthContext = createContext(null);
 
@@ -7,6 +7,7 @@ export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
   const [isAuthenticated, setIsAuthenticated] = useState(false);
+  const [bootstrap, setBootstrap] = useState(null);
 
   useEffect(() => {
     checkAuth();
@@ -16,13 +17,16 @@ export const AuthProvider = ({ children }) => {
     const token = localStorage.getItem('token');
     if (token) {
       try {
-        const response = await authAPI.me();
-        setUser(response.data);
+        const response = await bootstrapAPI.get();
+        setUser(response.data.user);
+        setBootstrap(response.data);
         setIsAuthenticated(true);
       } catch (error) {
         localStorage.removeItem('token');
         localStorage.removeItem('user');
+        bootstrapAPI.clear();
         setUser(null);
+        setBootstrap(null);
         setIsAuthenticated(false);
       }
     }
@@ -39,13 +43,19 @@ export const AuthProvider = ({ children }) => {
     setUser(userData);
     setIsAuthenticated(true);
     
+    bootstrapAPI.get()
+      .then((res) => setBootstrap(res.data))
+      .catch(() => setBootstrap(null));
+    
     return userData;
   };
 
   const logout = () => {
     localStorage.removeItem('token');
     localStorage.removeItem('user');
+    bootstrapAPI.clear();
     setUser(null);
+    setBootstrap(null);
     setIsAuthenticated(false);
   };
 
@@ -53,6 +63,7 @@ export const AuthProvider = ({ children }) => {
     user,
     loading,
     isAuthenticated,
+    bootstrap,
     login,
     logout,
     checkAuth,
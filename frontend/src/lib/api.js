@@ -58,6 +58,26 @@ export const authAPI = {
   getMyFotoProfilRequests: () => api.get('/auth/my-foto-profil-requests'),
 };
 
+// Bootstrap: user, akses, TA aktif dan master data dalam satu request.
+// Hasilnya disimpan per sesi; panggil clear() setelah master data diubah.
+let bootstrapData = null;
+
+export const bootstrapAPI = {
+  get: async () => {
+    const response = await api.get('/bootstrap');
+    bootstrapData = response.data;
+    return response;
+  },
+  // Bentuk response sama dengan tahunAkademikAPI.getAll()
+  getTahunAkademik: async () => {
+    if (!bootstrapData) await bootstrapAPI.get();
+    return { data: bootstrapData.master.tahun_akademik };
+  },
+  clear: () => {
+    bootstrapData = null;
+  },
+};
+
 // Dashboard
 export const dashboardAPI = {
   getStats: () => api.get('/dashboard/stats'),
@@ -104,6 +124,14 @@ export const mataKuliahAPI = {
   delete: (id) => api.delete(`/master/mata-kuliah/${id}`),
 };
 
+// Master Data - Ruangan
+export const ruanganAPI = {
+  getAll: (gedung = null) => api.get('/master/ruangan', { params: { gedung } }),
+  create: (data) => api.post('/master/ruangan', data),
+  update: (id, data) => api.put(`/master/ruangan/${id}`, data),
+  delete: (id) => api.delete(`/master/ruangan/${id}`),
+};
+
 // Master Data - Mahasiswa
 export const mahasiswaAPI = {
   getAll: (prodiId = null, status = null) => 
@@ -158,6 +186,7 @@ export const dosenPortalAPI = {
   getMyKelas: (tahunAkademikId = null) =>
     api.get('/dosen/kelas', { params: { tahun_akademik_id: tahunAkademikId } }),
   getKelasMahasiswa: (kelasId) => api.get(`/dosen/kelas/${kelasId}/mahasiswa`),
+  getSlotKosong: (kelasId, params) => api.get(`/dosen/kelas/${kelasId}/slot-kosong`, { params }),
   inputNilai: (data) => api.post('/dosen/nilai', data),
   // Dosen PA
   getMahasiswaBimbingan: () => api.get('/dosen/mahasiswa-bimbingan'),
@@ -169,6 +198,9 @@ export const dosenPortalAPI = {
   getPresensiDetail: (presensiId) => api.get(`/dosen/presensi/${presensiId}/detail`),
   savePresensiDetail: (presensiId, details) => api.post(`/dosen/presensi/${presensiId}/detail`, details),
   getRekapPresensi: (kelasId) => api.get(`/dosen/presensi/${kelasId}/rekap`),
+  // Jadwal ujian mata kuliah yang diampu
+  getUjian: (tahunAkademikId = null, jenis = 'UTS') =>
+    api.get('/dosen/ujian', { params: { tahun_akademik_id: tahunAkademikId, jenis } }),
 };
 
 // Alias for dosenPortalAPI
@@ -181,8 +213,26 @@ export const jadwalAPI = {
   create: (data) => api.post('/akademik/jadwal', data),
   update: (id, data) => api.put(`/akademik/jadwal/${id}`, data),
   checkConflict: (params) => api.get('/akademik/jadwal/check-conflict', { params }),
+  getRuanganTersedia: (params) => api.get('/akademik/jadwal/ruangan-tersedia', { params }),
+  generatePresensi: (data) => api.post('/akademik/presensi/generate', data),
 };
 
+// Jadwal Ujian (UTS/UAS)
+export const ujianAPI = {
+  getAll: (tahunAkademikId, jenis) =>
+    api.get('/akademik/ujian', { params: { tahun_akademik_id: tahunAkademikId, jenis } }),
+  generate: (data) => api.post('/akademik/ujian/generate', data),
+};
+
+// Feed kalender (.ics) mahasiswa/dosen
+export const kalenderAPI = {
+  getToken: () => api.get('/kalender/token'),
+  resetToken: () => api.post('/kalender/token'),
+};
+
+// URL feed lengkap untuk aplikasi kalender (Google Calendar, Outlook, dsb.)
+export const getKalenderFeedUrl = (path) => `${BACKEND_URL}${path}`;
+
 // Mahasiswa Jadwal & Presensi
 export const mahasiswaJadwalAPI = {
   getMyJadwal: (tahunAkademikId = null) =>
@@ -191,6 +241,8 @@ export const mahasiswaJadwalAPI = {
     api.get('/mahasiswa/presensi', { params: { kelas_id: kelasId } }),
   getMyPresensiRekap: (tahunAkademikId = null) =>
     api.get('/mahasiswa/presensi/rekap', { params: { tahun_akademik_id: tahunAkademikId } }),
+  getMyUjian: (tahunAkademikId = null, jenis = 'UTS') =>
+    api.get('/mahasiswa/ujian', { params: { tahun_akademik_id: tahunAkademikId, jenis } }),
 };
 
 // Password Reset
@@ -229,12 +281,16 @@ export const keuanganAPI = {
   createTagihanBatch: (data) => api.post('/keuangan/tagihan/batch', data),
   deleteTagihan: (id) => api.delete(`/keuangan/tagihan/${id}`),
   // Pembayaran
-  getPembayaran: (tahunAkademikId = null, status = null) =>
-    api.get('/keuangan/pembayaran', { params: { tahun_akademik_id: tahunAkademikId, status } }),
+  // Halaman berikutnya: kirim nilai header X-Next-Cursor sebagai cursor
+  getPembayaran: (tahunAkademikId = null, status = null, cursor = null) =>
+    api.get('/keuangan/pembayaran', { params: { tahun_akademik_id: tahunAkademikId, status, cursor } }),
   verifyPembayaran: (id, data) => api.put(`/keuangan/pembayaran/${id}/verify`, data),
   // Rekap
-  getRekap: (tahunAkademikId = null) =>
-    api.get('/keuangan/rekap', { params: { tahun_akademik_id: tahunAkademikId } }),
+  getRekap: (tahunAkademikId = null, groupBy = null) =>
+    api.get('/keuangan/rekap', { params: { tahun_akademik_id: tahunAkademikId, group_by: groupBy } }),
+  // Trend (snapshot harian)
+  getTrend: (params = {}) => api.get('/keuangan/trend', { params }),
+  refreshSnapshot: (rebuild = false) => api.post('/keuangan/snapshot/refresh', null, { params: { rebuild } }),
 };
 
 // Mahasiswa Keuangan
@@ -268,4 +324,11 @@ export const biodataAdminAPI = {
   getMahasiswaBelumIsi: () => api.get('/biodata/mahasiswa-belum-isi'),
 };
 
+// URL file upload; path dari API sudah bertanda tangan (?exp=&sig=), jadi
+// <img>/<a> bisa memuatnya tanpa header Authorization
+export const getUploadUrl = (path) => {
+  if (!path) return null;
+  return `${BACKEND_URL}${path}`;
+};
+
 export default api;
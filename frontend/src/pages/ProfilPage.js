@@ -7,7 +7,7 @@ import { Badge } from '../components/ui/badge';
 import { Alert, AlertDescription } from '../components/ui/alert';
 import { toast } from 'sonner';
 import { useAuth } from '../context/AuthContext';
-import { authAPI } from '../lib/api';
+import { authAPI, getUploadUrl } from '../lib/api';
 import { 
   User, 
   Camera, 
@@ -21,8 +21,6 @@ import {
   Shield
 } from 'lucide-react';
 
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-
 const ProfilPage = () => {
   const { user, checkAuth } = useAuth();
   const fileInputRef = useRef(null);
@@ -108,11 +106,6 @@ const ProfilPage = () => {
     });
   };
 
-  const getFotoUrl = (path) => {
-    if (!path) return null;
-    return `${BACKEND_URL}${path}`;
-  };
-
   const getRoleBadge = (role) => {
     const styles = {
       admin: { bg: 'bg-violet-100', text: 'text-violet-700', label: 'Administrator' },
@@ -140,7 +133,7 @@ const ProfilPage = () => {
               <div className="w-full h-full rounded-full bg-gray-100 overflow-hidden border-4 border-white shadow-lg">
                 {user?.foto_profil ? (
                   <img 
-                    src={getFotoUrl(user.foto_profil)} 
+                    src={getUploadUrl(user.foto_profil)} 
                     alt="Profile"
                     className="w-full h-full object-cover"
                   />
@@ -277,7 +270,7 @@ const ProfilPage = () => {
                     <div key={req.id} className="flex items-center justify-between p-3 border rounded-lg">
                       <div className="flex items-center gap-3">
                         <img 
-                          src={getFotoUrl(req.foto_baru)} 
+                          src={getUploadUrl(req.foto_baru)} 
                           alt="Foto"
                           className="w-10 h-10 rounded-full object-cover"
                         />
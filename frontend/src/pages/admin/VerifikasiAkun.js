@@ -34,7 +34,7 @@ import {
 } from '../../components/ui/table';
 import { Badge } from '../../components/ui/badge';
 import { toast } from 'sonner';
-import { authAPI, prodiAPI } from '../../lib/api';
+import { authAPI, prodiAPI, getUploadUrl } from '../../lib/api';
 import { 
   Search, 
   CheckCircle, 
@@ -47,8 +47,6 @@ import {
   ExternalLink
 } from 'lucide-react';
 
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-
 const VerifikasiAkun = () => {
   const [passwordRequests, setPasswordRequests] = useState([]);
   const [fotoRequests, setFotoRequests] = useState([]);
@@ -160,11 +158,6 @@ const VerifikasiAkun = () => {
     );
   };
 
-  const getDocumentUrl = (path) => {
-    if (!path) return null;
-    return `${BACKEND_URL}${path}`;
-  };
-
   return (
     <div className="space-y-6" data-testid="verifikasi-akun-page">
       {/* Header */}
@@ -335,7 +328,7 @@ const VerifikasiAkun = () => {
                         <TableCell>{req.prodi_nama || '-'}</TableCell>
                         <TableCell>
                           <img 
-                            src={getDocumentUrl(req.foto_baru)} 
+                            src={getUploadUrl(req.foto_baru_varian?.thumb || req.foto_baru)} 
                             alt="Preview"
                             className="w-10 h-10 rounded-full object-cover"
                           />
@@ -403,7 +396,7 @@ const VerifikasiAkun = () => {
                     <div className="mt-2 w-24 h-24 mx-auto rounded-full bg-gray-100 overflow-hidden">
                       {selectedRequest.foto_lama ? (
                         <img 
-                          src={getDocumentUrl(selectedRequest.foto_lama)} 
+                          src={getUploadUrl(selectedRequest.foto_lama)} 
                           alt="Foto lama"
                           className="w-full h-full object-cover"
                         />
@@ -418,13 +411,13 @@ const VerifikasiAkun = () => {
                     <Label className="text-gray-500 text-sm">Foto Baru</Label>
                     <div className="mt-2 w-24 h-24 mx-auto rounded-full bg-gray-100 overflow-hidden border-2 border-blue-500">
                       <img 
-                        src={getDocumentUrl(selectedRequest.foto_baru)} 
+                        src={getUploadUrl(selectedRequest.foto_baru_varian?.preview || selectedRequest.foto_baru)} 
                         alt="Foto baru"
                         className="w-full h-full object-cover"
                       />
                     </div>
                     <a 
-                      href={getDocumentUrl(selectedRequest.foto_baru)} 
+                      href={getUploadUrl(selectedRequest.foto_baru)} 
                       target="_blank" 
                       rel="noopener noreferrer"
                       className="text-xs text-blue-600 hover:underline inline-flex items-center gap-1 mt-2"
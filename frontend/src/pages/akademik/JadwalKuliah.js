@@ -27,10 +27,11 @@ import {
   TableHeader,
   TableRow,
 } from '../../components/ui/table';
-import { Loader2, Calendar, Clock, MapPin, Plus, AlertTriangle, User } from 'lucide-react';
+import { Loader2, Calendar, Clock, MapPin, Plus, AlertTriangle, User, Trash2, CalendarPlus } from 'lucide-react';
 import { toast } from 'sonner';
 
 const HARI_LIST = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu'];
+const SESI_BARU = { hari: '', jam_mulai: '08:00', jam_selesai: '10:00', ruangan: '' };
 
 const JadwalKuliah = () => {
   const [jadwalList, setJadwalList] = useState([]);
@@ -43,6 +44,7 @@ const JadwalKuliah = () => {
   const [dialogOpen, setDialogOpen] = useState(false);
   const [saving, setSaving] = useState(false);
   const [conflicts, setConflicts] = useState([]);
+  const [ruanganTersedia, setRuanganTersedia] = useState([]);
   const [formData, setFormData] = useState({
     kode_kelas: '',
     mata_kuliah_id: '',
@@ -52,8 +54,13 @@ const JadwalKuliah = () => {
     jam_selesai: '10:00',
     ruangan: '',
     kuota: 40,
+    sesi_tambahan: [],
   });
   const [editId, setEditId] = useState(null);
+  const [presensiDialogOpen, setPresensiDialogOpen] = useState(false);
+  const [libur, setLibur] = useState('');
+  const [maksPertemuan, setMaksPertemuan] = useState(16);
+  const [generatingPresensi, setGeneratingPresensi] = useState(false);
 
   useEffect(() => {
     loadInitialData();
@@ -116,6 +123,24 @@ const JadwalKuliah = () => {
     }
   };
 
+  const loadRuanganTersedia = async () => {
+    if (!formData.hari || !formData.jam_mulai || !formData.jam_selesai) return;
+
+    try {
+      const response = await jadwalAPI.getRuanganTersedia({
+        hari: formData.hari,
+        jam_mulai: formData.jam_mulai,
+        jam_selesai: formData.jam_selesai,
+        tahun_akademik_id: selectedTA,
+        kuota: formData.kuota || 0,
+        exclude_kelas_id: editId || null,
+      });
+      setRuanganTersedia(response.data);
+    } catch (error) {
+      setRuanganTersedia([]);
+    }
+  };
+
   useEffect(() => {
     const timer = setTimeout(() => {
       if (dialogOpen) {
@@ -125,6 +150,36 @@ const JadwalKuliah = () => {
     return () => clearTimeout(timer);
   }, [formData.hari, formData.jam_mulai, formData.jam_selesai, formData.dosen_id, formData.ruangan]);
 
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      if (dialogOpen) {
+        loadRuanganTersedia();
+      }
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [dialogOpen, formData.hari, formData.jam_mulai, formData.jam_selesai, formData.kuota]);
+
+  const handleGeneratePresensi = async () => {
+    setGeneratingPresensi(true);
+    try {
+      const response = await jadwalAPI.generatePresensi({
+        tahun_akademik_id: selectedTA,
+        libur: libur.split(',').map((t) => t.trim()).filter(Boolean),
+        maks_pertemuan: parseInt(maksPertemuan) || 16,
+      });
+      const { dibuat, sudah_ada, tanpa_jadwal } = response.data;
+      toast.success(`${dibuat} pertemuan dibuat, ${sudah_ada} sudah ada`);
+      if (tanpa_jadwal.length > 0) {
+        toast.warning(`${tanpa_jadwal.length} kelas belum memiliki jadwal`);
+      }
+      setPresensiDialogOpen(false);
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Gagal membuat kalender presensi');
+    } finally {
+      setGeneratingPresensi(false);
+    }
+  };
+
   const openCreateDialog = () => {
     setFormData({
       kode_kelas: '',
@@ -135,9 +190,11 @@ const JadwalKuliah = () => {
       jam_selesai: '10:00',
       ruangan: '',
       kuota: 40,
+      sesi_tambahan: [],
     });
     setEditId(null);
     setConflicts([]);
+    setRuanganTersedia([]);
     setDialogOpen(true);
   };
 
@@ -151,9 +208,12 @@ const JadwalKuliah = () => {
       jam_selesai: item.jam_selesai,
       ruangan: item.ruangan || '',
       kuota: item.kuota,
+      // Sesi pertama dicerminkan ke field utama, sisanya diedit sebagai sesi tambahan
+      sesi_tambahan: (item.sesi || []).slice(1).map((s) => ({ ...s, ruangan: s.ruangan || '' })),
     });
     setEditId(item.id);
     setConflicts([]);
+    setRuanganTersedia([]);
     setDialogOpen(true);
   };
 
@@ -165,9 +225,14 @@ const JadwalKuliah = () => {
 
     setSaving(true);
     try {
+      const { sesi_tambahan, ...fields } = formData;
       const data = {
-        ...formData,
+        ...fields,
         tahun_akademik_id: selectedTA,
+        sesi: [
+          { hari: formData.hari, jam_mulai: formData.jam_mulai, jam_selesai: formData.jam_selesai, ruangan: formData.ruangan || null },
+          ...sesi_tambahan.map((s) => ({ ...s, ruangan: s.ruangan || formData.ruangan || null })),
+        ],
       };
 
       if (editId) {
@@ -192,9 +257,15 @@ const JadwalKuliah = () => {
     }
   };
 
-  // Group jadwal by hari
+  const updateSesi = (index, field, value) => {
+    const sesi = formData.sesi_tambahan.map((s, i) => (i === index ? { ...s, [field]: value } : s));
+    setFormData({ ...formData, sesi_tambahan: sesi });
+  };
+
+  // Group jadwal by hari, satu baris per sesi mingguan
+  const sesiRows = jadwalList.flatMap((j) => (j.sesi?.length ? j.sesi : [j]).map((s) => ({ ...j, ...s, kelas: j })));
   const groupedJadwal = HARI_LIST.reduce((acc, hari) => {
-    acc[hari] = jadwalList.filter(j => j.hari === hari).sort((a, b) => a.jam_mulai.localeCompare(b.jam_mulai));
+    acc[hari] = sesiRows.filter(j => j.hari === hari).sort((a, b) => a.jam_mulai.localeCompare(b.jam_mulai));
     return acc;
   }, {});
 
@@ -214,10 +285,16 @@ const JadwalKuliah = () => {
           <h2 className="text-lg font-semibold text-slate-800">Jadwal Kuliah</h2>
           <p className="text-sm text-slate-500">Kelola jadwal kuliah dengan deteksi konflik</p>
         </div>
-        <Button onClick={openCreateDialog} className="bg-[#1e1b4b] hover:bg-[#312e81]" data-testid="add-jadwal-btn">
-          <Plus className="w-4 h-4 mr-2" />
-          Tambah Jadwal
-        </Button>
+        <div className="flex gap-2">
+          <Button variant="outline" onClick={() => setPresensiDialogOpen(true)} disabled={!selectedTA} data-testid="generate-presensi-btn">
+            <CalendarPlus className="w-4 h-4 mr-2" />
+            Generate Presensi
+          </Button>
+          <Button onClick={openCreateDialog} className="bg-[#1e1b4b] hover:bg-[#312e81]" data-testid="add-jadwal-btn">
+            <Plus className="w-4 h-4 mr-2" />
+            Tambah Jadwal
+          </Button>
+        </div>
       </div>
 
       {/* Filters */}
@@ -268,9 +345,9 @@ const JadwalKuliah = () => {
               ) : (
                 groupedJadwal[hari].map((item) => (
                   <div
-                    key={item.id}
+                    key={`${item.id}-${item.jam_mulai}`}
                     className="p-3 bg-slate-50 rounded-lg hover:bg-slate-100 cursor-pointer transition-colors"
-                    onClick={() => openEditDialog(item)}
+                    onClick={() => openEditDialog(item.kelas)}
                   >
                     <div className="flex items-center justify-between mb-1">
                       <Badge variant="outline" className="font-mono text-xs">{item.kode_kelas}</Badge>
@@ -413,7 +490,61 @@ const JadwalKuliah = () => {
                 onChange={(e) => setFormData({ ...formData, ruangan: e.target.value })}
                 placeholder="Contoh: R.301"
               />
+              {ruanganTersedia.length > 0 && (
+                <div className="mt-2 flex flex-wrap items-center gap-1">
+                  <span className="text-xs text-slate-500 mr-1">Ruangan kosong:</span>
+                  {ruanganTersedia.map((r) => (
+                    <Badge
+                      key={r.id}
+                      variant={formData.ruangan === r.nama ? 'default' : 'outline'}
+                      className="cursor-pointer"
+                      onClick={() => setFormData({ ...formData, ruangan: r.nama })}
+                    >
+                      {r.nama} ({r.kapasitas})
+                    </Badge>
+                  ))}
+                </div>
+              )}
             </div>
+
+            {formData.sesi_tambahan.map((sesi, index) => (
+              <div key={index} className="grid grid-cols-4 gap-2 items-end">
+                <div>
+                  <Label>Sesi {index + 2}</Label>
+                  <Select value={sesi.hari} onValueChange={(v) => updateSesi(index, 'hari', v)}>
+                    <SelectTrigger>
+                      <SelectValue placeholder="Hari" />
+                    </SelectTrigger>
+                    <SelectContent>
+                      {HARI_LIST.map((h) => (
+                        <SelectItem key={h} value={h}>{h}</SelectItem>
+                      ))}
+                    </SelectContent>
+                  </Select>
+                </div>
+                <Input type="time" value={sesi.jam_mulai} onChange={(e) => updateSesi(index, 'jam_mulai', e.target.value)} />
+                <Input type="time" value={sesi.jam_selesai} onChange={(e) => updateSesi(index, 'jam_selesai', e.target.value)} />
+                <div className="flex gap-1">
+                  <Input value={sesi.ruangan} onChange={(e) => updateSesi(index, 'ruangan', e.target.value)} placeholder="Ruangan" />
+                  <Button
+                    variant="ghost"
+                    size="icon"
+                    className="text-red-500 hover:text-red-700"
+                    onClick={() => setFormData({ ...formData, sesi_tambahan: formData.sesi_tambahan.filter((_, i) => i !== index) })}
+                  >
+                    <Trash2 className="w-4 h-4" />
+                  </Button>
+                </div>
+              </div>
+            ))}
+            <Button
+              variant="outline"
+              size="sm"
+              onClick={() => setFormData({ ...formData, sesi_tambahan: [...formData.sesi_tambahan, { ...SESI_BARU }] })}
+            >
+              <Plus className="w-4 h-4 mr-2" />
+              Tambah Sesi
+            </Button>
           </div>
 
           <DialogFooter>
@@ -429,6 +560,49 @@ const JadwalKuliah = () => {
           </DialogFooter>
         </DialogContent>
       </Dialog>
+
+      {/* Generate Presensi Dialog */}
+      <Dialog open={presensiDialogOpen} onOpenChange={setPresensiDialogOpen}>
+        <DialogContent className="max-w-md">
+          <DialogHeader>
+            <DialogTitle>Generate Kalender Presensi</DialogTitle>
+          </DialogHeader>
+          <div className="space-y-4">
+            <p className="text-sm text-slate-500">
+              Pertemuan setiap kelas dibuat dari jadwal mingguan selama masa semester. Pertemuan yang sudah ada tidak diubah.
+            </p>
+            <div className="space-y-2">
+              <Label>Tanggal libur (pisahkan dengan koma)</Label>
+              <Input
+                value={libur}
+                onChange={(e) => setLibur(e.target.value)}
+                placeholder="Contoh: 2024-10-21, 2024-12-25"
+                data-testid="input-libur"
+              />
+            </div>
+            <div className="space-y-2">
+              <Label>Jumlah pertemuan per kelas</Label>
+              <Input
+                type="number"
+                min={1}
+                value={maksPertemuan}
+                onChange={(e) => setMaksPertemuan(e.target.value)}
+              />
+            </div>
+          </div>
+          <DialogFooter>
+            <Button variant="outline" onClick={() => setPresensiDialogOpen(false)}>Batal</Button>
+            <Button
+              onClick={handleGeneratePresensi}
+              disabled={generatingPresensi}
+              className="bg-[#1e1b4b] hover:bg-[#312e81]"
+            >
+              {generatingPresensi && <Loader2 className="w-4 h-4 mr-2 animate-spin" />}
+              Generate
+            </Button>
+          </DialogFooter>
+        </DialogContent>
+      </Dialog>
     </div>
   );
 };
@@ -0,0 +1,219 @@
+import React, { useEffect, useState } from 'react';
+import { ujianAPI, tahunAkademikAPI } from '../../lib/api';
+import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
+import { Button } from '../../components/ui/button';
+import { Badge } from '../../components/ui/badge';
+import { Input } from '../../components/ui/input';
+import { Label } from '../../components/ui/label';
+import {
+  Select,
+  SelectContent,
+  SelectItem,
+  SelectTrigger,
+  SelectValue,
+} from '../../components/ui/select';
+import {
+  Table,
+  TableBody,
+  TableCell,
+  TableHead,
+  TableHeader,
+  TableRow,
+} from '../../components/ui/table';
+import { Loader2, CalendarCheck, AlertTriangle, Wand2 } from 'lucide-react';
+import { toast } from 'sonner';
+
+const JENIS_LIST = ['UTS', 'UAS'];
+
+const JadwalUjian = () => {
+  const [tahunAkademikList, setTahunAkademikList] = useState([]);
+  const [selectedTA, setSelectedTA] = useState('');
+  const [jenis, setJenis] = useState('UTS');
+  const [jadwalList, setJadwalList] = useState([]);
+  const [unassigned, setUnassigned] = useState([]);
+  const [tanggal, setTanggal] = useState('');
+  const [loading, setLoading] = useState(true);
+  const [generating, setGenerating] = useState(false);
+
+  useEffect(() => {
+    loadTahunAkademik();
+  }, []);
+
+  useEffect(() => {
+    if (selectedTA) {
+      loadJadwal();
+    }
+  }, [selectedTA, jenis]);
+
+  const loadTahunAkademik = async () => {
+    try {
+      const response = await tahunAkademikAPI.getAll();
+      setTahunAkademikList(response.data);
+      const activeTA = response.data.find(ta => ta.is_active);
+      if (activeTA) setSelectedTA(activeTA.id);
+    } catch (error) {
+      toast.error('Gagal memuat data');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const loadJadwal = async () => {
+    try {
+      const response = await ujianAPI.getAll(selectedTA, jenis);
+      setJadwalList(response.data);
+      setUnassigned([]);
+    } catch (error) {
+      console.error('Failed to load jadwal ujian:', error);
+    }
+  };
+
+  const handleGenerate = async () => {
+    const daftarTanggal = tanggal.split(',').map((t) => t.trim()).filter(Boolean);
+    if (daftarTanggal.length === 0) {
+      toast.error('Isi tanggal ujian');
+      return;
+    }
+    if (jadwalList.length > 0 && !window.confirm(`Jadwal ${jenis} yang ada akan diganti. Lanjutkan?`)) return;
+
+    setGenerating(true);
+    try {
+      const response = await ujianAPI.generate({ tahun_akademik_id: selectedTA, jenis, tanggal: daftarTanggal });
+      setJadwalList(response.data.jadwal);
+      setUnassigned(response.data.unassigned);
+      toast.success(`${response.data.jadwal.length} dari ${response.data.total_ujian} ujian dijadwalkan`);
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Gagal membuat jadwal ujian');
+    } finally {
+      setGenerating(false);
+    }
+  };
+
+  if (loading) {
+    return (
+      <div className="flex items-center justify-center h-64">
+        <Loader2 className="w-8 h-8 animate-spin text-[#1e1b4b]" />
+      </div>
+    );
+  }
+
+  return (
+    <div className="space-y-6" data-testid="jadwal-ujian-page">
+      <div className="flex flex-col sm:flex-row sm:items-center sm:justify-between gap-4">
+        <div>
+          <h2 className="text-lg font-semibold text-slate-800">Jadwal Ujian</h2>
+          <p className="text-sm text-slate-500">Susun jadwal UTS/UAS tanpa bentrok dari KRS yang disetujui</p>
+        </div>
+        <div className="flex gap-2">
+          <Select value={jenis} onValueChange={setJenis}>
+            <SelectTrigger className="w-28">
+              <SelectValue />
+            </SelectTrigger>
+            <SelectContent>
+              {JENIS_LIST.map((j) => (
+                <SelectItem key={j} value={j}>{j}</SelectItem>
+              ))}
+            </SelectContent>
+          </Select>
+          <Select value={selectedTA} onValueChange={setSelectedTA}>
+            <SelectTrigger className="w-64">
+              <SelectValue placeholder="Pilih Tahun Akademik" />
+            </SelectTrigger>
+            <SelectContent>
+              {tahunAkademikList.map((ta) => (
+                <SelectItem key={ta.id} value={ta.id}>
+                  {ta.tahun} - {ta.semester} {ta.is_active && '(Aktif)'}
+                </SelectItem>
+              ))}
+            </SelectContent>
+          </Select>
+        </div>
+      </div>
+
+      <Card className="shadow-card">
+        <CardContent className="p-4">
+          <div className="flex flex-col sm:flex-row sm:items-end gap-3">
+            <div className="flex-1">
+              <Label>Tanggal ujian (pisahkan dengan koma)</Label>
+              <Input
+                value={tanggal}
+                onChange={(e) => setTanggal(e.target.value)}
+                placeholder="Contoh: 2024-10-21, 2024-10-22, 2024-10-23"
+                data-testid="input-tanggal-ujian"
+              />
+            </div>
+            <Button onClick={handleGenerate} disabled={generating || !selectedTA} className="bg-[#1e1b4b] hover:bg-[#312e81]" data-testid="generate-ujian-btn">
+              {generating ? <Loader2 className="w-4 h-4 mr-2 animate-spin" /> : <Wand2 className="w-4 h-4 mr-2" />}
+              Susun Jadwal {jenis}
+            </Button>
+          </div>
+          <p className="text-xs text-slate-500 mt-2">Tiga sesi per hari (08:00, 10:30, 13:30) memakai ruangan di master data.</p>
+        </CardContent>
+      </Card>
+
+      {unassigned.length > 0 && (
+        <div className="bg-amber-50 border border-amber-200 rounded-lg p-3">
+          <div className="flex items-center gap-2 text-amber-700 font-medium text-sm mb-2">
+            <AlertTriangle className="w-4 h-4" />
+            {unassigned.length} ujian belum mendapat slot
+          </div>
+          <ul className="text-sm text-amber-600 space-y-1">
+            {unassigned.map((u) => (
+              <li key={u.mata_kuliah_id}>• {u.mata_kuliah_nama || u.mata_kuliah_id} ({u.jumlah_peserta} peserta): {u.alasan}</li>
+            ))}
+          </ul>
+        </div>
+      )}
+
+      <Card className="shadow-card">
+        <CardHeader className="pb-3">
+          <CardTitle className="text-base">Jadwal {jenis}</CardTitle>
+        </CardHeader>
+        <CardContent className="p-0">
+          <Table>
+            <TableHeader>
+              <TableRow>
+                <TableHead>Tanggal</TableHead>
+                <TableHead>Jam</TableHead>
+                <TableHead>Mata Kuliah</TableHead>
+                <TableHead>Ruangan</TableHead>
+                <TableHead className="text-center">Peserta</TableHead>
+              </TableRow>
+            </TableHeader>
+            <TableBody>
+              {jadwalList.length === 0 ? (
+                <TableRow>
+                  <TableCell colSpan={5} className="text-center py-12 text-slate-500">
+                    <CalendarCheck className="w-12 h-12 mx-auto mb-3 text-slate-300" />
+                    <p>Belum ada jadwal {jenis}</p>
+                  </TableCell>
+                </TableRow>
+              ) : (
+                jadwalList.map((item) => (
+                  <TableRow key={item.id}>
+                    <TableCell>{item.tanggal}</TableCell>
+                    <TableCell className="text-slate-600">{item.jam_mulai}-{item.jam_selesai}</TableCell>
+                    <TableCell>
+                      <div className="font-medium text-slate-800">{item.mata_kuliah_nama}</div>
+                      <div className="text-xs text-slate-500 font-mono">{item.kode_mk}</div>
+                    </TableCell>
+                    <TableCell>
+                      <div className="flex flex-wrap gap-1">
+                        {item.ruangan.map((r) => (
+                          <Badge key={r.nama} variant="outline">{r.nama} ({r.jumlah})</Badge>
+                        ))}
+                      </div>
+                    </TableCell>
+                    <TableCell className="text-center">{item.jumlah_peserta}</TableCell>
+                  </TableRow>
+                ))
+              )}
+            </TableBody>
+          </Table>
+        </CardContent>
+      </Card>
+    </div>
+  );
+};
+
+export default JadwalUjian;
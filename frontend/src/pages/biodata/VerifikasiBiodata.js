@@ -28,7 +28,7 @@ import {
 } from '../../components/ui/table';
 import { Badge } from '../../components/ui/badge';
 import { toast } from 'sonner';
-import { biodataAdminAPI } from '../../lib/api';
+import { biodataAdminAPI, getUploadUrl } from '../../lib/api';
 import { 
   Search, 
   CheckCircle, 
@@ -42,8 +42,6 @@ import {
   ArrowRight
 } from 'lucide-react';
 
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-
 const VerifikasiBiodata = () => {
   const [requests, setRequests] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -138,11 +136,6 @@ const VerifikasiBiodata = () => {
     );
   });
 
-  const getDocumentUrl = (path) => {
-    if (!path) return null;
-    return `${BACKEND_URL}${path}`;
-  };
-
   return (
     <div className="space-y-6" data-testid="verifikasi-biodata-page">
       {/* Header */}
@@ -316,7 +309,7 @@ const VerifikasiBiodata = () => {
                       <CardContent className="p-4 text-center">
                         <div className="w-full h-32 bg-gray-100 rounded-lg mb-3 flex items-center justify-center overflow-hidden">
                           <img 
-                            src={getDocumentUrl(detailData.dokumen_ktp)} 
+                            src={getUploadUrl(detailData.dokumen_ktp_varian?.preview || detailData.dokumen_ktp)} 
                             alt="KTP"
                             className="max-w-full max-h-full object-contain"
                             onError={(e) => { e.target.style.display = 'none'; e.target.nextSibling.style.display = 'flex'; }}
@@ -327,7 +320,7 @@ const VerifikasiBiodata = () => {
                         </div>
                         <p className="text-sm font-medium">KTP</p>
                         <a 
-                          href={getDocumentUrl(detailData.dokumen_ktp)} 
+                          href={getUploadUrl(detailData.dokumen_ktp)} 
                           target="_blank" 
                           rel="noopener noreferrer"
                           className="text-xs text-blue-600 hover:underline flex items-center justify-center gap-1 mt-1"
@@ -342,7 +335,7 @@ const VerifikasiBiodata = () => {
                       <CardContent className="p-4 text-center">
                         <div className="w-full h-32 bg-gray-100 rounded-lg mb-3 flex items-center justify-center overflow-hidden">
                           <img 
-                            src={getDocumentUrl(detailData.dokumen_kk)} 
+                            src={getUploadUrl(detailData.dokumen_kk_varian?.preview || detailData.dokumen_kk)} 
                             alt="KK"
                             className="max-w-full max-h-full object-contain"
                             onError={(e) => { e.target.style.display = 'none'; e.target.nextSibling.style.display = 'flex'; }}
@@ -353,7 +346,7 @@ const VerifikasiBiodata = () => {
                         </div>
                         <p className="text-sm font-medium">Kartu Keluarga</p>
                         <a 
-                          href={getDocumentUrl(detailData.dokumen_kk)} 
+                          href={getUploadUrl(detailData.dokumen_kk)} 
                           target="_blank" 
                           rel="noopener noreferrer"
                           className="text-xs text-blue-600 hover:underline flex items-center justify-center gap-1 mt-1"
@@ -368,7 +361,7 @@ const VerifikasiBiodata = () => {
                       <CardContent className="p-4 text-center">
                         <div className="w-full h-32 bg-gray-100 rounded-lg mb-3 flex items-center justify-center overflow-hidden">
                           <img 
-                            src={getDocumentUrl(detailData.dokumen_akte)} 
+                            src={getUploadUrl(detailData.dokumen_akte_varian?.preview || detailData.dokumen_akte)} 
                             alt="Akte"
                             className="max-w-full max-h-full object-contain"
                             onError={(e) => { e.target.style.display = 'none'; e.target.nextSibling.style.display = 'flex'; }}
@@ -379,7 +372,7 @@ const VerifikasiBiodata = () => {
                         </div>
                         <p className="text-sm font-medium">Akte Kelahiran</p>
                         <a 
-                          href={getDocumentUrl(detailData.dokumen_akte)} 
+                          href={getUploadUrl(detailData.dokumen_akte)} 
                           target="_blank" 
                           rel="noopener noreferrer"
                           className="text-xs text-blue-600 hover:underline flex items-center justify-center gap-1 mt-1"
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { dosenAPI, tahunAkademikAPI } from '../../lib/api';
+import { dosenAPI, bootstrapAPI } from '../../lib/api';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { Button } from '../../components/ui/button';
 import { Badge } from '../../components/ui/badge';
@@ -44,7 +44,7 @@ const DaftarMahasiswa = () => {
 
   const loadTahunAkademik = async () => {
     try {
-      const response = await tahunAkademikAPI.getAll();
+      const response = await bootstrapAPI.getTahunAkademik();
       setTahunAkademikList(response.data);
       
       const activeTA = response.data.find(ta => ta.is_active);
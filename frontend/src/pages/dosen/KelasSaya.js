@@ -1,8 +1,16 @@
 import React, { useEffect, useState } from 'react';
-import { dosenAPI, tahunAkademikAPI } from '../../lib/api';
+import { dosenAPI, bootstrapAPI } from '../../lib/api';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { Button } from '../../components/ui/button';
 import { Badge } from '../../components/ui/badge';
+import { Input } from '../../components/ui/input';
+import { Label } from '../../components/ui/label';
+import {
+  Dialog,
+  DialogContent,
+  DialogHeader,
+  DialogTitle,
+} from '../../components/ui/dialog';
 import {
   Select,
   SelectContent,
@@ -18,14 +26,19 @@ import {
   TableHeader,
   TableRow,
 } from '../../components/ui/table';
-import { Loader2, BookOpen, Users, Clock, MapPin, Calendar } from 'lucide-react';
+import { Loader2, BookOpen, Users, Clock, MapPin, Calendar, CalendarSearch } from 'lucide-react';
 import { toast } from 'sonner';
+import KalenderFeedButton from '../../components/kalender/KalenderFeedButton';
 
 const KelasSaya = () => {
   const [kelasList, setKelasList] = useState([]);
   const [tahunAkademikList, setTahunAkademikList] = useState([]);
   const [selectedTA, setSelectedTA] = useState('');
   const [loading, setLoading] = useState(true);
+  const [slotKelas, setSlotKelas] = useState(null);
+  const [slotTanggal, setSlotTanggal] = useState(new Date().toISOString().slice(0, 10));
+  const [slotData, setSlotData] = useState(null);
+  const [loadingSlot, setLoadingSlot] = useState(false);
 
   useEffect(() => {
     loadTahunAkademik();
@@ -39,7 +52,7 @@ const KelasSaya = () => {
 
   const loadTahunAkademik = async () => {
     try {
-      const response = await tahunAkademikAPI.getAll();
+      const response = await bootstrapAPI.getTahunAkademik();
       setTahunAkademikList(response.data);
       
       const activeTA = response.data.find(ta => ta.is_active);
@@ -68,6 +81,25 @@ const KelasSaya = () => {
     }
   };
 
+  const loadSlotKosong = async (kelas, tanggal) => {
+    setLoadingSlot(true);
+    try {
+      const response = await dosenAPI.getSlotKosong(kelas.id, { tanggal });
+      setSlotData(response.data);
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Gagal mencari slot kosong');
+      setSlotData(null);
+    } finally {
+      setLoadingSlot(false);
+    }
+  };
+
+  const openSlotDialog = (kelas) => {
+    setSlotKelas(kelas);
+    setSlotData(null);
+    loadSlotKosong(kelas, slotTanggal);
+  };
+
   const selectedTAData = tahunAkademikList.find(ta => ta.id === selectedTA);
 
   if (loading && kelasList.length === 0) {
@@ -86,19 +118,22 @@ const KelasSaya = () => {
           <h2 className="text-lg font-semibold text-slate-800">Kelas Saya</h2>
           <p className="text-sm text-slate-500">Daftar kelas yang Anda ampu</p>
         </div>
-        <div className="w-64">
-          <Select value={selectedTA} onValueChange={setSelectedTA}>
-            <SelectTrigger data-testid="select-ta-kelas">
-              <SelectValue placeholder="Pilih Tahun Akademik" />
-            </SelectTrigger>
-            <SelectContent>
-              {tahunAkademikList.map((ta) => (
-                <SelectItem key={ta.id} value={ta.id}>
-                  {ta.tahun} - {ta.semester} {ta.is_active && '(Aktif)'}
-                </SelectItem>
-              ))}
-            </SelectContent>
-          </Select>
+        <div className="flex gap-2">
+          <KalenderFeedButton />
+          <div className="w-64">
+            <Select value={selectedTA} onValueChange={setSelectedTA}>
+              <SelectTrigger data-testid="select-ta-kelas">
+                <SelectValue placeholder="Pilih Tahun Akademik" />
+              </SelectTrigger>
+              <SelectContent>
+                {tahunAkademikList.map((ta) => (
+                  <SelectItem key={ta.id} value={ta.id}>
+                    {ta.tahun} - {ta.semester} {ta.is_active && '(Aktif)'}
+                  </SelectItem>
+                ))}
+              </SelectContent>
+            </Select>
+          </div>
         </div>
       </div>
 
@@ -189,12 +224,13 @@ const KelasSaya = () => {
                   <TableHead>Ruangan</TableHead>
                   <TableHead className="text-center">Peserta</TableHead>
                   <TableHead className="text-center">Kuota</TableHead>
+                  <TableHead className="text-right">Aksi</TableHead>
                 </TableRow>
               </TableHeader>
               <TableBody>
                 {kelasList.length === 0 ? (
                   <TableRow>
-                    <TableCell colSpan={6} className="text-center py-12 text-slate-500">
+                    <TableCell colSpan={7} className="text-center py-12 text-slate-500">
                       <BookOpen className="w-12 h-12 mx-auto mb-3 text-slate-300" />
                       <p>Tidak ada kelas yang diampu</p>
                     </TableCell>
@@ -230,6 +266,12 @@ const KelasSaya = () => {
                       <TableCell className="text-center">
                         <span className="text-slate-600">{kelas.kuota || 40}</span>
                       </TableCell>
+                      <TableCell className="text-right">
+                        <Button variant="outline" size="sm" onClick={() => openSlotDialog(kelas)} data-testid={`slot-kosong-${kelas.id}`}>
+                          <CalendarSearch className="w-4 h-4 mr-2" />
+                          Slot Pengganti
+                        </Button>
+                      </TableCell>
                     </TableRow>
                   ))
                 )}
@@ -238,6 +280,51 @@ const KelasSaya = () => {
           )}
         </CardContent>
       </Card>
+
+      {/* Slot kuliah pengganti */}
+      <Dialog open={!!slotKelas} onOpenChange={(open) => !open && setSlotKelas(null)}>
+        <DialogContent className="max-w-lg">
+          <DialogHeader>
+            <DialogTitle>Slot Pengganti {slotKelas?.kode_kelas}</DialogTitle>
+          </DialogHeader>
+          <div className="space-y-4">
+            <div className="flex items-end gap-2">
+              <div className="flex-1">
+                <Label>Minggu dari tanggal</Label>
+                <Input type="date" value={slotTanggal} onChange={(e) => setSlotTanggal(e.target.value)} />
+              </div>
+              <Button onClick={() => loadSlotKosong(slotKelas, slotTanggal)} disabled={loadingSlot} className="bg-[#1e1b4b] hover:bg-[#312e81]">
+                {loadingSlot && <Loader2 className="w-4 h-4 mr-2 animate-spin" />}
+                Cari
+              </Button>
+            </div>
+            {slotData && (
+              <p className="text-sm text-slate-500">
+                {slotData.total_slot} slot kosong untuk dosen, {slotData.jumlah_peserta} mahasiswa dan ruangan ({slotData.durasi_menit} menit)
+              </p>
+            )}
+            <div className="max-h-80 overflow-y-auto space-y-2">
+              {slotData?.slots.map((slot) => (
+                <div key={`${slot.tanggal}-${slot.jam_mulai}`} className="p-3 bg-slate-50 rounded-lg">
+                  <div className="flex items-center justify-between">
+                    <span className="font-medium text-sm text-slate-800">{slot.hari}, {slot.tanggal}</span>
+                    <span className="text-xs text-slate-500 flex items-center gap-1">
+                      <Clock className="w-3 h-3" />
+                      {slot.jam_mulai}-{slot.jam_selesai}
+                    </span>
+                  </div>
+                  <div className="mt-1 flex flex-wrap items-center gap-1 text-xs text-slate-500">
+                    <MapPin className="w-3 h-3" />
+                    {slot.ruangan.map((r) => (
+                      <Badge key={r} variant="outline">{r}</Badge>
+                    ))}
+                  </div>
+                </div>
+              ))}
+            </div>
+          </div>
+        </DialogContent>
+      </Dialog>
     </div>
   );
 };
@@ -0,0 +1,152 @@
+import React, { useEffect, useState } from 'react';
+import { dosenAPI, bootstrapAPI } from '../../lib/api';
+import { Card, CardContent } from '../../components/ui/card';
+import { Badge } from '../../components/ui/badge';
+import {
+  Select,
+  SelectContent,
+  SelectItem,
+  SelectTrigger,
+  SelectValue,
+} from '../../components/ui/select';
+import {
+  Table,
+  TableBody,
+  TableCell,
+  TableHead,
+  TableHeader,
+  TableRow,
+} from '../../components/ui/table';
+import { Loader2, CalendarCheck } from 'lucide-react';
+import { toast } from 'sonner';
+
+const UjianDosen = () => {
+  const [ujianList, setUjianList] = useState([]);
+  const [tahunAkademikList, setTahunAkademikList] = useState([]);
+  const [selectedTA, setSelectedTA] = useState('');
+  const [jenis, setJenis] = useState('UTS');
+  const [loading, setLoading] = useState(true);
+
+  useEffect(() => {
+    loadTahunAkademik();
+  }, []);
+
+  useEffect(() => {
+    if (selectedTA) {
+      loadUjian();
+    }
+  }, [selectedTA, jenis]);
+
+  const loadTahunAkademik = async () => {
+    try {
+      const response = await bootstrapAPI.getTahunAkademik();
+      setTahunAkademikList(response.data);
+      const activeTA = response.data.find(ta => ta.is_active);
+      if (activeTA) setSelectedTA(activeTA.id);
+    } catch (error) {
+      toast.error('Gagal memuat data');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const loadUjian = async () => {
+    setLoading(true);
+    try {
+      const response = await dosenAPI.getUjian(selectedTA, jenis);
+      setUjianList(response.data);
+    } catch (error) {
+      console.error('Failed to load ujian:', error);
+      setUjianList([]);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  return (
+    <div className="space-y-6" data-testid="ujian-dosen-page">
+      <div className="flex flex-col sm:flex-row sm:items-center sm:justify-between gap-4">
+        <div>
+          <h2 className="text-lg font-semibold text-slate-800">Jadwal Ujian</h2>
+          <p className="text-sm text-slate-500">Ujian mata kuliah yang Anda ampu</p>
+        </div>
+        <div className="flex gap-2">
+          <Select value={jenis} onValueChange={setJenis}>
+            <SelectTrigger className="w-28">
+              <SelectValue />
+            </SelectTrigger>
+            <SelectContent>
+              <SelectItem value="UTS">UTS</SelectItem>
+              <SelectItem value="UAS">UAS</SelectItem>
+            </SelectContent>
+          </Select>
+          <Select value={selectedTA} onValueChange={setSelectedTA}>
+            <SelectTrigger className="w-64">
+              <SelectValue placeholder="Pilih Tahun Akademik" />
+            </SelectTrigger>
+            <SelectContent>
+              {tahunAkademikList.map((ta) => (
+                <SelectItem key={ta.id} value={ta.id}>
+                  {ta.tahun} - {ta.semester} {ta.is_active && '(Aktif)'}
+                </SelectItem>
+              ))}
+            </SelectContent>
+          </Select>
+        </div>
+      </div>
+
+      <Card className="shadow-card">
+        <CardContent className="p-0">
+          {loading ? (
+            <div className="flex items-center justify-center h-32">
+              <Loader2 className="w-6 h-6 animate-spin text-[#1e1b4b]" />
+            </div>
+          ) : (
+            <Table>
+              <TableHeader>
+                <TableRow>
+                  <TableHead>Tanggal</TableHead>
+                  <TableHead>Jam</TableHead>
+                  <TableHead>Mata Kuliah</TableHead>
+                  <TableHead>Ruangan</TableHead>
+                  <TableHead className="text-center">Peserta</TableHead>
+                </TableRow>
+              </TableHeader>
+              <TableBody>
+                {ujianList.length === 0 ? (
+                  <TableRow>
+                    <TableCell colSpan={5} className="text-center py-12 text-slate-500">
+                      <CalendarCheck className="w-12 h-12 mx-auto mb-3 text-slate-300" />
+                      <p>Jadwal {jenis} belum tersedia</p>
+                    </TableCell>
+                  </TableRow>
+                ) : (
+                  ujianList.map((item) => (
+                    <TableRow key={item.id}>
+                      <TableCell>{item.tanggal}</TableCell>
+                      <TableCell className="text-slate-600">{item.jam_mulai}-{item.jam_selesai}</TableCell>
+                      <TableCell>
+                        <div className="font-medium text-slate-800">{item.mata_kuliah_nama}</div>
+                        <div className="text-xs text-slate-500 font-mono">{item.kode_mk}</div>
+                      </TableCell>
+                      <TableCell>
+                        <div className="flex flex-wrap gap-1">
+                          {item.ruangan.map((r) => (
+                            <Badge key={r.nama} variant="outline">{r.nama} ({r.jumlah})</Badge>
+                          ))}
+                        </div>
+                      </TableCell>
+                      <TableCell className="text-center">{item.jumlah_peserta}</TableCell>
+                    </TableRow>
+                  ))
+                )}
+              </TableBody>
+            </Table>
+          )}
+        </CardContent>
+      </Card>
+    </div>
+  );
+};
+
+export default UjianDosen;
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { mahasiswaJadwalAPI, tahunAkademikAPI } from '../../lib/api';
+import { mahasiswaJadwalAPI, bootstrapAPI } from '../../lib/api';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { Badge } from '../../components/ui/badge';
 import {
@@ -11,6 +11,7 @@ import {
 } from '../../components/ui/select';
 import { Loader2, Calendar, Clock, MapPin, User, BookOpen } from 'lucide-react';
 import { toast } from 'sonner';
+import KalenderFeedButton from '../../components/kalender/KalenderFeedButton';
 
 const HARI_ORDER = { Senin: 1, Selasa: 2, Rabu: 3, Kamis: 4, Jumat: 5, Sabtu: 6, Minggu: 7 };
 const HARI_COLORS = {
@@ -40,7 +41,7 @@ const JadwalMahasiswa = () => {
 
   const loadTahunAkademik = async () => {
     try {
-      const response = await tahunAkademikAPI.getAll();
+      const response = await bootstrapAPI.getTahunAkademik();
       setTahunAkademikList(response.data);
       const activeTA = response.data.find(ta => ta.is_active);
       if (activeTA) setSelectedTA(activeTA.id);
@@ -99,19 +100,22 @@ const JadwalMahasiswa = () => {
           <h2 className="text-lg font-semibold text-slate-800">Jadwal Kuliah Saya</h2>
           <p className="text-sm text-slate-500">Jadwal mata kuliah yang diambil semester ini</p>
         </div>
-        <div className="w-64">
-          <Select value={selectedTA} onValueChange={setSelectedTA}>
-            <SelectTrigger>
-              <SelectValue placeholder="Pilih Tahun Akademik" />
-            </SelectTrigger>
-            <SelectContent>
-              {tahunAkademikList.map((ta) => (
-                <SelectItem key={ta.id} value={ta.id}>
-                  {ta.tahun} - {ta.semester} {ta.is_active && '(Aktif)'}
-                </SelectItem>
-              ))}
-            </SelectContent>
-          </Select>
+        <div className="flex gap-2">
+          <KalenderFeedButton />
+          <div className="w-64">
+            <Select value={selectedTA} onValueChange={setSelectedTA}>
+              <SelectTrigger>
+                <SelectValue placeholder="Pilih Tahun Akademik" />
+              </SelectTrigger>
+              <SelectContent>
+                {tahunAkademikList.map((ta) => (
+                  <SelectItem key={ta.id} value={ta.id}>
+                    {ta.tahun} - {ta.semester} {ta.is_active && '(Aktif)'}
+                  </SelectItem>
+                ))}
+              </SelectContent>
+            </Select>
+          </div>
         </div>
       </div>
 
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { krsAPI, tahunAkademikAPI } from '../../lib/api';
+import { krsAPI, bootstrapAPI } from '../../lib/api';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { Badge } from '../../components/ui/badge';
 import { Button } from '../../components/ui/button';
@@ -42,7 +42,7 @@ const KHSPage = () => {
 
   const loadTahunAkademik = async () => {
     try {
-      const response = await tahunAkademikAPI.getAll();
+      const response = await bootstrapAPI.getTahunAkademik();
       setTahunAkademikList(response.data);
       
       const activeTA = response.data.find(ta => ta.is_active);
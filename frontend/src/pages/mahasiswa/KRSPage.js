@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { krsAPI, tahunAkademikAPI } from '../../lib/api';
+import { krsAPI, bootstrapAPI } from '../../lib/api';
 import { Button } from '../../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { Badge } from '../../components/ui/badge';
@@ -66,7 +66,7 @@ const KRSPage = () => {
       const profileRes = await krsAPI.getProfile();
       setMahasiswa(profileRes.data);
       
-      const taResponse = await tahunAkademikAPI.getAll();
+      const taResponse = await bootstrapAPI.getTahunAkademik();
       setTahunAkademikList(taResponse.data);
       
       const activeTA = taResponse.data.find(ta => ta.is_active);
@@ -113,7 +113,12 @@ const KRSPage = () => {
         await loadKRS(activeTahunAkademik.id);
       }
     } catch (error) {
-      toast.error(error.response?.data?.detail || 'Gagal mendaftar mata kuliah');
+      const detail = error.response?.data?.detail;
+      if (typeof detail === 'object' && detail.conflicts) {
+        toast.error(`${detail.message}: ${detail.conflicts.join(', ')}`);
+      } else {
+        toast.error(detail || 'Gagal mendaftar mata kuliah');
+      }
     } finally {
       setEnrolling(false);
     }
@@ -388,6 +393,12 @@ const KRSPage = () => {
                         <div className="flex items-center gap-2">
                           <h4 className="font-semibold text-slate-800">{kelas.mata_kuliah_nama}</h4>
                           <Badge variant="outline" className="text-xs">{kelas.kode_kelas}</Badge>
+                          {kelas.bentrok && (
+                            <Badge className="text-xs bg-rose-100 text-rose-700 flex items-center gap-1">
+                              <AlertCircle className="w-3 h-3" />
+                              Bentrok dengan {kelas.bentrok_dengan.join(', ')}
+                            </Badge>
+                          )}
                         </div>
                         <div className="mt-2 grid grid-cols-2 gap-2 text-sm text-slate-600">
                           <div className="flex items-center gap-1.5">
@@ -29,7 +29,7 @@ import {
 } from '../../components/ui/table';
 import { Badge } from '../../components/ui/badge';
 import { toast } from 'sonner';
-import { mahasiswaKeuanganAPI, tahunAkademikAPI } from '../../lib/api';
+import { mahasiswaKeuanganAPI, bootstrapAPI } from '../../lib/api';
 import { 
   CreditCard, 
   Receipt, 
@@ -71,7 +71,7 @@ const KeuanganPage = () => {
 
   const loadTahunAkademik = async () => {
     try {
-      const res = await tahunAkademikAPI.getAll();
+      const res = await bootstrapAPI.getTahunAkademik();
       setTahunAkademikList(res.data);
       const activeTA = res.data.find(ta => ta.is_active);
       if (activeTA) {
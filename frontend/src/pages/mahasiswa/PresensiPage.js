@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { mahasiswaJadwalAPI, tahunAkademikAPI } from '../../lib/api';
+import { mahasiswaJadwalAPI, bootstrapAPI } from '../../lib/api';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { Badge } from '../../components/ui/badge';
 import {
@@ -38,7 +38,7 @@ const PresensiMahasiswa = () => {
 
   const loadTahunAkademik = async () => {
     try {
-      const response = await tahunAkademikAPI.getAll();
+      const response = await bootstrapAPI.getTahunAkademik();
       setTahunAkademikList(response.data);
       const activeTA = response.data.find(ta => ta.is_active);
       if (activeTA) setSelectedTA(activeTA.id);
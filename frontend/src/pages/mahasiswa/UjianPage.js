@@ -0,0 +1,129 @@
+import React, { useEffect, useState } from 'react';
+import { mahasiswaJadwalAPI, bootstrapAPI } from '../../lib/api';
+import { Card, CardContent } from '../../components/ui/card';
+import { Badge } from '../../components/ui/badge';
+import {
+  Select,
+  SelectContent,
+  SelectItem,
+  SelectTrigger,
+  SelectValue,
+} from '../../components/ui/select';
+import { Loader2, CalendarCheck, Clock, MapPin } from 'lucide-react';
+import { toast } from 'sonner';
+
+const UjianPage = () => {
+  const [ujianList, setUjianList] = useState([]);
+  const [tahunAkademikList, setTahunAkademikList] = useState([]);
+  const [selectedTA, setSelectedTA] = useState('');
+  const [jenis, setJenis] = useState('UTS');
+  const [loading, setLoading] = useState(true);
+
+  useEffect(() => {
+    loadTahunAkademik();
+  }, []);
+
+  useEffect(() => {
+    if (selectedTA) {
+      loadUjian();
+    }
+  }, [selectedTA, jenis]);
+
+  const loadTahunAkademik = async () => {
+    try {
+      const response = await bootstrapAPI.getTahunAkademik();
+      setTahunAkademikList(response.data);
+      const activeTA = response.data.find(ta => ta.is_active);
+      if (activeTA) setSelectedTA(activeTA.id);
+    } catch (error) {
+      toast.error('Gagal memuat data');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const loadUjian = async () => {
+    setLoading(true);
+    try {
+      const response = await mahasiswaJadwalAPI.getMyUjian(selectedTA, jenis);
+      setUjianList(response.data);
+    } catch (error) {
+      console.error('Failed to load ujian:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  return (
+    <div className="space-y-6" data-testid="ujian-mahasiswa-page">
+      <div className="flex flex-col sm:flex-row sm:items-center sm:justify-between gap-4">
+        <div>
+          <h2 className="text-lg font-semibold text-slate-800">Jadwal Ujian Saya</h2>
+          <p className="text-sm text-slate-500">Tanggal, jam dan ruangan ujian mata kuliah yang diambil</p>
+        </div>
+        <div className="flex gap-2">
+          <Select value={jenis} onValueChange={setJenis}>
+            <SelectTrigger className="w-28">
+              <SelectValue />
+            </SelectTrigger>
+            <SelectContent>
+              <SelectItem value="UTS">UTS</SelectItem>
+              <SelectItem value="UAS">UAS</SelectItem>
+            </SelectContent>
+          </Select>
+          <Select value={selectedTA} onValueChange={setSelectedTA}>
+            <SelectTrigger className="w-64">
+              <SelectValue placeholder="Pilih Tahun Akademik" />
+            </SelectTrigger>
+            <SelectContent>
+              {tahunAkademikList.map((ta) => (
+                <SelectItem key={ta.id} value={ta.id}>
+                  {ta.tahun} - {ta.semester} {ta.is_active && '(Aktif)'}
+                </SelectItem>
+              ))}
+            </SelectContent>
+          </Select>
+        </div>
+      </div>
+
+      {loading ? (
+        <div className="flex items-center justify-center h-32">
+          <Loader2 className="w-6 h-6 animate-spin text-[#1e1b4b]" />
+        </div>
+      ) : ujianList.length === 0 ? (
+        <Card className="shadow-card">
+          <CardContent className="py-12 text-center text-slate-500">
+            <CalendarCheck className="w-12 h-12 mx-auto mb-3 text-slate-300" />
+            <p>Jadwal {jenis} belum tersedia</p>
+          </CardContent>
+        </Card>
+      ) : (
+        <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
+          {ujianList.map((item) => (
+            <Card key={item.mata_kuliah_id} className="shadow-card">
+              <CardContent className="p-4">
+                <div className="flex items-center justify-between mb-2">
+                  <Badge variant="outline" className="font-mono">{item.kode_mk}</Badge>
+                  <span className="text-sm font-medium text-slate-700">{item.tanggal}</span>
+                </div>
+                <p className="font-medium text-slate-800">{item.mata_kuliah_nama}</p>
+                <div className="flex items-center gap-4 mt-2 text-sm text-slate-500">
+                  <span className="flex items-center gap-1">
+                    <Clock className="w-4 h-4" />
+                    {item.jam_mulai}-{item.jam_selesai}
+                  </span>
+                  <span className="flex items-center gap-1">
+                    <MapPin className="w-4 h-4" />
+                    {item.ruangan || '-'}
+                  </span>
+                </div>
+              </CardContent>
+            </Card>
+          ))}
+        </div>
+      )}
+    </div>
+  );
+};
+
+export default UjianPage;
@@ -0,0 +1,224 @@
+import React, { useEffect, useState } from 'react';
+import { ruanganAPI } from '../../lib/api';
+import { Button } from '../../components/ui/button';
+import { Input } from '../../components/ui/input';
+import { Label } from '../../components/ui/label';
+import { Badge } from '../../components/ui/badge';
+import { Card, CardContent } from '../../components/ui/card';
+import {
+  Dialog,
+  DialogContent,
+  DialogHeader,
+  DialogTitle,
+  DialogFooter,
+} from '../../components/ui/dialog';
+import {
+  Table,
+  TableBody,
+  TableCell,
+  TableHead,
+  TableHeader,
+  TableRow,
+} from '../../components/ui/table';
+import { Plus, Pencil, Trash2, Loader2, DoorOpen } from 'lucide-react';
+import { toast } from 'sonner';
+
+const Ruangan = () => {
+  const [data, setData] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [dialogOpen, setDialogOpen] = useState(false);
+  const [editingItem, setEditingItem] = useState(null);
+  const [saving, setSaving] = useState(false);
+
+  const [form, setForm] = useState({
+    nama: '',
+    gedung: '',
+    kapasitas: 40,
+    fasilitas: '',
+  });
+
+  useEffect(() => {
+    loadData();
+  }, []);
+
+  const loadData = async () => {
+    try {
+      const response = await ruanganAPI.getAll();
+      setData(response.data);
+    } catch (error) {
+      toast.error('Gagal memuat data');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const openDialog = (item = null) => {
+    if (item) {
+      setEditingItem(item);
+      setForm({
+        nama: item.nama,
+        gedung: item.gedung || '',
+        kapasitas: item.kapasitas,
+        fasilitas: item.fasilitas.join(', '),
+      });
+    } else {
+      setEditingItem(null);
+      setForm({ nama: '', gedung: '', kapasitas: 40, fasilitas: '' });
+    }
+    setDialogOpen(true);
+  };
+
+  const handleSubmit = async (e) => {
+    e.preventDefault();
+    setSaving(true);
+
+    const payload = {
+      nama: form.nama,
+      gedung: form.gedung || null,
+      kapasitas: parseInt(form.kapasitas, 10),
+      fasilitas: form.fasilitas.split(',').map((f) => f.trim()).filter(Boolean),
+    };
+
+    try {
+      if (editingItem) {
+        await ruanganAPI.update(editingItem.id, payload);
+        toast.success('Data berhasil diperbarui');
+      } else {
+        await ruanganAPI.create(payload);
+        toast.success('Data berhasil ditambahkan');
+      }
+      setDialogOpen(false);
+      loadData();
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Gagal menyimpan data');
+    } finally {
+      setSaving(false);
+    }
+  };
+
+  const handleDelete = async (item) => {
+    if (!window.confirm(`Hapus ruangan ${item.nama}?`)) return;
+
+    try {
+      await ruanganAPI.delete(item.id);
+      toast.success('Data berhasil dihapus');
+      loadData();
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Gagal menghapus data');
+    }
+  };
+
+  if (loading) {
+    return (
+      <div className="flex items-center justify-center h-64">
+        <Loader2 className="w-8 h-8 animate-spin text-[#1e1b4b]" />
+      </div>
+    );
+  }
+
+  return (
+    <div className="space-y-6" data-testid="ruangan-page">
+      <div className="flex items-center justify-between">
+        <div>
+          <h2 className="text-lg font-semibold text-slate-800">Ruangan</h2>
+          <p className="text-sm text-slate-500">Kelola data ruangan, kapasitas dan fasilitas</p>
+        </div>
+        <Button onClick={() => openDialog()} className="bg-[#1e1b4b] hover:bg-[#312e81]" data-testid="add-ruangan-btn">
+          <Plus className="w-4 h-4 mr-2" />
+          Tambah
+        </Button>
+      </div>
+
+      <Card className="shadow-card">
+        <CardContent className="p-0">
+          <Table>
+            <TableHeader>
+              <TableRow>
+                <TableHead>Nama</TableHead>
+                <TableHead>Gedung</TableHead>
+                <TableHead>Kapasitas</TableHead>
+                <TableHead>Fasilitas</TableHead>
+                <TableHead className="text-right">Aksi</TableHead>
+              </TableRow>
+            </TableHeader>
+            <TableBody>
+              {data.length === 0 ? (
+                <TableRow>
+                  <TableCell colSpan={5} className="text-center py-8 text-slate-500">
+                    <DoorOpen className="w-12 h-12 mx-auto mb-3 text-slate-300" />
+                    <p>Belum ada data ruangan</p>
+                    <Button variant="link" onClick={() => openDialog()} className="mt-2">
+                      Tambahkan sekarang
+                    </Button>
+                  </TableCell>
+                </TableRow>
+              ) : (
+                data.map((item, index) => (
+                  <TableRow key={item.id} className="animate-fadeIn" style={{ animationDelay: `${index * 50}ms` }}>
+                    <TableCell className="font-mono text-sm">{item.nama}</TableCell>
+                    <TableCell className="text-slate-600">{item.gedung || '-'}</TableCell>
+                    <TableCell>{item.kapasitas}</TableCell>
+                    <TableCell>
+                      <div className="flex flex-wrap gap-1">
+                        {item.fasilitas.length === 0 ? '-' : item.fasilitas.map((f) => (
+                          <Badge key={f} variant="outline">{f}</Badge>
+                        ))}
+                      </div>
+                    </TableCell>
+                    <TableCell className="text-right">
+                      <div className="flex items-center justify-end gap-2">
+                        <Button variant="ghost" size="icon" onClick={() => openDialog(item)} data-testid={`edit-ruangan-${item.id}`}>
+                          <Pencil className="w-4 h-4" />
+                        </Button>
+                        <Button variant="ghost" size="icon" onClick={() => handleDelete(item)} className="text-red-500 hover:text-red-700" data-testid={`delete-ruangan-${item.id}`}>
+                          <Trash2 className="w-4 h-4" />
+                        </Button>
+                      </div>
+                    </TableCell>
+                  </TableRow>
+                ))
+              )}
+            </TableBody>
+          </Table>
+        </CardContent>
+      </Card>
+
+      <Dialog open={dialogOpen} onOpenChange={setDialogOpen}>
+        <DialogContent className="sm:max-w-md">
+          <DialogHeader>
+            <DialogTitle>{editingItem ? 'Edit Ruangan' : 'Tambah Ruangan'}</DialogTitle>
+          </DialogHeader>
+          <form onSubmit={handleSubmit} className="space-y-4">
+            <div className="space-y-2">
+              <Label htmlFor="nama">Nama Ruangan</Label>
+              <Input id="nama" placeholder="Contoh: R.301" value={form.nama} onChange={(e) => setForm({ ...form, nama: e.target.value })} required data-testid="input-nama-ruangan" />
+            </div>
+            <div className="grid grid-cols-2 gap-4">
+              <div className="space-y-2">
+                <Label htmlFor="gedung">Gedung (opsional)</Label>
+                <Input id="gedung" placeholder="Contoh: Gedung A" value={form.gedung} onChange={(e) => setForm({ ...form, gedung: e.target.value })} data-testid="input-gedung" />
+              </div>
+              <div className="space-y-2">
+                <Label htmlFor="kapasitas">Kapasitas</Label>
+                <Input id="kapasitas" type="number" min={1} value={form.kapasitas} onChange={(e) => setForm({ ...form, kapasitas: e.target.value })} required data-testid="input-kapasitas" />
+              </div>
+            </div>
+            <div className="space-y-2">
+              <Label htmlFor="fasilitas">Fasilitas (pisahkan dengan koma)</Label>
+              <Input id="fasilitas" placeholder="Contoh: proyektor, AC" value={form.fasilitas} onChange={(e) => setForm({ ...form, fasilitas: e.target.value })} data-testid="input-fasilitas" />
+            </div>
+            <DialogFooter>
+              <Button type="button" variant="outline" onClick={() => setDialogOpen(false)}>Batal</Button>
+              <Button type="submit" disabled={saving} className="bg-[#1e1b4b] hover:bg-[#312e81]" data-testid="submit-ruangan">
+                {saving ? <Loader2 className="w-4 h-4 animate-spin mr-2" /> : null}
+                {editingItem ? 'Simpan' : 'Tambah'}
+              </Button>
+            </DialogFooter>
+          </form>
+        </DialogContent>
+      </Dialog>
+    </div>
+  );
+};
+
+export default Ruangan;
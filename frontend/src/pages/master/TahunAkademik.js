@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { tahunAkademikAPI } from '../../lib/api';
+import { tahunAkademikAPI, bootstrapAPI } from '../../lib/api';
 import { Button } from '../../components/ui/button';
 import { Input } from '../../components/ui/input';
 import { Label } from '../../components/ui/label';
@@ -51,6 +51,8 @@ const TahunAkademik = () => {
   }, []);
 
   const loadData = async () => {
+    // Daftar TA di halaman lain diambil dari bootstrap; muat ulang setelah perubahan
+    bootstrapAPI.clear();
     try {
       const response = await tahunAkademikAPI.getAll();
       setData(response.data);